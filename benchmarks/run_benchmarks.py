@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""Scan and deletion benchmarks against synthetic trees, with recorded baselines.
+
+Examples:
+    python -m benchmarks.run_benchmarks --scale 10k
+    python -m benchmarks.run_benchmarks --scale 100k --record
+    python -m benchmarks.run_benchmarks --scale 10k --check   # exit 1 on regression
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+
+# Allow running as a plain script from the repo root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.tree_generator import SCALES, TreeSpec, generate_tree
+from core.analyzer import DirectoryAnalyzer
+from core.chat_interface import CleanupAssistant
+from core.search_index import FilenameIndex
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BASELINE_FILE = Path(__file__).parent / "baselines.json"
+DEFAULT_THRESHOLD = 1.25  # 25% slower than baseline counts as a regression
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Silence prints and progress bars from interactive code paths."""
+    with open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        yield
+
+
+def _assistant_at(root: Path) -> CleanupAssistant:
+    assistant = CleanupAssistant()
+    assistant.current_path = root
+    return assistant
+
+
+# Each setup function prepares state and returns the callable that gets timed.
+
+def _setup_analyze_directories(root: Path) -> Callable:
+    analyzer = DirectoryAnalyzer(str(root), strategy=None)
+    return analyzer.analyze_directories
+
+
+def _setup_find_empty_items(root: Path) -> Callable:
+    return _assistant_at(root)._find_empty_items
+
+
+def _setup_analyze_directory(root: Path) -> Callable:
+    assistant = _assistant_at(root)
+    return lambda: assistant.analyze_directory(root)
+
+
+def _setup_search_files(root: Path) -> Callable:
+    assistant = _assistant_at(root)
+    return lambda: assistant.search_files("file_1_")
+
+
+def _setup_search_index_query(root: Path) -> Callable:
+    # Lookup cost alone, against an index that is already built
+    index = FilenameIndex.build(root)
+    return lambda: list(index.search("file_1_"))
+
+
+def _setup_delete_empty_items(root: Path) -> Callable:
+    assistant = _assistant_at(root)
+    with _quiet():
+        items = assistant._find_empty_items()
+
+    def run():
+        # Choose "delete permanently" and confirm
+        with patch("builtins.input", side_effect=["2", "yes"]):
+            return assistant._delete_empty_items(items)
+    return run
+
+
+def _setup_move_to_cleanup_dir(root: Path) -> Callable:
+    assistant = _assistant_at(root)
+    with _quiet():
+        items = assistant._find_empty_items()
+    cleanup_dir = root / "_bench_cleanup"
+    cleanup_dir.mkdir()
+    return lambda: assistant._move_to_cleanup_dir(items, cleanup_dir)
+
+
+def _setup_batch_startup(root: Path) -> Callable:
+    # A fresh interpreter running a headless command on an empty root: pure startup cost
+    probe = root.parent / "startup_probe"
+    probe.mkdir(exist_ok=True)
+    command = [sys.executable, str(REPO_ROOT / "main.py"), "scan", str(probe)]
+    return lambda: subprocess.run(command, cwd=root.parent, stdout=subprocess.DEVNULL, check=True)
+
+
+class Benchmark:
+    """A named benchmark; destructive ones get a fresh tree for every run.
+
+    walks says whether the timed call visits every entry of the tree, which
+    is what makes entries_per_s a meaningful rate for it.
+    """
+
+    def __init__(self, name: str, setup: Callable[[Path], Callable], destructive: bool = False,
+                 walks: bool = True):
+        self.name = name
+        self.setup = setup
+        self.destructive = destructive
+        self.walks = walks
+
+
+BENCHMARKS: List[Benchmark] = [
+    Benchmark("analyze_directories", _setup_analyze_directories),
+    Benchmark("find_empty_items", _setup_find_empty_items),
+    Benchmark("analyze_directory", _setup_analyze_directory),
+    Benchmark("search_files", _setup_search_files),
+    # These act on a prebuilt index, the empty items found during setup, or an empty root
+    Benchmark("search_index_query", _setup_search_index_query, walks=False),
+    Benchmark("delete_empty_items", _setup_delete_empty_items, destructive=True, walks=False),
+    Benchmark("move_to_cleanup_dir", _setup_move_to_cleanup_dir, destructive=True, walks=False),
+    Benchmark("batch_startup", _setup_batch_startup, walks=False),
+]
+
+
+def _time_once(func: Callable) -> float:
+    with _quiet():
+        start = time.perf_counter_ns()
+        func()
+        return (time.perf_counter_ns() - start) / 1e9
+
+
+def run_benchmarks(spec: TreeSpec, workdir: Path, repeat: int = 3,
+                   names: Optional[List[str]] = None, scale: str = "custom") -> Dict:
+    """Run the selected benchmarks and return a machine-readable result dict."""
+    workdir = Path(workdir)
+    selected = [b for b in BENCHMARKS if not names or b.name in names]
+    shared_root = workdir / "shared"
+    tree = generate_tree(shared_root, spec)
+
+    results = {}
+    for bench in selected:
+        runs = []
+        for run in range(repeat):
+            if bench.destructive:
+                root = workdir / f"{bench.name}_{run}"
+                generate_tree(root, spec)
+            else:
+                root = shared_root
+            with _quiet():
+                func = bench.setup(root)
+            runs.append(_time_once(func))
+            if bench.destructive:
+                shutil.rmtree(root, ignore_errors=True)
+
+        median = statistics.median(runs)
+        results[bench.name] = {
+            "runs_s": [round(r, 6) for r in runs],
+            "median_s": round(median, 6),
+            "min_s": round(min(runs), 6),
+        }
+        if bench.walks:
+            results[bench.name]["entries_per_s"] = round(tree.entries / median) if median else None
+        logger.info(f"{bench.name}: median {median:.3f}s over {repeat} runs")
+
+    return {
+        "scale": scale,
+        "entries": tree.entries,
+        "spec": spec.__dict__,
+        "timestamp": datetime.now().isoformat(),
+        "host": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "benchmarks": results,
+    }
+
+
+def load_baselines(path: Path = BASELINE_FILE) -> Dict:
+    """Load the baseline file, or an empty structure if it does not exist."""
+    if path.exists():
+        with path.open() as f:
+            return json.load(f)
+    return {"thresholds": {"default": DEFAULT_THRESHOLD}, "scales": {}}
+
+
+def record_baseline(result: Dict, path: Path = BASELINE_FILE) -> None:
+    """Store result as the baseline for its scale."""
+    baselines = load_baselines(path)
+    baselines.setdefault("scales", {})[result["scale"]] = result
+    with path.open("w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def find_regressions(result: Dict, baselines: Dict) -> List[str]:
+    """Compare median timings with the baseline for the same scale."""
+    baseline = baselines.get("scales", {}).get(result["scale"])
+    if not baseline:
+        return []
+
+    thresholds = baselines.get("thresholds", {})
+    regressions = []
+    for name, current in result["benchmarks"].items():
+        previous = baseline["benchmarks"].get(name)
+        if not previous or not previous["median_s"]:
+            continue
+        limit = thresholds.get(name, thresholds.get("default", DEFAULT_THRESHOLD))
+        ratio = current["median_s"] / previous["median_s"]
+        if ratio > limit:
+            regressions.append(
+                f"{name}: {current['median_s']:.3f}s vs baseline {previous['median_s']:.3f}s "
+                f"({ratio:.2f}x > {limit:.2f}x)"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="10k")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="*", help="Benchmark names to run")
+    parser.add_argument("--workdir", help="Where to generate trees (default: a temp dir)")
+    parser.add_argument("--baseline", default=str(BASELINE_FILE))
+    parser.add_argument("--record", action="store_true", help="Store results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if slower than the baseline")
+    parser.add_argument("--output", help="Also write results JSON to this file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    baseline_path = Path(args.baseline)
+
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        # Persisted search indexes and the journal belong to the temporary trees, not the checkout
+        os.environ["CLEANUP_INDEX_DIR"] = str(Path(workdir) / "search_index")
+        os.environ["CLEANUP_JOURNAL"] = str(Path(workdir) / "journal" / "operations.jsonl")
+        result = run_benchmarks(SCALES[args.scale], Path(workdir), args.repeat, args.only, args.scale)
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2) + "\n")
+
+    if args.check:
+        regressions = find_regressions(result, load_baselines(baseline_path))
+        for line in regressions:
+            logger.error(f"Regression: {line}")
+        if regressions:
+            return 1
+
+    if args.record:
+        record_baseline(result, baseline_path)
+        logger.info(f"Baseline for {args.scale} written to {baseline_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
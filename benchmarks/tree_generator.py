@@ -0,0 +1,123 @@
+"""Deterministic synthetic filesystem trees for benchmarks."""
+
+import logging
+import math
+import os
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Tuple
+
+from core.constants import SKIP_DIRS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TreeSpec:
+    """Shape of a synthetic tree.
+
+    size_distribution is one of:
+      ("fixed", n), ("uniform", lo, hi) or ("lognormal", mu, sigma)
+    File contents are sparse (truncate), so large sizes cost no disk space.
+    """
+    depth: int = 3
+    fanout: int = 10
+    files_per_dir: int = 8
+    empty_ratio: float = 0.1
+    size_distribution: Tuple = ("lognormal", 8.0, 2.0)
+    skip_dir_density: float = 0.02
+    seed: int = 42
+
+    def estimated_entries(self) -> int:
+        """Approximate number of files plus directories the spec produces."""
+        # Empty leaf directories stop descending, so branches thin out by empty_ratio
+        branching = self.fanout * (1 - self.empty_ratio)
+        populated = sum(branching ** level for level in range(self.depth + 1))
+        dirs = self.fanout * sum(branching ** level for level in range(self.depth))
+        return round(dirs + populated * self.files_per_dir)
+
+
+# Named scales used by the benchmark runner
+SCALES: Dict[str, TreeSpec] = {
+    "tiny": TreeSpec(depth=2, fanout=4, files_per_dir=3),
+    "10k": TreeSpec(depth=3, fanout=11, files_per_dir=8),
+    "100k": TreeSpec(depth=4, fanout=11, files_per_dir=8),
+    "1m": TreeSpec(depth=5, fanout=11, files_per_dir=8),
+}
+
+
+@dataclass
+class GeneratedTree:
+    """Summary of what generate_tree actually created."""
+    root: Path
+    files: int = 0
+    dirs: int = 0
+    empty_files: int = 0
+    empty_dirs: int = 0
+    skip_dirs: int = 0
+    total_bytes: int = 0
+    entries: int = field(init=False, default=0)
+
+    def __post_init__(self):
+        self.entries = self.files + self.dirs
+
+
+def _sample_size(rng: random.Random, distribution: Tuple) -> int:
+    kind = distribution[0]
+    if kind == "fixed":
+        return int(distribution[1])
+    if kind == "uniform":
+        return rng.randint(int(distribution[1]), int(distribution[2]))
+    if kind == "lognormal":
+        return max(1, int(math.exp(rng.gauss(distribution[1], distribution[2]))))
+    raise ValueError(f"Unknown size distribution: {kind}")
+
+
+def generate_tree(root: Path, spec: TreeSpec) -> GeneratedTree:
+    """Create the tree described by spec under root (same seed, same tree)."""
+    rng = random.Random(spec.seed)
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    skip_names = sorted(SKIP_DIRS)
+    counts = {"files": 0, "dirs": 0, "empty_files": 0, "empty_dirs": 0, "skip_dirs": 0, "total_bytes": 0}
+
+    # Iterative DFS keeps deep trees off the Python call stack
+    stack = [(root, 0)]
+    while stack:
+        directory, level = stack.pop()
+        for i in range(spec.files_per_dir):
+            path = os.path.join(directory, f"file_{level}_{i}.dat")
+            size = 0 if rng.random() < spec.empty_ratio else _sample_size(rng, spec.size_distribution)
+            with open(path, "wb") as f:
+                if size:
+                    f.truncate(size)
+            counts["files"] += 1
+            counts["total_bytes"] += size
+            if size == 0:
+                counts["empty_files"] += 1
+
+        if level >= spec.depth:
+            continue
+
+        for i in range(spec.fanout):
+            if rng.random() < spec.skip_dir_density:
+                name = f"{skip_names[rng.randrange(len(skip_names))]}"
+                if os.path.exists(os.path.join(directory, name)):
+                    name = f"dir_{level}_{i}"
+                else:
+                    counts["skip_dirs"] += 1
+            else:
+                name = f"dir_{level}_{i}"
+            child = Path(directory) / name
+            child.mkdir(exist_ok=True)
+            counts["dirs"] += 1
+            if rng.random() < spec.empty_ratio:
+                # Leave this branch as an empty leaf directory
+                counts["empty_dirs"] += 1
+                continue
+            stack.append((child, level + 1))
+
+    tree = GeneratedTree(root=root, **counts)
+    logger.info(f"Generated {tree.entries:,} entries under {root}")
+    return tree
@@ -9,6 +9,8 @@ from colorama import init, Fore, Style
 import json
 import time
 
+from utils.external_sort import SortedSpillStore
+
 # Initialize colorama for cross-platform colored output
 init()
 start_dir = input("Enter the starting directory: ")
@@ -49,8 +51,8 @@ class DirectoryAnalyzer:
         logging.info(f"Initialized DirectoryAnalyzer with start_dir: {self.start_dir}")
         logging.info(f"Target directory for empty dirs: {self.target_dir}")
 
-    def count_and_create_directories(self):
-        """First phase: Count and create all directories"""
+    def count_and_create_directories(self, paths: SortedSpillStore):
+        """First phase: Count and create all directories, adding each one to paths"""
         print("\nPhase 1: Creating Directory Structure...")
         
         try:
@@ -71,6 +73,7 @@ class DirectoryAnalyzer:
                 for dir_name in dirs:
                     self.dirs_processed += 1
                     source_path = os.path.join(root, dir_name)
+                    paths.add(source_path)
                     target_path = os.path.join(
                         self.target_dir, 
                         os.path.relpath(source_path, self.start_dir)
@@ -99,16 +102,17 @@ class DirectoryAnalyzer:
             print(f"\rCreating Directories: {self.dirs_processed:,} / {self.total_dirs:,} ({percent_complete:.1f}%)", end="")
             self.last_status_time = current_time
 
-    def analyze_directories(self):
-        """Main method that coordinates the two phases"""
+    def analyze_directories(self, paths: SortedSpillStore):
+        """Main method that coordinates the two phases; found paths go straight into paths"""
         try:
             # Phase 1: Create directory structure
-            if not self.count_and_create_directories():
+            if not self.count_and_create_directories(paths):
                 return None, None
 
             # Phase 2: Process files (existing code)
             print("\nPhase 2: Processing Files...")
             # ... rest of your existing analyze_directories code ...
+            return paths, {'total_dirs': self.total_dirs, 'dirs_processed': self.dirs_processed}
             
         except Exception as e:
             logging.error(f"Error during directory analysis: {e}")
@@ -178,15 +182,17 @@ def main():
         print(f"{'='*80}\n")
         
         analyzer = DirectoryAnalyzer()
-        all_files, dir_stats = analyzer.analyze_directories()
-        
-        if all_files is None:  # Early exit if directory creation failed
-            return
+        # Paths are added during the walk and sorted on disk rather than in memory
+        with SortedSpillStore() as paths:
+            all_files, dir_stats = analyzer.analyze_directories(paths)
             
-        # Write results to files
-        with open('all_dirs.txt', 'w', encoding='utf-8') as f:
-            for item in sorted(all_files):
-                f.write(f"{item}\n")
+            if all_files is None:  # Early exit if directory creation failed
+                return
+                
+            # Write results to files
+            with open('all_dirs.txt', 'w', encoding='utf-8') as f:
+                for item in all_files:
+                    f.write(f"{item}\n")
         
         # Save detailed statistics to JSON
         with open('directory_stats.json', 'w', encoding='utf-8') as f:
@@ -1,78 +1,198 @@
 """Directory analysis functionality."""
 
+import asyncio
 import logging
+import os
+import threading
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional, Sequence, Union
 from datetime import datetime
 
 from core.constants import SKIP_DIRS
-from strategies.base import DirectoryStrategy
+from core.scanner import ParallelScanner, ScanVisitor
+from strategies.base import BaseStrategy, BatchResult, DirectoryStrategy
+from strategies.pipeline import PipelineResult, Stage, StrategyPipeline, iterate_in_thread
 from utils.progress import ProgressTracker
+from utils.tracing import tracer
+
+class _EmptyDirectoryVisitor(ScanVisitor):
+    """Counts directories and collects the empty ones, optionally passing each on as found."""
+    
+    def __init__(self, on_empty: Optional[Callable[[str], None]] = None):
+        self.lock = threading.Lock()
+        self.total_directories = 0
+        self.empty_dirs: List[str] = []
+        self.errors = 0
+        self.on_empty = on_empty
+    
+    def visit_directory(self, path: str, entries: List[os.DirEntry], is_root: bool) -> None:
+        if is_root:
+            return
+        with self.lock:
+            self.total_directories += 1
+            if not entries:
+                self.empty_dirs.append(path)
+        if not entries and self.on_empty is not None:
+            self.on_empty(path)
+    
+    def on_error(self, path: str, error: OSError) -> None:
+        with self.lock:
+            self.errors += 1
 
 class DirectoryAnalyzer:
     """Analyzes and processes directories."""
     
     def __init__(
         self,
-        start_dir: str,
-        strategy: DirectoryStrategy,
+        start_dir: Union[str, Sequence[str]],
+        strategy: BaseStrategy,
         progress_tracker: Optional[ProgressTracker] = None,
-        skip_dirs: set = SKIP_DIRS
+        skip_dirs: set = SKIP_DIRS,
+        device_concurrency: Optional[Dict] = None
     ):
-        self.start_dir = Path(start_dir)
+        roots = [start_dir] if isinstance(start_dir, (str, os.PathLike)) else list(start_dir)
+        self.roots = [Path(r) for r in roots]
+        self.start_dir = self.roots[0]
         self.strategy = strategy
         self.progress = progress_tracker
         self.skip_dirs = skip_dirs
+        self.device_concurrency = device_concurrency
         self.logger = logging.getLogger(__name__)
         
     def analyze_directories(self) -> Tuple[List[str], Dict]:
-        """Analyze directories and collect statistics."""
+        """Analyze directories and collect statistics.
+        
+        All roots are scanned concurrently, with one worker pool per
+        physical device (see core.scanner.ParallelScanner).
+        """
         try:
-            if not self.start_dir.exists():
-                self.logger.error(f"Start directory does not exist: {self.start_dir}")
+            roots = [r for r in self.roots if r.exists()]
+            for missing in set(self.roots) - set(roots):
+                self.logger.error(f"Start directory does not exist: {missing}")
+            if not roots:
                 return None, {}
                 
-            stats = {
-                "total_directories": 0,
-                "empty_directories": 0,
-                "errors": 0,
-                "start_time": datetime.now().isoformat()
-            }
-            
-            all_dirs = []
-            
-            for item in self.start_dir.rglob("*"):
-                if item.is_dir() and not self._should_skip(item):
-                    stats["total_directories"] += 1
-                    if not any(item.iterdir()):
-                        stats["empty_directories"] += 1
-                        all_dirs.append(str(item))
-                        
-            return all_dirs, stats
+            visitor = _EmptyDirectoryVisitor()
+            stats = self._scan(roots, visitor)
+            return sorted(visitor.empty_dirs), stats
             
         except Exception as e:
             self.logger.error(f"Error analyzing directories: {e}")
             return None, {}
     
+    def _scan(self, roots: List[Path], visitor: _EmptyDirectoryVisitor) -> Dict:
+        """Scan roots concurrently, one worker pool per physical device (see core.scanner)."""
+        stats = {
+            "total_directories": 0,
+            "empty_directories": 0,
+            "errors": 0,
+            "start_time": datetime.now().isoformat()
+        }
+        scanner = ParallelScanner(
+            skip_dirs=self.skip_dirs,
+            concurrency=self.device_concurrency,
+            progress=self.progress
+        )
+        
+        with tracer.span("scan.analyze_directories", path=str(self.start_dir), roots=len(roots)) as span:
+            groups = scanner.scan(roots, visitor)
+            stats["total_directories"] = visitor.total_directories
+            stats["empty_directories"] = len(visitor.empty_dirs)
+            stats["errors"] = visitor.errors
+            stats["devices"] = {
+                f"{os.major(dev)}:{os.minor(dev)}": {
+                    "kind": group.info.kind,
+                    "mount_point": group.info.mount_point,
+                    "workers": group.workers,
+                    "directories": group.directories
+                }
+                for dev, group in groups.items()
+            }
+            span.set("items", stats["total_directories"])
+            span.set("empty_directories", stats["empty_directories"])
+            span.set("devices", len(groups))
+        return stats
+    
     def _should_skip(self, path: Path) -> bool:
         """Check if directory should be skipped."""
         return any(skip_dir in path.parts for skip_dir in self.skip_dirs)
     
+    def _in_scope(self, dir_path: str) -> bool:
+        """Not skipped, and not inside the strategy's own target (which may be under a root)."""
+        path = Path(dir_path).absolute()
+        if self._should_skip(path):
+            return False
+        target = getattr(self.strategy, 'target_dir', None)
+        return target is None or not path.is_relative_to(Path(target).absolute())
+    
+    @staticmethod
+    def _still_empty(dir_path: str) -> bool:
+        """Empty when scanned is not enough: the directory may have changed since."""
+        try:
+            if os.path.islink(dir_path):
+                return False
+            with os.scandir(dir_path) as it:
+                return next(it, None) is None
+        except OSError:
+            return False
+    
+    def build_pipeline(self, span=None, act_batch_size: int = 64) -> StrategyPipeline:
+        """filter -> validate -> act -> record stages around self.strategy."""
+        if isinstance(self.strategy, DirectoryStrategy):
+            strategy = self.strategy
+            
+            async def validate(dir_path) -> bool:
+                return await strategy.validate_directory(Path(dir_path))
+            
+            async def act(dir_paths) -> BatchResult:
+                # The validate stage already ran the safety check
+                return await strategy.execute_batch_async(dir_paths, validated=True)
+        else:
+            validate = self._still_empty
+            act = self.strategy.execute_batch
+        
+        def record(dir_path: Path) -> None:
+            if span is not None:
+                span.add("processed")
+        
+        return StrategyPipeline([
+            Stage("in_scope", "filter", self._in_scope),
+            Stage("still_empty", "validate", validate, workers=4),
+            Stage(self.strategy.__class__.__name__, "act", act, batch_size=act_batch_size),
+            Stage("record", "record", record),
+        ])
+    
+    async def run_cleanup(self) -> Optional[PipelineResult]:
+        """Scan and clean up concurrently: directories are acted on as the scan finds them."""
+        roots = [r for r in self.roots if r.exists()]
+        for missing in set(self.roots) - set(roots):
+            self.logger.error(f"Start directory does not exist: {missing}")
+        if not roots:
+            return None
+        
+        with tracer.span("cleanup.strategy", strategy=self.strategy.__class__.__name__) as span:
+            source = iterate_in_thread(lambda emit: self._scan(roots, _EmptyDirectoryVisitor(on_empty=emit)))
+            result = await self.build_pipeline(span).run(source)
+            span.set("items", len(result.processed) + len(result.skipped) + len(result.failed))
+            span.set("errors", len(result.failed))
+        if isinstance(self.strategy, DirectoryStrategy):
+            self.strategy.cleanup()
+        return result
+    
     def execute_cleanup(self) -> bool:
         """Execute the cleanup strategy."""
         try:
-            all_dirs, _ = self.analyze_directories()
-            if not all_dirs:
-                return False
-                
-            for dir_path in all_dirs:
-                try:
-                    self.strategy.execute(Path(dir_path))
-                except Exception as e:
-                    self.logger.error(f"Error processing directory {dir_path}: {e}")
+            with tracer.span("cleanup.execute", path=str(self.start_dir)) as span:
+                result = asyncio.run(self.run_cleanup())
+                if result is None or not (result.filtered or result.processed
+                                          or result.skipped or result.failed):
+                    return False
+                span.set("items", len(result.processed))
+                for dir_path, error in result.failed:
+                    self.logger.error(f"Error processing directory {dir_path}: {error}")
                     
             return True
             
         except Exception as e:
             self.logger.error(f"Error during cleanup: {e}")
-            return False 
\ No newline at end of file
+            return False 
@@ -0,0 +1,228 @@
+"""Detection of regenerable build artifacts and their reclaimable size.
+
+node_modules, virtualenvs, caches and build output are usually the
+largest things in a development tree, and all of them can be recreated
+by reinstalling or rebuilding. A directory counts as an artifact when
+its name matches a rule and the project around it confirms it (a
+package.json next to node_modules, a Cargo.toml next to target, a
+pyvenv.cfg inside a virtualenv), or when it carries a CACHEDIR.TAG.
+
+Sizes are disk usage (st_blocks). Small artifacts are measured exactly;
+in large ones only a random sample of the subdirectories at each level
+is walked and the result scaled up, so a 200k-file node_modules costs a
+few thousand stats. Results are cached by the artifact's mtime.
+"""
+
+import json
+import logging
+import os
+import random
+import stat
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core.constants import ARTIFACT_SIZE_MAX_AGE
+from core.search_index import DEFAULT_INDEX_DIR
+
+# name -> (kind, files in the parent that confirm it, files inside that confirm it)
+# Empty marker tuples on both sides mean the name alone is enough.
+ARTIFACT_RULES: Dict[str, Tuple[str, Tuple[str, ...], Tuple[str, ...]]] = {
+    'node_modules': ('node', ('package.json',), ()),
+    '.venv': ('virtualenv', (), ('pyvenv.cfg',)),
+    'venv': ('virtualenv', (), ('pyvenv.cfg',)),
+    'env': ('virtualenv', (), ('pyvenv.cfg',)),
+    '__pycache__': ('python cache', (), ()),
+    '.pytest_cache': ('pytest cache', (), ()),
+    '.mypy_cache': ('mypy cache', (), ()),
+    '.tox': ('tox', ('tox.ini', 'setup.cfg', 'pyproject.toml'), ()),
+    'target': ('build output', ('Cargo.toml', 'pom.xml', 'build.sbt'), ()),
+    'build': ('build output', ('setup.py', 'pyproject.toml', 'CMakeLists.txt', 'build.gradle',
+                               'build.gradle.kts', 'package.json', 'Makefile'), ()),
+}
+CACHEDIR_TAG = 'CACHEDIR.TAG'
+# Version control metadata is never an artifact and is not searched
+NEVER_ENTER = {'.git', '.hg', '.svn'}
+
+# Subdirectories measured per level before sampling kicks in
+SAMPLE_SIZE = 16
+
+
+@dataclass
+class Artifact:
+    """A regenerable directory and its (possibly estimated) disk usage."""
+
+    path: str
+    kind: str
+    bytes: int
+    files: int
+    exact: bool
+
+
+def _disk_usage(st: os.stat_result) -> int:
+    blocks = getattr(st, 'st_blocks', None)
+    return blocks * 512 if blocks is not None else st.st_size
+
+
+def find_artifacts(root) -> Iterator[Tuple[str, str]]:
+    """Yield (path, kind) for each artifact directory under root, without entering them."""
+    stack = [str(root)]
+    while stack:
+        path = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError as e:
+            logging.getLogger(__name__).debug(f"Skipping {path}: {e}")
+            continue
+        names = {entry.name for entry in entries}
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.name in NEVER_ENTER or not entry.is_dir(follow_symlinks=False):
+                    continue
+            except OSError:
+                continue
+            kind = _artifact_kind(entry, names)
+            if kind is not None:
+                yield entry.path, kind
+            else:
+                subdirs.append(entry.path)
+        stack.extend(reversed(subdirs))
+
+
+def _artifact_kind(entry: os.DirEntry, parent_names) -> Optional[str]:
+    rule = ARTIFACT_RULES.get(entry.name)
+    if rule is not None:
+        kind, parent_markers, own_markers = rule
+        confirmed = ((not parent_markers or any(m in parent_names for m in parent_markers))
+                     and (not own_markers or any(os.path.exists(os.path.join(entry.path, m))
+                                                 for m in own_markers)))
+        if confirmed:
+            return kind
+    if os.path.exists(os.path.join(entry.path, CACHEDIR_TAG)):
+        return 'cache'
+    return None
+
+
+def measure(path: str, sample_size: int = SAMPLE_SIZE,
+            rng: Optional[random.Random] = None) -> Tuple[float, float, bool]:
+    """(bytes, files, exact) under path, sampling subdirectories beyond sample_size per level.
+
+    When a directory has n > k subdirectories, k of them are measured and
+    their total is scaled by n / k: an unbiased estimate of the whole.
+    """
+    rng = rng or random.Random(path)
+    total_bytes = total_files = 0.0
+    exact = True
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return 0.0, 0.0, True
+    subdirs = []
+    for entry in entries:
+        try:
+            st = entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        total_bytes += _disk_usage(st)
+        if stat.S_ISDIR(st.st_mode):
+            subdirs.append(entry.path)
+        else:
+            total_files += 1
+    if len(subdirs) > sample_size:
+        scale = len(subdirs) / sample_size
+        subdirs = rng.sample(subdirs, sample_size)
+        exact = False
+    else:
+        scale = 1.0
+    for subdir in subdirs:
+        nbytes, nfiles, sub_exact = measure(subdir, sample_size, rng)
+        total_bytes += nbytes * scale
+        total_files += nfiles * scale
+        exact = exact and sub_exact
+    return total_bytes, total_files, exact
+
+
+def size_cache_file(cache_dir=None) -> Path:
+    """Where measured sizes are kept: next to the filename indexes (CLEANUP_INDEX_DIR)."""
+    cache_dir = Path(cache_dir or os.environ.get('CLEANUP_INDEX_DIR') or DEFAULT_INDEX_DIR)
+    return cache_dir / "artifact_sizes.json"
+
+
+class ArtifactScanner:
+    """Finds artifacts under a root and ranks them by reclaimable size.
+
+    A cached size is reused while the artifact directory's mtime is
+    unchanged and the entry is younger than max_age seconds.
+    """
+
+    def __init__(self, sample_size: int = SAMPLE_SIZE, cache_file=None,
+                 max_age: float = ARTIFACT_SIZE_MAX_AGE):
+        self.sample_size = sample_size
+        self.cache_file = Path(cache_file) if cache_file else size_cache_file()
+        self.max_age = max_age
+        self.logger = logging.getLogger(__name__)
+        self._cache: Optional[Dict[str, Dict]] = None
+        self.measured = 0
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        if self._cache is None:
+            try:
+                with open(self.cache_file, encoding='utf-8') as f:
+                    self._cache = json.load(f)
+            except (OSError, ValueError):
+                self._cache = {}
+        return self._cache
+
+    def _save_cache(self) -> None:
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_file.with_suffix('.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._cache, f)
+            os.replace(tmp, self.cache_file)
+        except OSError as e:
+            self.logger.warning(f"Could not save artifact sizes: {e}")
+
+    def size_of(self, path: str, kind: str) -> Artifact:
+        cache = self._load_cache()
+        try:
+            mtime_ns = os.lstat(path).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        cached = cache.get(path)
+        if (cached and cached['mtime_ns'] == mtime_ns
+                and time.time() - cached['measured_at'] < self.max_age):
+            return Artifact(path, kind, cached['bytes'], cached['files'], cached['exact'])
+        # Seeded by path so repeated estimates of an unchanged tree agree
+        nbytes, nfiles, exact = measure(path, self.sample_size, random.Random(path))
+        self.measured += 1
+        cache[path] = {'mtime_ns': mtime_ns, 'measured_at': time.time(),
+                       'bytes': int(nbytes), 'files': int(nfiles), 'exact': exact}
+        return Artifact(path, kind, int(nbytes), int(nfiles), exact)
+
+    def scan(self, root) -> List[Artifact]:
+        """All artifacts under root, largest first."""
+        root = os.path.abspath(root)
+        artifacts = [self.size_of(path, kind) for path, kind in find_artifacts(root)]
+        # Forget artifacts under root that have since been removed
+        found = {artifact.path for artifact in artifacts}
+        cache = self._load_cache()
+        stale = [path for path in cache if path.startswith(root + os.sep) and path not in found]
+        for path in stale:
+            del cache[path]
+        if self.measured or stale:
+            self._save_cache()
+        artifacts.sort(key=lambda a: (-a.bytes, a.path))
+        return artifacts
+
+
+def artifact_state(path: Path) -> Dict:
+    """Plan precondition for an artifact: still a directory, entries unchanged at the top level."""
+    st = path.lstat()
+    if not stat.S_ISDIR(st.st_mode):
+        raise NotADirectoryError(str(path))
+    return {'type': 'dir', 'mtime_ns': st.st_mtime_ns, 'mode': st.st_mode & 0o7777}
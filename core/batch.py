@@ -0,0 +1,599 @@
+"""Headless batch mode for cron and orchestration.
+
+Subcommands (scan, find-empty, analyze, duplicates, estimate, apply-plan) take any
+number of roots or plan files, process them concurrently and stream JSON
+Lines to stdout as results are discovered. Logs go to stderr and the log
+file, so stdout stays machine-readable. 'coordinate' and 'worker' spread
+one scan over many processes and hosts (see core.distributed); 'snapshot'
+and 'diff' save scans and compare them later (see core.snapshot).
+"""
+
+import argparse
+import heapq
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from core.constants import EMPTY_ITEM_SKIP_PATTERNS, SKIP_DIRS
+from core.devices import DEFAULT_CONCURRENCY
+from core.scanner import ParallelScanner, ScanVisitor
+from utils.external_sort import SortedSpillStore
+from utils.logging_utils import setup_logging
+
+COMMANDS = ('scan', 'find-empty', 'analyze', 'duplicates', 'estimate', 'apply-plan', 'coordinate', 'worker',
+            'snapshot', 'diff')
+
+# Exit codes
+EXIT_OK = 0
+EXIT_PARTIAL = 1   # finished, but some paths or operations failed
+EXIT_USAGE = 2     # bad arguments (argparse)
+EXIT_FAILED = 3    # nothing could be processed
+
+
+class JsonLinesWriter:
+    """Thread-safe JSON Lines emitter; every record is flushed immediately."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def emit(self, record_type: str, **fields) -> None:
+        line = json.dumps({'type': record_type, **fields}, default=str)
+        with self.lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+            self.count += 1
+
+
+class _RootVisitor(ScanVisitor):
+    """Keeps per-root statistics and reports each root as soon as its walk completes."""
+
+    def __init__(self, writer: JsonLinesWriter, roots: Sequence[str]):
+        self.writer = writer
+        self.lock = threading.Lock()
+        self.roots = set(roots)
+        self.started = {root: time.monotonic() for root in roots}
+        self.stats = {root: {'files': 0, 'dirs': 0, 'bytes': 0, 'errors': 0} for root in roots}
+        self.failed_roots: List[str] = []
+
+    def root_of(self, path: str) -> str:
+        current = path
+        while current not in self.roots:
+            parent = os.path.dirname(current)
+            if parent == current:
+                raise KeyError(path)
+            current = parent
+        return current
+
+    def visit_directory(self, path: str, entries: List[os.DirEntry], is_root: bool) -> None:
+        root = self.root_of(path)
+        files = 0
+        nbytes = 0
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    continue
+                files += 1
+                nbytes += self.visit_entry(root, entry)
+            except OSError as e:
+                self.on_entry_error(root, entry.path, e)
+        with self.lock:
+            stats = self.stats[root]
+            stats['files'] += files
+            stats['dirs'] += 0 if is_root else 1
+            stats['bytes'] += nbytes
+        self.visit(root, path, entries, is_root)
+
+    def on_error(self, path: str, error: OSError) -> None:
+        try:
+            root = self.root_of(path)
+        except KeyError:
+            return
+        self.on_entry_error(root, path, error)
+        if path == root:
+            self.failed_roots.append(root)
+
+    def root_finished(self, root: str) -> None:
+        self.finish_root(root, self.stats[root], round(time.monotonic() - self.started[root], 3))
+
+    def on_entry_error(self, root: str, path: str, error: OSError) -> None:
+        with self.lock:
+            self.stats[root]['errors'] += 1
+        self.writer.emit('error', root=root, path=path, error=str(error))
+
+    # Hooks for subclasses
+
+    def visit_entry(self, root: str, entry: os.DirEntry) -> int:
+        """Called for every non-directory entry; returns its size in bytes."""
+        return entry.stat(follow_symlinks=False).st_size
+
+    def visit(self, root: str, path: str, entries: List[os.DirEntry], is_root: bool) -> None:
+        pass
+
+    def finish_root(self, root: str, stats: Dict, duration_s: float) -> None:
+        self.writer.emit('summary', root=root, duration_s=duration_s, **stats)
+
+
+class _ScanVisitor(_RootVisitor):
+    def __init__(self, writer, roots, entries: bool = False):
+        super().__init__(writer, roots)
+        self.entries = entries
+
+    def visit_entry(self, root: str, entry: os.DirEntry) -> int:
+        size = entry.stat(follow_symlinks=False).st_size
+        if self.entries:
+            self.writer.emit('file', root=root, path=entry.path, size=size)
+        return size
+
+
+class _EmptyVisitor(_RootVisitor):
+    """Streams empty files and directories, with the assistant's skip patterns."""
+
+    def __init__(self, writer, roots):
+        super().__init__(writer, roots)
+        # Sorted on disk past the memory budget; deepest directories first, like the interactive flow
+        self.found = {'files': SortedSpillStore(decode=Path), 'dirs': SortedSpillStore(reverse=True, decode=Path)}
+        self.counts = {root: {'empty_files': 0, 'empty_dirs': 0} for root in roots}
+
+    @staticmethod
+    def _skipped(path: str) -> bool:
+        return any(pattern in path for pattern in EMPTY_ITEM_SKIP_PATTERNS)
+
+    def _found(self, root: str, kind: str, path: str) -> None:
+        with self.lock:
+            self.found[kind].add(path)
+            self.counts[root][f"empty_{kind}"] += 1
+        self.writer.emit('empty_file' if kind == 'files' else 'empty_dir', root=root, path=path)
+
+    def visit_entry(self, root: str, entry: os.DirEntry) -> int:
+        size = entry.stat(follow_symlinks=False).st_size
+        if size == 0 and entry.is_file(follow_symlinks=False) and not self._skipped(entry.path):
+            self._found(root, 'files', entry.path)
+        return size
+
+    def visit(self, root: str, path: str, entries: List[os.DirEntry], is_root: bool) -> None:
+        if not entries and not is_root and not self._skipped(path):
+            self._found(root, 'dirs', path)
+
+    def finish_root(self, root: str, stats: Dict, duration_s: float) -> None:
+        self.writer.emit('summary', root=root, duration_s=duration_s, **stats, **self.counts[root])
+
+
+class _AnalyzeVisitor(_RootVisitor):
+    """Per-root totals by file type plus bounded top-N largest and most recent files."""
+
+    def __init__(self, writer, roots, top: int = 10):
+        import mimetypes
+        from core.classifier import CATEGORIES, get_classifier
+
+        super().__init__(writer, roots)
+        self.guess_type = mimetypes.guess_type
+        self.category_of = get_classifier().category_of
+        self.category_names = CATEGORIES
+        self.top = top
+        self.types = {root: {} for root in roots}
+        self.categories = {root: [0] * len(CATEGORIES) for root in roots}
+        self.largest = {root: [] for root in roots}
+        self.recent = {root: [] for root in roots}
+
+    def visit_entry(self, root: str, entry: os.DirEntry) -> int:
+        st = entry.stat(follow_symlinks=False)
+        mime_type = self.guess_type(entry.name)[0] or "unknown"
+        category = self.category_of(entry.name)
+        with self.lock:
+            types = self.types[root]
+            types[mime_type] = types.get(mime_type, 0) + 1
+            self.categories[root][category] += 1
+            for heap, key in ((self.largest[root], st.st_size), (self.recent[root], st.st_mtime)):
+                item = (key, entry.path, st.st_size, st.st_mtime)
+                if len(heap) < self.top:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+        return st.st_size
+
+    def finish_root(self, root: str, stats: Dict, duration_s: float) -> None:
+        def files(heap):
+            return [{'path': path, 'size': size, 'modified': datetime.fromtimestamp(mtime).isoformat()}
+                    for _, path, size, mtime in sorted(heap, reverse=True)]
+
+        self.writer.emit('analysis', root=root, duration_s=duration_s, **stats,
+                         file_types=dict(sorted(self.types[root].items(), key=lambda kv: -kv[1])),
+                         categories={self.category_names[code]: count
+                                     for code, count in enumerate(self.categories[root]) if count},
+                         largest=files(self.largest[root]), recent=files(self.recent[root]))
+
+
+class _DuplicateVisitor(_RootVisitor):
+    def __init__(self, writer, roots, finder):
+        super().__init__(writer, roots)
+        self.finder = finder
+
+    def visit_entry(self, root: str, entry: os.DirEntry) -> int:
+        st = entry.stat(follow_symlinks=False)
+        if entry.is_file(follow_symlinks=False):
+            with self.lock:
+                self.finder.add(entry.path, st.st_size, st.st_dev, st.st_ino)
+        return st.st_size
+
+    def finish_root(self, root: str, stats: Dict, duration_s: float) -> None:
+        self.writer.emit('scanned', root=root, duration_s=duration_s, **stats)
+
+
+def _concurrency(workers: Optional[int]) -> Optional[Dict]:
+    """A --workers value overrides the per-device defaults for every kind."""
+    return {kind: workers for kind in DEFAULT_CONCURRENCY} if workers else None
+
+
+def _scan_progress(args, writer: JsonLinesWriter):
+    """With --progress, a tracker that emits 'progress' records (total and ETA from a sampled estimate)."""
+    if not getattr(args, 'progress', None):
+        return None
+    from utils.progress import MetricsSink, ProgressTracker
+
+    return ProgressTracker(description=args.command, unit="entries", interval=args.progress,
+                           sinks=[MetricsSink(lambda snapshot: writer.emit('progress', **snapshot))])
+
+
+def _run_scan(args, visitor: _RootVisitor) -> int:
+    """Walk all roots with one shared scanner; visitors stream records as they go."""
+    progress = _scan_progress(args, visitor.writer)
+    scanner = ParallelScanner(skip_dirs=SKIP_DIRS, concurrency=_concurrency(args.workers), progress=progress)
+    try:
+        scanner.scan(visitor.roots, visitor)
+    finally:
+        if progress is not None:
+            progress.close()
+    if len(visitor.failed_roots) == len(visitor.roots):
+        return EXIT_FAILED
+    errors = sum(stats['errors'] for stats in visitor.stats.values())
+    return EXIT_PARTIAL if errors else EXIT_OK
+
+
+def _roots(args) -> List[str]:
+    return [str(root) for root in ParallelScanner.normalize_roots(args.roots)]
+
+
+def cmd_scan(args, writer: JsonLinesWriter) -> int:
+    return _run_scan(args, _ScanVisitor(writer, _roots(args), entries=args.entries))
+
+
+def cmd_find_empty(args, writer: JsonLinesWriter) -> int:
+    visitor = _EmptyVisitor(writer, _roots(args))
+    code = _run_scan(args, visitor)
+    if args.plan and code != EXIT_FAILED:
+        from core.planner import compile_plan
+
+        plan = compile_plan(visitor.found, 'delete', root=os.path.commonpath(list(visitor.roots)))
+        writer.emit('plan', path=str(plan.save(args.plan)), ops=len(plan.ops), action=plan.action)
+    for store in visitor.found.values():
+        store.close()
+    return code
+
+
+def cmd_analyze(args, writer: JsonLinesWriter) -> int:
+    return _run_scan(args, _AnalyzeVisitor(writer, _roots(args), top=args.top))
+
+
+def cmd_duplicates(args, writer: JsonLinesWriter) -> int:
+    from core.duplicates import DuplicateFinder
+
+    finder = DuplicateFinder(min_size=args.min_size, workers=args.workers or 8)
+    code = _run_scan(args, _DuplicateVisitor(writer, _roots(args), finder))
+    if code == EXIT_FAILED:
+        return code
+    found = []
+    wasted = 0
+    for group in finder.groups():
+        found.append(group)
+        wasted += group.wasted_bytes
+        writer.emit('duplicates', **group.as_dict())
+    for path, error in finder.errors:
+        writer.emit('error', path=path, error=error)
+    writer.emit('duplicates_summary', groups=len(found), wasted_bytes=wasted)
+    if args.hardlink or args.dry_run:
+        from strategies.dedupe_strategy import HardlinkDedupeStrategy
+
+        report = HardlinkDedupeStrategy(workers=args.workers or 8, dry_run=args.dry_run).run(found)
+        for result in report.results:
+            writer.emit('dedupe', dry_run=report.dry_run, **result.as_dict())
+        writer.emit('dedupe_summary', dry_run=report.dry_run, linked=report.linked,
+                    reclaimed_bytes=report.reclaimed_bytes, skipped=report.skipped)
+        if report.skipped and not report.dry_run:
+            return EXIT_PARTIAL
+    return EXIT_PARTIAL if finder.errors else code
+
+
+def cmd_estimate(args, writer: JsonLinesWriter) -> int:
+    from core.estimate import TreeEstimator
+
+    roots = _roots(args)
+
+    def estimate(root: str) -> bool:
+        if not os.path.isdir(root):
+            writer.emit('error', root=root, error="not a directory")
+            return False
+        skip_dirs = frozenset() if args.all else SKIP_DIRS
+        result = TreeEstimator(root, skip_dirs).estimate(
+            tolerance=args.tolerance, confidence=args.confidence, time_budget=args.time_budget)
+        writer.emit('estimate', root=root, **result.as_dict())
+        return True
+
+    with ThreadPoolExecutor(max_workers=max(1, len(roots))) as pool:
+        outcomes = list(pool.map(estimate, roots))
+    if not any(outcomes):
+        return EXIT_FAILED
+    return EXIT_OK if all(outcomes) else EXIT_PARTIAL
+
+
+def cmd_apply_plan(args, writer: JsonLinesWriter) -> int:
+    from core.planner import CleanupPlan, PlanExecutor
+
+    def apply(plan_file: str) -> Optional[bool]:
+        try:
+            plan = CleanupPlan.load(plan_file)
+        except (OSError, ValueError, KeyError) as e:
+            writer.emit('error', plan=plan_file, error=f"Could not load plan: {e}")
+            return None
+
+        def on_result(r):
+            writer.emit('op', plan=plan_file, id=r.op.id, op=r.op.op, path=r.op.path,
+                        status=r.status, detail=r.detail or None)
+
+        started = time.monotonic()
+        result = PlanExecutor(workers=args.workers or 8, on_result=on_result).execute(plan)
+        counts: Dict[str, int] = {}
+        for r in result.results:
+            counts[r.status] = counts.get(r.status, 0) + 1
+        writer.emit('plan_summary', plan=plan_file, batch=result.batch_id,
+                    duration_s=round(time.monotonic() - started, 3), **counts)
+        return not any(r.status in ('failed', 'blocked') for r in result.results)
+
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        outcomes = [f.result() for f in as_completed([pool.submit(apply, p) for p in args.plans])]
+    if all(o is None for o in outcomes):
+        return EXIT_FAILED
+    return EXIT_OK if all(outcomes) else EXIT_PARTIAL
+
+
+def cmd_coordinate(args, writer: JsonLinesWriter) -> int:
+    from core.distributed import ScanCoordinator, parse_address, start_local_workers, wait_for_workers
+
+    def on_result(shard, result):
+        writer.emit('shard', id=shard.id, path=shard.path, **result['stats'])
+
+    try:
+        address = parse_address(args.listen)
+    except ValueError as e:
+        writer.emit('error', error=str(e))
+        return EXIT_FAILED
+    with ScanCoordinator(args.roots, address=address, token=args.token, split_depth=args.split_depth,
+                         on_result=on_result) as coordinator:
+        host, port = coordinator.address
+        writer.emit('listening', host=host, port=port, roots=coordinator.roots)
+        processes = start_local_workers(coordinator, args.local_workers)
+        report = wait_for_workers(coordinator, processes, args.timeout)
+    for path in report.empty_dirs:
+        writer.emit('empty_dir', path=path)
+    for path, error in report.error_samples:
+        writer.emit('error', path=path, error=error)
+    writer.emit('distributed_summary', **report.as_dict())
+    if not report.shards:
+        return EXIT_FAILED
+    return EXIT_PARTIAL if report.errors else EXIT_OK
+
+
+def cmd_worker(args, writer: JsonLinesWriter) -> int:
+    from core.distributed import ProtocolError, ScanWorker, parse_address
+
+    started = time.monotonic()
+    worker = ScanWorker(parse_address(args.connect), token=args.token)
+    try:
+        worker.run()
+    except (OSError, ProtocolError) as e:
+        writer.emit('error', error=f"Worker stopped: {e}", shards=worker.shards_done)
+        return EXIT_PARTIAL if worker.shards_done else EXIT_FAILED
+    writer.emit('worker_summary', worker=worker.worker_id, shards=worker.shards_done,
+                duration_s=round(time.monotonic() - started, 3))
+    return EXIT_OK
+
+
+def cmd_snapshot(args, writer: JsonLinesWriter) -> int:
+    from core.snapshot import Snapshot, take_snapshot
+
+    def snapshot(root: str) -> bool:
+        started = time.monotonic()
+        try:
+            path = take_snapshot(root, directory=args.dir)
+        except OSError as e:
+            writer.emit('error', root=root, error=str(e))
+            return False
+        with Snapshot.open(path) as snap:
+            writer.emit('snapshot', root=root, path=str(path), entries=len(snap), bytes=snap.total_bytes,
+                        errors=snap.header['errors'], duration_s=round(time.monotonic() - started, 3))
+        return True
+
+    roots = _roots(args)
+    with ThreadPoolExecutor(max_workers=max(1, len(roots))) as pool:
+        outcomes = list(pool.map(snapshot, roots))
+    if not any(outcomes):
+        return EXIT_FAILED
+    return EXIT_OK if all(outcomes) else EXIT_PARTIAL
+
+
+def cmd_diff(args, writer: JsonLinesWriter) -> int:
+    from core.snapshot import KIND_DIR, Snapshot, SnapshotDiff, iter_changes, snapshots_for
+
+    if len(args.targets) == 1:
+        files = snapshots_for(args.targets[0], args.dir)[-2:]
+        if len(files) < 2:
+            writer.emit('error', root=args.targets[0], error="Fewer than two snapshots of this root; "
+                                                             "take them with the 'snapshot' command")
+            return EXIT_FAILED
+    elif len(args.targets) == 2:
+        files = args.targets
+    else:
+        writer.emit('error', error="Pass one root, or an older and a newer snapshot file")
+        return EXIT_FAILED
+    opened = []
+    try:
+        for path in files:
+            opened.append(Snapshot.open(path))
+    except (OSError, ValueError, KeyError) as e:
+        for snap in opened:
+            snap.close()
+        writer.emit('error', path=str(path), error=f"Could not open snapshot: {e}")
+        return EXIT_FAILED
+    old, new = opened
+    with old, new:
+        if old.root != new.root:
+            writer.emit('error', error=f"Snapshots are of different roots: {old.root} and {new.root}")
+            return EXIT_FAILED
+        def absolute(relpath: str) -> str:
+            return os.path.join(new.root, relpath) if relpath else new.root
+
+        diff = SnapshotDiff(keep_changes=False)
+        for change in iter_changes(old, new):
+            diff.add(change)
+            if abs(change.delta) >= args.min_size:
+                writer.emit('change', status=change.status, path=absolute(change.path),
+                            old_size=change.old_size, new_size=change.new_size, dir=change.kind == KIND_DIR)
+        for path, growth in diff.top_directories(args.top):
+            writer.emit('dir_growth', path=absolute(path), growth_bytes=growth)
+        writer.emit('diff_summary', root=new.root, old=str(old.path), new=str(new.path),
+                    old_created_at=datetime.fromtimestamp(old.created_at).isoformat(),
+                    new_created_at=datetime.fromtimestamp(new.created_at).isoformat(), **diff.summary())
+    return EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="main.py", description="Non-interactive cleanup commands that stream JSON Lines to stdout")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--workers", type=int, default=None,
+                        help="Worker threads per device (default: chosen per device type)")
+    common.add_argument("--log-level", default="WARNING", help="Log level for stderr (default: WARNING)")
+    common.add_argument("--max-iops", type=float, default=None,
+                        help="Filesystem operations per second at most (default: CLEANUP_MAX_IOPS or no limit)")
+    common.add_argument("--max-bandwidth", type=float, default=None,
+                        help="Bytes per second copied or read at most (default: CLEANUP_MAX_BANDWIDTH or no limit)")
+    common.add_argument("--no-adapt-io", action="store_true",
+                        help="Do not slow down while the host is under I/O pressure")
+    common.add_argument("--idle-io", action="store_true", help="Use the idle I/O scheduling class (Linux)")
+    walking = argparse.ArgumentParser(add_help=False)
+    walking.add_argument("--progress", type=float, nargs="?", const=1.0, default=None, metavar="SECONDS",
+                         help="Also emit 'progress' records with an estimated total and ETA "
+                              "every SECONDS (default: 1)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    scan = sub.add_parser("scan", parents=[common, walking], help="Count files, directories and bytes per root")
+    scan.add_argument("roots", nargs="+")
+    scan.add_argument("--entries", action="store_true", help="Also emit one record per file")
+    scan.set_defaults(func=cmd_scan)
+
+    empty = sub.add_parser("find-empty", parents=[common, walking], help="Stream empty files and directories")
+    empty.add_argument("roots", nargs="+")
+    empty.add_argument("--plan", help="Also write a delete plan for 'apply-plan'")
+    empty.set_defaults(func=cmd_find_empty)
+
+    analyze = sub.add_parser("analyze", parents=[common, walking], help="File types, largest and most recent files")
+    analyze.add_argument("roots", nargs="+")
+    analyze.add_argument("--top", type=int, default=10, help="Files to list per ranking")
+    analyze.set_defaults(func=cmd_analyze)
+
+    dupes = sub.add_parser("duplicates", parents=[common, walking], help="Find files with identical content")
+    dupes.add_argument("roots", nargs="+")
+    dupes.add_argument("--min-size", type=int, default=1, help="Ignore files smaller than this (bytes)")
+    dupes.add_argument("--hardlink", action="store_true",
+                       help="Replace duplicates with hard links to one copy per filesystem")
+    dupes.add_argument("--dry-run", action="store_true", help="Report what --hardlink would reclaim")
+    dupes.set_defaults(func=cmd_duplicates)
+
+    estimate = sub.add_parser("estimate", parents=[common],
+                              help="Approximate files and bytes per root by random sampling")
+    estimate.add_argument("roots", nargs="+")
+    estimate.add_argument("--tolerance", type=float, default=0.05,
+                          help="Stop once the interval half-width is within this fraction (default: 0.05)")
+    estimate.add_argument("--confidence", type=float, default=0.95, help="Interval confidence level")
+    estimate.add_argument("--time-budget", type=float, default=10.0, help="Seconds to spend per root at most")
+    estimate.add_argument("--all", action="store_true", help="Include directories the scanners skip")
+    estimate.set_defaults(func=cmd_estimate)
+
+    apply = sub.add_parser("apply-plan", parents=[common], help="Execute saved cleanup plans")
+    apply.add_argument("plans", nargs="+")
+    apply.add_argument("--jobs", type=int, default=4, help="Plans to execute at once")
+    apply.set_defaults(func=cmd_apply_plan)
+
+    coordinate = sub.add_parser("coordinate", parents=[common],
+                                help="Serve shards of the roots to scan workers and merge their results")
+    coordinate.add_argument("roots", nargs="+")
+    coordinate.add_argument("--listen", default="127.0.0.1:0",
+                            help="host:port to accept workers on (default: a free port on localhost)")
+    coordinate.add_argument("--local-workers", type=int, default=0,
+                            help="Worker processes to start on this host as well (default: 0)")
+    coordinate.add_argument("--split-depth", type=int, default=1,
+                            help="Directory levels below each root to shard up front (default: 1)")
+    coordinate.add_argument("--token", default=None, help="Secret workers must present (default: CLEANUP_CLUSTER_TOKEN)")
+    coordinate.add_argument("--timeout", type=float, default=None, help="Give up after this many seconds")
+    coordinate.set_defaults(func=cmd_coordinate)
+
+    worker = sub.add_parser("worker", parents=[common], help="Scan shards for a coordinator until it is done")
+    worker.add_argument("--connect", required=True, help="Coordinator host:port")
+    worker.add_argument("--token", default=None, help="Secret the coordinator expects (default: CLEANUP_CLUSTER_TOKEN)")
+    worker.set_defaults(func=cmd_worker)
+
+    snapshot = sub.add_parser("snapshot", parents=[common], help="Save a columnar snapshot of each root")
+    snapshot.add_argument("roots", nargs="+")
+    snapshot.add_argument("--dir", default=None, help="Snapshot directory (default: CLEANUP_SNAPSHOT_DIR or cache/snapshots)")
+    snapshot.set_defaults(func=cmd_snapshot)
+
+    diff = sub.add_parser("diff", parents=[common],
+                          help="Compare two snapshots: added, removed, grown and shrunk paths, growth per directory")
+    diff.add_argument("targets", nargs="+", metavar="ROOT | OLD NEW",
+                      help="A root (its two newest snapshots) or an older and a newer snapshot file")
+    diff.add_argument("--dir", default=None, help="Snapshot directory (default: CLEANUP_SNAPSHOT_DIR or cache/snapshots)")
+    diff.add_argument("--top", type=int, default=20, help="Directories to list by growth")
+    diff.add_argument("--min-size", type=int, default=0,
+                      help="Only list paths whose size changed by at least this many bytes")
+    diff.set_defaults(func=cmd_diff)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None, stream=None) -> int:
+    """Run one batch command and return its exit code."""
+    args = build_parser().parse_args(argv)
+    setup_logging()
+    for handler in logging.getLogger().handlers:
+        if type(handler) is logging.StreamHandler:
+            handler.setLevel(args.log_level.upper())
+
+    if args.max_iops or args.max_bandwidth or args.no_adapt_io or args.idle_io:
+        from utils.io_governor import configure_governor, get_governor
+
+        defaults = get_governor()
+        configure_governor(ops_per_sec=args.max_iops or defaults.ops_per_sec,
+                           bytes_per_sec=args.max_bandwidth or defaults.bytes_per_sec,
+                           adaptive=defaults.adaptive and not args.no_adapt_io,
+                           idle_priority=defaults.idle_priority or args.idle_io)
+
+    writer = JsonLinesWriter(stream)
+    started = time.monotonic()
+    try:
+        code = args.func(args, writer)
+    except KeyboardInterrupt:
+        code = EXIT_FAILED
+    except Exception as e:
+        logging.getLogger(__name__).error(f"{args.command} failed: {e}")
+        writer.emit('error', error=str(e))
+        code = EXIT_FAILED
+    writer.emit('done', command=args.command, exit_code=code,
+                duration_s=round(time.monotonic() - started, 3), records=writer.count)
+    return code
@@ -2,20 +2,26 @@
 
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import os
-import mimetypes
 from datetime import datetime
+import itertools
 import json
-import subprocess
+import re
 import shlex
-from colorama import init, Fore, Style
-from tqdm import tqdm
+import time
+from colorama import Fore, Style
 import sys
-from send2trash import send2trash
 
-# Initialize colorama
-init()
+from core.constants import (DEFAULT_LOG_DIR, EMPTY_ITEM_SKIP_PATTERNS, PAGE_SIZE, RESULT_LIMIT,
+                            SEARCH_INDEX_MAX_AGE, SKIP_DIRS)
+from core.planner import CleanupPlan, PlanExecutor, PlanResult, compile_plan
+from core.scanner import iter_directories
+from core.search_index import FilenameIndex, open_index
+from utils.journal import get_journal
+from utils.paging import Pager, lazy_sorted
+from utils.progress import ProgressTracker, TerminalSink
+from utils.tracing import tracer
 
 class CleanupAssistant:
     def __init__(self):
@@ -23,6 +29,16 @@ class CleanupAssistant:
         self.logger = logging.getLogger(__name__)
         self.file_index: Dict[str, Dict] = {}
         self.history: List[str] = []
+        # LiveIndex or WatchClient kept current by a watch daemon, if one is attached
+        self.live_index = None
+        # Remaining pages of the last long result, shown by 'more'
+        self.pager: Optional[Pager] = None
+        # Filename indexes by root; one also serves searches in directories below it
+        self.search_indexes: Dict[str, FilenameIndex] = {}
+        # The same for 'search --all', whose indexes include SKIP_DIRS
+        self.full_search_indexes: Dict[str, FilenameIndex] = {}
+        # Shell session for '!' commands, started on first use
+        self.command_runner = None
         
     def handle_command(self, user_input: str) -> str:
         """Process user input with natural language understanding."""
@@ -30,6 +46,22 @@ class CleanupAssistant:
             self.history.append(user_input)
             command = user_input.lower().strip()
             
+            # Shell commands keep their case
+            if user_input.strip().startswith("!"):
+                return self._execute_system_command(user_input.strip()[1:])
+            
+            plan_response = self._plan_command(user_input.strip())
+            if plan_response is not None:
+                return plan_response
+            
+            search_response = self._search_command(user_input.strip())
+            if search_response is not None:
+                return search_response
+            
+            view_response = self._view_command(user_input.strip())
+            if view_response is not None:
+                return view_response
+            
             # First try to parse as natural language
             nl_response = self._natural_to_cli(command)
             if nl_response:
@@ -56,6 +88,8 @@ class CleanupAssistant:
                 return self._find_empty_files()  # Return the actual method result
             if any(x in text.lower() for x in ["show empty directories", "show me empty directories"]):
                 return self._find_empty_directories()  # Return the actual method result
+            if any(x in text.lower() for x in ["what's big", "whats big", "show big", "biggest"]):
+                return self.show_biggest()
             
             # Navigation commands
             if text.strip() == "..":
@@ -128,8 +162,18 @@ class CleanupAssistant:
                 return self.change_directory(path)
             elif command in ["ls", "show directories", "list", "show directory contents"]:
                 return self.list_contents()
+            elif command in ["more", "next", "next page"]:
+                return self.more()
+            elif command in ["artifacts", "show artifacts", "find artifacts"]:
+                return self.show_artifacts()
+            elif command in ["estimate", "estimate size", "how big"]:
+                return self.estimate_directory()
             elif command == "exit":
                 return "exit"
+            elif command.startswith("export trace"):
+                return self.export_trace(command[len("export trace"):].strip() or None)
+            elif command == "undo" or command.startswith("undo "):
+                return self.undo(command[len("undo"):].strip() or None)
             
             # Try natural language processing
             nl_response = self._natural_to_cli(command)
@@ -142,68 +186,60 @@ class CleanupAssistant:
             return f"{Fore.RED}Error processing command: {str(e)}{Style.RESET_ALL}"
 
     def _execute_system_command(self, command: str) -> str:
-        """Execute system command and return output."""
+        """Execute a shell command; output streams to a terminal as it arrives, otherwise it is returned."""
+        if self.command_runner is None:
+            from utils.command_runner import CommandRunner
+            self.command_runner = CommandRunner()
+        
+        streaming = sys.stdout.isatty()
+        
+        def on_output(text: str) -> None:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+        
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                cwd=str(self.current_path)
-            )
-            
-            if result.returncode == 0:
-                # Always return the actual output if available
-                if result.stdout.strip():
-                    return result.stdout.strip()
-                if result.stderr.strip():
-                    return result.stderr.strip()
-                return f"{Fore.GREEN}Command executed successfully{Style.RESET_ALL}"
-            return f"{Fore.RED}Error: {result.stderr}{Style.RESET_ALL}"
+            result = self.command_runner.run(command, self.current_path, on_output if streaming else None)
         except Exception as e:
             return f"{Fore.RED}Failed to execute command: {e}{Style.RESET_ALL}"
+        
+        if result.cancelled:
+            return f"{Fore.YELLOW}Command cancelled{Style.RESET_ALL}"
+        output = "" if streaming else result.output.strip()
+        if result.truncated_bytes and not streaming:
+            output += f"\n... {self._format_size(result.truncated_bytes)} more output not shown"
+        if result.returncode == 0:
+            if streaming:
+                return ""
+            # Always return the actual output if available
+            return output or f"{Fore.GREEN}Command executed successfully{Style.RESET_ALL}"
+        details = f": {output}" if output else ""
+        return f"{Fore.RED}Error (exit status {result.returncode}){details}{Style.RESET_ALL}"
 
     def analyze_directory(self, directory: Path) -> str:
-        """Analyze directory contents with detailed information."""
+        """Analyze directory contents: totals, a breakdown by file category and the newest files."""
+        from core.classifier import get_classifier
+        
         try:
-            stats = {
-                "total_files": 0,
-                "total_size": 0,
-                "file_types": {},
-            }
-            
-            files = []
-            for item in directory.rglob("*"):
-                if item.is_file():
-                    stats["total_files"] += 1
-                    size = item.stat().st_size
-                    modified = datetime.fromtimestamp(item.stat().st_mtime)
-                    mime_type = mimetypes.guess_type(item.name)[0] or "unknown"
-                    
-                    files.append({
-                        "path": str(item),
-                        "size": size,
-                        "modified": modified.isoformat(),
-                        "type": mime_type
-                    })
-                    
-                    stats["total_size"] += size
-                    stats["file_types"][mime_type] = stats["file_types"].get(mime_type, 0) + 1
-            
-            # Sort by most recent
-            files.sort(key=lambda x: x["modified"], reverse=True)
+            with tracer.span("scan.analyze_directory", path=str(directory)) as span:
+                table = get_classifier().classify_tree(directory)
+                total_size = sum(table.sizes)
+                span.set("items", len(table))
+                span.set("bytes", total_size)
             
             output = [
                 f"\n{Fore.GREEN}Directory Analysis for: {directory}{Style.RESET_ALL}",
-                f"Total Files: {stats['total_files']}",
-                f"Total Size: {self._format_size(stats['total_size'])}",
-                f"\n{Fore.YELLOW}Most Recent Files:{Style.RESET_ALL}"
+                f"Total Files: {len(table)}",
+                f"Total Size: {self._format_size(total_size)}",
+                f"\n{Fore.YELLOW}File Types:{Style.RESET_ALL}"
             ]
+            for category, (count, size) in table.breakdown().items():
+                output.append(f"  {category}: {count} files, {self._format_size(size)}")
             
-            for f in files[:10]:  # Show 10 most recent files
-                name = Path(f["path"]).name
-                size = self._format_size(f["size"])
-                date = f["modified"].split("T")[0]
+            output.append(f"\n{Fore.YELLOW}Most Recent Files:{Style.RESET_ALL}")
+            for row in table.most_recent(10):  # Show 10 most recent files
+                name = Path(table.paths[row]).name
+                size = self._format_size(table.sizes[row])
+                date = datetime.fromtimestamp(table.mtimes[row]).date().isoformat()
                 output.append(f"  {name} ({size}, {date})")
             
             return "\n".join(output)
@@ -211,23 +247,139 @@ class CleanupAssistant:
         except Exception as e:
             return f"{Fore.RED}Error analyzing directory: {str(e)}{Style.RESET_ALL}"
 
-    def search_files(self, term: str) -> str:
-        """Search for files matching the given term."""
+    def estimate_directory(self, tolerance: float = 0.05) -> str:
+        """Approximate file count and size from random samples of the tree, with 95% intervals."""
+        from core.estimate import TreeEstimator
+        
+        try:
+            with tracer.span("scan.estimate", path=str(self.current_path)) as span:
+                estimate = TreeEstimator(self.current_path, skip_dirs=frozenset()).estimate(tolerance=tolerance)
+                span.set("probes", estimate.probes)
+            files_low, files_high = estimate.files_interval
+            bytes_low, bytes_high = estimate.bytes_interval
+            return "\n".join([
+                f"\n{Fore.GREEN}Estimate for: {self.current_path}{Style.RESET_ALL}",
+                f"Files: ~{round(estimate.files):,} (95% between {round(files_low):,} and {round(files_high):,})",
+                f"Size: ~{self._format_size(estimate.bytes)} (95% between {self._format_size(bytes_low)} "
+                f"and {self._format_size(bytes_high)})",
+                f"Directories: ~{round(estimate.dirs):,}",
+                f"{estimate.probes} samples, {estimate.directories_read} directories read "
+                f"in {estimate.elapsed_s:.1f}s ('python main.py scan' counts exactly)",
+            ])
+        except Exception as e:
+            return f"{Fore.RED}Error estimating directory: {str(e)}{Style.RESET_ALL}"
+
+    def _search_index(self, include_skipped: bool = False) -> Tuple[FilenameIndex, str]:
+        """The index covering the current directory, and the current directory's path within it.
+
+        include_skipped selects an index that also covers SKIP_DIRS.
+        """
+        current = str(self.current_path)
+        indexes = self.full_search_indexes if include_skipped else self.search_indexes
+        for root, index in indexes.items():
+            if current == root or current.startswith(root + os.sep):
+                prefix = os.path.relpath(current, root) if current != root else ''
+                # Skipped directories are not in the parent's index; give them their own
+                if not set(prefix.split(os.sep)) & index.skip_dirs:
+                    break
+        else:
+            index = indexes[current] = open_index(current, skip_dirs=frozenset() if include_skipped else SKIP_DIRS)
+            root, prefix = current, ''
+        
+        if time.monotonic() - index.refreshed_at > SEARCH_INDEX_MAX_AGE:
+            index.sync()
+        return index, prefix
+
+    def search_files(self, term: str, include_skipped: bool = False) -> str:
+        """Search file names by substring, or by glob if term has wildcards, via the trigram index.
+
+        SKIP_DIRS are left out unless include_skipped is set ('search --all').
+        """
         try:
-            results = []
-            for item in self.current_path.rglob("*"):
-                if term.lower() in item.name.lower():
-                    results.append(str(item))
-            
-            if not results:
-                return f"No files found matching '{term}'"
-            
-            return f"{Fore.GREEN}Found matches:{Style.RESET_ALL}\n" + "\n".join(f"- {r}" for r in results)
+            with tracer.span("scan.search_files", path=str(self.current_path), term=term) as span:
+                index, prefix = self._search_index(include_skipped)
+                span.set("indexed", len(index))
+                below = prefix + os.sep if prefix else ''
+                matches = (f"- {os.path.join(index.root, path)}"
+                           for path in index.search(term) if path.startswith(below))
+                return self._paged(f"{Fore.GREEN}Found matches:{Style.RESET_ALL}", matches,
+                                   f"No files found matching '{term}'")
+        except Exception as e:
+            return f"{Fore.RED}Error searching files: {str(e)}{Style.RESET_ALL}"
+
+    def fuzzy_search(self, term: str, include_skipped: bool = False) -> str:
+        """File names that nearly contain term, fewest edits first."""
+        try:
+            index, prefix = self._search_index(include_skipped)
+            below = prefix + os.sep if prefix else ''
+            matches = (f"- {os.path.join(index.root, path)} ({distance} edits)"
+                       for distance, path in index.fuzzy(term, limit=RESULT_LIMIT) if path.startswith(below))
+            return self._paged(f"{Fore.GREEN}Closest matches for '{term}':{Style.RESET_ALL}", matches,
+                               f"No files found resembling '{term}'")
         except Exception as e:
             return f"{Fore.RED}Error searching files: {str(e)}{Style.RESET_ALL}"
 
-    def show_file_content(self, file_name: str) -> str:
-        """Show content of a file with smart handling of different file types."""
+    def grep(self, pattern: str, regex: bool = False, ignore_case: bool = False) -> str:
+        """Search file contents below the current directory, skipping SKIP_DIRS and binaries."""
+        from core.content_search import ContentSearcher
+        
+        try:
+            searcher = ContentSearcher(pattern, regex=regex, ignore_case=ignore_case)
+        except (ValueError, re.error) as e:
+            return f"{Fore.RED}Invalid search pattern: {str(e)}{Style.RESET_ALL}"
+        matches = (str(match) for match in searcher.search(self.current_path))
+        return self._paged(f"{Fore.GREEN}Lines matching '{pattern}':{Style.RESET_ALL}", matches,
+                           f"No files contain '{pattern}'")
+
+    def _grep_command(self, args: str) -> str:
+        """Parse 'grep [-i] [-E] <pattern>'."""
+        try:
+            words = shlex.split(args)
+        except ValueError as e:
+            return f"{Fore.RED}Could not parse: {str(e)}{Style.RESET_ALL}"
+        flags = {w for w in words if w in ("-i", "-E")}
+        terms = [w for w in words if w not in flags]
+        if len(terms) != 1:
+            return f"{Fore.YELLOW}Usage: grep [-i] [-E] <pattern>{Style.RESET_ALL}"
+        return self.grep(terms[0], regex="-E" in flags, ignore_case="-i" in flags)
+
+    def _search_command(self, user_input: str) -> Optional[str]:
+        """Handle 'search', 'fuzzy', 'grep' and 'reindex' (search terms keep their case)."""
+        words = user_input.split(maxsplit=1)
+        if not words:
+            return None
+        verb = words[0].lower()
+        if verb == "reindex" and len(words) == 1:
+            current = str(self.current_path)
+            self.search_indexes = {root: index for root, index in self.search_indexes.items()
+                                   if root != current}
+            self.full_search_indexes.pop(current, None)
+            index = self.search_indexes[current] = open_index(current)
+            return f"{Fore.GREEN}Indexed {len(index)} names under {current}{Style.RESET_ALL}"
+        if verb == "grep" and len(words) == 2:
+            return self._grep_command(words[1])
+        if verb in ("search", "fuzzy") and len(words) == 2:
+            term = words[1].strip()
+            include_skipped = term.startswith("--all ")
+            if include_skipped:
+                term = term[len("--all "):].strip()
+            term = term.strip('"\'')
+            if verb == "search":
+                return self.search_files(term, include_skipped)
+            return self.fuzzy_search(term, include_skipped)
+        return None
+
+    def show_file_content(self, file_name: str, line_range: Optional[Tuple[int, Optional[int]]] = None,
+                          byte_range: Optional[Tuple[int, int]] = None, tail: Optional[int] = None,
+                          find: Optional[str] = None) -> str:
+        """Show part of a file through a memory-mapped view, paged, without reading the whole file.
+        
+        Text is shown with line numbers from line_range (first, last or None for
+        the end), binaries as a hexdump. byte_range, tail and find select other
+        parts of the file instead.
+        """
+        from core.file_viewer import FileView
+        
         try:
             file_path = self.current_path / file_name
             if not file_path.exists():
@@ -236,23 +388,80 @@ class CleanupAssistant:
             if file_path.is_dir():
                 return f"{Fore.YELLOW}{file_name} is a directory{Style.RESET_ALL}"
             
-            if file_path.stat().st_size > 1_000_000:  # 1MB
-                response = input(f"{Fore.YELLOW}File is large. View anyway? (y/N): {Style.RESET_ALL}")
-                if response.lower() != 'y':
-                    return "Operation cancelled"
-            
-            if file_path.stat().st_size > 1000:
-                pager = os.environ.get('PAGER', 'less' if os.name != 'nt' else 'more')
-                subprocess.run([pager, str(file_path)])
-                return ""
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                return f"{Fore.CYAN}=== {file_name} ==={Style.RESET_ALL}\n{content}"
+            view = FileView(file_path)
+            kind = "binary" if view.binary else view.encoding
+            header = f"{Fore.CYAN}=== {file_name} ({self._format_size(view.size)}, {kind}) ==={Style.RESET_ALL}"
+            if find is not None:
+                lines = (f"{line_no:>6}  {text}" for line_no, text in view.find(find))
+                empty = f"'{find}' does not occur in {file_name}"
+            elif tail is not None:
+                lines = view.tail(tail)
+                empty = f"{file_name} is empty"
+            elif byte_range is not None:
+                lines = view.byte_range(*byte_range)
+                empty = f"No bytes in that range of {file_name} ({view.size} bytes)"
+            elif view.binary:
+                lines = view.byte_range(0, view.size)
+                empty = f"{file_name} is empty"
+            else:
+                first, last = line_range or (1, None)
+                numbered = (f"{line_no:>6}  {text}" for line_no, text in view.lines(first))
+                lines = itertools.islice(numbered, None if last is None else max(0, last - first + 1))
+                empty = f"No lines in that range of {file_name}" if line_range else f"{file_name} is empty"
+            return self._paged(header, self._closing(view, lines), empty)
                 
         except Exception as e:
             return f"{Fore.RED}Error reading file: {str(e)}{Style.RESET_ALL}"
 
+    @staticmethod
+    def _closing(view, lines: Iterable[str]) -> Iterator[str]:
+        """Yield lines, closing view once they run out or the pager is dropped."""
+        try:
+            yield from lines
+        finally:
+            view.close()
+
+    @staticmethod
+    def _parse_range(text: str, default_first: int = 1) -> Tuple[int, Optional[int]]:
+        """'A-B', 'A-' or '-B' as (first, last); a missing last means to the end."""
+        first, sep, last = text.partition("-")
+        if not sep:
+            raise ValueError(f"Expected a range like 100-200, got '{text}'")
+        return int(first) if first else default_first, int(last) if last else None
+
+    def _view_command(self, user_input: str) -> Optional[str]:
+        """Handle 'view <file> [lines A-B | bytes A-B | find <text>]', 'head <file> [N]' and 'tail <file> [N]'."""
+        words = user_input.split(maxsplit=1)
+        if len(words) != 2 or words[0].lower() not in ("view", "head", "tail"):
+            return None
+        verb = words[0].lower()
+        usage = (f"{Fore.YELLOW}Usage: view <file> [lines A-B | bytes A-B | find <text>], "
+                 f"head <file> [N], tail <file> [N]{Style.RESET_ALL}")
+        try:
+            args = shlex.split(words[1])
+        except ValueError as e:
+            return f"{Fore.RED}Could not parse: {str(e)}{Style.RESET_ALL}"
+        try:
+            if verb in ("head", "tail"):
+                if len(args) not in (1, 2):
+                    return usage
+                count = int(args[1]) if len(args) == 2 else 10
+                if verb == "tail":
+                    return self.show_file_content(args[0], tail=count)
+                return self.show_file_content(args[0], line_range=(1, count))
+            if len(args) == 1:
+                return self.show_file_content(args[0])
+            if len(args) >= 3 and args[1] == "find":
+                return self.show_file_content(args[0], find=" ".join(args[2:]))
+            if len(args) == 3 and args[1] == "lines":
+                return self.show_file_content(args[0], line_range=self._parse_range(args[2]))
+            if len(args) == 3 and args[1] == "bytes":
+                first, last = self._parse_range(args[2], default_first=0)
+                return self.show_file_content(args[0], byte_range=(first, sys.maxsize if last is None else last))
+        except ValueError as e:
+            return f"{Fore.RED}{str(e)}{Style.RESET_ALL}\n{usage}"
+        return usage
+
     def change_directory(self, new_path: str) -> str:
         """Change current working directory with smart path handling."""
         try:
@@ -294,26 +503,57 @@ class CleanupAssistant:
             return f"{Fore.RED}Could not change directory: {str(e)}{Style.RESET_ALL}"
 
     def list_contents(self) -> str:
-        """List contents with enhanced information."""
+        """List contents with enhanced information, directories first, one page at a time."""
         try:
-            contents = list(self.current_path.iterdir())
+            with os.scandir(self.current_path) as it:
+                entries = list(it)
             
-            dirs = []
-            files = []
-            
-            for p in contents:
-                if p.is_dir():
-                    dirs.append(f"{Fore.BLUE}📁 {p.name}/{Style.RESET_ALL}")
-                else:
-                    size = self._format_size(p.stat().st_size)
-                    modified = datetime.fromtimestamp(p.stat().st_mtime).strftime("%Y-%m-%d %H:%M")
-                    files.append(f"📄 {p.name} ({size}, modified: {modified})")
+            def render(entry: os.DirEntry) -> str:
+                if entry.is_dir():
+                    return f"{Fore.BLUE}📁 {entry.name}/{Style.RESET_ALL}"
+                # Only entries that reach the screen are stat'ed, once each
+                st = entry.stat()
+                modified = datetime.fromtimestamp(st.st_mtime).strftime("%Y-%m-%d %H:%M")
+                return f"📄 {entry.name} ({self._format_size(st.st_size)}, modified: {modified})"
             
-            return f"{Fore.YELLOW}Current directory contents:{Style.RESET_ALL}\n" + "\n".join(sorted(dirs) + sorted(files))
+            header = f"{Fore.YELLOW}Current directory contents:{Style.RESET_ALL}"
+            ordered = lazy_sorted(entries, key=lambda e: (not e.is_dir(), e.name))
+            return self._paged(header, map(render, ordered), header)
         except Exception as e:
             self.logger.error(f"Error listing contents: {e}")
             return f"{Fore.RED}Could not list directory contents: {str(e)}{Style.RESET_ALL}"
 
+    def _paged(self, header: str, lines: Iterable[str], empty_message: str) -> str:
+        """Show the first page of lines; the rest are only produced if 'more' asks."""
+        pager = Pager(header, lines, page_size=PAGE_SIZE, limit=RESULT_LIMIT)
+        page = pager.next_page()
+        if pager.shown == 0:
+            self.pager = None
+            return empty_message
+        self.pager = pager if pager.has_more else None
+        return page
+
+    def more(self) -> str:
+        """Show the next page of the last long result."""
+        if self.pager is None:
+            return f"{Fore.YELLOW}Nothing more to show.{Style.RESET_ALL}"
+        page = self.pager.next_page()
+        if not self.pager.has_more:
+            self.pager = None
+        return page
+
+    def export_trace(self, file_path: Optional[str] = None) -> str:
+        """Export recorded tracing spans for chrome://tracing or Perfetto."""
+        try:
+            if file_path is None:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                file_path = str(DEFAULT_LOG_DIR / "traces" / f"trace_{timestamp}.json")
+            path = tracer.export_chrome_trace(file_path)
+            return f"{Fore.GREEN}Trace written to: {path}{Style.RESET_ALL}"
+        except Exception as e:
+            self.logger.error(f"Error exporting trace: {e}")
+            return f"{Fore.RED}Could not export trace: {str(e)}{Style.RESET_ALL}"
+
     def _format_size(self, size: int) -> str:
         """Format file size in human-readable format."""
         for unit in ['B', 'KB', 'MB', 'GB']:
@@ -331,54 +571,68 @@ class CleanupAssistant:
             "- Type 'help' for more options"
         )
 
-    def _find_empty_items(self) -> Dict[str, List[Path]]:
-        """Find empty files and directories with extra safety checks."""
-        empty_files = []
-        empty_dirs = []
+    def _find_empty_items(self) -> Dict[str, Iterable[Path]]:
+        """Find empty files and directories with extra safety checks.
+        
+        Results are kept in spill-to-disk stores that iterate in sorted
+        order (directories deepest first), so huge trees do not exhaust memory.
+        """
+        from utils.external_sort import SortedSpillStore
+        
+        empty_files = SortedSpillStore(decode=Path)
+        empty_dirs = SortedSpillStore(reverse=True, decode=Path)
         
         # Skip patterns for safety
-        SKIP_PATTERNS = {
-            'venv', '__pycache__', '.git', 
-            'py.typed', '__init__.py', '.pytest_cache',
-            'REQUESTED', 'dist-info', '$RECYCLE.BIN'  # Added recycle bin to skip
-        }
+        SKIP_PATTERNS = EMPTY_ITEM_SKIP_PATTERNS
         
-        print(f"{Fore.CYAN}Analyzing directory contents...{Style.RESET_ALL}")
-        total_items = sum(1 for _ in self.current_path.rglob("*"))
+        from core.estimate import track_estimated_total
         
-        with tqdm(total=total_items, desc="Scanning", unit="items") as pbar:
-            for item in self.current_path.rglob("*"):
+        print(f"{Fore.CYAN}Analyzing directory contents...{Style.RESET_ALL}")
+        with tracer.span("scan.find_empty_items", path=str(self.current_path)) as span:
+            # No separate counting pass: a sampled estimate of the entry count gives the ETA
+            with self._progress("Scanning") as progress, \
+                    tracer.span("scan.walk", path=str(self.current_path)):
+                stop_estimate = track_estimated_total(progress, [self.current_path], skip_dirs=frozenset())
                 try:
-                    # Skip system and configuration files
-                    if any(pattern in str(item) for pattern in SKIP_PATTERNS):
-                        pbar.update(1)
-                        continue
-                    
-                    if item.is_file():
-                        # Double check file is truly empty
-                        try:
-                            if item.stat().st_size == 0:
-                                empty_files.append(item)
-                        except (OSError, IOError):
-                            # Skip if can't access file
-                            pass
-                    elif item.is_dir():
+                    for item in self.current_path.rglob("*"):
                         try:
-                            # Check if directory is truly empty (no hidden files)
-                            if not any(item.iterdir()):
-                                empty_dirs.append(item)
-                        except (OSError, IOError):
-                            # Skip if can't access directory
-                            pass
-                    pbar.update(1)
-                except Exception as e:
-                    self.logger.error(f"Error checking {item}: {e}")
-                    pbar.update(1)
-        
-        return {
-            'files': sorted(empty_files),
-            'dirs': sorted(empty_dirs, reverse=True)
-        }
+                            # Skip system and configuration files
+                            if any(pattern in str(item) for pattern in SKIP_PATTERNS):
+                                progress.advance()
+                                continue
+                            
+                            if item.is_file():
+                                # Double check file is truly empty
+                                try:
+                                    if item.stat().st_size == 0:
+                                        empty_files.add(str(item), item)
+                                except (OSError, IOError):
+                                    # Skip if can't access file
+                                    pass
+                            elif item.is_dir():
+                                try:
+                                    # Check if directory is truly empty (no hidden files)
+                                    if not any(item.iterdir()):
+                                        empty_dirs.add(str(item), item)
+                                except (OSError, IOError):
+                                    # Skip if can't access directory
+                                    pass
+                            progress.advance()
+                        except Exception as e:
+                            self.logger.error(f"Error checking {item}: {e}")
+                            progress.advance()
+                finally:
+                    stop_estimate.set()
+            
+            span.set("items", progress.total_processed)
+            span.set("empty_files", len(empty_files))
+            span.set("empty_dirs", len(empty_dirs))
+        
+        return {'files': empty_files, 'dirs': empty_dirs}
+
+    def _progress(self, description: str, total: int = 0, unit: str = "items") -> ProgressTracker:
+        """Create a throttled terminal progress tracker."""
+        return ProgressTracker(total=total, description=description, unit=unit, sinks=[TerminalSink()])
 
     def _format_path_for_display(self, path: Path) -> str:
         """Format path for user-friendly display."""
@@ -406,6 +660,11 @@ class CleanupAssistant:
 
     def _analyze_files_for_safety(self, items: Dict[str, List[Path]]) -> Tuple[bool, str]:
         """Analyze files for potential safety concerns."""
+        with tracer.span("safety.analyze", items=len(items['files'])):
+            return self._categorize_files_for_safety(items)
+
+    def _categorize_files_for_safety(self, items: Dict[str, List[Path]]) -> Tuple[bool, str]:
+        """Group files by risk level and print the categories."""
         try:
             # Group files by risk level
             safe_files = []
@@ -413,31 +672,33 @@ class CleanupAssistant:
             unsafe_files = []
             
             for file in items['files']:
-                name_lower = file.name.lower()
-                parent_lower = file.parent.name.lower()
+                # Each file's parent is needed twice; deriving it once keeps big lists cheap
+                parent = os.path.basename(os.path.dirname(file))
+                entry = (file.name, parent)
+                parent_lower = parent.lower()
                 
                 # Completely safe files
                 if ('node_modules' in str(file) and 
                     (file.suffix in ['.js', '.d.ts', '.txt'])):
-                    safe_files.append(file)
+                    safe_files.append(entry)
                 # Files that need caution
                 elif any(x in parent_lower for x in ['test', 'tests', 'examples']):
-                    caution_files.append(file)
+                    caution_files.append(entry)
                 # Files that might be risky
                 else:
-                    unsafe_files.append(file)
+                    unsafe_files.append(entry)
             
             print(f"\n{Fore.GREEN}Safe to delete:{Style.RESET_ALL}")
-            for f in safe_files:
-                print(f"  ✓ {f.name} (in {f.parent.name})")
+            for name, parent in safe_files:
+                print(f"  ✓ {name} (in {parent})")
             
             print(f"\n{Fore.YELLOW}Proceed with caution:{Style.RESET_ALL}")
-            for f in caution_files:
-                print(f"  ⚠️  {f.name} (in {f.parent.name})")
+            for name, parent in caution_files:
+                print(f"  ⚠️  {name} (in {parent})")
             
             print(f"\n{Fore.RED}Review carefully:{Style.RESET_ALL}")
-            for f in unsafe_files:
-                print(f"  ❌ {f.name} (in {f.parent.name})")
+            for name, parent in unsafe_files:
+                print(f"  ❌ {name} (in {parent})")
             
             return True, "Files have been categorized by safety level"
             
@@ -450,7 +711,8 @@ class CleanupAssistant:
         try:
             if is_dir:
                 # For directories, count total size of directory (should be 0)
-                size = sum(f.stat().st_size for f in item.rglob('*') if f.is_file())
+                size = sum(entry.stat().st_size for _, entries in iter_directories(item)
+                           for entry in entries if entry.is_file())
                 return f"  - {item.name}/ ({self._format_size(size)})"
             else:
                 # For files, just get the file size (should be 0)
@@ -459,8 +721,8 @@ class CleanupAssistant:
         except Exception:
             return f"  - {item.name} (size unknown)"
 
-    def _create_cleanup_directory(self) -> Path:
-        """Create a dated cleanup directory."""
+    def _cleanup_directory_path(self) -> Path:
+        """Path of today's cleanup directory (not created)."""
         # Create base name based on OS
         base_name = "mac-clean" if os.name == "posix" else "pc-clean"
         
@@ -469,48 +731,57 @@ class CleanupAssistant:
         dir_name = f"{base_name}-{date_str}"
         
         # Create in current directory
-        cleanup_dir = self.current_path / dir_name
+        return self.current_path / dir_name
+
+    def _create_cleanup_directory(self) -> Path:
+        """Create a dated cleanup directory."""
+        cleanup_dir = self._cleanup_directory_path()
         cleanup_dir.mkdir(exist_ok=True)
-        
         return cleanup_dir
 
+    def _cleanup_name(self, item: Path, expect: Dict) -> str:
+        """Name an item gets in the cleanup directory: its size is appended."""
+        if expect.get('type') == 'dir':
+            # Planned directories must be empty, so their total size is 0
+            return f"{item.name}-{self._format_size(0)}"
+        size = self._format_size(expect.get('size', 0))
+        return f"{item.stem}-{size}{item.suffix}"
+
+    def _execute_plan(self, plan: CleanupPlan) -> PlanResult:
+        """Run a plan in parallel with terminal progress."""
+        with self._progress("Processing", total=len(plan.ops), unit="ops") as pbar:
+            return PlanExecutor(progress=pbar).execute(plan)
+
     def _move_to_cleanup_dir(self, items: Dict[str, List[Path]], cleanup_dir: Path) -> Tuple[List[str], List[str]]:
         """Move items to cleanup directory with size in name."""
+        plan = compile_plan(items, 'move', root=self.current_path, cleanup_dir=cleanup_dir,
+                            name_for=self._cleanup_name)
+        outcome = self._execute_plan(plan)
         moved_files = []
         moved_dirs = []
-        
-        # Move files
-        for file in items['files']:
-            try:
-                size = self._format_size(file.stat().st_size)
-                new_name = f"{file.stem}-{size}{file.suffix}"
-                new_path = cleanup_dir / new_name
-                file.rename(new_path)
-                moved_files.append(f"{file.name} -> {new_name}")
-            except Exception as e:
-                self.logger.error(f"Error moving file {file}: {e}")
-        
-        # Move directories
-        for directory in items['dirs']:
-            try:
-                # Calculate total size (should be 0 for empty dirs)
-                size = self._format_size(sum(f.stat().st_size for f in directory.rglob('*') if f.is_file()))
-                new_name = f"{directory.name}-{size}"
-                new_path = cleanup_dir / new_name
-                directory.rename(new_path)
-                moved_dirs.append(f"{directory.name} -> {new_name}")
-            except Exception as e:
-                self.logger.error(f"Error moving directory {directory}: {e}")
-        
+        for r in outcome.results:
+            if r.op.op != 'move':
+                continue
+            if r.status == 'done':
+                moved = moved_dirs if r.op.expect.get('type') == 'dir' else moved_files
+                moved.append(f"{os.path.basename(r.op.path)} -> {os.path.basename(r.op.dst)}")
+            else:
+                self.logger.error(f"Error moving {r.op.path}: {r.detail}")
         return moved_files, moved_dirs
 
     def _delete_empty_items(self, items: Dict[str, List[Path]]) -> str:
         """Delete empty files and directories with safety options."""
+        with tracer.span("delete.empty_items", path=str(self.current_path),
+                         items=len(items['files']) + len(items['dirs'])):
+            return self._run_empty_item_deletion(items)
+
+    def _run_empty_item_deletion(self, items: Dict[str, List[Path]]) -> str:
+        """Confirm with the user, then compile and execute a cleanup plan."""
         # First show summary and educational message
         print(f"\n{Fore.CYAN}About Empty Files and Directories:{Style.RESET_ALL}")
         print("- Empty files (0 bytes) are safe to delete and won't harm your system")
         print("- Empty directories contain no files or hidden files")
-        print("- Deletion can't be undone, but empty files have no content to lose")
+        print("- Type 'undo' afterwards to restore the last cleanup")
         
         if items['files']:
             print(f"\n{Fore.CYAN}Empty files found ({len(items['files'])}):{Style.RESET_ALL}")
@@ -549,95 +820,149 @@ class CleanupAssistant:
             if confirm.lower() != 'yes':
                 return f"{Fore.YELLOW}Operation cancelled.{Style.RESET_ALL}"
         
-        if choice == "1":  # Move to Trash/Recycle Bin
-            try:
-                # Create cleanup directory
-                cleanup_dir = self._create_cleanup_directory()
-                print(f"\n{Fore.CYAN}Creating cleanup directory: {cleanup_dir.name}{Style.RESET_ALL}")
-                
-                # Move items to cleanup directory
-                moved_files, moved_dirs = self._move_to_cleanup_dir(items, cleanup_dir)
-                
-                # Send entire cleanup directory to trash
-                send2trash(str(cleanup_dir))
-                
-                # Prepare result message
-                result = []
-                if moved_files:
-                    result.append(f"\n{Fore.GREEN}Moved files to trash:{Style.RESET_ALL}")
-                    result.extend(f"  - {f}" for f in moved_files)
-                if moved_dirs:
-                    result.append(f"\n{Fore.GREEN}Moved directories to trash:{Style.RESET_ALL}")
-                    result.extend(f"  - {d}" for d in moved_dirs)
-                
-                result.append(f"\n{Fore.GREEN}All items have been organized in {cleanup_dir.name} and moved to trash{Style.RESET_ALL}")
-                result.append("You can restore them if needed.")
-                
-                return "\n".join(result)
-                
-            except Exception as e:
-                return f"{Fore.RED}Error organizing items: {str(e)}{Style.RESET_ALL}"
-        
-        deleted_files = []
-        deleted_dirs = []
-        errors = []
-        
-        # Delete files first
-        if items['files']:
-            with tqdm(total=len(items['files']), desc="Processing files", unit="files") as pbar:
-                for file in items['files']:
-                    try:
-                        # One final check before deletion
-                        if file.stat().st_size == 0:
-                            if choice == "1":
-                                send2trash(str(file))
-                                deleted_files.append(f"{self._format_path_for_display(file)} (moved to trash)")
-                            else:
-                                file.unlink()
-                                deleted_files.append(f"{self._format_path_for_display(file)} (deleted)")
-                        pbar.update(1)
-                    except Exception as e:
-                        errors.append(f"{file.name}: {e}")
-                        pbar.update(1)
-        
-        # Then delete directories
-        if items['dirs']:
-            with tqdm(total=len(items['dirs']), desc="Processing directories", unit="dirs") as pbar:
-                for directory in items['dirs']:
-                    try:
-                        # One final check before deletion
-                        if not any(directory.iterdir()):
-                            if choice == "1":
-                                send2trash(str(directory))
-                                deleted_dirs.append(f"{directory.name}/ (moved to trash)")
-                            else:
-                                directory.rmdir()
-                                deleted_dirs.append(f"{directory.name}/ (deleted)")
-                        pbar.update(1)
-                    except Exception as e:
-                        errors.append(f"{directory.name}: {e}")
-                        pbar.update(1)
+        try:
+            plan = self._compile_empty_item_plan(items, 'trash' if choice == "1" else 'delete')
+            return self._format_plan_result(plan, self._execute_plan(plan))
+        except Exception as e:
+            return f"{Fore.RED}Error organizing items: {str(e)}{Style.RESET_ALL}"
+
+    def _compile_empty_item_plan(self, items: Dict[str, List[Path]], action: str) -> CleanupPlan:
+        """Compile empty items into a 'trash' or 'delete' plan."""
+        if action == 'trash':
+            cleanup_dir = self._cleanup_directory_path()
+            print(f"\n{Fore.CYAN}Creating cleanup directory: {cleanup_dir.name}{Style.RESET_ALL}")
+            return compile_plan(items, 'trash', root=self.current_path, cleanup_dir=cleanup_dir,
+                                name_for=self._cleanup_name)
+        return compile_plan(items, 'delete', root=self.current_path)
+
+    def _format_plan_result(self, plan: CleanupPlan, outcome: PlanResult) -> str:
+        """Summarize an executed plan the way the interactive cleanup reports it."""
+        processed_files = []
+        processed_dirs = []
+        for r in outcome.done:
+            is_dir = r.op.expect.get('type') == 'dir'
+            if r.op.op == 'move':
+                line = f"{os.path.basename(r.op.path)} -> {os.path.basename(r.op.dst)}"
+            elif r.op.op in ('delete_file', 'rmdir'):
+                # The item is gone, so there is nothing left to stat for display
+                line = f"{os.path.basename(r.op.path)}{'/' if is_dir else ''} (deleted)"
+            else:
+                continue
+            (processed_dirs if is_dir else processed_files).append(line)
+        errors = [f"{os.path.basename(r.op.path)}: {r.detail}" for r in outcome.problems]
         
         # Prepare result message
         result = []
-        if deleted_files:
-            result.append(f"\n{Fore.GREEN}Processed files:{Style.RESET_ALL}")
-            result.extend(f"  - {f}" for f in deleted_files)
-        if deleted_dirs:
-            result.append(f"\n{Fore.GREEN}Processed directories:{Style.RESET_ALL}")
-            result.extend(f"  - {d}" for d in deleted_dirs)
+        verb = "Moved" if plan.action == 'trash' else "Processed"
+        if processed_files:
+            result.append(f"\n{Fore.GREEN}{verb} files{' to trash' if plan.action == 'trash' else ''}:{Style.RESET_ALL}")
+            result.extend(f"  - {f}" for f in processed_files)
+        if processed_dirs:
+            result.append(f"\n{Fore.GREEN}{verb} directories{' to trash' if plan.action == 'trash' else ''}:{Style.RESET_ALL}")
+            result.extend(f"  - {d}" for d in processed_dirs)
         if errors:
             result.append(f"\n{Fore.RED}Errors:{Style.RESET_ALL}")
             result.extend(f"  - {e}" for e in errors)
+        if not processed_files and not processed_dirs:
+            return "\n".join(result) if result else f"{Fore.YELLOW}No items were processed.{Style.RESET_ALL}"
         
         # Add summary message
-        if choice == "1":
-            result.append(f"\n{Fore.GREEN}Items have been moved to your Trash/Recycle Bin{Style.RESET_ALL}")
-            result.append("You can restore them if needed.")
+        if plan.action == 'trash':
+            cleanup_name = os.path.basename(plan.ops[-1].path)
+            result.append(f"\n{Fore.GREEN}All items have been organized in {cleanup_name} and moved to trash{Style.RESET_ALL}")
+            result.append("You can restore them if needed, or type 'undo'.")
+        elif plan.action == 'move':
+            result.append(f"\n{Fore.GREEN}Items have been moved{Style.RESET_ALL}")
         else:
             result.append(f"\n{Fore.YELLOW}Items have been permanently deleted{Style.RESET_ALL}")
+            result.append("Type 'undo' to recreate them.")
+        
+        return "\n".join(result)
+
+    def plan_cleanup(self, action: str = 'delete', file_path: Optional[str] = None) -> str:
+        """Scan for empty items now and save a plan to apply later."""
+        items = self._find_empty_items()
+        if not items['files'] and not items['dirs']:
+            return f"{Fore.GREEN}No empty files or folders found.{Style.RESET_ALL}"
+        plan = self._compile_empty_item_plan(items, action)
+        path = plan.save(file_path)
+        counts = ", ".join(f"{n} {op}" for op, n in plan.summary().items())
+        return (f"{Fore.GREEN}Plan written to: {path}{Style.RESET_ALL}\n"
+                f"  {len(plan.ops)} operations ({counts})\n"
+                f"Review it, then run 'apply plan {path}'")
+
+    def show_artifacts(self) -> str:
+        """Rank regenerable build artifacts below the current directory by reclaimable size."""
+        from core.artifacts import ArtifactScanner
+        
+        try:
+            with tracer.span("scan.artifacts", path=str(self.current_path)) as span:
+                artifacts = ArtifactScanner().scan(self.current_path)
+                span.set("items", len(artifacts))
+            total = sum(artifact.bytes for artifact in artifacts)
+            lines = (f"  {'' if a.exact else '~'}{self._format_size(a.bytes):>10}  "
+                     f"{os.path.relpath(a.path, self.current_path)}/ ({a.kind}, {a.files} files)"
+                     for a in artifacts)
+            return self._paged(f"{Fore.CYAN}Regenerable artifacts ({self._format_size(total)} reclaimable, "
+                               f"~ = estimated); 'plan artifacts' to clean them up:{Style.RESET_ALL}",
+                               lines, f"{Fore.GREEN}No build artifacts found.{Style.RESET_ALL}")
+        except Exception as e:
+            return f"{Fore.RED}Error finding artifacts: {str(e)}{Style.RESET_ALL}"
+
+    def plan_artifacts(self, file_path: Optional[str] = None) -> str:
+        """Save a plan that moves every artifact into the cleanup directory and trashes it."""
+        from core.artifacts import ArtifactScanner, artifact_state
         
-        return "\n".join(result) if result else f"{Fore.YELLOW}No items were processed.{Style.RESET_ALL}"
+        artifacts = ArtifactScanner().scan(self.current_path)
+        if not artifacts:
+            return f"{Fore.GREEN}No build artifacts found.{Style.RESET_ALL}"
+        plan = compile_plan({'dirs': [Path(a.path) for a in artifacts]}, 'trash', root=self.current_path,
+                            cleanup_dir=self._cleanup_directory_path(),
+                            name_for=lambda item, expect: f"{item.parent.name}-{item.name}",
+                            state_for=artifact_state)
+        path = plan.save(file_path)
+        total = self._format_size(sum(a.bytes for a in artifacts))
+        return (f"{Fore.GREEN}Plan written to: {path}{Style.RESET_ALL}\n"
+                f"  {len(artifacts)} artifacts, about {total}\n"
+                f"Review it, then run 'apply plan {path}'")
+
+    def apply_plan(self, file_path: str) -> str:
+        """Execute a saved plan, skipping items that changed since it was made."""
+        if not file_path:
+            return f"{Fore.YELLOW}Usage: apply plan <file>{Style.RESET_ALL}"
+        try:
+            plan = CleanupPlan.load(Path(file_path).expanduser())
+        except (OSError, ValueError, KeyError) as e:
+            return f"{Fore.RED}Could not load plan: {e}{Style.RESET_ALL}"
+        return self._format_plan_result(plan, self._execute_plan(plan))
+
+    def _plan_command(self, user_input: str) -> Optional[str]:
+        """Handle 'plan empty|trash|artifacts [file]' and 'apply plan <file>' (paths keep their case)."""
+        words = user_input.split(maxsplit=2)
+        lowered = [w.lower() for w in words]
+        if lowered[:2] == ["apply", "plan"]:
+            return self.apply_plan(words[2] if len(words) > 2 else "")
+        if lowered[:2] == ["plan", "artifacts"]:
+            return self.plan_artifacts(words[2] if len(words) > 2 else None)
+        if lowered[:1] == ["plan"] and len(words) > 1 and lowered[1] in ("empty", "delete", "trash"):
+            action = 'trash' if lowered[1] == "trash" else 'delete'
+            return self.plan_cleanup(action, words[2] if len(words) > 2 else None)
+        return None
+
+    def undo(self, batch_id: Optional[str] = None) -> str:
+        """Reverse the most recent journaled cleanup (or a given batch)."""
+        try:
+            with tracer.span("journal.undo", batch=batch_id or "latest"):
+                outcome = get_journal().undo(batch_id)
+        except LookupError as e:
+            return f"{Fore.YELLOW}{e}{Style.RESET_ALL}"
+
+        result = [f"\n{Fore.GREEN}Undid batch {outcome.batch_id}:{Style.RESET_ALL}"]
+        result.extend(f"  - {note}" for note in outcome.restored)
+        if outcome.failed or outcome.skipped:
+            result.append(f"\n{Fore.RED}Could not restore:{Style.RESET_ALL}")
+            result.extend(f"  - {path}: {error}" for path, error in outcome.failed + outcome.skipped)
+        return "\n".join(result)
 
     def show_help(self) -> str:
         """Show enhanced help message."""
@@ -646,15 +971,31 @@ class CleanupAssistant:
 1. Navigation:
    - cd <path>, go to <path>: Change directory
    - ls, list: Show directory contents
+   - more: Next page of a long listing or search
    - desktop, downloads, home: Quick navigation
    
 2. File Operations:
    - find empty: Find empty files and directories
    - delete empty: Remove empty files/folders
    - cat, show content <file>: View file contents
+   - what's big here: Largest items by total size
+   - search [--all] <text|glob>: Find names via the filename index (e.g. search *.log);
+     --all also looks inside .git, node_modules and other skipped directories
+   - fuzzy [--all] <text>: Find names that nearly match (typos allowed)
+   - reindex: Rebuild the filename index for this directory
+   - grep [-i] [-E] <pattern>: Search file contents (skips .git, node_modules, binaries)
+   - view <file> [lines A-B | bytes A-B | find <text>]: Show part of a file (hexdump for binaries)
+   - head <file> [N], tail <file> [N]: First or last lines of a file
+   - plan empty|trash [file]: Save a cleanup plan to review and run later
+   - estimate: Approximate file count and size in seconds, from random samples
+   - artifacts: Rank node_modules, virtualenvs, caches and build output by size
+   - plan artifacts [file]: Save a plan that moves them to the cleanup directory and trashes it
+   - apply plan <file>: Run a saved plan (changed items are skipped)
+   - undo [batch]: Reverse the last cleanup (moves, deletes, trash)
    
 3. System Commands:
-   - !<command>: Execute system command (e.g., !echo test)
+   - !<command>: Execute system command (e.g., !echo test); Ctrl-C cancels, shell variables persist
+   - export trace [file]: Save timing spans as Chrome trace JSON
    
 4. Natural Language:
    - "What's in this directory?"
@@ -664,30 +1005,69 @@ class CleanupAssistant:
 Type 'exit' to quit
 """
 
+    def _live_index_for_current_path(self):
+        """Return the attached live index if it covers the current directory."""
+        if self.live_index is None:
+            return None
+        try:
+            return self.live_index if self.live_index.covers(self.current_path) else None
+        except Exception as e:
+            self.logger.warning(f"Live index unavailable, scanning instead: {e}")
+            return None
+
+    def show_biggest(self, limit: int = 15) -> str:
+        """Show the largest entries in the current directory by subtree size."""
+        try:
+            index = self._live_index_for_current_path()
+            if index is None:
+                # One-off parallel scan into a temporary index
+                from core.watcher import build_index
+                index = build_index([self.current_path])
+            
+            entries = index.biggest(str(self.current_path), limit)
+            if not entries:
+                return f"{Fore.GREEN}Nothing found in {self.current_path}{Style.RESET_ALL}"
+            
+            summary = index.summary(str(self.current_path))
+            output = [f"{Fore.CYAN}Largest items in {self.current_path} "
+                      f"({self._format_size(summary.get('bytes', 0))} total):{Style.RESET_ALL}"]
+            for entry in entries:
+                name = Path(entry['path']).name + ("/" if entry['is_dir'] else "")
+                output.append(f"  {self._format_size(entry['size']):>10}  {name}")
+            return "\n".join(output)
+        except Exception as e:
+            return f"{Fore.RED}Error finding large items: {str(e)}{Style.RESET_ALL}"
+
     def _find_empty_files(self) -> str:
         """Find empty files in current directory."""
         try:
-            empty_files = [f for f in self.current_path.rglob("*") 
-                          if f.is_file() and f.stat().st_size == 0]
-            
-            if not empty_files:
-                return f"{Fore.GREEN}No empty files found.{Style.RESET_ALL}"
+            index = self._live_index_for_current_path()
+            if index is not None:
+                names = (os.path.basename(p) for p in index.empty_files(str(self.current_path)))
+            else:
+                names = (entry.name for _, entries in iter_directories(self.current_path)
+                         for entry in entries
+                         if entry.is_file(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_size == 0)
             
-            return f"{Fore.CYAN}Found empty files:{Style.RESET_ALL}\n" + \
-                   "\n".join(f"  - {f.name} (0 B)" for f in empty_files)
+            return self._paged(f"{Fore.CYAN}Found empty files:{Style.RESET_ALL}",
+                               (f"  - {name} (0 B)" for name in names),
+                               f"{Fore.GREEN}No empty files found.{Style.RESET_ALL}")
         except Exception as e:
             return f"{Fore.RED}Error finding empty files: {str(e)}{Style.RESET_ALL}"
 
     def _find_empty_directories(self) -> str:
         """Find empty directories in current directory."""
         try:
-            empty_dirs = [d for d in self.current_path.rglob("*") 
-                         if d.is_dir() and not any(d.iterdir())]
-            
-            if not empty_dirs:
-                return f"{Fore.GREEN}No empty directories found.{Style.RESET_ALL}"
+            index = self._live_index_for_current_path()
+            if index is not None:
+                names = (os.path.basename(p) for p in index.empty_dirs(str(self.current_path)))
+            else:
+                root = str(self.current_path)
+                names = (os.path.basename(path) for path, entries in iter_directories(root)
+                         if not entries and path != root)
             
-            return f"{Fore.CYAN}Found empty directories:{Style.RESET_ALL}\n" + \
-                   "\n".join(f"  - {d.name}/ (0 B)" for d in empty_dirs)
+            return self._paged(f"{Fore.CYAN}Found empty directories:{Style.RESET_ALL}",
+                               (f"  - {name}/ (0 B)" for name in names),
+                               f"{Fore.GREEN}No empty directories found.{Style.RESET_ALL}")
         except Exception as e:
             return f"{Fore.RED}Error finding empty directories: {str(e)}{Style.RESET_ALL}"
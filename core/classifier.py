@@ -0,0 +1,228 @@
+"""File-type classification for cleanup reports.
+
+Most files are classified by name alone: the category for each extension
+is worked out once (from a table, then mimetypes) and memoized, and
+directories such as __pycache__ or build mark everything below them.
+Only files whose name says nothing are sniffed, by reading their first
+few bytes on a thread pool in batches.
+"""
+
+import heapq
+import logging
+import mimetypes
+import os
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+from core.scanner import iter_directories
+
+CATEGORIES = ('unknown', 'media', 'archive', 'document', 'code', 'text', 'data',
+              'executable', 'build', 'cache', 'log')
+CODES = {name: code for code, name in enumerate(CATEGORIES)}
+UNKNOWN = 0
+
+EXTENSION_CATEGORIES = {
+    'archive': ('.zip', '.tar', '.gz', '.tgz', '.bz2', '.xz', '.zst', '.7z', '.rar', '.tar.gz',
+                '.tar.bz2', '.tar.xz', '.tar.zst', '.dmg', '.iso', '.deb', '.rpm', '.whl', '.jar'),
+    'document': ('.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.odt', '.ods',
+                 '.rtf', '.epub', '.pages', '.numbers', '.key'),
+    'code': ('.py', '.js', '.ts', '.tsx', '.jsx', '.c', '.h', '.cpp', '.hpp', '.cc', '.go',
+             '.rs', '.java', '.kt', '.rb', '.php', '.sh', '.swift', '.cs', '.sql', '.css', '.html'),
+    'text': ('.txt', '.md', '.rst', '.csv', '.tsv', '.ini', '.cfg', '.toml', '.yaml', '.yml'),
+    'data': ('.json', '.xml', '.db', '.sqlite', '.sqlite3', '.parquet', '.pkl', '.npy', '.h5'),
+    'executable': ('.exe', '.dll', '.so', '.dylib', '.app', '.msi'),
+    'build': ('.o', '.obj', '.a', '.lib', '.class', '.pdb', '.map'),
+    'cache': ('.pyc', '.pyo', '.tmp', '.temp', '.swp', '.bak', '.cache', '.part', '.crdownload'),
+    'log': ('.log', '.out', '.err', '.trace'),
+}
+_EXTENSIONS = {ext: CODES[category] for category, exts in EXTENSION_CATEGORIES.items() for ext in exts}
+_COMPRESSED = {'gz', 'bz2', 'xz', 'zst'}
+
+# Everything below a directory with one of these names gets its category
+DIR_CATEGORIES = {
+    '__pycache__': 'cache', '.pytest_cache': 'cache', '.mypy_cache': 'cache', '.cache': 'cache',
+    '.tox': 'build', 'build': 'build', 'dist': 'build', 'target': 'build', '.gradle': 'build',
+    'logs': 'log',
+}
+
+# (offset, signature, category); checked in order against the first SNIFF_BYTES
+MAGIC = (
+    (0, b"\x89PNG", 'media'), (0, b"\xff\xd8\xff", 'media'), (0, b"GIF8", 'media'),
+    (0, b"ID3", 'media'), (0, b"fLaC", 'media'), (0, b"OggS", 'media'), (0, b"RIFF", 'media'),
+    (4, b"ftyp", 'media'), (0, b"\x1a\x45\xdf\xa3", 'media'),
+    (0, b"PK\x03\x04", 'archive'), (0, b"\x1f\x8b", 'archive'), (0, b"BZh", 'archive'),
+    (0, b"\xfd7zXZ\x00", 'archive'), (0, b"7z\xbc\xaf", 'archive'), (0, b"Rar!", 'archive'),
+    (0, b"\x28\xb5\x2f\xfd", 'archive'),
+    (0, b"%PDF", 'document'), (0, b"\xd0\xcf\x11\xe0", 'document'),
+    (0, b"\x7fELF", 'executable'), (0, b"MZ", 'executable'), (0, b"\xcf\xfa\xed\xfe", 'executable'),
+    (0, b"\xca\xfe\xba\xbe", 'executable'), (0, b"#!", 'code'),
+    (0, b"SQLite format 3", 'data'), (0, b"{", 'data'), (0, b"<?xml", 'data'),
+)
+SNIFF_BYTES = 32
+
+
+def extension_key(name: str) -> str:
+    """Lower-case extension used as the memo key ('.tar.gz', '.log' for rotated 'app.log.1')."""
+    stem, dot, ext = name.lower().rpartition('.')
+    if not dot or not stem:
+        return ''
+    if ext.isdigit() or ext in _COMPRESSED:
+        base, _, inner = stem.rpartition('.')
+        if inner == 'log' or (inner.isdigit() and base.endswith('.log')):
+            return '.log'
+        if inner == 'tar':
+            return f'.tar.{ext}'
+    return f'.{ext}'
+
+
+def sniff(path: str) -> int:
+    """Category code from a file's leading bytes; UNKNOWN if unreadable or unrecognised."""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(SNIFF_BYTES)
+    except OSError:
+        return UNKNOWN
+    for offset, signature, category in MAGIC:
+        if head.startswith(signature, offset):
+            return CODES[category]
+    if head and b"\0" not in head:
+        try:
+            head.decode('utf-8')
+            return CODES['text']
+        except UnicodeDecodeError:
+            pass
+    return UNKNOWN
+
+
+class TypeTable:
+    """Per-file classification stored column-wise: one byte of category per file."""
+
+    def __init__(self):
+        self.paths: List[str] = []
+        self.codes = array('B')
+        self.sizes = array('Q')
+        self.mtimes = array('d')
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def add(self, path: str, size: int, mtime: float, code: int) -> int:
+        self.paths.append(path)
+        self.codes.append(code)
+        self.sizes.append(size)
+        self.mtimes.append(mtime)
+        return len(self.paths) - 1
+
+    def category(self, i: int) -> str:
+        return CATEGORIES[self.codes[i]]
+
+    def breakdown(self) -> Dict[str, Tuple[int, int]]:
+        """{category: (files, bytes)}, largest total first."""
+        counts = [0] * len(CATEGORIES)
+        totals = [0] * len(CATEGORIES)
+        for code, size in zip(self.codes, self.sizes):
+            counts[code] += 1
+            totals[code] += size
+        present = [code for code in range(len(CATEGORIES)) if counts[code]]
+        present.sort(key=lambda code: -totals[code])
+        return {CATEGORIES[code]: (counts[code], totals[code]) for code in present}
+
+    def most_recent(self, count: int) -> List[int]:
+        """Row numbers of the count most recently modified files, newest first."""
+        return heapq.nlargest(count, range(len(self.paths)), key=self.mtimes.__getitem__)
+
+
+class FileClassifier:
+    """Classifies files by name, directory and (optionally) magic bytes.
+
+    Extensions are memoized and directory names are checked once per
+    directory, so a tree of a million files costs a dictionary lookup per
+    file plus one bounded read for each file whose name is uninformative.
+    """
+
+    def __init__(self, sniff: bool = True, workers: int = 8, batch_size: int = 256):
+        self.sniff = sniff
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.logger = logging.getLogger(__name__)
+        self._memo: Dict[str, int] = {}
+
+    def category_of(self, name: str) -> int:
+        """Category code for a file name, from the extension memo."""
+        key = extension_key(name)
+        code = self._memo.get(key)
+        if code is None:
+            code = self._memo[key] = self._classify_extension(key)
+        return code
+
+    @staticmethod
+    def _classify_extension(key: str) -> int:
+        if not key:
+            return UNKNOWN
+        if key in _EXTENSIONS:
+            return _EXTENSIONS[key]
+        mime_type = mimetypes.guess_type(f"file{key}")[0]
+        if mime_type is None:
+            return UNKNOWN
+        major, _, minor = mime_type.partition('/')
+        if major in ('image', 'video', 'audio'):
+            return CODES['media']
+        if major == 'text':
+            return CODES['text']
+        if 'zip' in minor or 'compressed' in minor or 'archive' in minor:
+            return CODES['archive']
+        return CODES['data']
+
+    @staticmethod
+    def _directory_category(relative_dir: str) -> int:
+        for part in reversed(relative_dir.split(os.sep)):
+            if part in DIR_CATEGORIES:
+                return CODES[DIR_CATEGORIES[part]]
+        return UNKNOWN
+
+    def classify_tree(self, root, skip_dirs: Set[str] = frozenset()) -> TypeTable:
+        """Walk root once and classify every regular file in it."""
+        table = TypeTable()
+        root = str(root)
+        pending: List[Tuple[int, str]] = []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="classify") as pool:
+            futures = []
+            for path, entries in iter_directories(root, skip_dirs):
+                inherited = self._directory_category(os.path.relpath(path, root))
+                for entry in entries:
+                    try:
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError as e:
+                        self.logger.debug(f"Cannot classify {entry.path}: {e}")
+                        continue
+                    code = inherited or self.category_of(entry.name)
+                    row = table.add(entry.path, st.st_size, st.st_mtime, code)
+                    if code == UNKNOWN and self.sniff and st.st_size:
+                        pending.append((row, entry.path))
+                        if len(pending) >= self.batch_size:
+                            futures.append(pool.submit(self._sniff_batch, pending))
+                            pending = []
+            if pending:
+                futures.append(pool.submit(self._sniff_batch, pending))
+            for future in futures:
+                for row, code in future.result():
+                    table.codes[row] = code
+        return table
+
+    @staticmethod
+    def _sniff_batch(batch: List[Tuple[int, str]]) -> List[Tuple[int, int]]:
+        return [(row, sniff(path)) for row, path in batch]
+
+
+_default: Optional[FileClassifier] = None
+
+
+def get_classifier() -> FileClassifier:
+    """Shared classifier, so the extension memo is reused across calls."""
+    global _default
+    if _default is None:
+        _default = FileClassifier()
+    return _default
@@ -1,5 +1,6 @@
 """Constants used throughout the application."""
 
+import os
 from pathlib import Path
 
 # Directories to skip during cleanup
@@ -10,6 +11,34 @@ SKIP_DIRS = {
     '__pycache__'
 }
 
+# Path fragments never reported as empty items (packaging markers, VCS, caches)
+EMPTY_ITEM_SKIP_PATTERNS = {
+    'venv', '__pycache__', '.git',
+    'py.typed', '__init__.py', '.pytest_cache',
+    'REQUESTED', 'dist-info', '$RECYCLE.BIN'
+}
+
+# Interactive output: lines per page ('more' shows the next) and the most results kept
+PAGE_SIZE = 50
+RESULT_LIMIT = 10_000
+# Directories changed this recently may change again within the same mtime tick,
+# so an unchanged mtime does not yet prove their listing is current
+MTIME_SETTLE_NS = 2_000_000_000
+# Seconds a filename search index is trusted before 'search' refreshes it
+SEARCH_INDEX_MAX_AGE = 30.0
+# Seconds a measured build-artifact size is reused while its directory is unchanged
+ARTIFACT_SIZE_MAX_AGE = 24 * 3600.0
+# Bytes of candidate paths a scan keeps in memory before spilling sorted runs to disk
+SPILL_MEMORY_BUDGET = 64 * 1024 * 1024
+# Items one cleanup plan takes on; its ops are held in memory and saved as one file
+PLAN_MAX_OPS = 1_000_000
+
 # Default paths
 DEFAULT_LOG_DIR = Path('logs')
-DEFAULT_CONFIG_DIR = Path('config') 
\ No newline at end of file
+DEFAULT_CONFIG_DIR = Path('config')
+DEFAULT_CACHE_DIR = Path('cache')
+
+# Unix socket served by the watch daemon (main.py --daemon). The temp dir is read
+# from the environment: tempfile.gettempdir() probes the filesystem at import.
+_TMP_DIR = os.environ.get('TMPDIR') or os.environ.get('TEMP') or os.environ.get('TMP') or '/tmp'
+DEFAULT_WATCH_SOCKET = Path(_TMP_DIR) / f"ai-clean-cpu-{os.getuid() if hasattr(os, 'getuid') else 'user'}.sock"
@@ -0,0 +1,169 @@
+"""Parallel file-content search with memory-mapped reads.
+
+Files are found by a lazy walk that prunes SKIP_DIRS like the scanners,
+searched on a thread pool and streamed back in walk order, so the first
+matches are available while the rest of the tree is still being read.
+Files whose first block contains a NUL byte are treated as binary and
+skipped.
+"""
+
+import itertools
+import logging
+import mmap
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterator, List, Set
+
+from core.constants import SKIP_DIRS
+from core.scanner import iter_directories
+
+SNIFF_BYTES = 8192
+# Files up to this size are read into memory; larger ones are mapped
+MMAP_THRESHOLD = 1024 * 1024
+COUNT_CHUNK = 16 * 1024 * 1024
+MAX_LINE_CHARS = 200
+
+
+@dataclass
+class ContentMatch:
+    """One matching line."""
+
+    path: str
+    line_no: int
+    line: str
+
+    def __str__(self) -> str:
+        return f"{self.path}:{self.line_no}: {self.line}"
+
+
+def is_binary(block: bytes) -> bool:
+    """Binary sniffing from the first block: text files do not contain NUL bytes."""
+    return b"\0" in block
+
+
+class ContentSearcher:
+    """Literal or regex search over file contents.
+
+    Literal, case-sensitive patterns use the buffer's own find(); everything
+    else goes through a compiled bytes regex (multi-line, so ^ and $ anchor
+    at line boundaries). At most max_per_file matches are reported per file.
+    """
+
+    def __init__(self, pattern: str, regex: bool = False, ignore_case: bool = False,
+                 workers: int = 8, max_per_file: int = 100, skip_dirs: Set[str] = SKIP_DIRS):
+        if not pattern:
+            raise ValueError("Empty search pattern")
+        self.pattern = pattern
+        raw = pattern.encode('utf-8', 'surrogateescape')
+        self.literal = None if regex or ignore_case else raw
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        self.regex = re.compile(raw if regex else re.escape(raw), flags)
+        self.workers = max(1, workers)
+        self.max_per_file = max_per_file
+        self.skip_dirs = skip_dirs
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.files_searched = 0
+        self.binary_skipped = 0
+        self.errors = 0
+
+    def _spans(self, data) -> Iterator[int]:
+        """Start offsets of matches in data."""
+        if self.literal is not None:
+            pos = data.find(self.literal)
+            while pos != -1:
+                yield pos
+                pos = data.find(self.literal, pos + 1)
+        else:
+            for match in self.regex.finditer(data):
+                yield match.start()
+
+    @staticmethod
+    def _count_lines(data, start: int, end: int) -> int:
+        count = 0
+        for offset in range(start, end, COUNT_CHUNK):
+            count += data[offset:min(end, offset + COUNT_CHUNK)].count(b"\n")
+        return count
+
+    def iter_matches(self, path: str, data) -> Iterator[ContentMatch]:
+        """Matching lines of a bytes-like buffer (bytes or mmap), in order, one per line."""
+        line_no, counted_to = 1, 0
+        last_line_start = -1
+        for start in self._spans(data):
+            line_start = data.rfind(b"\n", 0, start) + 1
+            if line_start == last_line_start:
+                continue  # one report per line
+            line_end = data.find(b"\n", start)
+            if line_end == -1:
+                line_end = len(data)
+            line_no += self._count_lines(data, counted_to, line_start)
+            counted_to = line_start
+            last_line_start = line_start
+            text = data[line_start:min(line_end, line_start + MAX_LINE_CHARS * 4)]
+            line = text.decode('utf-8', 'replace').rstrip("\r")[:MAX_LINE_CHARS]
+            yield ContentMatch(path, line_no, line)
+
+    def _search_buffer(self, path: str, data) -> List[ContentMatch]:
+        return list(itertools.islice(self.iter_matches(path, data), self.max_per_file))
+
+    def search_file(self, path: str) -> List[ContentMatch]:
+        """Matches in one file; binary and unreadable files yield none."""
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                head = f.read(size if size <= MMAP_THRESHOLD else SNIFF_BYTES)
+                if not head:
+                    return []
+                binary = is_binary(head[:SNIFF_BYTES])
+                with self.lock:
+                    if binary:
+                        self.binary_skipped += 1
+                    else:
+                        self.files_searched += 1
+                if binary:
+                    return []
+                if size <= MMAP_THRESHOLD:
+                    return self._search_buffer(path, head)
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if hasattr(mm, 'madvise'):
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    return self._search_buffer(path, mm)
+        except (OSError, ValueError) as e:
+            with self.lock:
+                self.errors += 1
+            self.logger.debug(f"Cannot search {path}: {e}")
+            return []
+
+    def _files(self, root) -> Iterator[str]:
+        for _, entries in iter_directories(root, self.skip_dirs):
+            for entry in entries:
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        yield entry.path
+                except OSError:
+                    continue
+
+    def search(self, root) -> Iterator[ContentMatch]:
+        """Stream matches under root in walk order while later files are searched.
+
+        At most a few files per worker are in flight, so memory stays
+        bounded; closing the iterator early cancels the outstanding work.
+        """
+        window = self.workers * 4
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="content-search")
+        pending = deque()
+        try:
+            for path in self._files(root):
+                pending.append(pool.submit(self.search_file, path))
+                while len(pending) >= window or (pending and pending[0].done()):
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=False)
@@ -0,0 +1,140 @@
+"""Physical device detection and per-device scan concurrency limits."""
+
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+NETWORK_FS_TYPES = {
+    'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'fuse.sshfs', 'ceph', 'glusterfs',
+    'fuse.glusterfs', 'lustre', 'gpfs', 'beegfs', '9p',
+}
+
+# Worker threads per device kind. Seek-bound spinning disks get one or two
+# workers to avoid thrashing; NVMe and network filesystems need many
+# outstanding requests to reach their throughput.
+DEFAULT_CONCURRENCY = {
+    'nvme': 32,
+    'network': 32,
+    'ssd': 16,
+    'hdd': 2,
+    'memory': 8,
+    'unknown': 4,
+}
+
+
+class DeviceInfo:
+    """What we know about the device behind an st_dev number."""
+
+    def __init__(self, dev: int, kind: str = 'unknown', fs_type: str = '',
+                 mount_point: str = '', name: str = ''):
+        self.dev = dev
+        self.kind = kind
+        self.fs_type = fs_type
+        self.mount_point = mount_point
+        self.name = name
+
+    def __repr__(self) -> str:
+        return (f"DeviceInfo(dev={os.major(self.dev)}:{os.minor(self.dev)}, kind={self.kind!r}, "
+                f"fs={self.fs_type!r}, mount={self.mount_point!r}, name={self.name!r})")
+
+
+def _read_mountinfo(mountinfo: str = '/proc/self/mountinfo') -> Dict[str, Dict[str, str]]:
+    """Map 'major:minor' to the mount point and filesystem type (last mount wins)."""
+    mounts = {}
+    try:
+        with open(mountinfo) as f:
+            for line in f:
+                left, _, right = line.partition(' - ')
+                fields = left.split()
+                rest = right.split()
+                if len(fields) < 5 or not rest:
+                    continue
+                mounts[fields[2]] = {
+                    'mount_point': fields[4].replace('\\040', ' '),
+                    'fs_type': rest[0],
+                    'source': rest[1] if len(rest) > 1 else '',
+                }
+    except OSError:
+        pass
+    return mounts
+
+
+def _block_device_kind(major: int, minor: int, sys_root: str = '/sys') -> Optional[Dict[str, str]]:
+    """Classify a block device as nvme, ssd or hdd via sysfs."""
+    dev_dir = Path(sys_root) / 'dev' / 'block' / f"{major}:{minor}"
+    try:
+        real = dev_dir.resolve(strict=True)
+    except OSError:
+        return None
+
+    # Partitions have no queue/ of their own; the parent disk does
+    queue = real / 'queue'
+    if not queue.exists():
+        queue = real.parent / 'queue'
+        real = real.parent
+    try:
+        rotational = (queue / 'rotational').read_text().strip() == '1'
+    except OSError:
+        return None
+
+    name = real.name
+    if rotational:
+        kind = 'hdd'
+    elif name.startswith('nvme'):
+        kind = 'nvme'
+    else:
+        kind = 'ssd'
+    return {'kind': kind, 'name': name}
+
+
+class DeviceRegistry:
+    """Caches device detection results per st_dev."""
+
+    def __init__(self, mountinfo: str = '/proc/self/mountinfo', sys_root: str = '/sys'):
+        self.mountinfo = mountinfo
+        self.sys_root = sys_root
+        self._mounts: Optional[Dict[str, Dict[str, str]]] = None
+        self._devices: Dict[int, DeviceInfo] = {}
+
+    def lookup(self, dev: int) -> DeviceInfo:
+        """Return DeviceInfo for an st_dev value."""
+        info = self._devices.get(dev)
+        if info is None:
+            info = self._devices[dev] = self._detect(dev)
+            logger.debug(f"Detected {info}")
+        return info
+
+    def for_path(self, path) -> DeviceInfo:
+        return self.lookup(os.stat(path).st_dev)
+
+    def _detect(self, dev: int) -> DeviceInfo:
+        if self._mounts is None:
+            self._mounts = _read_mountinfo(self.mountinfo)
+        major, minor = os.major(dev), os.minor(dev)
+        mount = self._mounts.get(f"{major}:{minor}", {})
+        fs_type = mount.get('fs_type', '')
+        info = DeviceInfo(dev, fs_type=fs_type, mount_point=mount.get('mount_point', ''),
+                          name=mount.get('source', ''))
+
+        if fs_type in NETWORK_FS_TYPES or fs_type.startswith('nfs'):
+            info.kind = 'network'
+        elif fs_type in ('tmpfs', 'ramfs'):
+            info.kind = 'memory'
+        else:
+            block = _block_device_kind(major, minor, self.sys_root)
+            if block:
+                info.kind = block['kind']
+                info.name = block['name']
+        return info
+
+
+def concurrency_for(info: DeviceInfo, overrides: Optional[Dict] = None) -> int:
+    """Worker count for a device; overrides may be keyed by kind, mount point or st_dev."""
+    overrides = overrides or {}
+    for key in (info.dev, info.mount_point, info.kind):
+        if key in overrides:
+            return max(1, int(overrides[key]))
+    return DEFAULT_CONCURRENCY.get(info.kind, DEFAULT_CONCURRENCY['unknown'])
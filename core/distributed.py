@@ -0,0 +1,512 @@
+"""Scanning one tree from many processes and hosts at once.
+
+A ScanCoordinator splits the top levels of each root into shards and
+serves them over TCP to any number of ScanWorker processes, on the same
+host or on others that mount the same storage at the same path. The
+protocol is JSON Lines, one request and one reply at a time per
+connection:
+
+    worker -> {"type": "hello", "worker": id, "token": ...}
+    coord  -> {"type": "welcome", "skip_dirs": [...], "report_every": n}
+    worker -> {"type": "next"}
+    coord  -> {"type": "shard", "id": n, "path": ..., "is_root": ..., "exclude": [...]}
+              or {"type": "wait", "seconds": s} or {"type": "done"}
+    worker -> {"type": "progress", "id": n, "dirs": n, "pending": n}
+    coord  -> {"type": "continue"} or {"type": "split"}
+    worker -> {"type": "donate", "id": n, "paths": [...]}    (after "split")
+    coord  -> {"type": "continue"}
+    worker -> {"type": "result", "id": n, "stats": {...}, "empty_dirs": [...], "errors": [...]}
+    coord  -> {"type": "ack"}
+
+A shard is a directory scanned recursively, minus the subtrees listed in
+exclude (which are shards of their own). While some worker is idle and no
+shard is queued, the next worker to report progress on a shard with
+directories still pending is asked to split it: it hands back the older
+half of its directory stack (the shallowest, usually largest subtrees),
+which are queued as new shards. A shard whose worker disconnects is
+queued again, minus the subtrees it already donated, so a lost worker
+neither loses directories nor counts any twice.
+
+Counts match DirectoryAnalyzer: roots are not counted as directories,
+and a directory is empty when it has no entries at all.
+"""
+
+import hmac
+import itertools
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from core.constants import SKIP_DIRS
+from utils.external_sort import SortedSpillStore
+from utils.io_governor import IOGovernor, get_governor
+
+# Directories a worker scans between progress reports, and the longest it goes without one
+REPORT_EVERY = 256
+PROGRESS_INTERVAL = 0.5
+# How long an idle worker waits before asking for a shard again
+WAIT_SECONDS = 0.05
+# Failed paths kept in the merged report; the error count covers all of them
+MAX_ERROR_SAMPLES = 1000
+
+Address = Tuple[str, int]
+
+
+class ProtocolError(Exception):
+    """The other side sent something this protocol does not allow."""
+
+
+def parse_address(value: str, default_host: str = '127.0.0.1') -> Address:
+    """'host:port', ':port' or 'port' -> (host, port)."""
+    host, _, port = value.rpartition(':')
+    try:
+        return host.strip('[]') or default_host, int(port)
+    except ValueError:
+        raise ValueError(f"Not a host:port address: {value!r}")
+
+
+def _cluster_token(token: Optional[str]) -> Optional[str]:
+    return token if token is not None else os.environ.get('CLEANUP_CLUSTER_TOKEN') or None
+
+
+class _Channel:
+    """One JSON object per line over a socket."""
+
+    def __init__(self, rfile, wfile):
+        self.rfile = rfile
+        self.wfile = wfile
+
+    def send(self, message_type: str, **fields) -> None:
+        self.wfile.write((json.dumps({'type': message_type, **fields}) + '\n').encode())
+        self.wfile.flush()
+
+    def receive(self, *expected: str) -> Dict:
+        line = self.rfile.readline()
+        if not line:
+            raise ConnectionError("Connection closed")
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            raise ProtocolError(f"Malformed message: {e}")
+        if expected and message.get('type') not in expected:
+            raise ProtocolError(f"Expected {' or '.join(expected)}, got {message.get('type')!r}")
+        return message
+
+
+@dataclass
+class Shard:
+    """A subtree handed to one worker at a time."""
+
+    id: int
+    path: str
+    is_root: bool = False
+    exclude: Set[str] = field(default_factory=set)
+    attempts: int = 0
+
+    def as_message(self) -> Dict:
+        return {'id': self.id, 'path': self.path, 'is_root': self.is_root, 'exclude': sorted(self.exclude)}
+
+
+@dataclass
+class ScanReport:
+    """Merged results of a distributed scan."""
+
+    total_directories: int = 0
+    files: int = 0
+    bytes: int = 0
+    errors: int = 0
+    shards: int = 0
+    splits: int = 0
+    requeued: int = 0
+    duration_s: float = 0.0
+    workers: Dict[str, Dict] = field(default_factory=dict)
+    error_samples: List[Tuple[str, str]] = field(default_factory=list)
+    empty_dirs: SortedSpillStore = field(default_factory=SortedSpillStore)
+
+    @property
+    def empty_directories(self) -> int:
+        return len(self.empty_dirs)
+
+    def as_dict(self) -> Dict:
+        return {'total_directories': self.total_directories, 'empty_directories': self.empty_directories,
+                'files': self.files, 'bytes': self.bytes, 'errors': self.errors, 'shards': self.shards,
+                'splits': self.splits, 'requeued': self.requeued, 'duration_s': self.duration_s,
+                'workers': self.workers}
+
+
+class ScanCoordinator:
+    """Hands out shards of the given roots to workers and merges what they send back.
+
+    on_result, if given, is called with (shard, result message) as each
+    shard completes, from the connection's thread.
+    """
+
+    def __init__(self, roots: Iterable, address: Address = ('127.0.0.1', 0), token: Optional[str] = None,
+                 skip_dirs: Set[str] = SKIP_DIRS, split_depth: int = 1, report_every: int = REPORT_EVERY,
+                 on_result: Optional[Callable[[Shard, Dict], None]] = None):
+        from core.scanner import ParallelScanner
+
+        self.roots = [str(root) for root in ParallelScanner.normalize_roots(roots)]
+        self.token = _cluster_token(token)
+        self.skip_dirs = skip_dirs
+        self.split_depth = max(0, split_depth)
+        self.report_every = report_every
+        self.on_result = on_result
+        self.logger = logging.getLogger(__name__)
+        self.report = ScanReport()
+        self._ids = itertools.count()
+        self._queue: Deque[Shard] = deque()
+        self._active: Dict[int, Shard] = {}
+        self._idle: Set[str] = set()
+        self._splits_requested = 0
+        self._cond = threading.Condition()
+        self._started = 0.0
+        self._server = self._make_server(address)
+
+    @property
+    def address(self) -> Address:
+        return self._server.server_address[:2]
+
+    def _make_server(self, address: Address) -> socketserver.ThreadingTCPServer:
+        coordinator = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                coordinator._serve(_Channel(self.rfile, self.wfile), self.client_address)
+
+        server = socketserver.ThreadingTCPServer(address, Handler, bind_and_activate=False)
+        server.daemon_threads = True
+        server.allow_reuse_address = True
+        try:
+            server.server_bind()
+            server.server_activate()
+        except OSError:
+            server.server_close()
+            raise
+        if self.token is None and address[0] not in ('127.0.0.1', 'localhost', '::1'):
+            self.logger.warning(f"Coordinator listening on {address[0]} without a token; "
+                                f"set CLEANUP_CLUSTER_TOKEN to restrict who can join")
+        return server
+
+    def _new_shard(self, path: str, is_root: bool = False) -> Shard:
+        return Shard(next(self._ids), path, is_root)
+
+    def _plan_shards(self) -> List[Shard]:
+        """One shard per directory split_depth levels below each root, plus the levels above them."""
+        shards = []
+        level = []
+        for root in self.roots:
+            if not os.path.isdir(root):
+                self.logger.error(f"Start directory does not exist: {root}")
+                self.report.errors += 1
+                self.report.error_samples.append((root, "not a directory"))
+                continue
+            level.append(self._new_shard(root, is_root=True))
+        for _ in range(self.split_depth):
+            shards.extend(level)
+            below = []
+            for shard in level:
+                try:
+                    with os.scandir(shard.path) as it:
+                        children = [entry.path for entry in it
+                                    if entry.name not in self.skip_dirs and entry.is_dir(follow_symlinks=False)]
+                except OSError:
+                    # The worker given this shard reports the error
+                    continue
+                shard.exclude.update(children)
+                below.extend(self._new_shard(child) for child in children)
+            level = below
+        shards.extend(level)
+        return shards
+
+    def start(self) -> Address:
+        """Queue the initial shards and accept workers in a background thread."""
+        self._started = time.monotonic()
+        with self._cond:
+            self._queue.extend(self._plan_shards())
+        self.logger.info(f"Coordinating {len(self._queue)} shards of {len(self.roots)} roots on "
+                         f"{self.address[0]}:{self.address[1]}")
+        threading.Thread(target=self._server.serve_forever, name="scan-coordinator", daemon=True).start()
+        return self.address
+
+    @property
+    def finished(self) -> bool:
+        return not self._queue and not self._active
+
+    def wait(self, timeout: Optional[float] = None) -> ScanReport:
+        """Block until every shard is merged; raises TimeoutError after timeout seconds."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.finished, timeout):
+                raise TimeoutError(f"{len(self._queue) + len(self._active)} shards unfinished")
+        self.report.duration_s = round(time.monotonic() - self._started, 3)
+        return self.report
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'ScanCoordinator':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # Per-connection protocol
+
+    def _serve(self, channel: _Channel, client) -> None:
+        shard: Optional[Shard] = None
+        splitting = False
+        worker = f"{client[0]}:{client[1]}"
+        try:
+            hello = channel.receive('hello')
+            if self.token is not None and not hmac.compare_digest(str(hello.get('token')), self.token):
+                self.logger.warning(f"Rejected worker at {worker}: bad token")
+                channel.send('error', error="bad token")
+                return
+            worker = f"{hello.get('worker') or worker}"
+            with self._cond:
+                self.report.workers.setdefault(worker, {'shards': 0, 'directories': 0})
+            channel.send('welcome', skip_dirs=sorted(self.skip_dirs), report_every=self.report_every)
+            while True:
+                message = channel.receive('next', 'progress', 'donate', 'result')
+                kind = message['type']
+                if kind == 'next':
+                    shard = self._next_shard(worker)
+                    if shard is not None:
+                        channel.send('shard', **shard.as_message())
+                    elif self.finished:
+                        channel.send('done')
+                        return
+                    else:
+                        channel.send('wait', seconds=WAIT_SECONDS)
+                elif shard is None or message.get('id') != shard.id:
+                    raise ProtocolError(f"{kind} for a shard that is not assigned to this worker")
+                elif kind == 'progress':
+                    splitting = self._should_split(message)
+                    channel.send('split' if splitting else 'continue')
+                elif kind == 'donate':
+                    self._donate(shard, message.get('paths') or [])
+                    splitting = False
+                    channel.send('continue')
+                else:
+                    self._merge(worker, shard, message)
+                    shard = None
+                    channel.send('ack')
+        except (ConnectionError, ProtocolError, OSError, ValueError) as e:
+            self.logger.warning(f"Worker {worker} dropped: {e}")
+        finally:
+            with self._cond:
+                self._idle.discard(worker)
+                if splitting:
+                    self._splits_requested -= 1
+                if shard is not None and self._active.pop(shard.id, None) is not None:
+                    # Scan it again elsewhere; donated subtrees stay excluded
+                    self._queue.appendleft(shard)
+                    self.report.requeued += 1
+                self._cond.notify_all()
+
+    def _next_shard(self, worker: str) -> Optional[Shard]:
+        with self._cond:
+            if not self._queue:
+                self._idle.add(worker)
+                return None
+            self._idle.discard(worker)
+            shard = self._queue.popleft()
+            shard.attempts += 1
+            self._active[shard.id] = shard
+            return shard
+
+    def _should_split(self, progress: Dict) -> bool:
+        with self._cond:
+            wanted = len(self._idle) - len(self._queue) - self._splits_requested
+            if wanted <= 0 or progress.get('pending', 0) < 2:
+                return False
+            self._splits_requested += 1
+            return True
+
+    def _donate(self, shard: Shard, paths: List[str]) -> None:
+        with self._cond:
+            self._splits_requested -= 1
+            for path in paths:
+                shard.exclude.add(path)
+                self._queue.append(self._new_shard(path))
+            if paths:
+                self.report.splits += 1
+            self._cond.notify_all()
+
+    def _merge(self, worker: str, shard: Shard, result: Dict) -> None:
+        stats = result.get('stats') or {}
+        with self._cond:
+            if self._active.pop(shard.id, None) is None:
+                return
+            report = self.report
+            report.shards += 1
+            report.total_directories += stats.get('directories', 0)
+            report.files += stats.get('files', 0)
+            report.bytes += stats.get('bytes', 0)
+            report.errors += stats.get('errors', 0)
+            report.empty_dirs.extend(result.get('empty_dirs') or [])
+            room = MAX_ERROR_SAMPLES - len(report.error_samples)
+            report.error_samples.extend(tuple(e) for e in (result.get('errors') or [])[:max(0, room)])
+            totals = report.workers[worker]
+            totals['shards'] += 1
+            totals['directories'] += stats.get('directories', 0)
+            self._cond.notify_all()
+        if self.on_result is not None:
+            self.on_result(shard, result)
+
+
+class ScanWorker:
+    """Connects to a coordinator and scans shards until there are none left."""
+
+    def __init__(self, address: Address, token: Optional[str] = None, worker_id: Optional[str] = None,
+                 governor: Optional[IOGovernor] = None, connect_timeout: float = 10.0):
+        self.address = address
+        self.token = _cluster_token(token)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        self.governor = governor or get_governor()
+        self.connect_timeout = connect_timeout
+        self.logger = logging.getLogger(__name__)
+        self.skip_dirs: Set[str] = set(SKIP_DIRS)
+        self.report_every = REPORT_EVERY
+        self.shards_done = 0
+
+    def run(self) -> int:
+        """Scan shards until the coordinator is done; returns how many this worker completed."""
+        with socket.create_connection(self.address, timeout=self.connect_timeout) as sock:
+            # Scanning a shard can take far longer than any connect timeout
+            sock.settimeout(None)
+            with sock.makefile('rb') as rfile, sock.makefile('wb') as wfile:
+                channel = _Channel(rfile, wfile)
+                channel.send('hello', worker=self.worker_id, token=self.token)
+                welcome = channel.receive('welcome', 'error')
+                if welcome['type'] == 'error':
+                    raise ProtocolError(welcome.get('error'))
+                self.skip_dirs = set(welcome.get('skip_dirs', self.skip_dirs))
+                self.report_every = welcome.get('report_every', self.report_every)
+                while True:
+                    channel.send('next')
+                    reply = channel.receive('shard', 'wait', 'done')
+                    if reply['type'] == 'done':
+                        return self.shards_done
+                    if reply['type'] == 'wait':
+                        time.sleep(reply.get('seconds', WAIT_SECONDS))
+                        continue
+                    channel.send('result', **self.scan_shard(reply, channel))
+                    channel.receive('ack')
+                    self.shards_done += 1
+
+    def scan_shard(self, shard: Dict, channel: Optional[_Channel] = None) -> Dict:
+        """Walk one shard depth-first, reporting progress and donating subtrees when asked."""
+        shard_id, root = shard['id'], shard['path']
+        exclude = set(shard.get('exclude') or ())
+        stats = {'directories': 0, 'files': 0, 'bytes': 0, 'errors': 0}
+        empty_dirs: List[str] = []
+        errors: List[Tuple[str, str]] = []
+        stack = [root]
+        since_report = 0
+        last_report = time.monotonic()
+        while stack:
+            path = stack.pop()
+            is_root = shard.get('is_root') and path == root
+            self.governor.throttle()
+            started = time.perf_counter()
+            entries = []
+            try:
+                with os.scandir(path) as it:
+                    entries = list(it)
+            except OSError as e:
+                stats['errors'] += 1
+                errors.append((path, str(e)))
+                continue
+            finally:
+                self.governor.record_latency(time.perf_counter() - started, len(entries))
+            if not is_root:
+                stats['directories'] += 1
+                if not entries:
+                    empty_dirs.append(path)
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in self.skip_dirs and entry.path not in exclude:
+                            stack.append(entry.path)
+                        continue
+                    stats['files'] += 1
+                    stats['bytes'] += entry.stat(follow_symlinks=False).st_size
+                except OSError as e:
+                    stats['errors'] += 1
+                    errors.append((entry.path, str(e)))
+
+            since_report += 1
+            if channel is not None and stack and (since_report >= self.report_every
+                                                  or time.monotonic() - last_report >= PROGRESS_INTERVAL):
+                channel.send('progress', id=shard_id, dirs=stats['directories'], pending=len(stack))
+                if channel.receive('continue', 'split')['type'] == 'split':
+                    # The bottom of the stack holds the shallowest, least explored subtrees
+                    donated, stack = stack[:len(stack) // 2], stack[len(stack) // 2:]
+                    channel.send('donate', id=shard_id, paths=donated)
+                    channel.receive('continue')
+                since_report = 0
+                last_report = time.monotonic()
+        return {'id': shard_id, 'stats': stats, 'empty_dirs': empty_dirs,
+                'errors': errors[:MAX_ERROR_SAMPLES]}
+
+
+def run_worker(address: Address, token: Optional[str] = None) -> int:
+    """Process entry point for one worker; returns the shards it completed."""
+    return ScanWorker(address, token).run()
+
+
+def start_local_workers(coordinator: ScanCoordinator, count: int) -> List:
+    """Start count worker processes on this host for coordinator."""
+    import multiprocessing
+
+    # spawn, not fork: the coordinator's threads must not be copied into the workers
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=run_worker, args=(coordinator.address, coordinator.token),
+                                 name=f"scan-worker-{i}", daemon=True)
+                 for i in range(count)]
+    for process in processes:
+        process.start()
+    return processes
+
+
+def wait_for_workers(coordinator: ScanCoordinator, processes: List,
+                     timeout: Optional[float] = None) -> ScanReport:
+    """coordinator.wait(), but fail early once every local worker has exited.
+
+    With no local processes, waits for remote workers only.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not processes:
+                return coordinator.wait(remaining)
+            try:
+                return coordinator.wait(0.5 if remaining is None else min(0.5, remaining))
+            except TimeoutError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise
+                if not any(process.is_alive() for process in processes):
+                    raise RuntimeError("Every local scan worker exited before the scan finished")
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+
+def run_local(roots: Iterable, workers: int = 4, token: Optional[str] = None,
+              timeout: Optional[float] = None, **options) -> ScanReport:
+    """Scan roots with a coordinator and `workers` worker processes on this host."""
+    with ScanCoordinator(roots, token=token, **options) as coordinator:
+        return wait_for_workers(coordinator, start_local_workers(coordinator, max(1, workers)), timeout)
@@ -0,0 +1,134 @@
+"""Duplicate file detection: size, then partial hash, then full hash."""
+
+import hashlib
+import logging
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Tuple
+
+PARTIAL_BYTES = 64 * 1024
+CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass
+class DuplicateGroup:
+    """Files with identical content; paths[0] is the one listed first."""
+
+    size: int
+    digest: str
+    paths: List[str] = field(default_factory=list)
+
+    @property
+    def wasted_bytes(self) -> int:
+        return self.size * (len(self.paths) - 1)
+
+    def as_dict(self) -> Dict:
+        return {'size': self.size, 'digest': self.digest, 'paths': self.paths,
+                'wasted_bytes': self.wasted_bytes}
+
+
+def partial_digest(path: str, size: int, partial_bytes: int = PARTIAL_BYTES) -> bytes:
+    """Hash the first and last partial_bytes of a file (all of it when small)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        h.update(f.read(partial_bytes))
+        if size > 2 * partial_bytes:
+            f.seek(-partial_bytes, os.SEEK_END)
+            h.update(f.read(partial_bytes))
+        elif size > partial_bytes:
+            h.update(f.read())
+    return h.digest()
+
+
+def full_digest(path: str, chunk_bytes: int = CHUNK_BYTES) -> bytes:
+    """Hash a whole file in fixed-size chunks."""
+    h = hashlib.blake2b(digest_size=32)
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_bytes)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.digest()
+
+
+class DuplicateFinder:
+    """Collects candidate files, then confirms duplicates in stages.
+
+    Only files sharing a size are read at all; of those, only files whose
+    head and tail hash alike are read in full. Hard links to one inode are
+    counted once, since they already share storage.
+    """
+
+    def __init__(self, min_size: int = 1, workers: int = 8, partial_bytes: int = PARTIAL_BYTES):
+        self.min_size = min_size
+        self.workers = max(1, workers)
+        self.partial_bytes = partial_bytes
+        self.logger = logging.getLogger(__name__)
+        self.by_size: Dict[int, Dict[object, str]] = defaultdict(dict)
+        self.errors: List[Tuple[str, str]] = []
+
+    def add(self, path: str, size: int, dev: int = 0, ino: int = 0) -> None:
+        """Register a regular file. Not thread-safe; feed it from one thread or under a lock."""
+        if size < self.min_size:
+            return
+        key = (dev, ino) if ino else path
+        self.by_size[size].setdefault(key, path)
+
+    def add_entry(self, entry: os.DirEntry) -> None:
+        """Register a DirEntry if it is a regular file (symlinks are ignored)."""
+        if entry.is_file(follow_symlinks=False):
+            st = entry.stat(follow_symlinks=False)
+            self.add(entry.path, st.st_size, st.st_dev, st.st_ino)
+
+    def _hash_all(self, pool: ThreadPoolExecutor, paths: List[str], fn) -> Dict[bytes, List[str]]:
+        groups: Dict[bytes, List[str]] = defaultdict(list)
+        futures = {pool.submit(fn, path): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                groups[future.result()].append(path)
+            except OSError as e:
+                self.errors.append((path, str(e)))
+                self.logger.warning(f"Cannot read {path}: {e}")
+        return groups
+
+    def _confirm(self, pool: ThreadPoolExecutor, size: int, paths: List[str]) -> List[DuplicateGroup]:
+        confirmed = []
+        partial = self._hash_all(pool, paths, lambda p: partial_digest(p, size, self.partial_bytes))
+        for digest, candidates in partial.items():
+            if len(candidates) < 2:
+                continue
+            if size <= 2 * self.partial_bytes:
+                # The partial hash already covered the whole file
+                full = {digest: candidates}
+            else:
+                full = self._hash_all(pool, candidates, full_digest)
+            for digest, same in full.items():
+                if len(same) > 1:
+                    confirmed.append(DuplicateGroup(size, digest.hex(), sorted(same)))
+        return confirmed
+
+    def groups(self) -> Iterator[DuplicateGroup]:
+        """Yield duplicate groups as each size class is confirmed (largest sizes start first)."""
+        candidates = sorted(((size, list(files.values())) for size, files in self.by_size.items()
+                             if len(files) > 1), reverse=True)
+        with ThreadPoolExecutor(max_workers=self.workers) as hash_pool, \
+                ThreadPoolExecutor(max_workers=self.workers) as size_pool:
+            futures = [size_pool.submit(self._confirm, hash_pool, size, paths) for size, paths in candidates]
+            for future in as_completed(futures):
+                yield from future.result()
+
+
+def find_duplicates(paths: List[str], min_size: int = 1, workers: int = 8) -> List[DuplicateGroup]:
+    """Convenience wrapper: duplicate groups among the given files."""
+    finder = DuplicateFinder(min_size=min_size, workers=workers)
+    for path in paths:
+        try:
+            st = os.lstat(path)
+        except OSError:
+            continue
+        finder.add(path, st.st_size, st.st_dev, st.st_ino)
+    return sorted(finder.groups(), key=lambda g: g.wasted_bytes, reverse=True)
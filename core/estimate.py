@@ -0,0 +1,244 @@
+"""Tree size estimates from random descents (Knuth's estimator).
+
+One probe walks from the root to a leaf, choosing a random subdirectory
+at each level, and weights what it sees in each directory by the product
+of the branching factors above it. The mean over many probes is an
+unbiased estimate of the tree's totals; its standard error gives a
+confidence interval, and probing stops once that interval is narrow
+enough. Listings are memoized, so the levels near the root, which every
+probe passes through, are read once, and once every directory below a
+node has been read that subtree's exact totals replace further sampling
+of it; a small tree is therefore counted exactly.
+
+Estimates are unbiased but heavy-tailed on very lopsided trees (one huge
+directory deep below a single branch), where the interval can be too
+optimistic for small probe counts; min_probes guards against that.
+"""
+
+import logging
+import math
+import os
+import random
+import statistics
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from core.constants import SKIP_DIRS
+
+# Directory listings kept between probes
+LISTING_CACHE_SIZE = 200_000
+
+
+@dataclass
+class TreeEstimate:
+    """Estimated totals with (low, high) confidence intervals."""
+
+    files: float
+    dirs: float
+    bytes: float
+    files_interval: Tuple[float, float]
+    bytes_interval: Tuple[float, float]
+    confidence: float
+    probes: int
+    directories_read: int
+    elapsed_s: float
+
+    @property
+    def relative_error(self) -> float:
+        """Half-width of the file-count interval relative to the estimate."""
+        low, high = self.files_interval
+        return (high - low) / 2 / self.files if self.files else 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            'files': round(self.files), 'dirs': round(self.dirs), 'bytes': round(self.bytes),
+            'files_interval': [round(v) for v in self.files_interval],
+            'bytes_interval': [round(v) for v in self.bytes_interval],
+            'confidence': self.confidence, 'probes': self.probes,
+            'directories_read': self.directories_read, 'elapsed_s': round(self.elapsed_s, 3),
+        }
+
+
+class _Running:
+    """Welford's running mean and variance."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def stderr(self) -> float:
+        return math.sqrt(self.m2 / (self.n - 1) / self.n) if self.n > 1 else math.inf
+
+
+class TreeEstimator:
+    """Estimates file count, directory count and bytes under root by random descent."""
+
+    def __init__(self, root, skip_dirs: Set[str] = SKIP_DIRS, seed: Optional[int] = None):
+        self.root = os.path.abspath(root)
+        self.skip_dirs = skip_dirs
+        self.rng = random.Random(seed)
+        self.logger = logging.getLogger(__name__)
+        self._listings: Dict[str, Tuple[int, int, List[str]]] = {}
+        # Exact (files, dirs, bytes) of fully read subtrees, and progress towards them
+        self._exact: Dict[str, Tuple[int, int, int]] = {}
+        self._partial: Dict[str, List[int]] = {}
+
+    def _listing(self, path: str) -> Tuple[int, int, List[str]]:
+        """(files, bytes, subdirectories) directly in path."""
+        cached = self._listings.get(path)
+        if cached is not None:
+            return cached
+        files = nbytes = 0
+        subdirs = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in self.skip_dirs:
+                                subdirs.append(entry.path)
+                        else:
+                            files += 1
+                            nbytes += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError as e:
+            self.logger.debug(f"Cannot list {path}: {e}")
+        listing = (files, nbytes, subdirs)
+        if len(self._listings) < LISTING_CACHE_SIZE:
+            self._listings[path] = listing
+            # [subdirs not yet exact, files, dirs, bytes]
+            self._partial[path] = [len(subdirs), files, len(subdirs), nbytes]
+            self._settle(path)
+        return listing
+
+    def _settle(self, path: str) -> None:
+        """Record path's totals as exact if all its subdirectories are, and pass them upwards."""
+        while path in self._partial and self._partial[path][0] == 0:
+            _, files, dirs, nbytes = self._partial.pop(path)
+            self._exact[path] = (files, dirs, nbytes)
+            if path == self.root:
+                return
+            parent = os.path.dirname(path)
+            totals = self._partial.get(parent)
+            if totals is None:
+                return
+            totals[0] -= 1
+            totals[1] += files
+            totals[2] += dirs
+            totals[3] += nbytes
+            path = parent
+
+    def probe(self) -> Tuple[float, float, float]:
+        """One random root-to-leaf descent: (files, dirs, bytes) estimates."""
+        path, weight = self.root, 1
+        files = dirs = nbytes = 0.0
+        while True:
+            exact = self._exact.get(path)
+            if exact is not None:
+                return (files + weight * exact[0], dirs + weight * exact[1], nbytes + weight * exact[2])
+            nfiles, size, subdirs = self._listing(path)
+            files += weight * nfiles
+            nbytes += weight * size
+            if not subdirs:
+                return files, dirs, nbytes
+            dirs += weight * len(subdirs)
+            weight *= len(subdirs)
+            path = self.rng.choice(subdirs)
+
+    def estimate(self, tolerance: float = 0.05, confidence: float = 0.95, min_probes: int = 30,
+                 max_probes: int = 100_000, time_budget: float = 10.0,
+                 on_update: Optional[Callable[[TreeEstimate], None]] = None,
+                 stop: Optional[threading.Event] = None) -> TreeEstimate:
+        """Probe until the file and byte intervals are within tolerance of the estimates.
+
+        Also stops after max_probes, after time_budget seconds or when stop
+        is set. on_update receives the running estimate every 32 probes.
+        """
+        z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+        started = time.monotonic()
+        files, dirs, nbytes = _Running(), _Running(), _Running()
+
+        def current() -> TreeEstimate:
+            files_half, bytes_half = z * files.stderr(), z * nbytes.stderr()
+            return TreeEstimate(files.mean, dirs.mean, nbytes.mean,
+                                (max(0.0, files.mean - files_half), files.mean + files_half),
+                                (max(0.0, nbytes.mean - bytes_half), nbytes.mean + bytes_half),
+                                confidence, files.n, len(self._listings), time.monotonic() - started)
+
+        def precise() -> bool:
+            return all(z * r.stderr() <= tolerance * r.mean or r.m2 == 0 for r in (files, nbytes))
+
+        while files.n < max_probes:
+            if self.root in self._exact:
+                # Everything has been read: the totals are known without error
+                count, ndirs, size = self._exact[self.root]
+                return TreeEstimate(count, ndirs, size, (count, count), (size, size), confidence,
+                                    files.n, len(self._listings), time.monotonic() - started)
+            f, d, b = self.probe()
+            files.add(f)
+            dirs.add(d)
+            nbytes.add(b)
+            if files.n >= min_probes and precise():
+                break
+            if files.n % 32 == 0:
+                if on_update is not None:
+                    on_update(current())
+                if time.monotonic() - started > time_budget or (stop is not None and stop.is_set()):
+                    break
+        return current()
+
+
+def estimate_in_background(root, on_estimate: Callable[[TreeEstimate], None],
+                           skip_dirs: Set[str] = SKIP_DIRS, tolerance: float = 0.1,
+                           time_budget: float = 5.0, stop: Optional[threading.Event] = None) -> threading.Event:
+    """Estimate root on a daemon thread, reporting refinements; set the returned event to stop early.
+
+    Used to give full scans a total (and so an ETA) without a counting pass.
+    Several estimates can share one stop event.
+    """
+    stop = stop or threading.Event()
+
+    def run():
+        try:
+            result = TreeEstimator(root, skip_dirs).estimate(
+                tolerance=tolerance, time_budget=time_budget, on_update=on_estimate, stop=stop)
+            if not stop.is_set():
+                on_estimate(result)
+        except Exception as e:
+            logging.getLogger(__name__).debug(f"Estimate of {root} failed: {e}")
+
+    threading.Thread(target=run, daemon=True, name="tree-estimate").start()
+    return stop
+
+
+def track_estimated_total(progress, roots, skip_dirs: Set[str] = SKIP_DIRS) -> threading.Event:
+    """Keep progress.total at the estimated entry count (files + directories) of all roots.
+
+    The estimates run in the background; set the returned event once the
+    scan is over so they stop refining a total nobody reads any more.
+    """
+    stop = threading.Event()
+    lock = threading.Lock()
+    entries: Dict[str, float] = {}
+
+    def report(root: str, estimate: TreeEstimate) -> None:
+        with lock:
+            entries[root] = estimate.files + estimate.dirs
+            total = round(sum(entries.values()))
+        if not stop.is_set():
+            progress.set_total(total)
+
+    for root in roots:
+        root = str(root)
+        estimate_in_background(root, lambda estimate, root=root: report(root, estimate), skip_dirs, stop=stop)
+    return stop
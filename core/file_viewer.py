@@ -0,0 +1,150 @@
+"""Constant-memory file viewing over mmap.
+
+Nothing is read up front except a small sample used to guess the encoding
+and spot binary content. Line positions are found on demand: the file is
+split into fixed blocks and only the newline count before each block is
+kept, so jumping to line N of a 20 GB log scans at most up to that line
+once and remembers a few bytes per megabyte.
+"""
+
+import mmap
+import os
+from array import array
+from bisect import bisect_left
+from typing import Iterator, Optional, Tuple
+
+from core.content_search import SNIFF_BYTES, ContentSearcher, is_binary
+
+BLOCK_SIZE = 1024 * 1024
+MAX_LINE_BYTES = 1024
+HEX_WIDTH = 16
+
+
+def detect_encoding(sample: bytes) -> str:
+    """Best guess from a sample: BOM-marked or valid UTF-8, otherwise Latin-1 (which never fails)."""
+    if sample.startswith(b"\xef\xbb\xbf"):
+        return 'utf-8-sig'
+    try:
+        sample.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off by the end of the sample is still UTF-8
+        if e.reason != 'unexpected end of data' or e.start < len(sample) - 3:
+            return 'latin-1'
+    return 'utf-8'
+
+
+def hexdump(data, offset: int = 0) -> Iterator[str]:
+    """Classic 16-bytes-per-row hex and ASCII rendering; offset is the address of data[0]."""
+    for start in range(0, len(data), HEX_WIDTH):
+        row = data[start:start + HEX_WIDTH]
+        hex_part = " ".join(f"{byte:02x}" for byte in row)
+        text = "".join(chr(byte) if 32 <= byte < 127 else "." for byte in row)
+        yield f"{offset + start:08x}  {hex_part:<{HEX_WIDTH * 3 - 1}}  |{text}|"
+
+
+class FileView:
+    """Read-only, memory-mapped view of one file.
+
+    Lines are decoded one at a time and cut at MAX_LINE_BYTES, so a file
+    with a multi-gigabyte line costs no more to show than any other.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._file = open(self.path, 'rb')
+        try:
+            self.size = os.fstat(self._file.fileno()).st_size
+            self.data = (mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                         if self.size else b"")
+        except (OSError, ValueError):
+            self._file.close()
+            raise
+        sample = self.data[:SNIFF_BYTES]
+        self.binary = is_binary(sample)
+        self.encoding = detect_encoding(sample)
+        # _block_lines[b] is the number of newlines before byte b * BLOCK_SIZE
+        self._block_lines = array('Q', [0])
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _decode(self, start: int, end: int) -> str:
+        truncated = end - start > MAX_LINE_BYTES
+        text = self.data[start:min(end, start + MAX_LINE_BYTES)].decode(self.encoding, 'replace')
+        return text.rstrip("\r") + (" ..." if truncated else "")
+
+    def _line_end(self, start: int) -> int:
+        end = self.data.find(b"\n", start)
+        return self.size if end == -1 else end
+
+    def _index_until(self, newlines: int) -> None:
+        """Extend the block index until it passes the given newline count or the end of the file."""
+        blocks = self._block_lines
+        while blocks[-1] < newlines and (len(blocks) - 1) * BLOCK_SIZE < self.size:
+            start = (len(blocks) - 1) * BLOCK_SIZE
+            blocks.append(blocks[-1] + self.data[start:start + BLOCK_SIZE].count(b"\n"))
+
+    def line_offset(self, line_no: int) -> Optional[int]:
+        """Byte offset where 1-based line_no starts, or None past the end of the file."""
+        if line_no <= 1:
+            return 0 if line_no == 1 and self.size else None
+        newlines = line_no - 1
+        self._index_until(newlines)
+        if self._block_lines[-1] < newlines:
+            return None
+        # The block holding the (line_no - 1)th newline
+        block = bisect_left(self._block_lines, newlines) - 1
+        pos = block * BLOCK_SIZE
+        for _ in range(newlines - self._block_lines[block]):
+            pos = self.data.find(b"\n", pos) + 1
+        return pos if pos < self.size else None
+
+    def lines(self, first: int = 1) -> Iterator[Tuple[int, str]]:
+        """(line number, text) pairs from line first to the end of the file."""
+        pos = self.line_offset(first)
+        line_no = first
+        while pos is not None and pos < self.size:
+            end = self._line_end(pos)
+            yield line_no, self._decode(pos, end)
+            pos, line_no = end + 1, line_no + 1
+
+    def tail(self, count: int) -> Iterator[str]:
+        """The last count lines, found by searching backwards from the end."""
+        end = self.size
+        if end and self.data[end - 1:end] == b"\n":
+            end -= 1
+        starts = []
+        pos = end
+        while len(starts) < count and pos > 0:
+            newline = self.data.rfind(b"\n", 0, pos)
+            starts.append(newline + 1)
+            pos = newline
+        for start in reversed(starts):
+            yield self._decode(start, min(self._line_end(start), end))
+
+    def byte_range(self, start: int, end: int) -> Iterator[str]:
+        """Bytes [start, end) as hexdump rows for binaries or decoded lines for text."""
+        start, end = max(0, start), min(end, self.size)
+        if self.binary:
+            for block in range(start, end, BLOCK_SIZE):
+                yield from hexdump(self.data[block:min(end, block + BLOCK_SIZE)], block)
+            return
+        pos = start
+        while pos < end:
+            line_end = min(self._line_end(pos), end)
+            yield self._decode(pos, line_end)
+            pos = line_end + 1
+
+    def find(self, pattern: str, regex: bool = False, ignore_case: bool = False) -> Iterator[Tuple[int, str]]:
+        """(line number, text) for each line matching pattern."""
+        searcher = ContentSearcher(pattern, regex=regex, ignore_case=ignore_case)
+        for match in searcher.iter_matches(self.path, self.data):
+            yield match.line_no, match.line
@@ -0,0 +1,213 @@
+"""In-memory index of a directory tree, kept current by incremental updates."""
+
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from core.constants import SKIP_DIRS
+
+
+class LiveIndex:
+    """File sizes, empty items and per-directory subtree totals.
+
+    Every mutation propagates its size and count deltas to the ancestor
+    directories, so queries such as "what's big here" are answered from
+    memory without walking the filesystem.
+    """
+
+    def __init__(self, roots: Iterable, skip_dirs: Set[str] = SKIP_DIRS):
+        self.roots = [os.path.abspath(r) for r in roots]
+        self.skip_dirs = skip_dirs
+        self.lock = threading.RLock()
+        self.files: Dict[str, int] = {}
+        self.children: Dict[str, Set[str]] = {}
+        self.tree_bytes: Dict[str, int] = {}
+        self.tree_files: Dict[str, int] = {}
+        self.tree_dirs: Dict[str, int] = {}
+        self.empty_file_set: Set[str] = set()
+        self.empty_dir_set: Set[str] = set()
+        self.updated_at = time.time()
+        for root in self.roots:
+            self.add_dir(root)
+
+    # -- mutation ---------------------------------------------------------
+
+    def _ancestors(self, path: str):
+        """Yield path's ancestors that are indexed, nearest first."""
+        parent = os.path.dirname(path)
+        while parent in self.children:
+            yield parent
+            if parent in self.roots:
+                return
+            next_parent = os.path.dirname(parent)
+            if next_parent == parent:
+                return
+            parent = next_parent
+
+    def _propagate(self, path: str, nbytes: int, nfiles: int, ndirs: int) -> None:
+        for ancestor in self._ancestors(path):
+            self.tree_bytes[ancestor] += nbytes
+            self.tree_files[ancestor] += nfiles
+            self.tree_dirs[ancestor] += ndirs
+
+    def _link(self, path: str) -> None:
+        parent = os.path.dirname(path)
+        siblings = self.children.get(parent)
+        if siblings is not None and path not in self.roots:
+            siblings.add(os.path.basename(path))
+            self.empty_dir_set.discard(parent)
+
+    def _unlink(self, path: str) -> None:
+        parent = os.path.dirname(path)
+        siblings = self.children.get(parent)
+        if siblings is not None:
+            siblings.discard(os.path.basename(path))
+            if not siblings and parent not in self.roots:
+                self.empty_dir_set.add(parent)
+
+    def add_dir(self, path: str) -> None:
+        """Register a directory (idempotent)."""
+        with self.lock:
+            if path in self.children:
+                return
+            self.children[path] = set()
+            self.tree_bytes[path] = 0
+            self.tree_files[path] = 0
+            self.tree_dirs[path] = 0
+            if path not in self.roots:
+                self.empty_dir_set.add(path)
+            self._link(path)
+            self._propagate(path, 0, 0, 1)
+            self.updated_at = time.time()
+
+    def set_file(self, path: str, size: int) -> None:
+        """Add a file or update its size."""
+        with self.lock:
+            old = self.files.get(path)
+            self.files[path] = size
+            if old is None:
+                self._link(path)
+                self._propagate(path, size, 1, 0)
+            elif old != size:
+                self._propagate(path, size - old, 0, 0)
+            if size == 0:
+                self.empty_file_set.add(path)
+            else:
+                self.empty_file_set.discard(path)
+            self.updated_at = time.time()
+
+    def add_placeholder(self, path: str) -> None:
+        """Record an entry that is not indexed (e.g. a skipped directory)."""
+        with self.lock:
+            self._link(path)
+
+    def remove(self, path: str) -> None:
+        """Remove a file or a whole directory subtree."""
+        with self.lock:
+            if path in self.files:
+                size = self.files.pop(path)
+                self.empty_file_set.discard(path)
+                self._propagate(path, -size, -1, 0)
+            elif path in self.children:
+                self._propagate(path, -self.tree_bytes[path], -self.tree_files[path],
+                                -(self.tree_dirs[path] + 1))
+                self._drop_subtree(path)
+            self._unlink(path)
+            self.updated_at = time.time()
+
+    def _drop_subtree(self, path: str) -> None:
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            for name in self.children.pop(current, ()):
+                child = os.path.join(current, name)
+                if child in self.children:
+                    stack.append(child)
+                elif child in self.files:
+                    del self.files[child]
+                    self.empty_file_set.discard(child)
+            for table in (self.tree_bytes, self.tree_files, self.tree_dirs):
+                table.pop(current, None)
+            self.empty_dir_set.discard(current)
+
+    def apply_listing(self, path: str, entries: Iterable[Tuple[str, bool, int]]) -> List[str]:
+        """Reconcile one directory with a fresh (name, is_dir, size) listing.
+
+        Returns the subdirectories that still need their own listing.
+        """
+        subdirs = []
+        with self.lock:
+            self.add_dir(path)
+            seen = set()
+            for name, is_dir, size in entries:
+                seen.add(name)
+                child = os.path.join(path, name)
+                if is_dir:
+                    if child in self.files:
+                        self.remove(child)
+                    if name in self.skip_dirs:
+                        self.add_placeholder(child)
+                    else:
+                        self.add_dir(child)
+                        subdirs.append(child)
+                else:
+                    if child in self.children:
+                        self.remove(child)
+                    self.set_file(child, size)
+            for name in list(self.children.get(path, ())):
+                if name not in seen:
+                    self.remove(os.path.join(path, name))
+        return subdirs
+
+    # -- queries ----------------------------------------------------------
+
+    def covers(self, path) -> bool:
+        """True when path is a directory inside the indexed roots."""
+        return os.path.abspath(path) in self.children
+
+    def _under(self, items: Iterable[str], path: Optional[str]) -> List[str]:
+        if path is None:
+            return sorted(items)
+        base = os.path.abspath(path)
+        prefix = base.rstrip(os.sep) + os.sep
+        return sorted(p for p in items if p.startswith(prefix))
+
+    def empty_files(self, path: Optional[str] = None) -> List[str]:
+        with self.lock:
+            return self._under(self.empty_file_set, path)
+
+    def empty_dirs(self, path: Optional[str] = None) -> List[str]:
+        with self.lock:
+            return self._under(self.empty_dir_set, path)
+
+    def biggest(self, path: str, limit: int = 10) -> List[Dict]:
+        """Direct children of path ranked by (subtree) size."""
+        base = os.path.abspath(path)
+        with self.lock:
+            ranked = []
+            for name in self.children.get(base, ()):
+                child = os.path.join(base, name)
+                if child in self.children:
+                    ranked.append({'path': child, 'size': self.tree_bytes[child], 'is_dir': True,
+                                   'files': self.tree_files[child]})
+                elif child in self.files:
+                    ranked.append({'path': child, 'size': self.files[child], 'is_dir': False, 'files': 1})
+        ranked.sort(key=lambda item: item['size'], reverse=True)
+        return ranked[:limit]
+
+    def summary(self, path: str) -> Dict:
+        """Totals for the subtree rooted at path."""
+        base = os.path.abspath(path)
+        with self.lock:
+            if base not in self.children:
+                return {}
+            return {
+                'path': base,
+                'bytes': self.tree_bytes[base],
+                'files': self.tree_files[base],
+                'dirs': self.tree_dirs[base],
+                'empty_files': len(self._under(self.empty_file_set, base)),
+                'empty_dirs': len(self._under(self.empty_dir_set, base)),
+                'updated_at': self.updated_at,
+            }
@@ -0,0 +1,483 @@
+"""Two-phase cleanup: compile scan results into a plan file, then execute it.
+
+A plan is an ordered list of operations, each with the preconditions that
+held when it was compiled (type, size, mtime, emptiness) and the ids of the
+operations it depends on. The executor runs independent operations in
+parallel and re-checks every precondition with a single lstat (plus one
+scandir for emptiness, except before an rmdir, which refuses a non-empty
+directory by itself) right before acting, so a plan compiled hours earlier
+never touches an item that has changed since.
+"""
+
+import errno
+import itertools
+import json
+import logging
+import os
+import shutil
+import stat
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.constants import DEFAULT_LOG_DIR, PLAN_MAX_OPS
+from utils.io_governor import IOGovernor, get_governor
+from utils.journal import JournalOp, OperationJournal, get_journal
+from utils.tracing import tracer
+
+PLAN_VERSION = 1
+DEFAULT_PLAN_DIR = DEFAULT_LOG_DIR / "plans"
+
+# Operations the executor understands
+PLAN_OPS = ('mkdir', 'move', 'delete_file', 'rmdir', 'trash')
+
+
+@dataclass
+class PlanOp:
+    """One planned operation and the state it expects to find."""
+
+    id: int
+    op: str
+    path: str
+    dst: Optional[str] = None
+    expect: Dict = field(default_factory=dict)
+    depends_on: List[int] = field(default_factory=list)
+
+
+@dataclass
+class CleanupPlan:
+    """A reviewable, serializable list of operations."""
+
+    root: str
+    action: str
+    ops: List[PlanOp] = field(default_factory=list)
+    created: str = field(default_factory=lambda: datetime.now().isoformat(timespec='seconds'))
+    version: int = PLAN_VERSION
+
+    def add(self, op: str, path, dst=None, expect: Optional[Dict] = None,
+            depends_on: Optional[List[int]] = None) -> PlanOp:
+        plan_op = PlanOp(len(self.ops), op, str(path), str(dst) if dst is not None else None,
+                         expect or {}, list(depends_on or []))
+        self.ops.append(plan_op)
+        return plan_op
+
+    def validate(self) -> None:
+        """Reject plans with dangling or cyclic dependencies."""
+        ids = {op.id for op in self.ops}
+        waiting = {op.id: len(op.depends_on) for op in self.ops}
+        dependents: Dict[int, List[int]] = {op.id: [] for op in self.ops}
+        for op in self.ops:
+            for dep in op.depends_on:
+                if dep not in ids:
+                    raise ValueError(f"Op {op.id} depends on unknown op {dep}")
+                dependents[dep].append(op.id)
+        ready = [i for i, n in waiting.items() if n == 0]
+        seen = 0
+        while ready:
+            seen += 1
+            for dependent in dependents[ready.pop()]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
+        if seen != len(self.ops):
+            raise ValueError("Plan has cyclic dependencies")
+
+    def summary(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for op in self.ops:
+            counts[op.op] = counts.get(op.op, 0) + 1
+        return counts
+
+    def to_dict(self) -> Dict:
+        return {
+            'version': self.version,
+            'created': self.created,
+            'root': self.root,
+            'action': self.action,
+            'ops': [{'id': op.id, **{k: v for k, v in asdict(op).items() if k != 'id' and v not in (None, [], {})}}
+                    for op in self.ops],
+        }
+
+    def save(self, path=None) -> Path:
+        """Write the plan as JSON (one op per line, so it diffs and reviews well)."""
+        if path is None:
+            DEFAULT_PLAN_DIR.mkdir(parents=True, exist_ok=True)
+            path = DEFAULT_PLAN_DIR / f"plan_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        path = Path(path)
+        data = self.to_dict()
+        ops = data.pop('ops')
+        header = ', '.join(f"{json.dumps(k)}: {json.dumps(v)}" for k, v in data.items())
+        lines = ',\n  '.join(json.dumps(op, separators=(',', ':')) for op in ops)
+        path.write_text(f"{{{header}, \"ops\": [\n  {lines}\n]}}\n", encoding='utf-8')
+        return path
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CleanupPlan':
+        if data.get('version') != PLAN_VERSION:
+            raise ValueError(f"Unsupported plan version: {data.get('version')}")
+        plan = cls(root=data['root'], action=data['action'], created=data.get('created', ''))
+        for raw in data['ops']:
+            if raw['op'] not in PLAN_OPS:
+                raise ValueError(f"Unknown plan operation: {raw['op']}")
+            plan.ops.append(PlanOp(raw['id'], raw['op'], raw['path'], raw.get('dst'),
+                                   raw.get('expect', {}), raw.get('depends_on', [])))
+        return plan
+
+    @classmethod
+    def load(cls, path) -> 'CleanupPlan':
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def expected_state(path: Path) -> Dict:
+    """Capture the preconditions an item must still satisfy at execution time."""
+    st = os.lstat(path)
+    if stat.S_ISDIR(st.st_mode):
+        return {'type': 'dir', 'empty': True, 'mode': st.st_mode & 0o7777}
+    return {'type': 'file', 'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'mode': st.st_mode & 0o7777}
+
+
+def check_preconditions(path: str, expect: Dict, check_empty: bool = True) -> Optional[str]:
+    """Return why path no longer matches its expected state, or None if it does.
+
+    check_empty=False skips the scandir behind 'empty', for callers whose
+    operation refuses a non-empty directory by itself (rmdir).
+    """
+    if not expect:
+        return None
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return "no longer exists"
+    if expect.get('type') == 'dir':
+        if not stat.S_ISDIR(st.st_mode):
+            return "is no longer a directory"
+        if check_empty and expect.get('empty'):
+            with os.scandir(path) as it:
+                if next(it, None) is not None:
+                    return "is no longer empty"
+        if 'mtime_ns' in expect and st.st_mtime_ns != expect['mtime_ns']:
+            return "modified since the plan was made"
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return "is no longer a regular file"
+    if 'size' in expect and st.st_size != expect['size']:
+        return f"size changed ({expect['size']} -> {st.st_size} bytes)"
+    if 'mtime_ns' in expect and st.st_mtime_ns != expect['mtime_ns']:
+        return "modified since the plan was made"
+    return None
+
+
+def _add_nesting_dependencies(plan: CleanupPlan) -> None:
+    """Make each op on a directory wait for the ops on paths inside it."""
+    by_path = {op.path: op for op in plan.ops if op.op in ('rmdir', 'trash', 'move')}
+    if not by_path:
+        return
+    floor = min(len(path) for path in by_path)
+    # When every owner lives inside the plan root, no walk needs to go above it
+    root_prefix = plan.root.rstrip(os.sep) + os.sep
+    if all(path.startswith(root_prefix) for path in by_path):
+        floor = max(floor, len(root_prefix))
+    sep = os.sep
+    for op in plan.ops:
+        # Parents by slicing at separators: os.path.dirname per level dominates big plans
+        path = op.path
+        end = path.rfind(sep)
+        while end > 0 and end >= floor:
+            owner = by_path.get(path[:end])
+            if owner is not None:
+                owner.depends_on.append(op.id)
+                break
+            end = path.rfind(sep, 0, end)
+
+
+def _unique_name(name: str, used: set, suffixes: Dict[str, int]) -> str:
+    """Suffix name with -1, -2, ... until it collides with nothing in used.
+
+    suffixes remembers the last suffix taken per name, so many items with
+    the same name do not probe every earlier suffix again.
+    """
+    candidate = name
+    stem, dot, suffix = name.rpartition('.') if '.' in name.lstrip('.') else (name, '', '')
+    n = suffixes.get(name, 0)
+    while candidate in used:
+        n += 1
+        candidate = f"{stem}-{n}{dot}{suffix}"
+    suffixes[name] = n
+    used.add(candidate)
+    return candidate
+
+
+def compile_plan(items: Dict[str, List[Path]], action: str = 'delete', root=None,
+                 cleanup_dir: Optional[Path] = None,
+                 name_for: Optional[Callable[[Path, Dict], str]] = None,
+                 state_for: Callable[[Path], Dict] = expected_state,
+                 max_ops: Optional[int] = PLAN_MAX_OPS) -> CleanupPlan:
+    """Turn empty-item scan results into a plan.
+
+    action 'delete' removes items permanently; 'trash' moves them into
+    cleanup_dir (named by name_for(path, expected_state)) and sends that
+    directory to the Trash;
+    'move' does the same without trashing. state_for records each item's
+    preconditions (by default: unchanged files, still-empty directories).
+
+    items may hold any iterables (e.g. SortedSpillStores); they are read
+    once, lazily. At most max_ops items are planned, so one plan never
+    holds more than that many ops; the rest are left for a later plan.
+    """
+    if action not in ('delete', 'trash', 'move'):
+        raise ValueError(f"Unknown plan action: {action}")
+    if action != 'delete' and cleanup_dir is None:
+        raise ValueError(f"Action '{action}' needs a cleanup directory")
+
+    with tracer.span("plan.compile", action=action) as span:
+        plan = CleanupPlan(root=str(root or Path.cwd()), action=action)
+        source = itertools.chain(items.get('files', ()), items.get('dirs', ()))
+        candidates = itertools.islice(source, max_ops)
+
+        if action == 'delete':
+            for item, expect in _with_state(candidates, state_for):
+                plan.add('delete_file' if expect['type'] == 'file' else 'rmdir', item, expect=expect)
+            _add_nesting_dependencies(plan)
+        else:
+            # Only a directory the plan creates is removed again on undo
+            target = str(cleanup_dir)
+            existing = os.path.isdir(target)
+            setup = [] if existing else [plan.add('mkdir', target).id]
+            # Names already taken on disk or by earlier moves in this plan
+            used = set(os.listdir(target)) if existing else set()
+            suffixes: Dict[str, int] = {}
+            moves = []
+            for item, expect in _with_state(candidates, state_for):
+                name = _unique_name(name_for(item, expect) if name_for else item.name, used, suffixes)
+                moves.append(plan.add('move', item, os.path.join(target, name), expect, setup).id)
+            if action == 'trash':
+                plan.add('trash', cleanup_dir, depends_on=moves)
+        if next(source, None) is not None:
+            logging.getLogger(__name__).warning(f"Plan stopped at {max_ops:,} items; "
+                                                f"run it and plan again for the rest")
+        span.set("ops", len(plan.ops))
+    return plan
+
+
+def _with_state(items: Iterable[Path], state_for: Callable[[Path], Dict]) -> Iterator[Tuple[Path, Dict]]:
+    for item in items:
+        try:
+            yield item, state_for(item)
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Skipping {item}: {e}")
+
+
+@dataclass
+class OpResult:
+    op: PlanOp
+    status: str  # done, stale, failed, blocked
+    detail: str = ''
+
+
+class PlanResult:
+    """Per-op outcomes of a plan execution."""
+
+    def __init__(self):
+        self.results: List[OpResult] = []
+        self.batch_id: Optional[str] = None
+
+    def of(self, status: str) -> List[OpResult]:
+        return [r for r in self.results if r.status == status]
+
+    @property
+    def done(self) -> List[OpResult]:
+        return self.of('done')
+
+    @property
+    def problems(self) -> List[OpResult]:
+        return [r for r in self.results if r.status != 'done']
+
+
+class PlanExecutor:
+    """Runs a plan with dependency-aware parallelism, journaling every op.
+
+    Execution starts on the calling thread. Extra workers (up to `workers`)
+    are added only while ops take longer than `parallel_threshold` seconds on
+    average, i.e. when syscalls actually block on slow disks or network
+    filesystems; on fast local storage threads would only add contention.
+    """
+
+    def __init__(self, workers: int = 8, journal: Optional[OperationJournal] = None, progress=None,
+                 parallel_threshold: float = 0.0002,
+                 on_result: Optional[Callable[['OpResult'], None]] = None,
+                 governor: Optional[IOGovernor] = None):
+        self.workers = max(1, workers)
+        self.governor = governor
+        self.on_result = on_result
+        self.parallel_threshold = parallel_threshold
+        self.journal = journal
+        self.progress = progress
+        self.logger = logging.getLogger(__name__)
+
+    def _apply(self, op: PlanOp) -> None:
+        if op.op == 'mkdir':
+            os.makedirs(op.path, exist_ok=True)
+        elif op.op == 'move':
+            if os.path.lexists(op.dst):
+                raise FileExistsError(f"{op.dst} already exists")
+            try:
+                os.rename(op.path, op.dst)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                # The cleanup directory is on another filesystem: copy, then remove
+                shutil.move(op.path, op.dst)
+        elif op.op == 'delete_file':
+            os.unlink(op.path)
+        elif op.op == 'rmdir':
+            os.rmdir(op.path)
+        elif op.op == 'trash':
+            from send2trash import send2trash
+            send2trash(op.path)
+
+    def execute(self, plan: CleanupPlan) -> PlanResult:
+        """Run every op whose dependencies completed and whose preconditions still hold.
+
+        Worker threads pull ready ops from a shared queue; finishing an op
+        releases its dependents into the same queue.
+        """
+        plan.validate()
+        result = PlanResult()
+        if not plan.ops:
+            return result
+        ops = {op.id: op for op in plan.ops}
+        dependents: Dict[int, List[int]] = {op.id: [] for op in plan.ops}
+        waiting: Dict[int, int] = {}
+        for op in plan.ops:
+            waiting[op.id] = len(op.depends_on)
+            for dep in op.depends_on:
+                dependents[dep].append(op.id)
+
+        ready = deque(op for op in plan.ops if waiting[op.id] == 0)
+        cond = threading.Condition()
+        remaining = [len(plan.ops)]
+        failed_ids = set()
+        # Unexpected errors raised in any worker, re-raised on the calling thread
+        errors: List[BaseException] = []
+
+        journal = self.journal or get_journal()
+        governor = self.governor or get_governor()
+        journal_ops = {op.id: JournalOp(op.op, op.path, op.dst,
+                                        {'mode': op.expect['mode']} if 'mode' in op.expect else None)
+                       for op in plan.ops}
+        # Every intent goes out with the batch header, under one fsync
+        with tracer.span("plan.execute", ops=len(plan.ops), action=plan.action), \
+                journal.batch(f"Apply {plan.action} plan for {plan.root}", journal_ops.values()) as batch:
+            result.batch_id = batch.batch_id
+
+            # Outcomes need no fsync of their own (recovery re-probes the
+            # filesystem), so each worker hands them to the journal in chunks
+            _STATUS = {'done': 'done', 'stale': 'skipped', 'blocked': 'skipped', 'failed': 'failed'}
+
+            def run(op: PlanOp) -> Tuple[str, str]:
+                if failed_ids and any(dep in failed_ids for dep in op.depends_on):
+                    return 'blocked', "dependency did not complete"
+                try:
+                    problem = check_preconditions(op.path, op.expect, check_empty=op.op != 'rmdir')
+                    if problem:
+                        return 'stale', problem
+                    self._apply(op)
+                except OSError as e:
+                    if op.op == 'rmdir' and e.errno in (errno.ENOTEMPTY, errno.EEXIST):
+                        return 'stale', "is no longer empty"
+                    self.logger.error(f"Plan op {op.op} {op.path} failed: {e}")
+                    return 'failed', str(e)
+                except Exception as e:
+                    self.logger.error(f"Plan op {op.op} {op.path} failed: {e}")
+                    return 'failed', str(e)
+                return 'done', ''
+
+            threads: List[threading.Thread] = []
+
+            def maybe_add_worker(op_seconds: float, nops: int) -> None:
+                # Caller holds cond
+                if (len(threads) < self.workers and len(ready) > len(threads)
+                        and op_seconds / nops > self.parallel_threshold):
+                    thread = threading.Thread(target=worker, daemon=True, name=f"plan-worker-{len(threads)}")
+                    threads.append(thread)
+                    thread.start()
+
+            def worker() -> None:
+                pending = []
+                chunk: List[PlanOp] = []
+                counted = True
+                try:
+                    while True:
+                        with cond:
+                            while not ready and remaining[0] and not errors:
+                                if pending:
+                                    break
+                                cond.wait()
+                            if errors or (not ready and not remaining[0]):
+                                break
+                            # Take a share of the ready ops per lock round-trip
+                            take = max(1, min(32, len(ready) // (len(threads) + 1)))
+                            chunk = [ready.popleft() for _ in range(min(take, len(ready)))]
+                        if not chunk:
+                            batch.record_many(pending)
+                            pending = []
+                            continue
+                        counted = False
+                        # Paced and timed per chunk: per-op bookkeeping would cost as much as the syscalls
+                        governor.throttle(len(chunk))
+                        started = time.perf_counter()
+                        finished = [(op, *run(op)) for op in chunk]
+                        elapsed = time.perf_counter() - started
+                        governor.record_latency(elapsed, len(chunk))
+                        pending.extend((journal_ops[op.id], _STATUS[status], detail or None)
+                                       for op, status, detail in finished)
+                        if len(pending) >= 128:
+                            batch.record_many(pending)
+                            pending = []
+                        with cond:
+                            for op, status, detail in finished:
+                                result.results.append(OpResult(op, status, detail))
+                                # A stale op changed nothing, so its dependents re-check their own preconditions
+                                if status in ('failed', 'blocked'):
+                                    failed_ids.add(op.id)
+                                for dependent in dependents[op.id]:
+                                    waiting[dependent] -= 1
+                                    if waiting[dependent] == 0:
+                                        ready.append(ops[dependent])
+                            remaining[0] -= len(finished)
+                            counted = True
+                            maybe_add_worker(elapsed, len(finished))
+                            cond.notify_all()
+                        if self.on_result is not None:
+                            for op, status, detail in finished:
+                                self.on_result(OpResult(op, status, detail))
+                        if self.progress is not None:
+                            self.progress.advance(len(finished))
+                    batch.record_many(pending)
+                except BaseException as e:
+                    # Journal errors (ENOSPC, EIO) and the like: stop every worker instead of
+                    # leaving the chunk counted as outstanding, which would wait forever
+                    self.logger.error(f"Plan worker failed: {e}")
+                    with cond:
+                        errors.append(e)
+                        if not counted:
+                            for op in chunk:
+                                result.results.append(OpResult(op, 'failed', str(e)))
+                                failed_ids.add(op.id)
+                            remaining[0] -= len(chunk)
+                        cond.notify_all()
+
+            # The calling thread is the first worker
+            worker()
+            for thread in list(threads):
+                thread.join()
+            if errors:
+                raise errors[0]
+
+        result.results.sort(key=lambda r: r.op.id)
+        return result
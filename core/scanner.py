@@ -0,0 +1,218 @@
+"""Parallel os.scandir tree walker with one worker pool per physical device."""
+
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from core.constants import SKIP_DIRS
+from core.devices import DeviceInfo, DeviceRegistry, concurrency_for
+from utils.io_governor import IOGovernor, get_governor
+from utils.progress import ProgressTracker
+
+
+class ScanVisitor(ABC):
+    """Receives every scanned directory; called concurrently from worker threads."""
+
+    @abstractmethod
+    def visit_directory(self, path: str, entries: List[os.DirEntry], is_root: bool) -> None:
+        """Handle one listed directory."""
+
+    def on_error(self, path: str, error: OSError) -> None:
+        pass
+
+    def root_finished(self, root: str) -> None:
+        """Called once every directory under root has been visited (or failed)."""
+        pass
+
+
+class DeviceGroup:
+    """A worker pool dedicated to one st_dev."""
+
+    def __init__(self, info: DeviceInfo, workers: int):
+        self.info = info
+        self.workers = workers
+        self.directories = 0
+        self.pool = ThreadPoolExecutor(max_workers=workers,
+                                       thread_name_prefix=f"scan-{info.kind}-{info.dev}")
+
+
+class ParallelScanner:
+    """Walks many roots at once, scheduling each subtree on its device's pool.
+
+    Roots are grouped by st_dev and every device gets its own concurrency
+    limit (see core.devices.DEFAULT_CONCURRENCY), so independent volumes are
+    scanned simultaneously while spinning disks are not flooded with seeks.
+    Subtrees that cross onto another mount are handed to that device's pool.
+    Every directory read is paced by the shared IOGovernor.
+    """
+
+    def __init__(self, skip_dirs: Set[str] = SKIP_DIRS, concurrency: Optional[Dict] = None,
+                 registry: Optional[DeviceRegistry] = None,
+                 progress: Optional[ProgressTracker] = None, cross_devices: bool = True,
+                 governor: Optional[IOGovernor] = None):
+        self.skip_dirs = skip_dirs
+        self.governor = governor or get_governor()
+        self.concurrency = concurrency
+        self.registry = registry or DeviceRegistry()
+        self.progress = progress
+        self.cross_devices = cross_devices
+        self.logger = logging.getLogger(__name__)
+        self.groups: Dict[int, DeviceGroup] = {}
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._root_pending: Dict[str, int] = {}
+        self._done = threading.Event()
+        self._failure: Optional[BaseException] = None
+
+    @staticmethod
+    def normalize_roots(roots: Iterable) -> List[Path]:
+        """Resolve roots and drop any that are nested inside another root."""
+        resolved = sorted({Path(os.path.abspath(r)) for r in roots})
+        kept: List[Path] = []
+        for root in resolved:
+            if not any(root == k or k in root.parents for k in kept):
+                kept.append(root)
+        return kept
+
+    def scan(self, roots: Iterable, visitor: ScanVisitor) -> Dict[int, DeviceGroup]:
+        """Scan all roots to completion and return the device groups used."""
+        self._done.clear()
+        self.groups = {}
+        self._failure = None
+        # Hold one pending slot while submitting so early finishers can't signal done
+        self._pending = 1
+        self._root_pending = {}
+        roots = self.normalize_roots(roots)
+        stop_estimate = None
+        if self.progress is not None and not self.progress.total:
+            from core.estimate import track_estimated_total
+
+            # No counting pass: sampled estimates of the entry count give the ETA
+            stop_estimate = track_estimated_total(self.progress, roots, self.skip_dirs)
+        try:
+            for root in roots:
+                try:
+                    dev = os.stat(root).st_dev
+                except OSError as e:
+                    self.logger.error(f"Error accessing {root}: {e}")
+                    visitor.on_error(str(root), e)
+                    visitor.root_finished(str(root))
+                    continue
+                self._submit(str(root), dev, visitor, str(root), is_root=True)
+
+            self._task_finished()
+            self._done.wait()
+        finally:
+            for group in self.groups.values():
+                group.pool.shutdown(wait=True)
+            if stop_estimate is not None:
+                stop_estimate.set()
+
+        if self._failure is not None:
+            raise self._failure
+        return self.groups
+
+    def _group(self, dev: int) -> DeviceGroup:
+        group = self.groups.get(dev)
+        if group is None:
+            with self._lock:
+                group = self.groups.get(dev)
+                if group is None:
+                    info = self.registry.lookup(dev)
+                    workers = concurrency_for(info, self.concurrency)
+                    group = self.groups[dev] = DeviceGroup(info, workers)
+                    self.logger.info(f"Scanning device {info.name or info.dev} ({info.kind}) "
+                                     f"with {workers} workers")
+        return group
+
+    def _submit(self, path: str, dev: int, visitor: ScanVisitor, root: str, is_root: bool = False) -> None:
+        group = self._group(dev)
+        with self._lock:
+            self._pending += 1
+            self._root_pending[root] = self._root_pending.get(root, 0) + 1
+        group.pool.submit(self._scan_directory, path, dev, group, visitor, root, is_root)
+
+    def _scan_directory(self, path: str, dev: int, group: DeviceGroup,
+                        visitor: ScanVisitor, root: str, is_root: bool) -> None:
+        try:
+            self.governor.throttle()
+            started = time.perf_counter()
+            entries = []
+            try:
+                with os.scandir(path) as it:
+                    entries = list(it)
+            except OSError as e:
+                self.logger.error(f"Error accessing {path}: {e}")
+                visitor.on_error(path, e)
+                return
+            finally:
+                # Per entry: listing a huge directory is slow without anything being contended
+                self.governor.record_latency(time.perf_counter() - started, len(entries))
+
+            for entry in entries:
+                try:
+                    if entry.name in self.skip_dirs or not entry.is_dir(follow_symlinks=False):
+                        continue
+                    child_dev = entry.stat(follow_symlinks=False).st_dev if self.cross_devices else dev
+                except OSError as e:
+                    visitor.on_error(entry.path, e)
+                    continue
+                self._submit(entry.path, child_dev, visitor, root)
+
+            visitor.visit_directory(path, entries, is_root)
+            if self.progress is not None:
+                self.progress.advance(len(entries))
+        except BaseException as e:
+            self._failure = e
+            self.logger.error(f"Scan worker failed on {path}: {e}")
+        finally:
+            with self._lock:
+                group.directories += 1
+                self._root_pending[root] -= 1
+                root_done = self._root_pending[root] == 0
+            if root_done:
+                try:
+                    visitor.root_finished(root)
+                except Exception as e:
+                    self._failure = e
+                    self.logger.error(f"Scan visitor failed finishing {root}: {e}")
+            self._task_finished()
+
+    def _task_finished(self) -> None:
+        with self._lock:
+            self._pending -= 1
+            finished = self._pending == 0
+        if finished:
+            self._done.set()
+
+
+def iter_directories(root, skip_dirs: Set[str] = frozenset()) -> Iterator[Tuple[str, List[os.DirEntry]]]:
+    """Lazily walk root depth-first, yielding (path, entries) per directory.
+
+    The sequential counterpart of ParallelScanner for consumers that stop
+    early (paged REPL output): nothing past the last directory requested is
+    listed. Symlinked directories are not followed; unreadable ones are skipped.
+    """
+    stack = [str(root)]
+    while stack:
+        path = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError as e:
+            logging.getLogger(__name__).debug(f"Skipping {path}: {e}")
+            continue
+        yield path, entries
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.name not in skip_dirs and entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+            except OSError:
+                continue
+        stack.extend(reversed(subdirs))
@@ -0,0 +1,398 @@
+"""Trigram index over file names for substring, glob and fuzzy search.
+
+Every indexed path (relative to the index root) is split into the set of
+its lowercase three-character substrings; each trigram maps to a sorted
+posting list of path ids. A substring query intersects the posting lists
+of its own trigrams and only verifies the few survivors, so lookups cost
+milliseconds however large the tree is. Directory mtimes are recorded so
+that refresh() only re-lists directories whose entries changed.
+
+Unlike a plain rglob, an index leaves out SKIP_DIRS (.git, node_modules,
+virtualenvs, ...) by default. Pass skip_dirs=frozenset() to index
+everything; such an index is persisted separately from the default one.
+"""
+
+import fnmatch
+import hashlib
+import itertools
+import json
+import logging
+import os
+import re
+import sys
+import time
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from core.constants import DEFAULT_CACHE_DIR, MTIME_SETTLE_NS, SKIP_DIRS
+
+DEFAULT_INDEX_DIR = DEFAULT_CACHE_DIR / "search_index"
+INDEX_MAGIC = b"AICLEAN-TRIGRAM 1\n"
+GLOB_CHARS = re.compile(r"\[[^\]]*\]|[*?]")
+FUZZY_CANDIDATES = 2000
+
+
+def trigrams(text: str) -> Set[str]:
+    """Lowercase three-character substrings of text."""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def substring_distance(pattern: str, text: str, limit: int) -> int:
+    """Fewest edits turning pattern into some substring of text (limit + 1 if more).
+
+    Edits are insertions, deletions, substitutions and transpositions of
+    adjacent characters (optimal string alignment), the usual typing slips.
+    """
+    before = None
+    previous = [0] * (len(text) + 1)
+    for i, pc in enumerate(pattern, 1):
+        current = [i]
+        best = i
+        for j, tc in enumerate(text, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (pc != tc))
+            if before is not None and j > 1 and pc == text[j - 2] and pattern[i - 2] == tc:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+            if cost < best:
+                best = cost
+        if best > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(previous)
+
+
+def _parent(relpath: str) -> str:
+    return relpath.rpartition(os.sep)[0]
+
+
+def index_file_for(root, index_dir=None, skip_dirs: Set[str] = SKIP_DIRS) -> Path:
+    """Where the index for root is persisted (CLEANUP_INDEX_DIR overrides the default)."""
+    index_dir = Path(index_dir or os.environ.get('CLEANUP_INDEX_DIR') or DEFAULT_INDEX_DIR)
+    key = os.path.abspath(root)
+    if skip_dirs != SKIP_DIRS:
+        key += '\0' + '\0'.join(sorted(skip_dirs))
+    digest = hashlib.md5(key.encode('utf-8', 'surrogateescape')).hexdigest()
+    return index_dir / f"{digest}.idx"
+
+
+class FilenameIndex:
+    """Trigram posting lists over the relative paths of every entry under root.
+
+    Directories in skip_dirs are not indexed. Removed entries are
+    tombstoned rather than deleted from posting lists, and compacted away
+    once they make up a quarter of the index.
+    """
+
+    def __init__(self, root, skip_dirs: Set[str] = SKIP_DIRS):
+        self.root = os.path.abspath(root)
+        self.skip_dirs = skip_dirs
+        self.logger = logging.getLogger(__name__)
+        self.paths: List[Optional[str]] = []
+        self.ids: Dict[str, int] = {}
+        self.postings: Dict[str, array] = {}
+        self.dirs: Dict[str, int] = {}
+        # Entries per directory, derived on first need (refresh diffs, subtree removal)
+        self._by_dir: Optional[Dict[str, Set[str]]] = None
+        self.removed = 0
+        self.refreshed_at = 0.0
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # -- building and updating ---------------------------------------------
+
+    @classmethod
+    def build(cls, root, skip_dirs: Set[str] = SKIP_DIRS) -> 'FilenameIndex':
+        """Index every entry under root."""
+        index = cls(root, skip_dirs)
+        index.refresh()
+        return index
+
+    def add(self, relpath: str) -> None:
+        if relpath in self.ids:
+            return
+        path_id = len(self.paths)
+        self.paths.append(relpath)
+        self.ids[relpath] = path_id
+        postings = self.postings
+        for gram in trigrams(relpath):
+            posting = postings.get(gram)
+            if posting is None:
+                posting = postings[gram] = array('I')
+            posting.append(path_id)
+        if self._by_dir is not None:
+            self._by_dir.setdefault(_parent(relpath), set()).add(relpath)
+        self.dirty = True
+
+    def _entries_by_dir(self) -> Dict[str, Set[str]]:
+        if self._by_dir is None:
+            by_dir: Dict[str, Set[str]] = {}
+            for path in self.ids:
+                by_dir.setdefault(_parent(path), set()).add(path)
+            self._by_dir = by_dir
+        return self._by_dir
+
+    def remove(self, relpath: str) -> None:
+        """Drop an entry and, if it was a directory, everything below it."""
+        by_dir = self._entries_by_dir()
+        doomed = []
+        if relpath in self.ids:
+            doomed.append(relpath)
+            by_dir.get(_parent(relpath), set()).discard(relpath)
+        stack = [relpath] if relpath in self.dirs else []
+        while stack:
+            directory = stack.pop()
+            self.dirs.pop(directory, None)
+            for child in by_dir.pop(directory, ()):
+                doomed.append(child)
+                if child in self.dirs:
+                    stack.append(child)
+        for path in doomed:
+            self.paths[self.ids.pop(path)] = None
+        self.removed += len(doomed)
+        self.dirty = self.dirty or bool(doomed)
+
+    def _list(self, relpath: str, mtime_ns: int, now_ns: int) -> Optional[List[os.DirEntry]]:
+        path = os.path.join(self.root, relpath) if relpath else self.root
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError as e:
+            self.logger.debug(f"Cannot index {path}: {e}")
+            return None
+        # A directory that changed in the last mtime tick is listed again next time
+        self.dirs[relpath] = mtime_ns if now_ns - mtime_ns > MTIME_SETTLE_NS else 0
+        return entries
+
+    def refresh(self) -> Tuple[int, int]:
+        """Bring the index up to date; returns (added, removed) entry counts.
+
+        Only directories whose mtime changed are listed again; unchanged ones
+        cost one stat, and their subdirectories are taken from the index.
+        """
+        before_ids, before_removed = len(self.paths), self.removed
+        now_ns = time.time_ns()
+        children: Dict[str, List[str]] = {}
+        for d in self.dirs:
+            if d:
+                children.setdefault(_parent(d), []).append(d)
+
+        stack = ['']
+        while stack:
+            relpath = stack.pop()
+            path = os.path.join(self.root, relpath) if relpath else self.root
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                self.remove(relpath)
+                continue
+            known = self.dirs.get(relpath)
+            if known is not None and known == mtime_ns:
+                stack.extend(children.get(relpath, ()))
+                continue
+
+            entries = self._list(relpath, mtime_ns, now_ns)
+            if entries is None:
+                continue
+            present = set()
+            for entry in entries:
+                child = os.path.join(relpath, entry.name) if relpath else entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir and entry.name in self.skip_dirs:
+                    continue
+                present.add(child)
+                if not is_dir and child in self.dirs:
+                    # A directory replaced by a file: forget what was below it
+                    self.remove(child)
+                self.add(child)
+                if is_dir:
+                    stack.append(child)
+                    if child not in self.dirs:
+                        self.dirs[child] = -1
+            # Entries that disappeared from a directory listed on an earlier refresh
+            if known is not None and known >= 0:
+                for p in self._entries_by_dir().get(relpath, set()) - present:
+                    self.remove(p)
+
+        self.refreshed_at = time.monotonic()
+        if self.removed > len(self.paths) // 4:
+            self.compact()
+        return len(self.paths) - before_ids, self.removed - before_removed
+
+    def compact(self) -> None:
+        """Rebuild ids and posting lists without tombstones."""
+        live = [p for p in self.paths if p is not None]
+        self.paths, self.ids, self.postings, self.removed = [], {}, {}, 0
+        self._by_dir = None
+        for path in live:
+            self.add(path)
+
+    def sync(self, path=None) -> Tuple[int, int]:
+        """refresh() and persist the index if anything changed."""
+        changes = self.refresh()
+        if self.dirty:
+            try:
+                self.save(path)
+            except OSError as e:
+                self.logger.warning(f"Could not save search index: {e}")
+        return changes
+
+    # -- queries -----------------------------------------------------------
+
+    def _candidates(self, grams: Iterable[str]) -> Optional[Set[int]]:
+        """Ids whose path contains every trigram, or None if there are no trigrams."""
+        lists = []
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is None:
+                return set()
+            lists.append(posting)
+        if not lists:
+            return None
+        lists.sort(key=len)
+        candidates = set(lists[0])
+        for posting in lists[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return candidates
+
+    def _scan(self, ids: Optional[Set[int]]) -> Iterator[Tuple[int, str]]:
+        if ids is None:
+            for path_id, path in enumerate(self.paths):
+                if path is not None:
+                    yield path_id, path
+        else:
+            for path_id in sorted(ids):
+                path = self.paths[path_id]
+                if path is not None:
+                    yield path_id, path
+
+    @staticmethod
+    def _subject(path: str, whole_path: bool) -> str:
+        return (path if whole_path else os.path.basename(path)).lower()
+
+    def substring(self, text: str) -> Iterator[str]:
+        """Relative paths whose name (or path, if text has a separator) contains text."""
+        needle = text.lower()
+        whole_path = os.sep in needle
+        for _, path in self._scan(self._candidates(trigrams(needle))):
+            if needle in self._subject(path, whole_path):
+                yield path
+
+    def glob(self, pattern: str) -> Iterator[str]:
+        """Relative paths whose name (or path, if the pattern has a separator) matches."""
+        pattern = pattern.lower()
+        whole_path = os.sep in pattern
+        literal_grams = set()
+        for literal in GLOB_CHARS.split(pattern):
+            literal_grams |= trigrams(literal)
+        for _, path in self._scan(self._candidates(literal_grams)):
+            if fnmatch.fnmatchcase(self._subject(path, whole_path), pattern):
+                yield path
+
+    def search(self, term: str) -> Iterator[str]:
+        """Glob match if term has wildcards, substring match otherwise."""
+        return self.glob(term) if GLOB_CHARS.search(term) else self.substring(term)
+
+    def fuzzy(self, text: str, max_distance: int = 2, limit: int = 50) -> List[Tuple[int, str]]:
+        """(edits, path) for names closest to containing text, best first.
+
+        A name within k edits of text shares at least len(grams) - 3k of its
+        trigrams, so only paths with that many hits are compared at all; k
+        is lowered for short queries to keep that bound meaningful.
+        """
+        needle = text.lower()
+        grams = trigrams(needle)
+        k = max(0, min(max_distance, (len(grams) - 1) // 3))
+        if not grams:
+            return [(0, path) for path in itertools.islice(self.substring(needle), limit)]
+
+        hits = Counter(itertools.chain.from_iterable(
+            self.postings[g] for g in grams if g in self.postings))
+        needed = len(grams) - 3 * k
+        candidates = [path_id for path_id, count in hits.most_common(FUZZY_CANDIDATES) if count >= needed]
+
+        ranked = []
+        for path_id in candidates:
+            path = self.paths[path_id]
+            if path is None:
+                continue
+            name = os.path.basename(path).lower()
+            distance = substring_distance(needle, name, k)
+            if distance <= k:
+                ranked.append((distance, len(name), path))
+        ranked.sort()
+        return [(distance, path) for distance, _, path in ranked[:limit]]
+
+    # -- persistence -------------------------------------------------------
+
+    def save(self, path=None) -> Path:
+        """Write the index atomically: a JSON header, NUL-separated paths, one posting blob."""
+        path = Path(path or index_file_for(self.root, skip_dirs=self.skip_dirs))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        grams = sorted(self.postings)
+        names = b"\0".join((p or '').encode('utf-8', 'surrogateescape') for p in self.paths)
+        header = {
+            'root': self.root,
+            'byteorder': sys.byteorder,
+            'paths_bytes': len(names),
+            'grams': [[g, len(self.postings[g])] for g in grams],
+            'dirs': self.dirs,
+            'saved_at': time.time(),
+        }
+        tmp = path.with_suffix('.tmp')
+        with tmp.open('wb') as f:
+            f.write(INDEX_MAGIC)
+            f.write(json.dumps(header, separators=(',', ':')).encode('utf-8', 'surrogateescape') + b"\n")
+            f.write(names)
+            for g in grams:
+                self.postings[g].tofile(f)
+        os.replace(tmp, path)
+        self.dirty = False
+        return path
+
+    @classmethod
+    def load(cls, root, path=None, skip_dirs: Set[str] = SKIP_DIRS) -> 'FilenameIndex':
+        """Read a saved index; raises ValueError if the file is not a usable index for root."""
+        path = Path(path or index_file_for(root, skip_dirs=skip_dirs))
+        index = cls(root, skip_dirs)
+        with path.open('rb') as f:
+            if f.readline() != INDEX_MAGIC:
+                raise ValueError(f"{path} is not a filename index")
+            header = json.loads(f.readline().decode('utf-8', 'surrogateescape'))
+            if header['root'] != index.root or header['byteorder'] != sys.byteorder:
+                raise ValueError(f"{path} was built for another root or machine")
+            names = f.read(header['paths_bytes'])
+            blob = array('I')
+            blob.frombytes(f.read())
+
+        index.paths = [p or None for p in names.decode('utf-8', 'surrogateescape').split('\0')] if names else []
+        index.ids = {p: i for i, p in enumerate(index.paths) if p is not None}
+        index.removed = len(index.paths) - len(index.ids)
+        offset = 0
+        for gram, count in header['grams']:
+            index.postings[gram] = blob[offset:offset + count]
+            offset += count
+        index.dirs = header['dirs']
+        return index
+
+
+def open_index(root, index_dir=None, skip_dirs: Set[str] = SKIP_DIRS) -> FilenameIndex:
+    """Load the saved index for root (or start an empty one), bring it up to date and save it."""
+    path = index_file_for(root, index_dir, skip_dirs)
+    try:
+        index = FilenameIndex.load(root, path, skip_dirs)
+    except (OSError, ValueError, KeyError) as e:
+        if path.exists():
+            logging.getLogger(__name__).warning(f"Rebuilding search index for {root}: {e}")
+        index = FilenameIndex(root, skip_dirs)
+    index.sync(path)
+    return index
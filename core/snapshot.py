@@ -0,0 +1,362 @@
+"""Columnar snapshots of a scanned tree and a merge-join diff between two of them.
+
+A snapshot file holds every entry under a root, sorted by the UTF-8 bytes
+of its path relative to the root, as fixed-width columns:
+
+    AICLEAN-SNAPSHOT 1\\n
+    {JSON header: root, byteorder, count, created_at, columns}\\n
+    padding to 8 bytes
+    offsets  uint64[count + 1]   path i is paths[offsets[i]:offsets[i + 1]]
+    sizes    int64[count]
+    mtimes   int64[count]        nanoseconds
+    inodes   uint64[count]
+    kinds    uint8[count]        KIND_FILE, KIND_DIR or KIND_OTHER
+    paths    the path bytes, back to back
+
+Every column starts on an 8-byte boundary. Snapshot.open() maps the file
+and exposes the columns as memoryviews of the mapping, so loading costs
+nothing however large the snapshot is, and a diff only touches the pages
+it reads. Because both sides are sorted, diff_snapshots() walks them once
+in step (a merge join) and reports added, removed, grown and shrunk
+entries plus the net growth of every directory, without rescanning.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from core.constants import DEFAULT_CACHE_DIR, SKIP_DIRS
+from core.scanner import ParallelScanner, ScanVisitor
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_MAGIC = f"AICLEAN-SNAPSHOT {SNAPSHOT_VERSION}\n".encode()
+DEFAULT_SNAPSHOT_DIR = DEFAULT_CACHE_DIR / "snapshots"
+KIND_FILE, KIND_DIR, KIND_OTHER = 0, 1, 2
+# Column name, array typecode; paths follow the fixed-width columns
+COLUMNS = (('offsets', 'Q'), ('sizes', 'q'), ('mtimes', 'q'), ('inodes', 'Q'), ('kinds', 'B'))
+ALIGN = 8
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGN) * ALIGN
+
+
+def _encode(relpath: str) -> bytes:
+    return relpath.encode('utf-8', 'surrogateescape')
+
+
+def _decode(raw: bytes) -> str:
+    return raw.decode('utf-8', 'surrogateescape')
+
+
+def snapshot_dir(directory=None) -> Path:
+    """Where snapshots are kept (CLEANUP_SNAPSHOT_DIR overrides the default)."""
+    return Path(directory or os.environ.get('CLEANUP_SNAPSHOT_DIR') or DEFAULT_SNAPSHOT_DIR)
+
+
+def snapshots_for(root, directory=None) -> List[Path]:
+    """Saved snapshots of root, oldest first."""
+    digest = hashlib.md5(os.path.abspath(root).encode('utf-8', 'surrogateescape')).hexdigest()
+    return sorted(snapshot_dir(directory).glob(f"{digest}-*.snap"))
+
+
+class SnapshotEntry(NamedTuple):
+    path: str
+    size: int
+    mtime_ns: int
+    inode: int
+    kind: int
+
+
+class _Collector(ScanVisitor):
+    """Gathers one row per entry; the numeric columns stay compact arrays until sorted."""
+
+    def __init__(self, root: str, skip_dirs: Set[str]):
+        self.root = root
+        self.skip_dirs = skip_dirs
+        self.lock = threading.Lock()
+        self.paths: List[bytes] = []
+        self.sizes = array('q')
+        self.mtimes = array('q')
+        self.inodes = array('Q')
+        self.kinds = array('B')
+        self.errors = 0
+
+    def visit_directory(self, path: str, entries: List[os.DirEntry], is_root: bool) -> None:
+        prefix = '' if is_root else os.path.relpath(path, self.root) + os.sep
+        rows = []
+        for entry in entries:
+            try:
+                st = entry.stat(follow_symlinks=False)
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in self.skip_dirs:
+                        continue
+                    kind = KIND_DIR
+                else:
+                    kind = KIND_FILE if entry.is_file(follow_symlinks=False) else KIND_OTHER
+            except OSError:
+                with self.lock:
+                    self.errors += 1
+                continue
+            rows.append((_encode(prefix + entry.name), st.st_size, st.st_mtime_ns, st.st_ino, kind))
+        with self.lock:
+            for raw, size, mtime_ns, inode, kind in rows:
+                self.paths.append(raw)
+                self.sizes.append(size)
+                self.mtimes.append(mtime_ns)
+                self.inodes.append(inode)
+                self.kinds.append(kind)
+
+    def on_error(self, path: str, error: OSError) -> None:
+        with self.lock:
+            self.errors += 1
+
+
+def write_snapshot(path, root: str, collector: _Collector) -> Path:
+    """Sort the collected rows by path and write them atomically as a snapshot file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    order = sorted(range(len(collector.paths)), key=collector.paths.__getitem__)
+    offsets = array('Q', [0])
+    total = 0
+    for i in order:
+        total += len(collector.paths[i])
+        offsets.append(total)
+    columns = {
+        'offsets': offsets,
+        'sizes': array('q', (collector.sizes[i] for i in order)),
+        'mtimes': array('q', (collector.mtimes[i] for i in order)),
+        'inodes': array('Q', (collector.inodes[i] for i in order)),
+        'kinds': array('B', (collector.kinds[i] for i in order)),
+    }
+    header = {
+        'version': SNAPSHOT_VERSION,
+        'root': root,
+        'byteorder': sys.byteorder,
+        'count': len(order),
+        'created_at': time.time(),
+        'errors': collector.errors,
+        'columns': [[name, code, len(columns[name])] for name, code in COLUMNS] + [['paths', 'B', total]],
+    }
+    tmp = path.with_suffix('.tmp')
+    with tmp.open('wb') as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(json.dumps(header, separators=(',', ':')).encode('utf-8', 'surrogateescape') + b"\n")
+        for name, _ in COLUMNS:
+            f.write(b"\0" * (_aligned(f.tell()) - f.tell()))
+            columns[name].tofile(f)
+        f.write(b"\0" * (_aligned(f.tell()) - f.tell()))
+        for i in order:
+            f.write(collector.paths[i])
+    os.replace(tmp, path)
+    return path
+
+
+def take_snapshot(root, path=None, skip_dirs: Set[str] = SKIP_DIRS, directory=None) -> Path:
+    """Scan root and save a snapshot of it (by default into snapshot_dir(), named by root and time)."""
+    root = os.path.abspath(root)
+    if not os.path.isdir(root):
+        raise NotADirectoryError(f"Not a directory: {root}")
+    collector = _Collector(root, skip_dirs)
+    ParallelScanner(skip_dirs=skip_dirs).scan([root], collector)
+    if path is None:
+        digest = hashlib.md5(root.encode('utf-8', 'surrogateescape')).hexdigest()
+        now = time.time_ns()
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.localtime(now // 10**9))
+        path = snapshot_dir(directory) / f"{digest}-{stamp}.{now % 10**9:09d}.snap"
+    return write_snapshot(path, root, collector)
+
+
+class Snapshot:
+    """A snapshot file mapped into memory; columns are zero-copy memoryviews."""
+
+    def __init__(self, path, header: Dict, mapping, views: Dict[str, memoryview]):
+        self.path = Path(path)
+        self.header = header
+        self.root: str = header['root']
+        self.created_at: float = header['created_at']
+        self._mapping = mapping
+        self._views = views
+        self.offsets = views['offsets']
+        self.sizes = views['sizes']
+        self.mtimes = views['mtimes']
+        self.inodes = views['inodes']
+        self.kinds = views['kinds']
+
+    @classmethod
+    def open(cls, path) -> 'Snapshot':
+        """Map a snapshot file; raises ValueError if it is not a snapshot this version can read."""
+        import mmap
+
+        with open(path, 'rb') as f:
+            if f.readline() != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a version {SNAPSHOT_VERSION} snapshot")
+            header = json.loads(f.readline().decode('utf-8', 'surrogateescape'))
+            if header['byteorder'] != sys.byteorder:
+                raise ValueError(f"{path} was written on a machine with another byte order")
+            position = f.tell()
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                raise ValueError(f"{path} is empty")
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        whole = memoryview(mapping)
+        views = {}
+        try:
+            for name, code, length in header['columns']:
+                position = _aligned(position)
+                end = position + length * array(code).itemsize
+                if end > size:
+                    raise ValueError(f"{path} is truncated")
+                views[name] = whole[position:end].cast(code)
+                position = end
+        except (ValueError, KeyError, TypeError):
+            for view in views.values():
+                view.release()
+            whole.release()
+            mapping.close()
+            raise
+        whole.release()
+        return cls(path, header, mapping, views)
+
+    def __len__(self) -> int:
+        return self.header['count']
+
+    def raw_path(self, i: int) -> bytes:
+        return self._views['paths'][self.offsets[i]:self.offsets[i + 1]].tobytes()
+
+    def entry(self, i: int) -> SnapshotEntry:
+        return SnapshotEntry(_decode(self.raw_path(i)), self.sizes[i], self.mtimes[i], self.inodes[i], self.kinds[i])
+
+    def __iter__(self) -> Iterator[SnapshotEntry]:
+        return (self.entry(i) for i in range(len(self)))
+
+    def find(self, relpath: str) -> Optional[SnapshotEntry]:
+        """Binary search for one path relative to the root."""
+        key = _encode(relpath)
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.raw_path(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return self.entry(lo) if lo < len(self) and self.raw_path(lo) == key else None
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(size for size, kind in zip(self.sizes, self.kinds) if kind != KIND_DIR)
+
+    def close(self) -> None:
+        for view in self._views.values():
+            view.release()
+        self._views = {}
+        self._mapping.close()
+
+    def __enter__(self) -> 'Snapshot':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class Change(NamedTuple):
+    """One difference between two snapshots; a size of -1 means absent on that side."""
+
+    status: str   # 'added', 'removed', 'grown' or 'shrunk'
+    path: str
+    old_size: int
+    new_size: int
+    kind: int
+
+    @property
+    def delta(self) -> int:
+        return 0 if self.kind == KIND_DIR else max(self.new_size, 0) - max(self.old_size, 0)
+
+
+def iter_changes(old: Snapshot, new: Snapshot) -> Iterator[Change]:
+    """Merge-join two snapshots of the same root, yielding changes in path order."""
+    i, j = 0, 0
+    n, m = len(old), len(new)
+    old_path, new_path = old.raw_path, new.raw_path
+    old_sizes, new_sizes = old.sizes, new.sizes
+    a = old_path(0) if n else None
+    b = new_path(0) if m else None
+    while i < n and j < m:
+        if a == b:
+            before, after = old_sizes[i], new_sizes[j]
+            if before != after and new.kinds[j] != KIND_DIR:
+                yield Change('grown' if after > before else 'shrunk', _decode(b), before, after, new.kinds[j])
+            i += 1
+            j += 1
+            a = old_path(i) if i < n else None
+            b = new_path(j) if j < m else None
+        elif a < b:
+            yield Change('removed', _decode(a), old_sizes[i], -1, old.kinds[i])
+            i += 1
+            a = old_path(i) if i < n else None
+        else:
+            yield Change('added', _decode(b), -1, new_sizes[j], new.kinds[j])
+            j += 1
+            b = new_path(j) if j < m else None
+    for k in range(i, n):
+        yield Change('removed', _decode(old_path(k)), old_sizes[k], -1, old.kinds[k])
+    for k in range(j, m):
+        yield Change('added', _decode(new_path(k)), -1, new_sizes[k], new.kinds[k])
+
+
+@dataclass
+class SnapshotDiff:
+    """Totals of a diff, with the net growth of every directory that changed.
+
+    Directory growth is rolled up, so a directory's figure includes
+    everything below it; the root is ''.
+    """
+
+    keep_changes: bool = True
+    changes: List[Change] = field(default_factory=list)
+    counts: Dict[str, int] = field(default_factory=lambda: {'added': 0, 'removed': 0, 'grown': 0, 'shrunk': 0})
+    growth: int = 0
+    dir_growth: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, change: Change) -> None:
+        self.counts[change.status] += 1
+        if self.keep_changes:
+            self.changes.append(change)
+        delta = change.delta
+        if not delta:
+            return
+        self.growth += delta
+        directory = change.path
+        while directory:
+            directory = directory.rpartition(os.sep)[0]
+            self.dir_growth[directory] = self.dir_growth.get(directory, 0) + delta
+
+    def of(self, status: str) -> List[Change]:
+        return [c for c in self.changes if c.status == status]
+
+    def top_directories(self, limit: int = 20) -> List[Tuple[str, int]]:
+        """Directories that grew the most, largest growth first."""
+        grew = [(path, delta) for path, delta in self.dir_growth.items() if delta > 0]
+        return sorted(grew, key=lambda item: (-item[1], item[0]))[:limit]
+
+    def summary(self) -> Dict:
+        return {**self.counts, 'growth_bytes': self.growth}
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot, keep_changes: bool = True) -> SnapshotDiff:
+    """Diff two snapshots of the same root; raises ValueError for snapshots of different roots."""
+    if old.root != new.root:
+        raise ValueError(f"Snapshots are of different roots: {old.root} and {new.root}")
+    diff = SnapshotDiff(keep_changes=keep_changes)
+    for change in iter_changes(old, new):
+        diff.add(change)
+    logging.getLogger(__name__).debug(f"Diffed {len(old)} and {len(new)} entries: {diff.summary()}")
+    return diff
@@ -0,0 +1,358 @@
+"""Watch daemon that keeps a LiveIndex current via inotify, with polling fallback."""
+
+import errno
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+from core.constants import MTIME_SETTLE_NS, SKIP_DIRS
+from core.live_index import LiveIndex
+from core.scanner import ParallelScanner, ScanVisitor
+from utils import inotify
+
+
+def _listing(entries: Iterable[os.DirEntry]):
+    """Convert DirEntry objects to (name, is_dir, size) tuples."""
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                yield entry.name, True, 0
+            else:
+                yield entry.name, False, entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            continue
+
+
+class _IndexVisitor(ScanVisitor):
+    """Feeds a parallel scan into the live index and collects directories."""
+
+    def __init__(self, index: LiveIndex):
+        self.index = index
+        self.directories: List[str] = []
+        self.lock = threading.Lock()
+
+    def visit_directory(self, path: str, entries: List[os.DirEntry], is_root: bool) -> None:
+        self.index.apply_listing(path, list(_listing(entries)))
+        with self.lock:
+            self.directories.append(path)
+
+
+def build_index(roots: Iterable, skip_dirs: Set[str] = SKIP_DIRS,
+                concurrency: Optional[Dict] = None) -> LiveIndex:
+    """Build a one-off LiveIndex with a parallel scan (no watching)."""
+    index = LiveIndex(roots, skip_dirs)
+    ParallelScanner(skip_dirs=skip_dirs, concurrency=concurrency).scan(index.roots, _IndexVisitor(index))
+    return index
+
+
+class WatchDaemon:
+    """Builds an initial index, then applies inotify events incrementally.
+
+    Directories that cannot be watched (watch limit reached, unsupported
+    filesystem, non-Linux platform) are re-listed every poll_interval
+    seconds when their mtime changes (or is too recent to trust), and fully re-listed every
+    full_rescan_every polls to catch in-place file growth.
+    """
+
+    def __init__(self, roots: Iterable, skip_dirs: Set[str] = SKIP_DIRS,
+                 poll_interval: float = 30.0, full_rescan_every: int = 10,
+                 concurrency: Optional[Dict] = None):
+        self.roots = [os.path.abspath(r) for r in roots]
+        self.skip_dirs = skip_dirs
+        self.poll_interval = poll_interval
+        self.full_rescan_every = full_rescan_every
+        self.concurrency = concurrency
+        self.logger = logging.getLogger(__name__)
+        self.index = LiveIndex(self.roots, skip_dirs)
+
+        self.inotify: Optional[inotify.Inotify] = None
+        self.wd_to_path: Dict[int, str] = {}
+        self.path_to_wd: Dict[str, int] = {}
+        self.polled: Dict[str, int] = {}  # directory -> last seen mtime_ns
+        self.watch_limit_hit = False
+        self._polls = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- setup ------------------------------------------------------------
+
+    def build(self) -> LiveIndex:
+        """Scan the roots in parallel and register watches for every directory."""
+        if inotify.is_supported():
+            try:
+                self.inotify = inotify.Inotify()
+            except OSError as e:
+                self.logger.warning(f"inotify unavailable, falling back to polling: {e}")
+
+        scan_started_ns = time.time_ns()
+        visitor = _IndexVisitor(self.index)
+        ParallelScanner(skip_dirs=self.skip_dirs, concurrency=self.concurrency).scan(self.roots, visitor)
+        for directory in visitor.directories:
+            self._watch(directory)
+            # Catch changes that happened between listing and watching
+            try:
+                if os.stat(directory).st_mtime_ns >= scan_started_ns:
+                    self._relist(directory)
+            except OSError:
+                pass
+
+        summary = [self.index.summary(root) for root in self.roots]
+        self.logger.info(
+            f"Indexed {sum(s.get('files', 0) for s in summary):,} files in "
+            f"{len(visitor.directories):,} directories; {len(self.path_to_wd):,} watched, "
+            f"{len(self.polled):,} polled"
+        )
+        return self.index
+
+    def _watch(self, directory: str) -> None:
+        if self.inotify is not None and not self.watch_limit_hit:
+            try:
+                wd = self.inotify.add_watch(directory)
+                self.wd_to_path[wd] = directory
+                self.path_to_wd[directory] = wd
+                return
+            except OSError as e:
+                if e.errno == errno.ENOSPC:
+                    self.watch_limit_hit = True
+                    self.logger.warning(
+                        f"inotify watch limit reached ({inotify.max_user_watches()}); "
+                        f"remaining directories will be polled every {self.poll_interval}s"
+                    )
+                elif e.errno == errno.ENOENT:
+                    return
+                else:
+                    self.logger.warning(f"Cannot watch {directory}, polling instead: {e}")
+        try:
+            self.polled[directory] = self._settled(os.stat(directory).st_mtime_ns)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _settled(mtime_ns: int) -> int:
+        """The mtime to compare against next poll; 0 (always re-list) while it may still tick."""
+        return mtime_ns if time.time_ns() - mtime_ns > MTIME_SETTLE_NS else 0
+
+    def _unwatch_subtree(self, directory: str) -> None:
+        prefix = directory.rstrip(os.sep) + os.sep
+        for path in [p for p in self.path_to_wd if p == directory or p.startswith(prefix)]:
+            wd = self.path_to_wd.pop(path)
+            self.wd_to_path.pop(wd, None)
+            if self.inotify is not None:
+                try:
+                    self.inotify.rm_watch(wd)
+                except OSError:
+                    pass
+        for path in [p for p in self.polled if p == directory or p.startswith(prefix)]:
+            del self.polled[path]
+
+    # -- incremental updates ----------------------------------------------
+
+    def _relist(self, directory: str) -> List[str]:
+        """Re-read one directory and reconcile the index; returns new subdirectories."""
+        try:
+            with os.scandir(directory) as it:
+                listing = list(_listing(it))
+        except OSError:
+            self._unwatch_subtree(directory)
+            self.index.remove(directory)
+            return []
+        known = set(self.index.children.get(directory, ()))
+        subdirs = self.index.apply_listing(directory, listing)
+        removed = known - {name for name, _, _ in listing}
+        for name in removed:
+            self._unwatch_subtree(os.path.join(directory, name))
+        return [d for d in subdirs if d not in self.path_to_wd and d not in self.polled]
+
+    def _add_subtree(self, directory: str) -> None:
+        """Index and watch a newly appeared directory tree."""
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            self._watch(current)
+            stack.extend(self._relist(current))
+
+    def _stat_into_index(self, path: str) -> None:
+        try:
+            st = os.lstat(path)
+        except OSError:
+            self._unwatch_subtree(path)
+            self.index.remove(path)
+            return
+        if os.path.isdir(path) and not os.path.islink(path):
+            if os.path.basename(path) in self.skip_dirs:
+                self.index.add_placeholder(path)
+            else:
+                self._add_subtree(path)
+        else:
+            self.index.set_file(path, st.st_size)
+
+    def handle_event(self, event: inotify.InotifyEvent) -> None:
+        """Apply one inotify event to the index."""
+        if event.mask & inotify.IN_Q_OVERFLOW:
+            self.logger.warning("inotify queue overflowed; rescanning all roots")
+            for root in self.roots:
+                self._add_subtree(root)
+            return
+
+        directory = self.wd_to_path.get(event.wd)
+        if directory is None:
+            return
+        if event.mask & inotify.IN_IGNORED:
+            self.wd_to_path.pop(event.wd, None)
+            self.path_to_wd.pop(directory, None)
+            return
+        if event.mask & (inotify.IN_DELETE_SELF | inotify.IN_MOVE_SELF):
+            if directory not in self.roots:
+                self._unwatch_subtree(directory)
+                self.index.remove(directory)
+            return
+
+        path = os.path.join(directory, event.name) if event.name else directory
+        if event.mask & (inotify.IN_DELETE | inotify.IN_MOVED_FROM):
+            self._unwatch_subtree(path)
+            self.index.remove(path)
+        elif event.mask & (inotify.IN_CREATE | inotify.IN_MOVED_TO | inotify.IN_MODIFY |
+                           inotify.IN_CLOSE_WRITE | inotify.IN_ATTRIB):
+            self._stat_into_index(path)
+
+    def poll(self, full: bool = False) -> None:
+        """Re-list polled directories whose mtime changed (all of them if full)."""
+        for directory, mtime_ns in list(self.polled.items()):
+            try:
+                current = os.stat(directory).st_mtime_ns
+            except OSError:
+                self._unwatch_subtree(directory)
+                self.index.remove(directory)
+                continue
+            if full or current != mtime_ns:
+                self.polled[directory] = self._settled(current)
+                for subdir in self._relist(directory):
+                    self._add_subtree(subdir)
+
+    # -- lifecycle --------------------------------------------------------
+
+    def run(self) -> None:
+        """Process events until stop() is called."""
+        next_poll = time.monotonic() + self.poll_interval
+        while not self._stop.is_set():
+            timeout = max(0.0, min(next_poll - time.monotonic(), 0.5))
+            if self.inotify is not None:
+                for event in self.inotify.read_events(timeout):
+                    try:
+                        self.handle_event(event)
+                    except Exception as e:
+                        self.logger.error(f"Error applying inotify event {event}: {e}")
+            else:
+                self._stop.wait(timeout)
+            if time.monotonic() >= next_poll:
+                self._polls += 1
+                self.poll(full=self._polls % self.full_rescan_every == 0)
+                next_poll = time.monotonic() + self.poll_interval
+
+    def start(self) -> 'WatchDaemon':
+        """Build the index and keep it current on a background thread."""
+        self.build()
+        self._thread = threading.Thread(target=self.run, daemon=True, name="watch-daemon")
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.inotify is not None:
+            self.inotify.close()
+
+
+class _QueryHandler(socketserver.StreamRequestHandler):
+    """One JSON request per line, one JSON response per line."""
+
+    def handle(self):
+        index: LiveIndex = self.server.index
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                cmd = request.get('cmd')
+                path = request.get('path')
+                if cmd == 'empty_files':
+                    result = index.empty_files(path)
+                elif cmd == 'empty_dirs':
+                    result = index.empty_dirs(path)
+                elif cmd == 'biggest':
+                    result = index.biggest(path, int(request.get('limit', 10)))
+                elif cmd == 'summary':
+                    result = index.summary(path)
+                elif cmd == 'covers':
+                    result = index.covers(path)
+                else:
+                    raise ValueError(f"Unknown command: {cmd}")
+                response = {'ok': True, 'result': result}
+            except Exception as e:
+                response = {'ok': False, 'error': str(e)}
+            self.wfile.write((json.dumps(response) + '\n').encode())
+            self.wfile.flush()
+
+
+class WatchServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves LiveIndex queries over a Unix socket."""
+
+    daemon_threads = True
+
+    def __init__(self, index: LiveIndex, socket_path: str):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.index = index
+        super().__init__(socket_path, _QueryHandler)
+        os.chmod(socket_path, 0o600)
+
+
+class WatchClient:
+    """Queries a running watch daemon; mirrors the LiveIndex query methods."""
+
+    def __init__(self, socket_path: str, timeout: float = 5.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._file = None
+
+    def _request(self, **request):
+        with self._lock:
+            if self._sock is None:
+                self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._sock.settimeout(self.timeout)
+                self._sock.connect(self.socket_path)
+                self._file = self._sock.makefile('rwb')
+            self._file.write((json.dumps(request) + '\n').encode())
+            self._file.flush()
+            response = json.loads(self._file.readline())
+        if not response.get('ok'):
+            raise RuntimeError(response.get('error', 'watch daemon error'))
+        return response['result']
+
+    def covers(self, path) -> bool:
+        return self._request(cmd='covers', path=os.path.abspath(path))
+
+    def empty_files(self, path=None) -> List[str]:
+        return self._request(cmd='empty_files', path=path and os.path.abspath(path))
+
+    def empty_dirs(self, path=None) -> List[str]:
+        return self._request(cmd='empty_dirs', path=path and os.path.abspath(path))
+
+    def biggest(self, path, limit: int = 10) -> List[Dict]:
+        return self._request(cmd='biggest', path=os.path.abspath(path), limit=limit)
+
+    def summary(self, path) -> Dict:
+        return self._request(cmd='summary', path=os.path.abspath(path))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._sock is not None:
+                self._file.close()
+                self._sock.close()
+                self._sock = None
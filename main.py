@@ -1,19 +1,98 @@
 #!/usr/bin/env python3
 """Directory Cleanup Application"""
 
+import argparse
 import logging
+import signal
+import sys
+import threading
 from pathlib import Path
 from colorama import init, Fore, Style
 from utils.logging_utils import setup_logging
-from core.chat_interface import CleanupAssistant
+from core import batch
+from core.constants import DEFAULT_WATCH_SOCKET
 
-# Initialize colorama
-init()
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="AI-powered directory cleanup assistant")
+    parser.add_argument("paths", nargs="*", help="Starting directory (or roots to watch with --daemon)")
+    parser.add_argument("--analyze", action="store_true",
+                        help="Print an analysis of the starting directory and exit")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep a live index of the starting directory for instant answers")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Run a watch daemon serving live scan results over a Unix socket")
+    parser.add_argument("--connect", action="store_true",
+                        help="Answer queries from a running watch daemon")
+    parser.add_argument("--socket", default=str(DEFAULT_WATCH_SOCKET),
+                        help="Unix socket used by --daemon and --connect")
+    parser.add_argument("--poll-interval", type=float, default=30.0,
+                        help="Seconds between rescans of directories that cannot be watched")
+    return parser.parse_args(argv)
 
-def main():
+def run_daemon(args: argparse.Namespace) -> None:
+    """Index the roots, keep them current and serve queries until interrupted."""
+    from core.watcher import WatchDaemon, WatchServer
+    
+    roots = args.paths or [str(Path.cwd())]
+    daemon = WatchDaemon(roots, poll_interval=args.poll_interval).start()
+    server = WatchServer(daemon.index, args.socket)
+    # shutdown() waits for serve_forever() to return, so it must not run on the serving thread
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+    print(f"{Fore.GREEN}Watching {', '.join(daemon.roots)}; serving on {args.socket}{Style.RESET_ALL}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        daemon.stop()
+        Path(args.socket).unlink(missing_ok=True)
+
+def main(argv=None):
     """Main entry point."""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in batch.COMMANDS:
+        # Headless subcommands: JSON Lines on stdout, exit code for the caller
+        return batch.main(argv)
+    
+    # Initialize colorama
+    init()
+    args = parse_args(argv)
     setup_logging()
+    
+    if args.daemon:
+        run_daemon(args)
+        return
+    
+    # The interactive assistant is only imported when the REPL actually starts
+    from core.chat_interface import CleanupAssistant
+    from utils.journal import get_journal
+    
+    # Resolve cleanups interrupted by a crash before doing anything new
+    try:
+        for batch_id in get_journal().recover():
+            print(f"{Fore.YELLOW}Recovered interrupted cleanup {batch_id}; type 'undo' to reverse it{Style.RESET_ALL}")
+    except OSError as e:
+        logging.getLogger(__name__).warning(f"Could not read operation journal: {e}")
+    
     assistant = CleanupAssistant()
+    if args.paths:
+        print(assistant.change_directory(args.paths[0]))
+    
+    if args.analyze:
+        print(assistant.analyze_directory(assistant.current_path))
+        return
+    
+    watcher = None
+    if args.connect:
+        from core.watcher import WatchClient
+        assistant.live_index = WatchClient(args.socket)
+    elif args.watch:
+        from core.watcher import WatchDaemon
+        print(f"{Fore.CYAN}Indexing {assistant.current_path}...{Style.RESET_ALL}")
+        watcher = WatchDaemon([assistant.current_path], poll_interval=args.poll_interval).start()
+        assistant.live_index = watcher.index
     
     print(f"""
 {Fore.GREEN}Directory Navigation Assistant{Style.RESET_ALL}
@@ -24,28 +103,34 @@ You can:
 - Get help (help, ?)
     """)
     
-    while True:
-        try:
-            user_input = input(f"\n{Fore.CYAN}{assistant.current_path}{Style.RESET_ALL}> ").strip()
-            
-            if not user_input:
-                continue
+    try:
+        while True:
+            try:
+                user_input = input(f"\n{Fore.CYAN}{assistant.current_path}{Style.RESET_ALL}> ").strip()
                 
-            response = assistant.handle_command(user_input)
-            
-            if response == "exit":
+                if not user_input:
+                    continue
+                    
+                response = assistant.handle_command(user_input)
+                
+                if response == "exit":
+                    print(f"\n{Fore.GREEN}Goodbye!{Style.RESET_ALL}")
+                    break
+                    
+                if response:  # Only print if there's a response
+                    print(response)
+                
+            except KeyboardInterrupt:
                 print(f"\n{Fore.GREEN}Goodbye!{Style.RESET_ALL}")
                 break
-                
-            if response:  # Only print if there's a response
-                print(response)
-            
-        except KeyboardInterrupt:
-            print(f"\n{Fore.GREEN}Goodbye!{Style.RESET_ALL}")
-            break
-        except Exception as e:
-            logging.error(f"Unexpected error: {e}")
-            print(f"{Fore.RED}An unexpected error occurred: {e}{Style.RESET_ALL}")
+            except Exception as e:
+                logging.error(f"Unexpected error: {e}")
+                print(f"{Fore.RED}An unexpected error occurred: {e}{Style.RESET_ALL}")
+    finally:
+        if watcher is not None:
+            watcher.stop()
+        if assistant.command_runner is not None:
+            assistant.command_runner.close()
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
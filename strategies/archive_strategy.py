@@ -0,0 +1,196 @@
+"""Strategy for archiving cold directories into compressed tarballs."""
+
+import logging
+import os
+import shutil
+import tarfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from strategies.base import BaseStrategy
+from utils.io_governor import get_governor
+from utils.journal import OperationJournal, get_journal
+
+# Uncompressed bytes per gzip member; each member is compressed on its own thread
+CHUNK_SIZE = 4 * 1024 * 1024
+READ_SIZE = 1024 * 1024
+
+
+class ArchiveError(Exception):
+    """The archive could not be written or does not match its source."""
+
+
+def _gzip_member(data: bytes, level: int) -> bytes:
+    # wbits=31 produces a complete gzip member (header, deflate data, CRC and size)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+class ParallelGzipWriter:
+    """File-like writer that gzips fixed-size chunks on a thread pool.
+
+    Chunks become separate gzip members written in order; concatenated
+    members are a valid .gz file (as produced by pigz) that gzip, tar and
+    Python's gzip module read as one stream. zlib releases the GIL while
+    compressing, so the work spreads across cores. At most two chunks per
+    worker are in memory at once.
+    """
+
+    def __init__(self, fileobj, level: int = 6, workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE):
+        self.fileobj = fileobj
+        self.level = level
+        self.chunk_size = chunk_size
+        workers = workers or os.cpu_count() or 1
+        self.window = workers * 2
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gzip")
+        self._pending = deque()
+        self._buffer = bytearray()
+        self.members = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self.bytes_in += len(data)
+        while len(self._buffer) >= self.chunk_size:
+            self._submit(bytes(self._buffer[:self.chunk_size]))
+            del self._buffer[:self.chunk_size]
+        return len(data)
+
+    def _submit(self, chunk: bytes) -> None:
+        self._pending.append(self._pool.submit(_gzip_member, chunk, self.level))
+        while len(self._pending) > self.window:
+            self._write_next()
+
+    def _write_next(self) -> None:
+        member = self._pending.popleft().result()
+        self.fileobj.write(member)
+        self.members += 1
+        self.bytes_out += len(member)
+
+    def close(self) -> None:
+        """Compress what is left and write every outstanding member."""
+        try:
+            if self._buffer or not self.members and not self._pending:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            while self._pending:
+                self._write_next()
+        finally:
+            self._pool.shutdown(wait=True)
+
+
+class ArchiveStrategy(BaseStrategy):
+    """Replace a directory with a verified .tar.gz of it in target_dir.
+
+    The archive is written under a temporary name, read back in full
+    (every gzip member's CRC is checked and the member list compared with
+    what was added) and only then renamed into place. The source is removed
+    last, and only if nothing in it changed while it was being archived.
+    The whole step is journaled as 'archive', so undo extracts it again.
+    """
+
+    def __init__(self, target_dir: Path, level: int = 6, workers: Optional[int] = None,
+                 chunk_size: int = CHUNK_SIZE, remove_source: bool = True,
+                 journal: Optional[OperationJournal] = None):
+        self.target_dir = Path(target_dir)
+        self.level = level
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.remove_source = remove_source
+        self.journal = journal
+        self.logger = logging.getLogger(__name__)
+
+    def archive_path(self, source_dir: Path) -> Path:
+        return self.target_dir / f"{Path(source_dir).name}.tar.gz"
+
+    def execute(self, source_dir: Path) -> Path:
+        """Archive source_dir and (by default) remove it; returns the archive path."""
+        source_dir = Path(source_dir)
+        if not source_dir.is_dir() or source_dir.is_symlink():
+            raise NotADirectoryError(f"{source_dir} is not a directory")
+        destination = self.archive_path(source_dir)
+        if destination.exists():
+            raise FileExistsError(f"{destination} already exists")
+        self.target_dir.mkdir(parents=True, exist_ok=True)
+        partial = destination.with_name(f".{destination.name}.partial")
+
+        try:
+            manifest = self._write(source_dir, partial)
+            self._verify(partial, manifest)
+            changed = self._changed(source_dir, manifest)
+            if changed:
+                raise ArchiveError(f"{changed} changed while it was being archived")
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+
+        meta = {'files': sum(1 for _, kind, _, _ in manifest if kind == tarfile.REGTYPE),
+                'bytes': sum(size for _, _, size, _ in manifest),
+                'kept_source': not self.remove_source}
+        with (self.journal or get_journal()).operation('archive', source_dir, destination, meta=meta):
+            os.replace(partial, destination)
+            if self.remove_source:
+                shutil.rmtree(source_dir)
+        self.logger.info(f"Archived {source_dir} to {destination}")
+        return destination
+
+    def _write(self, source_dir: Path, archive: Path) -> List[Tuple[str, bytes, int, float]]:
+        """Stream source_dir into archive; returns (name, type, size, mtime) per member."""
+        manifest = []
+        governor = get_governor()
+
+        def record(info: tarfile.TarInfo) -> tarfile.TarInfo:
+            governor.throttle(1, info.size)
+            manifest.append((info.name, info.type, info.size, info.mtime))
+            return info
+
+        with open(archive, 'wb') as f:
+            writer = ParallelGzipWriter(f, self.level, self.workers, self.chunk_size)
+            try:
+                with tarfile.open(fileobj=writer, mode='w|', format=tarfile.PAX_FORMAT) as tar:
+                    tar.add(str(source_dir), arcname=source_dir.name, filter=record)
+            finally:
+                writer.close()
+            f.flush()
+            os.fsync(f.fileno())
+        self.logger.debug(f"{source_dir}: {writer.bytes_in} bytes -> {writer.bytes_out} "
+                          f"in {writer.members} gzip members")
+        return manifest
+
+    @staticmethod
+    def _verify(archive: Path, manifest: List[Tuple[str, bytes, int, float]]) -> None:
+        """Read the whole archive back and compare it with the manifest."""
+        expected = iter(manifest)
+        try:
+            with tarfile.open(archive, mode='r:gz') as tar:
+                for member in tar:
+                    want = next(expected, None)
+                    if want is None or (member.name, member.type, member.size) != want[:3]:
+                        raise ArchiveError(f"{archive}: unexpected member {member.name}")
+                    if member.isfile():
+                        data = tar.extractfile(member)
+                        while data.read(READ_SIZE):
+                            pass
+        except (tarfile.TarError, OSError, EOFError, zlib.error) as e:
+            raise ArchiveError(f"{archive} failed verification: {e}") from e
+        missing = next(expected, None)
+        if missing is not None:
+            raise ArchiveError(f"{archive}: {missing[0]} is missing")
+
+    @staticmethod
+    def _changed(source_dir: Path, manifest: List[Tuple[str, bytes, int, float]]) -> Optional[str]:
+        """First archived path whose size or mtime differs from the archive, if any."""
+        base = source_dir.parent
+        for name, kind, size, mtime in manifest:
+            path = base / name
+            try:
+                st = path.lstat()
+            except OSError:
+                return str(path)
+            if int(st.st_mtime) != int(mtime) or (kind == tarfile.REGTYPE and st.st_size != size):
+                return str(path)
+        return None
@@ -1,16 +1,113 @@
-"""Base strategy for directory operations."""
+"""Base strategy for directory operations.
 
-from pathlib import Path
-from abc import ABC, abstractmethod
+Every strategy acts on one directory at a time through execute() and on
+many through execute_batch(), which the cleanup pipeline calls with
+whatever items are ready (see strategies.pipeline). Strategies that ask
+for AI confirmation derive from DirectoryStrategy, which implements both
+on top of its async handle_empty_directory().
+"""
+
+import asyncio
 import logging
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+
+@dataclass
+class BatchResult:
+    """Per-item outcome of executing a strategy on several directories."""
+
+    processed: List[Path] = field(default_factory=list)
+    skipped: List[Tuple[Path, str]] = field(default_factory=list)
+    failed: List[Tuple[Path, str]] = field(default_factory=list)
+
+    def merge(self, other: 'BatchResult') -> None:
+        self.processed.extend(other.processed)
+        self.skipped.extend(other.skipped)
+        self.failed.extend(other.failed)
+
 
 class BaseStrategy(ABC):
     """Base class for directory operation strategies."""
-    
+
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
-    
+
     @abstractmethod
+    def execute(self, source_dir: Path):
+        """Execute the strategy on the given directory; raises on failure."""
+
+    def execute_batch(self, paths: Iterable[Path]) -> BatchResult:
+        """Execute the strategy on each path, collecting failures instead of raising.
+
+        Strategies with a cheaper way to handle many items at once override this.
+        """
+        result = BatchResult()
+        for path in paths:
+            path = Path(path)
+            try:
+                self.execute(path)
+                result.processed.append(path)
+            except Exception as e:
+                self.logger.error(f"Error processing directory {path}: {e}")
+                result.failed.append((path, str(e)))
+        return result
+
+
+class DirectoryStrategy(BaseStrategy):
+    """Strategy for empty directories that each need an async safety check."""
+
+    def __init__(self, ai_safety):
+        super().__init__()
+        self.ai_safety = ai_safety
+        self.processed_count = 0
+        self.skipped_count = 0
+
+    async def validate_directory(self, dir_path: Path) -> bool:
+        """Still an empty directory, and approved by the safety check."""
+        try:
+            if dir_path.is_symlink() or not dir_path.is_dir():
+                return False
+            with os.scandir(dir_path) as it:
+                if next(it, None) is not None:
+                    return False
+        except OSError:
+            return False
+        if not await self.ai_safety.validate_empty_directory(dir_path):
+            self.skipped_count += 1
+            return False
+        return True
+
+    @abstractmethod
+    async def handle_empty_directory(self, dir_path: Path, validated: bool = False) -> bool:
+        """Process one directory; False if it was skipped, raises OSError if acting on it failed.
+
+        validated means validate_directory() has already approved it.
+        """
+
     def execute(self, source_dir: Path) -> bool:
-        """Execute the strategy on the given directory."""
-        pass
\ No newline at end of file
+        return asyncio.run(self.handle_empty_directory(Path(source_dir)))
+
+    async def execute_batch_async(self, paths: Iterable[Path], validated: bool = False) -> BatchResult:
+        """Handle paths concurrently; the safety checks are network-bound."""
+        paths = [Path(p) for p in paths]
+        result = BatchResult()
+        outcomes = await asyncio.gather(*(self.handle_empty_directory(p, validated) for p in paths),
+                                        return_exceptions=True)
+        for path, outcome in zip(paths, outcomes):
+            if isinstance(outcome, BaseException):
+                result.failed.append((path, str(outcome)))
+            elif outcome:
+                result.processed.append(path)
+            else:
+                result.skipped.append((path, "rejected by safety check"))
+        return result
+
+    def execute_batch(self, paths: Iterable[Path]) -> BatchResult:
+        return asyncio.run(self.execute_batch_async(paths))
+
+    def cleanup(self) -> None:
+        """Hook for reporting once all directories have been handled."""
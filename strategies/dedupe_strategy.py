@@ -0,0 +1,156 @@
+"""Strategy for collapsing duplicate files into hard links."""
+
+import filecmp
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.duplicates import DuplicateGroup
+from utils.io_governor import get_governor
+from utils.journal import JournalBatch, OperationJournal, get_journal
+
+
+@dataclass
+class DedupeResult:
+    """What happened (or would happen, in a dry run) to one duplicate group."""
+
+    canonical: str
+    size: int
+    linked: List[str] = field(default_factory=list)
+    reclaimed_bytes: int = 0
+    skipped: List[Tuple[str, str]] = field(default_factory=list)
+
+    def as_dict(self) -> Dict:
+        return {'canonical': self.canonical, 'size': self.size, 'linked': self.linked,
+                'reclaimed_bytes': self.reclaimed_bytes,
+                'skipped': [{'path': path, 'reason': reason} for path, reason in self.skipped]}
+
+
+@dataclass
+class DedupeReport:
+    """Totals over all groups processed by one run."""
+
+    dry_run: bool
+    results: List[DedupeResult] = field(default_factory=list)
+
+    @property
+    def linked(self) -> int:
+        return sum(len(r.linked) for r in self.results)
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        return sum(r.reclaimed_bytes for r in self.results)
+
+    @property
+    def skipped(self) -> int:
+        return sum(len(r.skipped) for r in self.results)
+
+
+class HardlinkDedupeStrategy:
+    """Replace verified duplicates with hard links to one canonical copy.
+
+    Within a group, files are linked only to a canonical copy on the same
+    filesystem with the same owner and permissions, since a hard link
+    shares both. Each file is compared byte for byte with its canonical
+    copy just before the swap, which links the canonical copy to a
+    temporary name beside the file and renames that over it, so the path
+    never disappears. A dry run makes the same comparison. Space is reclaimed only for files with no other
+    links. Swaps are journaled as 'hardlink', one batch per run; undo gives
+    each file its own copy again. Groups are processed in parallel.
+    """
+
+    def __init__(self, workers: int = 8, dry_run: bool = False,
+                 journal: Optional[OperationJournal] = None):
+        self.workers = max(1, workers)
+        self.dry_run = dry_run
+        self.journal = journal
+        self.logger = logging.getLogger(__name__)
+
+    def execute(self, group: DuplicateGroup, batch: Optional[JournalBatch] = None) -> DedupeResult:
+        """Link the files of one group; in a dry run only report what would be linked."""
+        if batch is None and not self.dry_run:
+            with (self.journal or get_journal()).batch(f"hardlink {group.digest}") as batch:
+                return self.execute(group, batch)
+        stats = {}
+        result = DedupeResult(group.paths[0], group.size)
+        for path in group.paths:
+            try:
+                stats[path] = os.lstat(path)
+            except OSError as e:
+                result.skipped.append((path, str(e)))
+        # One canonical copy per (filesystem, owner, mode), the one with the most links
+        canonical: Dict[Tuple[int, int, int, int], str] = {}
+        for path, st in sorted(stats.items(), key=lambda kv: (-kv[1].st_nlink, kv[0])):
+            key = (st.st_dev, st.st_uid, st.st_gid, st.st_mode)
+            target = canonical.setdefault(key, path)
+            if target == path:
+                continue
+            target_st = stats[target]
+            if st.st_ino == target_st.st_ino:
+                continue
+            if st.st_size != group.size or target_st.st_size != group.size:
+                result.skipped.append((path, "size changed"))
+                continue
+            try:
+                # A dry run verifies as well, so it only counts files that would be linked
+                if self.dry_run:
+                    self._verify(target, path, st)
+                else:
+                    self._swap(batch, target, path, st)
+            except (OSError, ValueError) as e:
+                result.skipped.append((path, str(e)))
+                continue
+            result.linked.append(path)
+            if st.st_nlink == 1:
+                result.reclaimed_bytes += group.size
+        if len(canonical) > 1:
+            self.logger.debug(f"{group.digest}: {len(canonical)} canonical copies "
+                              f"(different filesystems or permissions)")
+        result.canonical = next(iter(canonical.values()), result.canonical)
+        return result
+
+    @staticmethod
+    def _verify(canonical: str, path: str, st: os.stat_result) -> None:
+        """Raise ValueError unless path still matches st and has the canonical copy's bytes."""
+        # Both copies are read in full by the comparison
+        get_governor().throttle(1, 2 * st.st_size)
+        if not filecmp.cmp(canonical, path, shallow=False):
+            raise ValueError("content differs from canonical copy")
+        current = os.lstat(path)
+        if (current.st_ino, current.st_size, current.st_mtime_ns) != (st.st_ino, st.st_size, st.st_mtime_ns):
+            raise ValueError("changed while being compared")
+
+    @classmethod
+    def _swap(cls, batch: JournalBatch, canonical: str, path: str, st: os.stat_result) -> None:
+        cls._verify(canonical, path, st)
+        tmp = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.urandom(4).hex()}.link")
+        meta = {'mode': st.st_mode & 0o7777, 'size': st.st_size}
+        op = batch.intend('hardlink', path, canonical, meta)
+        try:
+            os.link(canonical, tmp)
+            try:
+                os.replace(tmp, path)
+            except OSError:
+                os.unlink(tmp)
+                raise
+        except OSError as e:
+            batch.failed(op, e)
+            raise
+        batch.done(op)
+
+    def run(self, groups: Iterable[DuplicateGroup]) -> DedupeReport:
+        """Process groups in parallel as one journal batch; largest savings first."""
+        report = DedupeReport(self.dry_run)
+        groups = list(groups)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="dedupe") as pool:
+            if self.dry_run:
+                report.results = list(pool.map(self.execute, groups))
+            else:
+                with (self.journal or get_journal()).batch(f"hardlink {len(groups)} duplicate groups") as batch:
+                    report.results = list(pool.map(lambda group: self.execute(group, batch), groups))
+        report.results.sort(key=lambda r: (-r.reclaimed_bytes, r.canonical))
+        self.logger.info(f"{'Would link' if self.dry_run else 'Linked'} {report.linked} files, "
+                         f"{report.reclaimed_bytes} bytes reclaimable, {report.skipped} skipped")
+        return report
@@ -1,11 +1,12 @@
 """Strategy for deleting empty directories."""
 
 import logging
+import os
 from pathlib import Path
-import shutil
 
 from .base import DirectoryStrategy
 from utils.ai_safety import AISafetyCheck
+from utils.journal import get_journal
 
 class DeleteStrategy(DirectoryStrategy):
     """Strategy that permanently deletes empty directories."""
@@ -14,9 +15,9 @@ class DeleteStrategy(DirectoryStrategy):
         super().__init__(ai_safety)
         logging.warning("Delete strategy initialized - directories will be permanently removed")
     
-    async def handle_empty_directory(self, dir_path: Path) -> bool:
+    async def handle_empty_directory(self, dir_path: Path, validated: bool = False) -> bool:
         """Delete an empty directory."""
-        if not await self.validate_directory(dir_path):
+        if not validated and not await self.validate_directory(dir_path):
             return False
             
         try:
@@ -27,14 +28,19 @@ class DeleteStrategy(DirectoryStrategy):
                 self.skipped_count += 1
                 return False
             
-            shutil.rmtree(dir_path)
+            # Journaled as rmdir, which undo reverses by recreating an empty directory;
+            # os.rmdir refuses to remove anything that gained contents since validation
+            meta = {'mode': dir_path.stat().st_mode & 0o7777}
+            with get_journal().operation('rmdir', dir_path, meta=meta):
+                os.rmdir(dir_path)
             self.processed_count += 1
             logging.info(f"Deleted empty directory: {dir_path}")
             return True
             
-        except (OSError, shutil.Error) as e:
+        except OSError as e:
+            # A failure, not a rejection: the batch reports it under failed
             logging.error(f"Failed to delete directory {dir_path}: {e}")
-            return False
+            raise
     
     def cleanup(self) -> None:
         """Log final deletion statistics."""
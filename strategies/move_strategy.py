@@ -1,24 +1,232 @@
-"""Basic strategy for moving directories."""
+"""Basic strategy for moving directories.
 
+Within one filesystem a move is a single rename. Across filesystems the
+tree is copied file by file on a thread pool, using the kernel's copy
+offload (copy_file_range, then sendfile) so data does not pass through
+Python, and each file is verified before the source is removed. Copied
+files are recorded in a manifest beside the destination; if the move is
+interrupted, running it again skips everything the manifest lists.
+"""
+
+import errno
+import json
 import logging
-from pathlib import Path
+import os
 import shutil
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from strategies.base import BaseStrategy
+from utils.io_governor import get_governor
+from utils.journal import OperationJournal, get_journal
+
+COPY_CHUNK = 1024 * 1024 * 1024
+FALLBACK_CHUNK = 1024 * 1024
+# Errors meaning "this offload does not work for these files", not "the copy failed"
+_NO_OFFLOAD = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF, errno.ENOTSUP}
+
+
+def _offload(infd: int, outfd: int, size: int) -> int:
+    """Copy up to size bytes in the kernel; returns how many were copied."""
+    copied = 0
+    copy_file_range = getattr(os, 'copy_file_range', None)
+    if copy_file_range is not None:
+        try:
+            while copied < size:
+                n = copy_file_range(infd, outfd, min(size - copied, COPY_CHUNK), copied, copied)
+                if n == 0:
+                    break
+                copied += n
+            return copied
+        except OSError as e:
+            if e.errno not in _NO_OFFLOAD:
+                raise
+    sendfile = getattr(os, 'sendfile', None)
+    if sendfile is not None:
+        try:
+            os.lseek(outfd, copied, os.SEEK_SET)
+            while copied < size:
+                n = sendfile(outfd, infd, copied, min(size - copied, COPY_CHUNK))
+                if n == 0:
+                    break
+                copied += n
+        except OSError as e:
+            if e.errno not in _NO_OFFLOAD:
+                raise
+    return copied
 
-class MoveStrategy:
-    def __init__(self, target_dir: Path):
+
+def copy_file(src: str, dst: str) -> int:
+    """Copy one regular file's data with kernel offload where possible; returns its size."""
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        copied = _offload(fsrc.fileno(), fdst.fileno(), size)
+        # Whatever the kernel would not copy (or a file that grew) goes through userspace
+        fsrc.seek(copied)
+        fdst.seek(copied)
+        shutil.copyfileobj(fsrc, fdst, FALLBACK_CHUNK)
+        return fdst.tell()
+
+
+class MoveStrategy(BaseStrategy):
+    def __init__(self, target_dir: Path, journal: Optional[OperationJournal] = None,
+                 workers: int = 8, checksum: bool = False,
+                 on_progress: Optional[Callable[[int, int], None]] = None):
         self.target_dir = Path(target_dir)
+        self.journal = journal
+        self.workers = max(1, workers)
+        self.checksum = checksum
+        self.on_progress = on_progress
         self.logger = logging.getLogger(__name__)
-        
+
     def execute(self, source_dir: Path) -> None:
         """Move directory to target location."""
         try:
             # Ensure target directory exists
             self.target_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Simple move operation
-            shutil.move(str(source_dir), str(self.target_dir))
+
+            # Journaled as one move so it can be undone
+            source_dir = Path(source_dir)
+            destination = self.target_dir / source_dir.name
+            manifest = self.manifest_path(destination)
+            if destination.exists() and not manifest.exists():
+                raise FileExistsError(f"Destination path '{destination}' already exists")
+            with (self.journal or get_journal()).operation('move', source_dir, destination):
+                if manifest.exists() or not self._rename(source_dir, destination):
+                    self._copy_and_remove(source_dir, destination, manifest)
             self.logger.info(f"Moved {source_dir} to {self.target_dir}")
-            
+
         except Exception as e:
             self.logger.error(f"Failed to move {source_dir}: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    @staticmethod
+    def manifest_path(destination: Path) -> Path:
+        """Where an interrupted cross-device move records the files it has copied."""
+        return destination.with_name(f".{destination.name}.move-manifest.jsonl")
+
+    @staticmethod
+    def _rename(source: Path, destination: Path) -> bool:
+        """Rename within a filesystem; False if source and destination are on different ones."""
+        try:
+            os.rename(source, destination)
+            return True
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            return False
+
+    def _copy_and_remove(self, source: Path, destination: Path, manifest: Path) -> None:
+        done = self._load_manifest(manifest)
+        dirs, files, links = self._walk(source)
+        total = sum(size for _, size, _ in files)
+        pending = [item for item in files if not self._already_copied(item, done, destination)]
+        if len(pending) < len(files):
+            self.logger.info(f"Resuming move of {source}: {len(files) - len(pending)} files already copied")
+        progress = [total - sum(size for _, size, _ in pending)]
+        lock = threading.Lock()
+        governor = get_governor()
+
+        for rel in dirs:
+            (destination / rel).mkdir(parents=True, exist_ok=True)
+        for rel, target in links:
+            link = destination / rel
+            if os.path.lexists(link):
+                link.unlink()
+            os.symlink(target, link)
+
+        with open(manifest, 'a', encoding='utf-8') as record:
+            def copy_one(item: Tuple[str, int, int]) -> None:
+                rel, size, mtime_ns = item
+                src, dst = source / rel, destination / rel
+                governor.throttle(1, size)
+                copied = copy_file(str(src), str(dst))
+                shutil.copystat(src, dst, follow_symlinks=False)
+                self._verify(src, dst, size, copied)
+                line = json.dumps({'path': rel, 'size': size, 'mtime_ns': mtime_ns})
+                with lock:
+                    record.write(line + '\n')
+                    record.flush()
+                    progress[0] += size
+                    if self.on_progress is not None:
+                        self.on_progress(progress[0], total)
+
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="move") as pool:
+                # list() re-raises the first copy or verification error
+                list(pool.map(copy_one, pending))
+            os.fsync(record.fileno())
+
+        # Anything added or modified during the copy would be lost by the rmtree
+        if self._walk(source) != (dirs, files, links):
+            raise OSError(errno.EBUSY, f"{source} changed while it was being copied; run the move again")
+
+        # Directory times last, deepest first, since filling a directory changes its mtime
+        for rel in sorted(dirs, key=lambda d: d.count(os.sep), reverse=True):
+            shutil.copystat(source / rel, destination / rel)
+        shutil.copystat(source, destination)
+        shutil.rmtree(source)
+        manifest.unlink()
+
+    @staticmethod
+    def _walk(source: Path) -> Tuple[List[str], List[Tuple[str, int, int]], List[Tuple[str, str]]]:
+        """Relative directories, (file, size, mtime_ns) and (symlink, target) under source."""
+        dirs, files, links = [], [], []
+
+        def fail(error: OSError) -> None:
+            # A directory that cannot be read must not be left behind by the rmtree
+            raise error
+
+        for dirpath, dirnames, filenames in os.walk(source, onerror=fail):
+            base = os.path.relpath(dirpath, source)
+            for name in dirnames + filenames:
+                path = os.path.join(dirpath, name)
+                rel = os.path.normpath(os.path.join(base, name))
+                st = os.lstat(path)
+                if stat.S_ISLNK(st.st_mode):
+                    links.append((rel, os.readlink(path)))
+                elif stat.S_ISDIR(st.st_mode):
+                    dirs.append(rel)
+                elif stat.S_ISREG(st.st_mode):
+                    files.append((rel, st.st_size, st.st_mtime_ns))
+                else:
+                    raise OSError(errno.EINVAL, f"cannot move special file {path} across filesystems")
+        return dirs, files, links
+
+    @staticmethod
+    def _load_manifest(manifest: Path) -> Dict[str, Tuple[int, int]]:
+        done = {}
+        try:
+            with open(manifest, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from an interruption
+                    done[entry['path']] = (entry['size'], entry['mtime_ns'])
+        except FileNotFoundError:
+            pass
+        return done
+
+    @staticmethod
+    def _already_copied(item: Tuple[str, int, int], done: Dict[str, Tuple[int, int]],
+                        destination: Path) -> bool:
+        """Listed in the manifest, unchanged at the source and intact at the destination."""
+        rel, size, mtime_ns = item
+        if done.get(rel) != (size, mtime_ns):
+            return False
+        try:
+            return (destination / rel).stat().st_size == size
+        except OSError:
+            return False
+
+    def _verify(self, src: Path, dst: Path, size: int, copied: int) -> None:
+        if copied != size or dst.stat().st_size != size:
+            raise OSError(errno.EIO, f"{dst}: copied {copied} of {size} bytes")
+        if self.checksum:
+            from core.duplicates import full_digest
+
+            if full_digest(str(src)) != full_digest(str(dst)):
+                raise OSError(errno.EIO, f"{dst}: checksum differs from {src}")
@@ -0,0 +1,209 @@
+"""Asyncio producer/consumer pipeline for running strategies.
+
+Items flow from a source through stages connected by bounded queues, so
+a slow stage holds back the ones before it instead of letting work pile
+up in memory, and acting on items that have passed validation overlaps
+with producing and validating the rest.
+
+Stage kinds:
+
+- filter: fn(item) -> bool; rejected items are dropped silently.
+- validate: fn(item) -> bool; rejected items are reported as skipped.
+- act: fn(items) -> BatchResult, called with up to batch_size items
+  that are ready at once; processed items continue downstream.
+- record: fn(item), for bookkeeping; items pass through.
+
+Coroutine functions are awaited. Plain functions of validate and act
+stages are run in a thread, since they do blocking I/O; filter and
+record functions are expected to be cheap and are called inline.
+"""
+
+import asyncio
+import inspect
+import logging
+import threading
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Iterable, List, Optional, Union
+
+from strategies.base import BatchResult
+
+STAGE_KINDS = ('filter', 'validate', 'act', 'record')
+QUEUE_SIZE = 256
+
+_END = object()
+
+
+@dataclass
+class Stage:
+    """One step of a pipeline, run by `workers` concurrent consumers."""
+
+    name: str
+    kind: str
+    fn: Callable
+    workers: int = 1
+    batch_size: int = 1
+
+    def __post_init__(self):
+        if self.kind not in STAGE_KINDS:
+            raise ValueError(f"Unknown stage kind '{self.kind}' (expected one of {', '.join(STAGE_KINDS)})")
+
+
+@dataclass
+class PipelineResult(BatchResult):
+    """Outcome of a pipeline run: what the act stages did, plus items filtered out."""
+
+    filtered: int = 0
+
+
+class StrategyPipeline:
+    """Runs items through filter, validate, act and record stages concurrently."""
+
+    def __init__(self, stages: List[Stage], queue_size: int = QUEUE_SIZE):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = queue_size
+        self.logger = logging.getLogger(__name__)
+
+    async def run(self, source: Union[Iterable, AsyncIterator]) -> PipelineResult:
+        """Feed every item of source through the stages and wait for all of them."""
+        result = PipelineResult()
+        queues = [asyncio.Queue(self.queue_size) for _ in self.stages]
+        tasks = [asyncio.create_task(self._produce(source, queues[0], self.stages[0].workers))]
+        for i, stage in enumerate(self.stages):
+            downstream = queues[i + 1] if i + 1 < len(queues) else None
+            consumers = self.stages[i + 1].workers if downstream is not None else 0
+            tasks.append(asyncio.create_task(
+                self._run_stage(stage, queues[i], downstream, consumers, result)))
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        return result
+
+    @staticmethod
+    async def _produce(source, queue: asyncio.Queue, consumers: int) -> None:
+        if hasattr(source, '__aiter__'):
+            async for item in source:
+                await queue.put(item)
+        else:
+            for item in source:
+                await queue.put(item)
+        for _ in range(consumers):
+            await queue.put(_END)
+
+    async def _run_stage(self, stage: Stage, queue: asyncio.Queue, downstream: Optional[asyncio.Queue],
+                         consumers: int, result: PipelineResult) -> None:
+        await asyncio.gather(*(self._consume(stage, queue, downstream, result)
+                               for _ in range(max(1, stage.workers))))
+        if downstream is not None:
+            for _ in range(consumers):
+                await downstream.put(_END)
+
+    async def _consume(self, stage: Stage, queue: asyncio.Queue, downstream: Optional[asyncio.Queue],
+                       result: PipelineResult) -> None:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                return
+            if stage.kind == 'act':
+                items = [item]
+                ended = False
+                # Take whatever else is ready, up to batch_size, without waiting for more
+                while len(items) < stage.batch_size and not queue.empty():
+                    extra = queue.get_nowait()
+                    if extra is _END:
+                        ended = True
+                        break
+                    items.append(extra)
+                passed = await self._act(stage, items, result)
+            else:
+                ended = False
+                passed = [item] if await self._check(stage, item, result) else []
+            if downstream is not None:
+                for out in passed:
+                    await downstream.put(out)
+            if ended:
+                return
+
+    async def _call(self, stage: Stage, arg):
+        if inspect.iscoroutinefunction(stage.fn):
+            outcome = await stage.fn(arg)
+        elif stage.kind in ('validate', 'act'):
+            outcome = await asyncio.to_thread(stage.fn, arg)
+        else:
+            outcome = stage.fn(arg)
+        # A plain function (a lambda, a partial) may still hand back a coroutine
+        if inspect.isawaitable(outcome):
+            outcome = await outcome
+        return outcome
+
+    async def _check(self, stage: Stage, item, result: PipelineResult) -> bool:
+        try:
+            outcome = await self._call(stage, item)
+        except Exception as e:
+            self.logger.error(f"{stage.name} failed for {item}: {e}")
+            result.failed.append((item, f"{stage.name}: {e}"))
+            return False
+        if stage.kind == 'record' or outcome:
+            return True
+        if stage.kind == 'filter':
+            result.filtered += 1
+        else:
+            result.skipped.append((item, f"rejected by {stage.name}"))
+        return False
+
+    async def _act(self, stage: Stage, items: list, result: PipelineResult) -> list:
+        try:
+            batch = await self._call(stage, items)
+        except Exception as e:
+            self.logger.error(f"{stage.name} failed for {len(items)} items: {e}")
+            result.failed.extend((item, f"{stage.name}: {e}") for item in items)
+            return []
+        result.skipped.extend(batch.skipped)
+        result.failed.extend(batch.failed)
+        result.processed.extend(batch.processed)
+        return batch.processed
+
+
+async def iterate_in_thread(produce: Callable[[Callable[[object], None]], None],
+                            queue_size: int = QUEUE_SIZE) -> AsyncIterator:
+    """Run produce(emit) in a thread and yield each item it emits.
+
+    emit blocks while the queue is full, so a producer such as a scanner
+    is held back by the consumers. If iteration stops early, the producer
+    keeps running but its remaining items are discarded.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(queue_size)
+    stopped = threading.Event()
+
+    def emit(item) -> None:
+        if not stopped.is_set():
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def run() -> None:
+        try:
+            produce(emit)
+        finally:
+            if not stopped.is_set():
+                asyncio.run_coroutine_threadsafe(queue.put(_END), loop).result()
+
+    worker = loop.run_in_executor(None, run)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                break
+            yield item
+        await worker
+    finally:
+        if not worker.done():
+            stopped.set()
+            # Unblock an emit waiting on the full queue
+            while not worker.done():
+                while not queue.empty():
+                    queue.get_nowait()
+                await asyncio.sleep(0.01)
@@ -8,4 +8,34 @@ def test_directory(tmp_path):
     """Create a simple test directory structure."""
     test_dir = tmp_path / "test_dirs"
     test_dir.mkdir()
-    return test_dir
\ No newline at end of file
+    return test_dir
+
+@pytest.fixture(autouse=True)
+def isolated_journal(tmp_path):
+    """Keep operation journal writes out of the working tree."""
+    from utils.journal import OperationJournal, set_journal
+
+    journal = OperationJournal(tmp_path / "journal" / "operations.jsonl")
+    set_journal(journal)
+    yield journal
+    journal.close()
+    set_journal(None)
+
+@pytest.fixture(autouse=True)
+def isolated_search_index(tmp_path, monkeypatch):
+    """Keep persisted filename indexes out of the working tree."""
+    monkeypatch.setenv("CLEANUP_INDEX_DIR", str(tmp_path / "search_index"))
+
+@pytest.fixture(autouse=True)
+def isolated_snapshots(tmp_path, monkeypatch):
+    """Keep scan snapshots out of the working tree."""
+    monkeypatch.setenv("CLEANUP_SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+
+@pytest.fixture(autouse=True)
+def steady_io_governor():
+    """Run without adaptive pacing, so results don't depend on how busy the host is."""
+    from utils.io_governor import configure_governor
+
+    governor = configure_governor(adaptive=False)
+    yield governor
+    configure_governor(adaptive=False)
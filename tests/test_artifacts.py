@@ -0,0 +1,88 @@
+"""Test suite for build-artifact detection."""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from core.artifacts import ArtifactScanner, find_artifacts, measure
+from core.chat_interface import CleanupAssistant
+from core.planner import CleanupPlan
+
+
+@pytest.fixture
+def projects(test_directory):
+    web = test_directory / "web"
+    (web / "node_modules" / "left-pad").mkdir(parents=True)
+    (web / "package.json").write_text("{}")
+    (web / "node_modules" / "left-pad" / "index.js").write_text("x" * 5000)
+    tool = test_directory / "tool"
+    (tool / ".venv" / "lib").mkdir(parents=True)
+    (tool / ".venv" / "pyvenv.cfg").write_text("home = /usr/bin")
+    (tool / "pkg" / "__pycache__").mkdir(parents=True)
+    (tool / "pkg" / "__pycache__" / "mod.cpython-311.pyc").write_bytes(b"\0" * 100)
+    # Same names without their project markers are left alone
+    (test_directory / "notes" / "node_modules").mkdir(parents=True)
+    (test_directory / "notes" / "build").mkdir()
+    (test_directory / "notes" / "venv").mkdir()
+    (test_directory / "thumbs").mkdir()
+    (test_directory / "thumbs" / "CACHEDIR.TAG").write_text("Signature: 8a477f597d28d172789f06886806bc55")
+    return test_directory
+
+
+def test_artifacts_are_confirmed_by_markers(projects):
+    found = {os.path.relpath(path, projects): kind for path, kind in find_artifacts(projects)}
+    assert found == {
+        os.path.join("web", "node_modules"): "node",
+        os.path.join("tool", ".venv"): "virtualenv",
+        os.path.join("tool", "pkg", "__pycache__"): "python cache",
+        "thumbs": "cache",
+    }
+
+
+def test_sampling_estimates_wide_trees(tmp_path):
+    for i in range(40):
+        package = tmp_path / f"pkg{i}"
+        package.mkdir()
+        (package / "a.js").write_text("x")
+        (package / "b.js").write_text("y")
+
+    exact_bytes, exact_files, exact = measure(str(tmp_path), sample_size=100)
+    assert (exact_files, exact) == (80, True)
+    bytes_estimate, files_estimate, exact = measure(str(tmp_path), sample_size=8)
+    # Every package is alike, so scaling the sample recovers the totals
+    assert not exact and files_estimate == pytest.approx(80)
+    assert bytes_estimate == pytest.approx(exact_bytes)
+
+
+def test_sizes_are_cached_until_the_artifact_changes(projects, tmp_path):
+    cache_file = tmp_path / "sizes.json"
+    scanner = ArtifactScanner(cache_file=cache_file)
+    ranked = scanner.scan(projects)
+    assert scanner.measured == 4
+    assert Path(ranked[0].path).name == "node_modules" and ranked[0].exact
+    assert ranked[0].files == 1
+
+    again = ArtifactScanner(cache_file=cache_file)
+    assert again.scan(projects) == ranked and again.measured == 0
+
+    (projects / "web" / "node_modules" / "new-dep").mkdir()
+    changed = ArtifactScanner(cache_file=cache_file)
+    changed.scan(projects)
+    assert changed.measured == 1
+    assert len(json.loads(cache_file.read_text())) == 4
+
+
+def test_repl_lists_and_plans_artifacts(projects):
+    assistant = CleanupAssistant()
+    assistant.current_path = projects
+    output = assistant.handle_command("artifacts")
+    assert "Regenerable artifacts" in output
+    assert output.splitlines()[1].strip().endswith(f"{os.path.join('web', 'node_modules')}/ (node, 1 files)")
+
+    plan_file = projects.parent / "artifacts.json"
+    assert "4 artifacts" in assistant.handle_command(f"plan artifacts {plan_file}")
+    plan = CleanupPlan.load(plan_file)
+    moves = sorted(os.path.basename(op.dst) for op in plan.ops if op.op == 'move')
+    assert moves == ["pkg-__pycache__", "test_dirs-thumbs", "tool-.venv", "web-node_modules"]
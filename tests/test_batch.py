@@ -0,0 +1,96 @@
+"""Test suite for the headless batch commands."""
+
+import io
+import json
+import os
+
+import pytest
+
+from core import batch
+
+
+def run(*argv):
+    stream = io.StringIO()
+    code = batch.main(list(argv), stream=stream)
+    return code, [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+@pytest.fixture
+def roots(tmp_path, monkeypatch):
+    # batch.main sets up file logging relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    one, two = tmp_path / "one", tmp_path / "two"
+    (one / "nested" / "empty_dir").mkdir(parents=True)
+    (one / "nested" / "empty.txt").touch()
+    (one / "data.txt").write_text("same content")
+    (two / "empty_dir").mkdir(parents=True)
+    (two / "copy.txt").write_text("same content")
+    (two / ".git").mkdir()
+    (two / ".git" / "HEAD").touch()
+    return one, two
+
+
+def test_find_empty_streams_per_root(roots):
+    """Items and per-root summaries are attributed to the root they came from."""
+    one, two = roots
+    code, records = run("find-empty", str(one), str(two))
+    assert code == batch.EXIT_OK
+
+    found = {(r['type'], r['root'], r['path']) for r in records if r['type'].startswith('empty_')}
+    assert found == {
+        ('empty_file', str(one), str(one / "nested" / "empty.txt")),
+        ('empty_dir', str(one), str(one / "nested" / "empty_dir")),
+        ('empty_dir', str(two), str(two / "empty_dir")),
+    }
+    summaries = {r['root']: r for r in records if r['type'] == 'summary'}
+    assert summaries[str(one)]['empty_files'] == 1
+    assert summaries[str(two)]['files'] == 1
+    # Each root's summary follows its own items; the final record closes the run
+    summary_at = {r['root']: i for i, r in enumerate(records) if r['type'] == 'summary'}
+    for i, record in enumerate(records):
+        if record['type'].startswith('empty_'):
+            assert i < summary_at[record['root']]
+    assert records[-1]['type'] == 'done'
+
+
+def test_exit_codes_for_missing_roots(roots, tmp_path):
+    one, _ = roots
+    code, records = run("scan", str(one), str(tmp_path / "missing"))
+    assert code == batch.EXIT_PARTIAL
+    assert any(r['type'] == 'error' for r in records)
+
+    code, _ = run("scan", str(tmp_path / "missing"))
+    assert code == batch.EXIT_FAILED
+
+    with pytest.raises(SystemExit) as exc:
+        batch.main(["scan"])
+    assert exc.value.code == batch.EXIT_USAGE
+
+
+def test_duplicates_across_roots_ignore_hardlinks(roots):
+    one, two = roots
+    os.link(one / "data.txt", one / "data-link.txt")
+    code, records = run("duplicates", str(one), str(two))
+    assert code == batch.EXIT_OK
+
+    groups = [r for r in records if r['type'] == 'duplicates']
+    assert len(groups) == 1
+    assert len(groups[0]['paths']) == 2
+    assert str(two / "copy.txt") in groups[0]['paths']
+    assert groups[0]['wasted_bytes'] == len("same content")
+
+
+def test_find_empty_plan_then_apply(roots, tmp_path):
+    """A plan written by find-empty can be applied later, streaming each op."""
+    one, two = roots
+    plan_file = tmp_path / "plan.json"
+    code, _ = run("find-empty", str(one), str(two), "--plan", str(plan_file))
+    assert code == batch.EXIT_OK
+    assert (one / "nested" / "empty.txt").exists()
+
+    code, records = run("apply-plan", str(plan_file), str(tmp_path / "missing.json"))
+    assert code == batch.EXIT_PARTIAL
+    assert {r['status'] for r in records if r['type'] == 'op'} == {'done'}
+    assert not (one / "nested" / "empty.txt").exists()
+    assert not (two / "empty_dir").exists()
+    assert (one / "data.txt").exists()
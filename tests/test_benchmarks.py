@@ -0,0 +1,66 @@
+"""Test suite for the synthetic tree generator and benchmark runner."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from benchmarks.run_benchmarks import find_regressions, record_baseline, load_baselines, run_benchmarks
+from benchmarks.tree_generator import SCALES, TreeSpec, generate_tree
+
+
+def _listing(root: Path):
+    entries = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel = os.path.relpath(dirpath, root)
+        entries.extend(os.path.join(rel, d) + "/" for d in dirnames)
+        entries.extend((os.path.join(rel, f), os.path.getsize(os.path.join(dirpath, f))) for f in filenames)
+    return sorted(entries, key=str)
+
+
+def test_generator_is_deterministic(tmp_path):
+    """Same spec and seed produce byte-for-byte the same tree."""
+    spec = SCALES["tiny"]
+    generate_tree(tmp_path / "a", spec)
+    generate_tree(tmp_path / "b", spec)
+    assert _listing(tmp_path / "a") == _listing(tmp_path / "b")
+
+
+def test_generator_counts_match_disk(tmp_path):
+    """Reported counts agree with what is on disk."""
+    spec = TreeSpec(depth=2, fanout=5, files_per_dir=4, empty_ratio=0.3,
+                    size_distribution=("uniform", 1, 100), skip_dir_density=0.2, seed=7)
+    tree = generate_tree(tmp_path, spec)
+
+    files = [p for p in tmp_path.rglob("*") if p.is_file()]
+    dirs = [p for p in tmp_path.rglob("*") if p.is_dir()]
+    assert tree.files == len(files)
+    assert tree.dirs == len(dirs)
+    assert tree.empty_files == sum(1 for p in files if p.stat().st_size == 0)
+    assert tree.empty_dirs == sum(1 for d in dirs if not any(d.iterdir()))
+    assert tree.total_bytes == sum(p.stat().st_size for p in files)
+    assert tree.skip_dirs > 0
+
+
+def test_benchmarks_run_and_detect_regressions(tmp_path):
+    """A tiny run yields timings; slower results are flagged against the baseline."""
+    result = run_benchmarks(SCALES["tiny"], tmp_path / "work", repeat=1,
+                            names=["analyze_directories", "delete_empty_items"], scale="tiny")
+    assert set(result["benchmarks"]) == {"analyze_directories", "delete_empty_items"}
+    assert result["entries"] > 0
+    # Only benchmarks that walk the tree get a per-entry rate
+    assert result["benchmarks"]["analyze_directories"]["entries_per_s"] > 0
+    assert "entries_per_s" not in result["benchmarks"]["delete_empty_items"]
+
+    baseline_file = tmp_path / "baselines.json"
+    record_baseline(result, baseline_file)
+    baselines = load_baselines(baseline_file)
+    assert find_regressions(result, baselines) == []
+
+    slower = {**result, "benchmarks": {
+        name: {**bench, "median_s": bench["median_s"] * 2}
+        for name, bench in result["benchmarks"].items()
+    }}
+    regressions = find_regressions(slower, baselines)
+    assert len(regressions) == 2
+    assert "analyze_directories" in regressions[0]
@@ -0,0 +1,63 @@
+"""Test suite for file-type classification."""
+
+import os
+
+from core import classifier
+from core.chat_interface import CleanupAssistant
+from core.classifier import CODES, FileClassifier, extension_key
+
+
+def test_names_are_classified_once_per_extension(monkeypatch):
+    calls = []
+    real = FileClassifier._classify_extension
+
+    def counting(key):
+        calls.append(key)
+        return real(key)
+
+    monkeypatch.setattr(FileClassifier, "_classify_extension", staticmethod(counting))
+    types = FileClassifier()
+    assert types.category_of("photo.JPG") == CODES['media']
+    assert types.category_of("other.jpg") == CODES['media']
+    assert types.category_of("backup.tar.gz") == CODES['archive']
+    assert types.category_of("server.log.3.gz") == CODES['log']
+    assert types.category_of("module.pyc") == CODES['cache']
+    assert types.category_of("README") == CODES['unknown']
+    assert calls.count(".jpg") == 1
+    assert extension_key("app.log.1") == ".log" and extension_key(".bashrc") == ""
+
+
+def test_tree_uses_directories_and_magic_bytes(test_directory, monkeypatch):
+    (test_directory / "build" / "lib").mkdir(parents=True)
+    (test_directory / "build" / "lib" / "thing.py").write_text("x = 1\n")
+    (test_directory / "picture").write_bytes(b"\x89PNG\r\n\x1a\n" + b"\0" * 100)
+    (test_directory / "archive_no_ext").write_bytes(b"PK\x03\x04" + b"\0" * 10)
+    (test_directory / "notes").write_text("plain words\n")
+    (test_directory / "blob").write_bytes(b"\0\1\2\3")
+    (test_directory / "empty").touch()
+    sniffed = []
+    real_sniff = classifier.sniff
+    monkeypatch.setattr(classifier, "sniff", lambda path: sniffed.append(path) or real_sniff(path))
+
+    table = FileClassifier(batch_size=2).classify_tree(test_directory)
+    by_name = {os.path.basename(path): table.category(row) for row, path in enumerate(table.paths)}
+    assert by_name == {"thing.py": "build", "picture": "media", "archive_no_ext": "archive",
+                       "notes": "text", "blob": "unknown", "empty": "unknown"}
+    assert len(sniffed) == 4  # only nameless, non-empty files outside categorised directories
+    assert table.breakdown()["media"] == (1, 108)
+
+    names_only = FileClassifier(sniff=False).classify_tree(test_directory)
+    assert names_only.breakdown()["unknown"][0] == 5
+
+
+def test_analyze_directory_reports_categories(test_directory):
+    (test_directory / "a.mp3").write_bytes(b"ID3" + b"\0" * 2000)
+    (test_directory / "b.log").write_text("started\n")
+    (test_directory / "c.zip").write_bytes(b"PK\x03\x04")
+
+    output = CleanupAssistant().analyze_directory(test_directory)
+    assert "Total Files: 3" in output
+    lines = output.splitlines()
+    types = lines[lines.index(next(l for l in lines if "File Types" in l)) + 1:][:3]
+    assert [line.split(":")[0].strip() for line in types] == ["media", "log", "archive"]
+    assert "b.log" in output
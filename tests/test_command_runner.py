@@ -0,0 +1,58 @@
+"""Test suite for streaming shell command execution."""
+
+import os
+import threading
+import time
+
+import pytest
+
+from core.chat_interface import CleanupAssistant
+from utils.command_runner import CommandRunner
+
+pytestmark = pytest.mark.skipif(os.name != 'posix', reason="uses /bin/sh")
+
+
+@pytest.mark.parametrize("persistent", [True, False])
+def test_output_streams_and_is_capped(tmp_path, persistent):
+    runner = CommandRunner(persistent=persistent, output_limit=100)
+    chunks = []
+    started = time.monotonic()
+    result = runner.run("printf first; sleep 0.3; head -c 1000 /dev/zero | tr '\\0' x; exit 3", tmp_path,
+                        on_output=lambda text: chunks.append((text, time.monotonic() - started)))
+
+    assert chunks[0] == ("first", pytest.approx(0, abs=0.2))  # shown before the command ends
+    assert "".join(text for text, _ in chunks) == "first" + "x" * 1000
+    assert (result.returncode, len(result.output), result.truncated_bytes) == (3, 100, 905)
+    assert result.output.startswith("firstxx")
+    runner.close()
+
+
+def test_persistent_session_keeps_state_and_survives_errors(tmp_path):
+    runner = CommandRunner()
+    assert runner.run("GREETING=hello", tmp_path).returncode == 0
+    assert runner.run('printf "$GREETING"', tmp_path).output == "hello"
+    assert runner.run("pwd", tmp_path).output.strip() == str(tmp_path)
+    assert runner.run("echo 'unterminated", tmp_path).returncode != 0
+    assert runner.run("exit 4", tmp_path).returncode == 4
+    assert runner.run("printf again", tmp_path).output == "again"  # a new session was started
+    runner.close()
+
+
+def test_cancel_kills_a_running_command(tmp_path):
+    runner = CommandRunner()
+    threading.Timer(0.2, runner.cancel).start()
+    started = time.monotonic()
+    result = runner.run("sleep 10; echo finished", tmp_path)
+    assert result.cancelled and result.returncode is None
+    assert time.monotonic() - started < 5
+    assert runner.run("printf ok", tmp_path).output == "ok"
+    runner.close()
+
+
+def test_repl_shell_commands_keep_case(test_directory):
+    (test_directory / "MixedCase.txt").touch()
+    assistant = CleanupAssistant()
+    assistant.current_path = test_directory
+    assert "MixedCase.txt" in assistant.handle_command("!ls MixedCase.txt")
+    assert "exit status 1" in assistant.handle_command("!false")
+    assistant.command_runner.close()
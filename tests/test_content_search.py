@@ -0,0 +1,64 @@
+"""Test suite for parallel content search."""
+
+import os
+
+from core.chat_interface import CleanupAssistant
+from core.content_search import MMAP_THRESHOLD, ContentSearcher
+
+
+def _relative(matches, root):
+    return [(os.path.relpath(m.path, root), m.line_no, m.line) for m in matches]
+
+
+def test_literal_regex_and_ignore_case(test_directory):
+    (test_directory / "notes.txt").write_text("first line\nTODO: fix this\nno\ntodo twice todo\n")
+    (test_directory / "sub").mkdir()
+    (test_directory / "sub" / "code.py").write_text("x = 1\n# TODO later\n")
+
+    literal = _relative(ContentSearcher("TODO").search(test_directory), test_directory)
+    assert sorted(literal) == [("notes.txt", 2, "TODO: fix this"),
+                               (os.path.join("sub", "code.py"), 2, "# TODO later")]
+
+    folded = _relative(ContentSearcher("todo", ignore_case=True).search(test_directory), test_directory)
+    assert ("notes.txt", 4, "todo twice todo") in folded and len(folded) == 3
+
+    regex = _relative(ContentSearcher(r"^\w+ = \d", regex=True).search(test_directory), test_directory)
+    assert regex == [(os.path.join("sub", "code.py"), 1, "x = 1")]
+
+
+def test_binary_files_and_skip_dirs_are_ignored(test_directory):
+    (test_directory / "image.bin").write_bytes(b"\x89PNG\0\0needle")
+    (test_directory / "node_modules" / "pkg").mkdir(parents=True)
+    (test_directory / "node_modules" / "pkg" / "index.js").write_text("needle\n")
+    (test_directory / ".git").mkdir()
+    (test_directory / ".git" / "config").write_text("needle\n")
+    (test_directory / "keep.txt").write_text("needle\n")
+
+    searcher = ContentSearcher("needle")
+    assert _relative(searcher.search(test_directory), test_directory) == [("keep.txt", 1, "needle")]
+    assert searcher.binary_skipped == 1 and searcher.files_searched == 1
+
+
+def test_large_files_are_memory_mapped(test_directory):
+    filler = b"." * 99 + b"\n"
+    with open(test_directory / "big.log", "wb") as f:
+        f.write(filler * (MMAP_THRESHOLD // len(filler) + 10))
+        f.write(b"ERROR at the end\n")
+    lines = MMAP_THRESHOLD // len(filler) + 10
+
+    matches = list(ContentSearcher("ERROR").search(test_directory))
+    assert [(m.line_no, m.line) for m in matches] == [(lines + 1, "ERROR at the end")]
+
+
+def test_repl_grep_command(test_directory):
+    for i in range(3):
+        (test_directory / f"file_{i}.txt").write_text(f"line {i}\nMatch Me {i}\n")
+
+    assistant = CleanupAssistant()
+    assistant.current_path = test_directory
+    output = assistant.handle_command('grep -i "match me"')
+    assert "Lines matching 'match me'" in output
+    assert f"{test_directory / 'file_1.txt'}:2: Match Me 1" in output
+    assert "No files contain" in assistant.handle_command("grep -E ^absent$")
+    assert "Invalid search pattern" in assistant.handle_command("grep -E (")
+    assert "Usage" in assistant.handle_command("grep -i")
@@ -0,0 +1,98 @@
+"""Tests for the distributed scan coordinator and workers."""
+
+import io
+import json
+import random
+import socket
+import threading
+
+import pytest
+
+from core import batch
+from core.analyzer import DirectoryAnalyzer
+from core.distributed import ProtocolError, ScanCoordinator, ScanWorker, _Channel
+from utils.io_governor import IOGovernor
+
+
+@pytest.fixture
+def tree(test_directory):
+    rng = random.Random(3)
+
+    def make(path, depth):
+        path.mkdir(parents=True, exist_ok=True)
+        for i in range(rng.randint(0, 3) if depth else 0):
+            (path / f"file{i}").write_text("x" * i)
+        for i in range(rng.randint(1, 4) if depth else 0):
+            make(path / f"dir{i}", depth - 1)
+
+    make(test_directory, 5)
+    (test_directory / ".git" / "objects").mkdir(parents=True)
+    empty_dirs, stats = DirectoryAnalyzer(str(test_directory), None).analyze_directories()
+    return test_directory, empty_dirs, stats
+
+
+def _run_workers(coordinator, count, **kwargs):
+    workers = [ScanWorker(coordinator.address, **kwargs) for _ in range(count)]
+    threads = [threading.Thread(target=worker.run) for worker in workers]
+    for thread in threads:
+        thread.start()
+    report = coordinator.wait(timeout=30)
+    for thread in threads:
+        thread.join(timeout=5)
+    return report, workers
+
+
+def test_split_shards_merge_to_single_process_results(tree):
+    root, empty_dirs, stats = tree
+    # One shard for the whole tree, so idle workers only get work by splitting it
+    with ScanCoordinator([root], split_depth=0, report_every=1) as coordinator:
+        governor = IOGovernor(ops_per_sec=2000, adaptive=False)
+        report, workers = _run_workers(coordinator, 3, governor=governor)
+
+    assert report.splits >= 1 and report.shards > 1
+    assert sum(worker.shards_done for worker in workers) == report.shards
+    assert report.total_directories == stats['total_directories']
+    assert list(report.empty_dirs) == empty_dirs
+    assert report.errors == 0
+
+
+def test_shard_of_a_lost_worker_is_scanned_again(tree):
+    root, empty_dirs, stats = tree
+    with ScanCoordinator([root]) as coordinator:
+        # A worker that takes a shard and disappears without a result
+        with socket.create_connection(coordinator.address) as sock:
+            with sock.makefile('rb') as rfile, sock.makefile('wb') as wfile:
+                channel = _Channel(rfile, wfile)
+                channel.send('hello', worker='crashes')
+                channel.receive('welcome')
+                channel.send('next')
+                channel.receive('shard')
+        report, _ = _run_workers(coordinator, 2)
+
+    assert report.requeued == 1
+    assert report.total_directories == stats['total_directories']
+    assert list(report.empty_dirs) == empty_dirs
+
+
+def test_workers_must_present_the_cluster_token(tree):
+    root, _, _ = tree
+    with ScanCoordinator([root], token="secret") as coordinator:
+        with pytest.raises(ProtocolError):
+            ScanWorker(coordinator.address, token="wrong").run()
+        report, _ = _run_workers(coordinator, 1, token="secret")
+    assert report.shards > 0
+
+
+def test_coordinate_command_with_local_worker_processes(tree, monkeypatch, tmp_path):
+    root, empty_dirs, stats = tree
+    monkeypatch.chdir(tmp_path)
+    stream = io.StringIO()
+    code = batch.main(["coordinate", str(root), "--local-workers", "2", "--timeout", "60"], stream=stream)
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    assert code == batch.EXIT_OK
+    assert records[0]['type'] == 'listening' and records[0]['port'] > 0
+    assert [r['path'] for r in records if r['type'] == 'empty_dir'] == empty_dirs
+    summary = next(r for r in records if r['type'] == 'distributed_summary')
+    assert summary['total_directories'] == stats['total_directories']
+    assert summary['shards'] == sum(1 for r in records if r['type'] == 'shard')
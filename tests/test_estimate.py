@@ -0,0 +1,127 @@
+"""Test suite for sampled tree estimates."""
+
+import io
+import json
+import threading
+import time
+
+import pytest
+
+from core import batch
+from core.chat_interface import CleanupAssistant
+from core.estimate import TreeEstimator, estimate_in_background
+from core.scanner import ParallelScanner, ScanVisitor
+from utils.progress import ProgressTracker
+
+
+def make_tree(root, fanout, depth, files_per_dir, size=10):
+    """Regular tree; returns (files, dirs, bytes) below root."""
+    totals = [0, 0, 0]
+
+    def build(path, level, index=0):
+        for i in range(files_per_dir(level, index)):
+            (path / f"f{i}").write_bytes(b"x" * size)
+            totals[0] += 1
+            totals[2] += size
+        if level < depth:
+            for i in range(fanout(level)):
+                child = path / f"d{i}"
+                child.mkdir()
+                totals[1] += 1
+                build(child, level + 1, i)
+
+    build(root, 0)
+    return tuple(totals)
+
+
+def test_uniform_tree_is_estimated_without_error(tmp_path):
+    truth = make_tree(tmp_path, fanout=lambda level: 3, depth=3, files_per_dir=lambda level, index: 2)
+    # Every descent sees the same thing, so a handful of probes is exact
+    estimate = TreeEstimator(tmp_path, seed=1).estimate(min_probes=5)
+    assert (estimate.files, estimate.dirs, estimate.bytes) == truth
+    assert estimate.relative_error == 0
+
+
+def test_irregular_tree_interval_covers_the_truth(tmp_path):
+    truth = make_tree(tmp_path, fanout=lambda level: 6 - level, depth=4,
+                      files_per_dir=lambda level, index: (7 * index + level) % 9)
+    estimate = TreeEstimator(tmp_path, seed=7).estimate(tolerance=0.2, min_probes=50)
+    low, high = estimate.files_interval
+    assert low <= truth[0] <= high and low < high
+    assert estimate.probes >= 50 and estimate.directories_read < truth[1] / 2
+
+    # Given enough probes, every directory is read and the answer becomes exact
+    exact = TreeEstimator(tmp_path, seed=7).estimate(tolerance=0, max_probes=100_000)
+    assert (exact.files, exact.dirs, exact.bytes) == truth
+    assert exact.files_interval == (truth[0], truth[0])
+
+
+def test_background_estimate_sets_progress_total(tmp_path):
+    make_tree(tmp_path, fanout=lambda level: 2, depth=2, files_per_dir=lambda level, index: 1)
+    tracker = ProgressTracker(sinks=[])
+    done = threading.Event()
+
+    def on_estimate(estimate):
+        tracker.set_total(round(estimate.files + estimate.dirs))
+        done.set()
+
+    estimate_in_background(tmp_path, on_estimate)
+    assert done.wait(5)
+    assert tracker.total == 7 + 6
+
+
+def test_scans_get_an_estimated_total_for_all_roots(tmp_path):
+    roots = [tmp_path / "a", tmp_path / "b"]
+    for root in roots:
+        root.mkdir()
+        make_tree(root, fanout=lambda level: 2, depth=2, files_per_dir=lambda level, index: 1)
+    tracker = ProgressTracker(sinks=[])
+
+    class WaitForTotal(ScanVisitor):
+        def visit_directory(self, path, entries, is_root):
+            # Hold the scan until the estimate has reported, so the test does not race it
+            deadline = time.monotonic() + 5
+            while tracker.total < 26 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+    ParallelScanner(progress=tracker).scan(roots, WaitForTotal())
+
+    assert tracker.total == 2 * (7 + 6)
+    assert tracker.total_processed == tracker.total
+
+
+def test_batch_scan_streams_progress_records(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = tmp_path / "share"
+    root.mkdir()
+    make_tree(root, fanout=lambda level: 2, depth=2, files_per_dir=lambda level, index: 3)
+
+    stream = io.StringIO()
+    assert batch.main(["scan", str(root), "--progress", "0.05"], stream=stream) == batch.EXIT_OK
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    final = [r for r in records if r['type'] == 'progress' and r['final']]
+    assert len(final) == 1 and final[0]['items'] == 21 + 6
+    # The final record comes once every root is done, right before the command's own 'done'
+    assert records[-2] == final[0] and records[-1]['type'] == 'done'
+
+    stream = io.StringIO()
+    batch.main(["scan", str(root)], stream=stream)
+    assert 'progress' not in stream.getvalue()
+
+
+def test_batch_and_repl_estimates(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = tmp_path / "share"
+    root.mkdir()
+    make_tree(root, fanout=lambda level: 2, depth=2, files_per_dir=lambda level, index: 3)
+
+    stream = io.StringIO()
+    assert batch.main(["estimate", str(root), str(tmp_path / "missing")], stream=stream) == batch.EXIT_PARTIAL
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    estimate = next(r for r in records if r['type'] == 'estimate')
+    assert (estimate['root'], estimate['files'], estimate['dirs']) == (str(root), 21, 6)
+
+    assistant = CleanupAssistant()
+    assistant.current_path = root
+    output = assistant.handle_command("estimate")
+    assert "Files: ~21 (95% between 21 and 21)" in output
@@ -0,0 +1,85 @@
+"""Tests for the spill-to-disk sorted store."""
+
+import os
+import random
+from pathlib import Path
+
+from utils import external_sort
+from utils.external_sort import SortedSpillStore
+
+
+def _names(count, seed=7):
+    rng = random.Random(seed)
+    return [f"/data/{rng.randrange(10**6):06d}/file-{i}" for i in range(count)]
+
+
+def test_spilled_runs_merge_into_sorted_order(tmp_path):
+    names = _names(5000)
+    with SortedSpillStore(memory_budget=20_000, tmp_dir=str(tmp_path)) as store:
+        store.extend(names)
+        assert store.spilled_runs > 1
+        assert len(store) == len(names)
+        assert list(store) == sorted(names)
+        # Iteration can be repeated, and adding after iterating is kept in order
+        store.add("/a")
+        assert next(iter(store)) == "/a"
+
+
+def test_reverse_order_and_decode(tmp_path):
+    names = _names(2000) + ["/x/\udcff-undecodable", "/x/été"]
+    store = SortedSpillStore(memory_budget=10_000, reverse=True, decode=Path, tmp_dir=str(tmp_path))
+    store.extend(names)
+    assert store.spilled_runs > 0
+    assert list(store) == [Path(n) for n in sorted(names, reverse=True)]
+    store.close()
+
+
+def test_runs_are_removed_on_close_and_collection(tmp_path):
+    store = SortedSpillStore(memory_budget=1000, tmp_dir=str(tmp_path))
+    store.extend(_names(500))
+    assert os.listdir(tmp_path)
+    store.close()
+    assert not os.listdir(tmp_path) and not store and list(store) == []
+
+    store = SortedSpillStore(memory_budget=1000, tmp_dir=str(tmp_path))
+    store.extend(_names(500))
+    del store
+    assert not os.listdir(tmp_path)
+
+
+def test_run_count_stays_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(external_sort, 'MAX_RUNS', 4)
+    names = _names(3000)
+    with SortedSpillStore(memory_budget=500, tmp_dir=str(tmp_path)) as store:
+        store.extend(names)
+        assert store.spilled_runs <= 5
+        assert len(os.listdir(tmp_path)) == store.spilled_runs
+        assert list(store) == sorted(names)
+
+
+def test_unspilled_items_are_decoded_once(tmp_path):
+    decoded = []
+
+    def decode(item):
+        decoded.append(item)
+        return Path(item)
+
+    store = SortedSpillStore(decode=decode, tmp_dir=str(tmp_path))
+    store.extend(["b", "a"])
+    assert list(store) == list(store) == [Path("a"), Path("b")]
+    assert len(decoded) == 2
+    store.add("c")
+    assert list(store) == [Path("a"), Path("b"), Path("c")]
+
+
+def test_decoded_items_given_to_add_are_not_decoded_again(tmp_path):
+    def decode(item):
+        raise AssertionError(f"decoded {item}")
+
+    store = SortedSpillStore(decode=decode, tmp_dir=str(tmp_path))
+    b, a = Path("b"), Path("a")
+    store.add("b", b)
+    store.add("a", a)
+    items = list(store)
+    assert items == [a, b]
+    assert items[0] is a
@@ -0,0 +1,56 @@
+"""Test suite for the memory-mapped file viewer."""
+
+from core import file_viewer
+from core.chat_interface import CleanupAssistant
+from core.file_viewer import FileView, detect_encoding
+
+
+def test_line_offsets_are_found_lazily_across_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_viewer, "BLOCK_SIZE", 64)
+    path = tmp_path / "app.log"
+    path.write_text("".join(f"line {i}\n" for i in range(1, 101)))
+
+    with FileView(path) as view:
+        assert list(view.lines(98)) == [(98, "line 98"), (99, "line 99"), (100, "line 100")]
+        assert view.line_offset(101) is None
+        indexed = len(view._block_lines)
+        assert next(view.lines(3)) == (3, "line 3")
+        assert len(view._block_lines) == indexed  # earlier lines reuse the index
+        assert list(view.tail(2)) == ["line 99", "line 100"]
+        assert list(view.byte_range(0, 13)) == ["line 1", "line 2"]
+        assert list(view.find(r"line 5\d?$", regex=True))[:2] == [(5, "line 5"), (50, "line 50")]
+
+
+def test_encoding_and_binary_detection(tmp_path):
+    assert detect_encoding("naïve".encode("utf-8")) == "utf-8"
+    assert detect_encoding("naïve".encode("utf-8")[:3]) == "utf-8"  # cut mid-character
+    assert detect_encoding("naïve".encode("latin-1")) == "latin-1"
+    assert detect_encoding(b"\xef\xbb\xbfhello") == "utf-8-sig"
+
+    path = tmp_path / "blob.bin"
+    path.write_bytes(b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR")
+    with FileView(path) as view:
+        assert view.binary
+        assert list(view.byte_range(0, view.size)) == [
+            "00000000  89 50 4e 47 0d 0a 1a 0a 00 00 00 0d 49 48 44 52  |.PNG........IHDR|"]
+
+
+def test_repl_view_head_tail_and_find(test_directory):
+    (test_directory / "big.log").write_text("".join(f"entry {i}\n" for i in range(1, 201)))
+    (test_directory / "empty.txt").touch()
+
+    assistant = CleanupAssistant()
+    assistant.current_path = test_directory
+    first = assistant.handle_command("view big.log").splitlines()
+    assert "big.log" in first[0] and "utf-8" in first[0]
+    assert first[1].split() == ["1", "entry", "1"] and "'more'" in first[-1]
+    assert "entry 51" in assistant.handle_command("more")
+
+    assert assistant.handle_command("head big.log 2").splitlines()[1:] == ["     1  entry 1", "     2  entry 2"]
+    assert assistant.handle_command("tail big.log 1").splitlines()[1:] == ["entry 200"]
+    assert assistant.handle_command("view big.log lines 150-151").splitlines()[1:] == [
+        "   150  entry 150", "   151  entry 151"]
+    assert "   199  entry 199" in assistant.handle_command("view big.log find 199")
+    assert "is empty" in assistant.handle_command("view empty.txt")
+    assert "File not found" in assistant.handle_command("tail missing.log")
+    assert "Usage" in assistant.handle_command("view big.log lines")
@@ -0,0 +1,126 @@
+"""Tests for the adaptive I/O governor."""
+
+from utils.io_governor import ADJUST_INTERVAL, LATENCY_FLOOR, IOGovernor, LoadMonitor, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeMonitor(LoadMonitor):
+    def __init__(self, level):
+        self.level = level
+
+    def busy_level(self):
+        return self.level
+
+
+def test_token_bucket_paces_ops_and_large_requests():
+    clock = FakeClock()
+    bucket = TokenBucket(100, clock=clock, sleep=clock.sleep)
+    for _ in range(300):
+        bucket.acquire()
+    # One second of burst, then 100 per second
+    assert 1.9 <= clock.now <= 2.1
+
+    # A single request far above the burst is granted and paid off by waiting
+    bytes_bucket = TokenBucket(1000, clock=clock, sleep=clock.sleep)
+    started = clock.now
+    bytes_bucket.acquire(5000)
+    assert abs(clock.now - started - 4.0) < 0.01
+
+    bucket.set_rate(None)
+    started = clock.now
+    for _ in range(10_000):
+        bucket.acquire()
+    assert clock.now == started
+
+
+def test_governor_backs_off_when_busy_and_recovers_when_idle():
+    clock = FakeClock()
+    monitor = FakeMonitor(0.0)
+    governor = IOGovernor(monitor=monitor, clock=clock, sleep=clock.sleep)
+
+    def run_for(seconds, ops_per_tick=100):
+        end = clock.now + seconds
+        while clock.now < end:
+            for _ in range(ops_per_tick):
+                governor.throttle()
+            clock.now += 0.1
+
+    # Idle: nothing is limited, and the unthrottled rate becomes the reference
+    run_for(2 * ADJUST_INTERVAL)
+    assert governor.ops.rate is None and governor.fraction == 1.0
+
+    monitor.level = 2.0
+    run_for(3 * ADJUST_INTERVAL)
+    assert governor.fraction <= 0.25
+    assert governor.ops.rate is not None and governor.ops.rate < 1000 * 0.5
+    assert governor.throttled_seconds > 0
+
+    monitor.level = 0.0
+    run_for(15 * ADJUST_INTERVAL, ops_per_tick=1)
+    assert governor.fraction == 1.0 and governor.ops.rate is None
+
+
+def test_latency_contention_counts_when_the_host_shows_pressure():
+    clock = FakeClock()
+    # Some pressure, but below the busy threshold: latency decides
+    governor = IOGovernor(ops_per_sec=1000, monitor=FakeMonitor(0.5), clock=clock, sleep=clock.sleep)
+    for _ in range(50):
+        governor.record_latency(0.0005)
+    for _ in range(50):
+        governor.record_latency(0.05)
+    clock.now += ADJUST_INTERVAL
+    governor.throttle()
+    assert governor.fraction == 0.5 and governor.ops.rate == 500
+
+
+def test_slow_cold_reads_do_not_throttle_an_idle_host():
+    clock = FakeClock()
+    governor = IOGovernor(monitor=FakeMonitor(0.0), clock=clock, sleep=clock.sleep)
+
+    def read(seconds, entries=1):
+        governor.throttle()
+        clock.now += seconds
+        governor.record_latency(seconds, entries)
+
+    # Warm-cache listings first set a very low baseline
+    for _ in range(200):
+        read(0.00002)
+    for _ in range(2000):
+        read(0.008)
+    assert governor.fraction == 1.0 and governor.ops.rate is None
+    assert governor.throttled_seconds == 0
+    assert clock.now < 16.1
+
+    # Listing a huge directory is slow in total but not per entry
+    for _ in range(100):
+        read(0.5, entries=100_000)
+    assert governor._latency < LATENCY_FLOOR
+
+
+def test_configured_limits_apply_to_plan_execution(tmp_path):
+    from core.planner import PlanExecutor, compile_plan
+
+    files = []
+    for i in range(30):
+        path = tmp_path / f"empty{i}"
+        path.touch()
+        files.append(path)
+    plan = compile_plan({'files': files, 'dirs': []}, 'delete', root=tmp_path)
+    clock = FakeClock()
+    governor = IOGovernor(ops_per_sec=10, adaptive=False, clock=clock, sleep=clock.sleep)
+
+    result = PlanExecutor(governor=governor).execute(plan)
+    assert len(result.done) == 30
+    # A burst of 10, then 10 per second
+    assert 1.9 <= clock.now <= 2.1
+    assert governor.stats()['ops'] == 30
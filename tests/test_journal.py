@@ -0,0 +1,221 @@
+"""Test suite for the operation journal, undo and crash recovery."""
+
+import json
+import os
+import threading
+from unittest.mock import patch
+
+from core.chat_interface import CleanupAssistant
+from strategies.move_strategy import MoveStrategy
+from utils.journal import JournalOp, OperationJournal, find_in_trash
+
+
+def _moved(journal, tmp_path, name, skipped=()):
+    """Journal a closed batch with a done move of name and skipped moves of the others."""
+    with journal.batch(f"move {name}") as batch:
+        op = batch.intend("move", tmp_path / name, tmp_path / "dst" / name)
+        batch.done(op)
+        for other in skipped:
+            batch.skipped(batch.intend("move", tmp_path / other, tmp_path / "dst" / other), "changed")
+    return journal.batches().popitem()[0]
+
+
+def test_group_commit_shares_fsyncs(tmp_path):
+    """Concurrent durable writers piggyback on each other's fsync."""
+    journal = OperationJournal(tmp_path / "ops.jsonl", commit_interval=10)
+    real_fsync = os.fsync
+    calls = {"n": 0}
+
+    def counting_fsync(fd):
+        calls["n"] += 1
+        real_fsync(fd)
+
+    with patch("utils.journal.os.fsync", counting_fsync):
+        def worker(n):
+            with journal.batch(f"worker {n}") as batch:
+                for i in range(20):
+                    op = batch.intend("move", tmp_path / f"{n}-{i}", tmp_path / "dst" / f"{n}-{i}")
+                    batch.done(op)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        writes = journal._written
+        journal.close()
+
+    assert len(journal.batches()) == 8
+    assert calls["n"] < writes
+
+
+
+def test_hand_formatted_records_match_json(tmp_path):
+    journal = OperationJournal(tmp_path / "ops.jsonl")
+    odd = 'dir "quoted"\\tab\tnon-ascii \u00e9 \udcff'
+    with journal.batch("formats") as batch:
+        ops = batch.intend_many([JournalOp("move", odd, odd + "-dst", {'mode': 0o644}),
+                                 JournalOp("rmdir", "plain", None, {'mode': 1, 'flag': True})])
+        batch.record_many([(ops[0], 'done', None), (ops[1], 'failed', 'error "x" \u00e9')])
+    journal.close()
+
+    lines = (tmp_path / "ops.jsonl").read_text(encoding='utf-8').splitlines()
+    records = [json.loads(line) for line in lines]
+    # Byte for byte what the generic encoder writes
+    assert lines == [json.dumps(r, separators=(',', ':')) for r in records]
+    assert records[1]['src'] == odd and records[1]['meta'] == {'mode': 0o644}
+    assert records[2]['dst'] is None and records[2]['meta'] == {'mode': 1, 'flag': True}
+    assert records[4]['error'] == 'error "x" \u00e9'
+
+def test_undo_recreates_permanently_deleted_items(test_directory):
+    """Deleting empty items through the REPL can be reversed with 'undo'."""
+    (test_directory / "empty.txt").touch()
+    os.chmod(test_directory / "empty.txt", 0o600)
+    (test_directory / "empty_dir").mkdir()
+    (test_directory / "keep.txt").write_text("content")
+
+    assistant = CleanupAssistant()
+    assistant.current_path = test_directory
+    with patch("builtins.input", side_effect=["2", "yes"]):
+        assistant.handle_command("delete empty")
+    assert not (test_directory / "empty.txt").exists()
+    assert not (test_directory / "empty_dir").exists()
+
+    result = assistant.handle_command("undo")
+    assert "Undid batch" in result
+    assert (test_directory / "empty.txt").stat().st_size == 0
+    assert (test_directory / "empty.txt").stat().st_mode & 0o777 == 0o600
+    assert (test_directory / "empty_dir").is_dir()
+    assert "Nothing to undo" in assistant.handle_command("undo")
+
+
+def test_crash_recovery_resolves_open_batch(tmp_path):
+    """Intents without outcomes are resolved from the filesystem on restart."""
+    src = tmp_path / "src"
+    src.mkdir()
+    for name in ("a", "b", "c"):
+        (src / name).write_text(name)
+    dst = tmp_path / "dst"
+    dst.mkdir()
+
+    path = tmp_path / "ops.jsonl"
+    journal = OperationJournal(path)
+    batch_id = journal.begin_batch("moves", [JournalOp("move", src / n, dst / n) for n in ("a", "b", "c")])
+    # Simulate a crash after two moves, before any outcome was recorded
+    os.rename(src / "a", dst / "a")
+    os.rename(src / "b", dst / "b")
+    journal.close()
+
+    restarted = OperationJournal(path)
+    assert restarted.recover() == [batch_id]
+    assert restarted.recover() == []
+    batch = restarted.batches()[batch_id]
+    assert sorted(batch["outcomes"].values()) == ["done", "done", "not_applied"]
+
+    result = restarted.undo()
+    assert len(result.restored) == 2
+    assert sorted(p.name for p in src.iterdir()) == ["a", "b", "c"]
+    assert list(dst.iterdir()) == []
+
+
+def test_undo_orders_dependent_ops(tmp_path):
+    """Ops on nested paths run in reverse order; independent ones share a level."""
+    ops = [
+        JournalOp("mkdir", tmp_path / "clean"),
+        JournalOp("move", tmp_path / "x", tmp_path / "clean" / "x"),
+        JournalOp("move", tmp_path / "y", tmp_path / "clean" / "y"),
+        JournalOp("trash", tmp_path / "clean"),
+    ]
+    levels = OperationJournal._dependency_levels(list(reversed(ops)))
+    assert [[op.op for op in level] for level in levels] == [["trash"], ["move", "move"], ["mkdir"]]
+
+
+def test_move_strategy_is_journaled(tmp_path, isolated_journal):
+    """MoveStrategy moves can be undone."""
+    source = tmp_path / "empty_dir"
+    source.mkdir()
+    target = tmp_path / "target"
+
+    MoveStrategy(target).execute(source)
+    assert (target / "empty_dir").is_dir()
+
+    isolated_journal.undo()
+    assert source.is_dir()
+    assert not (target / "empty_dir").exists()
+
+
+def test_compaction_keeps_only_undoable_history(tmp_path):
+    """Undone, unneeded and old batches are dropped; open batches survive intact."""
+    journal = OperationJournal(tmp_path / "ops.jsonl", keep_batches=2)
+    (tmp_path / "dst").mkdir()
+    (tmp_path / "dst" / "undone").touch()
+    undone = _moved(journal, tmp_path, "undone")
+    journal.undo(undone)
+    _moved(journal, tmp_path, "old")
+    partial = _moved(journal, tmp_path, "partial", skipped=["stale"])
+    latest = _moved(journal, tmp_path, "latest")
+    crashed = journal.begin_batch("crashed", [JournalOp("delete_file", tmp_path / "gone")])
+    before = len(journal.read_records())
+
+    assert journal.compact() is True
+
+    batches = journal.batches()
+    assert list(batches) == [partial, latest, crashed]
+    assert [op.src for op in batches[partial]["ops"].values()] == [str(tmp_path / "partial")]
+    assert batches[crashed]["status"] is None and len(batches[crashed]["ops"]) == 1
+    assert len(journal.read_records()) < before
+    assert journal.recover() == [crashed]
+    (tmp_path / "dst" / "latest").touch()
+    assert len(journal.undo(latest).restored) == 1
+    assert (tmp_path / "latest").exists()
+
+
+def test_journal_compacts_itself_as_it_grows(tmp_path):
+    """Reading the journal back stays bounded however many batches were written."""
+    journal = OperationJournal(tmp_path / "ops.jsonl", compact_bytes=4096, keep_batches=3)
+    for n in range(100):
+        with journal.batch(f"batch {n}") as batch:
+            batch.done(batch.intend("delete_file", tmp_path / f"file-{n}"))
+    journal.close()
+
+    assert (tmp_path / "ops.jsonl").stat().st_size < 2 * 4096
+    assert len(journal.batches()) < 20
+
+    # With nothing left to drop the file stays as it is, and is not reread at every batch end
+    journal = OperationJournal(tmp_path / "ops.jsonl", compact_bytes=1, keep_batches=1000)
+    inode = (tmp_path / "ops.jsonl").stat().st_ino
+    with patch.object(journal, "_read", wraps=journal._read) as read:
+        for n in range(5):
+            with journal.batch(f"batch {n}") as batch:
+                batch.done(batch.intend("delete_file", tmp_path / f"again-{n}"))
+    journal.close()
+    assert (tmp_path / "ops.jsonl").stat().st_ino == inode
+    assert read.call_count < 5
+
+
+def test_compaction_waits_for_other_processes(tmp_path):
+    """A journal another holder still appends to is not rewritten under it."""
+    path = tmp_path / "ops.jsonl"
+    other = OperationJournal(path)
+    other.begin_batch("elsewhere")
+    journal = OperationJournal(path)
+
+    assert journal.compact() is False
+    other.close()
+    assert journal.compact() is True
+
+
+def test_find_in_trash_searches_the_items_own_mount(tmp_path, monkeypatch):
+    """Items on another filesystem go to $topdir/.Trash-$uid with a path relative to $topdir."""
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "home"))
+    monkeypatch.setattr("utils.journal._mount_point", lambda path: str(tmp_path))
+    trash = tmp_path / f".Trash-{os.getuid()}"
+    (trash / "files").mkdir(parents=True)
+    (trash / "info").mkdir()
+    (trash / "files" / "item").touch()
+    (trash / "info" / "item.trashinfo").write_text(
+        "[Trash Info]\nPath=data/item\nDeletionDate=2026-01-01T00:00:00\n")
+
+    assert find_in_trash(str(tmp_path / "data" / "item")) == (trash / "files" / "item",
+                                                             trash / "info" / "item.trashinfo")
+    assert find_in_trash(str(tmp_path / "data" / "other")) is None
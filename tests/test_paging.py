@@ -0,0 +1,66 @@
+"""Test suite for paged REPL output."""
+
+import itertools
+
+from core.chat_interface import CleanupAssistant
+from core.constants import PAGE_SIZE
+from utils.paging import Pager, lazy_sorted
+
+
+def test_pager_is_lazy_and_honours_limit():
+    """Only one page is pulled from the source; the limit ends the stream."""
+    pulled = []
+
+    def lines():
+        for i in itertools.count():
+            pulled.append(i)
+            yield f"line {i}"
+
+    pager = Pager("Header", lines(), page_size=10, limit=25)
+    first = pager.next_page().splitlines()
+    assert first[0] == "Header" and first[1:11] == [f"line {i}" for i in range(10)]
+    assert "'more'" in first[-1]
+    assert len(pulled) == 11  # the page plus one line of lookahead
+
+    pager.next_page()
+    last = pager.next_page().splitlines()
+    assert last[:5] == [f"line {i}" for i in range(20, 25)]
+    assert "stopped after 25" in last[-1]
+    assert not pager.has_more and pager.next_page() is None
+
+
+def test_lazy_sorted_orders_like_sorted():
+    items = [5, 3, 9, 1, 3, 7]
+    assert list(lazy_sorted(items, key=lambda x: -x)) == sorted(items, reverse=True)
+
+
+def test_list_contents_pages_with_more(test_directory):
+    for i in range(PAGE_SIZE + 10):
+        (test_directory / f"file_{i:03d}.txt").touch()
+    (test_directory / "zz_dir").mkdir()
+
+    assistant = CleanupAssistant()
+    assistant.current_path = test_directory
+    first = assistant.handle_command("ls").splitlines()
+    assert "Current directory contents" in first[0]
+    assert "zz_dir/" in first[1]  # directories sort first
+    assert "file_000.txt" in first[2]
+    assert "'more'" in first[-1]
+
+    rest = assistant.handle_command("more").splitlines()
+    assert len(rest) == 11
+    assert "file_059.txt" in rest[-1]
+    assert "Nothing more" in assistant.handle_command("more")
+
+
+def test_search_and_empty_files_stream_from_walk(test_directory):
+    (test_directory / "a" / "b").mkdir(parents=True)
+    (test_directory / "a" / "b" / "needle.txt").touch()
+    (test_directory / "a" / "other.txt").write_text("x")
+
+    assistant = CleanupAssistant()
+    assistant.current_path = test_directory
+    assert str(test_directory / "a" / "b" / "needle.txt") in assistant.search_files("NEEDLE")
+    assert "No files found" in assistant.search_files("missing")
+    assert "needle.txt (0 B)" in assistant.handle_command("show me empty files")
+    assert "No empty directories" in assistant.handle_command("show me empty directories")
@@ -0,0 +1,154 @@
+"""Tests for the strategy pipeline and the batch strategy contract."""
+
+import asyncio
+import warnings
+from pathlib import Path
+
+from core.analyzer import DirectoryAnalyzer
+from strategies.base import BatchResult
+from strategies.move_strategy import MoveStrategy
+from strategies.pipeline import Stage, StrategyPipeline
+
+
+def test_stage_kinds_and_batching():
+    batches = []
+    recorded = []
+
+    async def validate(n):
+        return n % 3 != 0
+
+    def act(items):
+        batches.append(list(items))
+        result = BatchResult()
+        for n in items:
+            if n == 5:
+                result.failed.append((n, "boom"))
+            else:
+                result.processed.append(n)
+        return result
+
+    pipeline = StrategyPipeline([
+        Stage("odd", "filter", lambda n: n % 2 == 1),
+        Stage("not_multiple_of_3", "validate", validate, workers=3),
+        Stage("act", "act", act, batch_size=4),
+        Stage("record", "record", recorded.append),
+    ], queue_size=2)
+    result = asyncio.run(pipeline.run(range(20)))
+
+    assert result.filtered == 10
+    assert sorted(n for n, _ in result.skipped) == [3, 9, 15]
+    assert result.failed == [(5, "boom")]
+    assert sorted(result.processed) == sorted(recorded) == [1, 7, 11, 13, 17, 19]
+    assert all(1 <= len(batch) <= 4 for batch in batches)
+
+
+def test_acting_overlaps_with_producing():
+    events = []
+
+    def source():
+        for n in range(50):
+            events.append(("produced", n))
+            yield n
+
+    def act(items):
+        events.append(("acted", items[0]))
+        return BatchResult(processed=list(items))
+
+    pipeline = StrategyPipeline([Stage("act", "act", act, batch_size=8)], queue_size=4)
+    result = asyncio.run(pipeline.run(source()))
+
+    assert len(result.processed) == 50
+    first_act = events.index(next(e for e in events if e[0] == "acted"))
+    # Bounded queues: the first batch is handled long before the source is exhausted
+    assert first_act < events.index(("produced", 49))
+
+
+def test_execute_cleanup_streams_scan_into_strategy(tmp_path):
+    root = tmp_path / "root"
+    for name in ("empty1", "empty2", "nested/empty3"):
+        (root / name).mkdir(parents=True)
+    (root / "nonempty").mkdir()
+    (root / "nonempty" / "file.txt").write_text("content")
+    # The target lives under the root being scanned; moved directories must not be moved again
+    target = root / "moved"
+    target.mkdir()
+
+    analyzer = DirectoryAnalyzer(str(root), strategy=MoveStrategy(target))
+    assert analyzer.execute_cleanup() is True
+
+    assert sorted(p.name for p in target.iterdir()) == ["empty1", "empty2", "empty3"]
+    assert (root / "nonempty" / "file.txt").exists()
+    assert (root / "nested").is_dir()
+
+
+def test_delete_strategy_implements_batch_contract(tmp_path):
+    from strategies.delete_strategy import DeleteStrategy
+
+    class ApproveAll:
+        async def validate_empty_directory(self, dir_path):
+            return True
+
+        async def get_final_confirmation(self, dir_path):
+            return dir_path.name != "keep"
+
+    dirs = [tmp_path / name for name in ("a", "b", "keep")]
+    for path in dirs:
+        path.mkdir()
+    strategy = DeleteStrategy(ApproveAll())
+    result = strategy.execute_batch(dirs)
+
+    assert sorted(p.name for p in result.processed) == ["a", "b"]
+    assert [p.name for p, _ in result.skipped] == ["keep"]
+    assert Path(tmp_path / "keep").exists() and not (tmp_path / "a").exists()
+
+
+def test_delete_strategy_keeps_a_directory_that_gained_contents(tmp_path):
+    from strategies.delete_strategy import DeleteStrategy
+
+    class FillBeforeConfirming:
+        async def validate_empty_directory(self, dir_path):
+            return True
+
+        async def get_final_confirmation(self, dir_path):
+            # Something writes into the directory between validation and removal
+            (dir_path / "new.txt").write_text("content")
+            return True
+
+    target = tmp_path / "target"
+    target.mkdir()
+    result = DeleteStrategy(FillBeforeConfirming()).execute_batch([target])
+
+    assert result.processed == [] and result.skipped == []
+    # os.rmdir refused, which is a failure rather than a safety rejection
+    assert [path for path, _ in result.failed] == [target]
+    assert (target / "new.txt").read_text() == "content"
+
+
+def test_directory_strategy_is_validated_once_by_the_pipeline(tmp_path):
+    from strategies.delete_strategy import DeleteStrategy
+
+    class CountingCheck:
+        def __init__(self):
+            self.validated = []
+
+        async def validate_empty_directory(self, dir_path):
+            self.validated.append(dir_path.name)
+            return dir_path.name != "protected"
+
+        async def get_final_confirmation(self, dir_path):
+            return True
+
+    root = tmp_path / "root"
+    for name in ("a", "b", "protected"):
+        (root / name).mkdir(parents=True)
+    check = CountingCheck()
+    analyzer = DirectoryAnalyzer(str(root), strategy=DeleteStrategy(check))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        result = asyncio.run(analyzer.run_cleanup())
+
+    assert sorted(p.name for p in result.processed) == ["a", "b"]
+    assert [Path(p).name for p, _ in result.skipped] == ["protected"]
+    assert sorted(check.validated) == ["a", "b", "protected"]
+    assert (root / "protected").is_dir() and not (root / "a").exists()
@@ -0,0 +1,198 @@
+"""Test suite for cleanup plan compilation and execution."""
+
+import errno
+import os
+import re
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from core.chat_interface import CleanupAssistant
+from core.planner import CleanupPlan, PlanExecutor, compile_plan
+
+
+@pytest.fixture
+def empty_items(test_directory):
+    (test_directory / "a.txt").touch()
+    (test_directory / "b.txt").touch()
+    (test_directory / "outer" / "inner").mkdir(parents=True)
+    (test_directory / "keep.txt").write_text("content")
+    return {
+        'files': [test_directory / "a.txt", test_directory / "b.txt"],
+        'dirs': [test_directory / "outer" / "inner", test_directory / "outer"],
+    }
+
+
+def test_plan_round_trip_and_dependencies(empty_items, tmp_path):
+    """Plans survive save/load; a directory waits for the ops inside it."""
+    plan = compile_plan(empty_items, 'delete', root=tmp_path)
+    by_path = {op.path: op for op in plan.ops}
+    inner = by_path[str(empty_items['dirs'][0])]
+    outer = by_path[str(empty_items['dirs'][1])]
+    assert outer.depends_on == [inner.id]
+    assert by_path[str(empty_items['files'][0])].expect['size'] == 0
+
+    loaded = CleanupPlan.load(plan.save(tmp_path / "plan.json"))
+    assert [(op.op, op.path, op.depends_on) for op in loaded.ops] == \
+        [(op.op, op.path, op.depends_on) for op in plan.ops]
+
+
+def test_executor_runs_dependencies_and_skips_stale_items(empty_items, tmp_path):
+    """Changed items are left alone; nested empty dirs are removed bottom-up."""
+    plan = compile_plan(empty_items, 'delete', root=tmp_path)
+    empty_items['files'][1].write_text("written after planning")
+
+    result = PlanExecutor(workers=4).execute(plan)
+
+    assert not empty_items['files'][0].exists()
+    assert empty_items['files'][1].exists()
+    assert not empty_items['dirs'][1].exists()
+    assert [r.op.path for r in result.of('stale')] == [str(empty_items['files'][1])]
+
+
+def test_directory_filled_after_planning_is_stale(empty_items, tmp_path):
+    """rmdir's own refusal of a non-empty directory is reported like a failed precondition."""
+    plan = compile_plan(empty_items, 'delete', root=tmp_path)
+    (empty_items['dirs'][0] / "new.txt").write_text("written after planning")
+
+    result = PlanExecutor().execute(plan)
+
+    assert (empty_items['dirs'][0] / "new.txt").exists()
+    stale = {r.op.path: r.detail for r in result.of('stale')}
+    assert stale == {str(d): "is no longer empty" for d in empty_items['dirs']}
+    assert not result.of('failed')
+
+
+def test_executor_blocks_dependents_of_failed_ops(tmp_path):
+    """An op whose dependency failed is not attempted."""
+    plan = CleanupPlan(root=str(tmp_path), action='move')
+    mkdir = plan.add('mkdir', tmp_path / "file.txt" / "sub")
+    (tmp_path / "file.txt").write_text("x")
+    (tmp_path / "item").touch()
+    plan.add('move', tmp_path / "item", tmp_path / "file.txt" / "sub" / "item", depends_on=[mkdir.id])
+
+    result = PlanExecutor().execute(plan)
+    assert [r.status for r in result.results] == ['failed', 'blocked']
+    assert (tmp_path / "item").exists()
+
+
+def test_move_plan_falls_back_to_copying_across_filesystems(empty_items, tmp_path, monkeypatch):
+    def rename(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "rename", rename)
+    cleanup_dir = tmp_path / "cleanup"
+    plan = compile_plan(empty_items, 'move', root=tmp_path, cleanup_dir=cleanup_dir)
+    result = PlanExecutor().execute(plan)
+
+    assert not result.of('failed')
+    assert not any(path.exists() for path in empty_items['files'])
+    assert len(list(cleanup_dir.iterdir())) == len(empty_items['files']) + len(empty_items['dirs'])
+
+
+def test_move_plan_suffixes_colliding_names(tmp_path):
+    files = []
+    for n in range(5):
+        (tmp_path / f"d{n}").mkdir()
+        files.append(tmp_path / f"d{n}" / "same.txt")
+        files[-1].touch()
+    cleanup_dir = tmp_path / "cleanup"
+    cleanup_dir.mkdir()
+    (cleanup_dir / "same.txt").touch()
+
+    plan = compile_plan({'files': files, 'dirs': []}, 'move', root=tmp_path, cleanup_dir=cleanup_dir)
+
+    assert [os.path.basename(op.dst) for op in plan.ops] == [f"same-{n}.txt" for n in range(1, 6)]
+
+
+
+def test_plan_streams_items_and_stops_at_max_ops(tmp_path, caplog):
+    files = []
+    for n in range(5):
+        files.append(tmp_path / f"f{n}.txt")
+        files[-1].touch()
+    pulled = []
+
+    def stream():
+        for path in files:
+            pulled.append(path)
+            yield path
+
+    plan = compile_plan({'files': stream()}, 'delete', root=tmp_path, max_ops=3)
+
+    assert [op.path for op in plan.ops] == [str(path) for path in files[:3]]
+    # One item past the bound is read to tell a full source from a truncated one
+    assert pulled == files[:4]
+    assert "Plan stopped at 3 items" in caplog.text
+
+
+
+def test_worker_error_is_raised_instead_of_hanging(tmp_path):
+    files = []
+    for n in range(400):
+        files.append(tmp_path / f"f{n}.txt")
+        files[-1].touch()
+    plan = compile_plan({'files': files}, 'delete', root=tmp_path)
+
+    class FailingInWorkers:
+        def throttle(self, count=1, nbytes=0):
+            if threading.current_thread().name.startswith("plan-worker"):
+                raise OSError(errno.EIO, "journal device failed")
+
+        def record_latency(self, seconds, count=1):
+            pass
+
+    outcome = []
+
+    def execute():
+        try:
+            PlanExecutor(workers=4, parallel_threshold=0, governor=FailingInWorkers()).execute(plan)
+        except OSError as e:
+            outcome.append(e)
+
+    runner = threading.Thread(target=execute, daemon=True)
+    runner.start()
+    runner.join(10)
+    assert not runner.is_alive()
+    assert outcome and outcome[0].errno == errno.EIO
+
+def test_cyclic_plan_rejected(tmp_path):
+    plan = CleanupPlan(root=str(tmp_path), action='delete')
+    plan.add('rmdir', tmp_path / "a", depends_on=[1])
+    plan.add('rmdir', tmp_path / "b", depends_on=[0])
+    with pytest.raises(ValueError, match="cyclic"):
+        PlanExecutor().execute(plan)
+
+
+def test_repl_plan_apply_and_undo(empty_items, test_directory, tmp_path):
+    """'plan empty' writes a plan without touching files; 'apply plan' runs it."""
+    assistant = CleanupAssistant()
+    assistant.current_path = test_directory
+    plan_file = tmp_path / "Plan.json"
+
+    output = assistant.handle_command(f"plan empty {plan_file}")
+    assert plan_file.exists()
+    assert "operations" in output
+    assert (test_directory / "a.txt").exists()
+
+    output = assistant.handle_command(f"apply plan {plan_file}")
+    assert "permanently deleted" in output
+    assert not (test_directory / "a.txt").exists()
+    assert (test_directory / "keep.txt").exists()
+
+    assistant.handle_command("undo")
+    assert (test_directory / "a.txt").exists()
+
+
+def test_interactive_trash_runs_as_plan(empty_items, test_directory):
+    """Choosing Trash moves items into the cleanup dir, then trashes it once."""
+    assistant = CleanupAssistant()
+    assistant.current_path = test_directory
+    with patch("send2trash.send2trash") as trash, patch("builtins.input", return_value="1"):
+        output = assistant._delete_empty_items({'files': empty_items['files'], 'dirs': []})
+
+    cleanup_dir = assistant._cleanup_directory_path()
+    trash.assert_called_once_with(str(cleanup_dir))
+    assert re.search(r"a\.txt -> a-0\.0 B\.txt", output)
+    assert (cleanup_dir / "a-0.0 B.txt").exists()
@@ -0,0 +1,75 @@
+"""Test suite for the progress tracking subsystem."""
+
+import io
+import logging
+import threading
+
+import pytest
+
+from utils.progress import (LogSink, MetricsSink, ProgressSink, ProgressTracker, TerminalSink,
+                            format_progress)
+
+
+def test_concurrent_advance_is_exact():
+    """Counters from many threads add up without losing updates."""
+    tracker = ProgressTracker(sinks=[])
+
+    def work():
+        for _ in range(10_000):
+            tracker.advance(1, nbytes=10)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    snapshot = tracker.close()
+    assert snapshot.items == 80_000
+    assert snapshot.bytes == 800_000
+
+
+def test_rates_and_eta():
+    """Throughput and ETA are derived from counters and totals."""
+    tracker = ProgressTracker(total=100, sinks=[])
+    tracker.advance(25, nbytes=2048)
+    snapshot = tracker.snapshot()
+    assert snapshot.items_per_sec > 0
+    assert snapshot.bytes_per_sec > 0
+    assert snapshot.eta is not None and snapshot.eta > 0
+    assert snapshot.percentage == 25.0
+    assert "25/100 (25.0%)" in format_progress(snapshot)
+
+
+def test_sinks_receive_final_snapshot(caplog):
+    """Every sink sees the final state when the tracker closes."""
+    caplog.set_level(logging.INFO)
+    stream = io.StringIO()
+    metrics = MetricsSink()
+    with ProgressTracker(description="Scanning", interval=60,
+                         sinks=[TerminalSink(stream), LogSink(), metrics]) as tracker:
+        tracker.advance(3)
+
+    assert "Scanning: 3" in stream.getvalue()
+    assert metrics.latest["items"] == 3 and metrics.latest["final"] is True
+    assert "Scanning: 3" in caplog.text
+
+
+def test_legacy_update_is_throttled(caplog):
+    """update() no longer logs a line per call."""
+    caplog.set_level(logging.INFO)
+    tracker = ProgressTracker(interval=60)
+    for i in range(1000):
+        tracker.update(i, 1000)
+    assert tracker.total_processed == 999
+    assert caplog.text.count("Progress") == 0
+    tracker.close()
+    assert caplog.text.count("Progress") == 1
+
+
+def test_sink_without_emit_cannot_be_created():
+    class Forgetful(ProgressSink):
+        pass
+
+    with pytest.raises(TypeError, match="emit"):
+        Forgetful()
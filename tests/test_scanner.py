@@ -0,0 +1,111 @@
+"""Test suite for device-aware parallel scanning."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from core.analyzer import DirectoryAnalyzer
+from core.devices import DeviceInfo, DeviceRegistry, concurrency_for
+from core.scanner import ParallelScanner, ScanVisitor
+
+
+@pytest.fixture
+def two_roots(tmp_path):
+    """Two independent trees with known empty directories."""
+    first = tmp_path / "first"
+    (first / "empty1").mkdir(parents=True)
+    (first / "nested" / "empty_nested").mkdir(parents=True)
+    (first / "node_modules" / "ignored_empty").mkdir(parents=True)
+    (first / "full").mkdir()
+    (first / "full" / "file.txt").write_text("content")
+
+    second = tmp_path / "second"
+    (second / "empty2").mkdir(parents=True)
+    (second / "empty3").mkdir()
+    return first, second
+
+
+def test_multi_root_analysis(two_roots):
+    """All roots are scanned in one pass and skip dirs are pruned."""
+    first, second = two_roots
+    all_dirs, stats = DirectoryAnalyzer([str(first), str(second)], strategy=None).analyze_directories()
+
+    names = sorted(Path(d).name for d in all_dirs)
+    assert names == ["empty1", "empty2", "empty3", "empty_nested"]
+    assert stats["total_directories"] == 6
+    assert stats["errors"] == 0
+    assert sum(d["directories"] for d in stats["devices"].values()) == 8
+
+
+def test_nested_roots_are_scanned_once(two_roots):
+    """A root inside another root does not double count."""
+    first, _ = two_roots
+    roots = ParallelScanner.normalize_roots([first, first / "nested", first])
+    assert roots == [Path(os.path.abspath(first))]
+
+
+
+def test_visitor_without_visit_directory_cannot_be_created():
+    class Forgetful(ScanVisitor):
+        pass
+
+    with pytest.raises(TypeError, match="visit_directory"):
+        Forgetful()
+
+def test_unreadable_directory_counts_as_error(two_roots, monkeypatch, caplog):
+    """Scan errors are logged and counted instead of aborting the scan."""
+    first, _ = two_roots
+    real_scandir = os.scandir
+
+    def failing_scandir(path):
+        if str(path).endswith("nested"):
+            raise PermissionError("Access denied")
+        return real_scandir(path)
+
+    monkeypatch.setattr(os, "scandir", failing_scandir)
+    all_dirs, stats = DirectoryAnalyzer(str(first), strategy=None).analyze_directories()
+
+    assert "Error accessing" in caplog.text
+    assert stats["errors"] == 1
+    assert [Path(d).name for d in all_dirs] == ["empty1"]
+
+
+def _fake_system(tmp_path, fs_type, disk, rotational, partition=True):
+    """Build a fake mountinfo and sysfs for device 8:1."""
+    mountinfo = tmp_path / "mountinfo"
+    mountinfo.write_text(f"36 25 8:1 / /data rw,relatime shared:1 - {fs_type} /dev/{disk}1 rw\n")
+    disk_dir = tmp_path / "sys" / "devices" / disk
+    target = disk_dir / f"{disk}1" if partition else disk_dir
+    target.mkdir(parents=True)
+    (disk_dir / "queue").mkdir()
+    (disk_dir / "queue" / "rotational").write_text(f"{rotational}\n")
+    (tmp_path / "sys" / "dev" / "block").mkdir(parents=True)
+    (tmp_path / "sys" / "dev" / "block" / "8:1").symlink_to(target)
+    return DeviceRegistry(mountinfo=str(mountinfo), sys_root=str(tmp_path / "sys"))
+
+
+@pytest.mark.parametrize("fs_type,disk,rotational,kind", [
+    ("ext4", "sda", 1, "hdd"),
+    ("ext4", "sdb", 0, "ssd"),
+    ("xfs", "nvme0n", 0, "nvme"),
+    ("nfs4", "sda", 1, "network"),
+])
+def test_device_classification(tmp_path, fs_type, disk, rotational, kind):
+    """Devices are classified from mountinfo and sysfs."""
+    registry = _fake_system(tmp_path, fs_type, disk, rotational)
+    info = registry.lookup(os.makedev(8, 1))
+    assert info.kind == kind
+    assert info.mount_point == "/data"
+
+
+def test_concurrency_limits():
+    """Spinning disks get few workers; overrides win by dev, mount, then kind."""
+    hdd = DeviceInfo(os.makedev(8, 1), kind="hdd", mount_point="/data")
+    nvme = DeviceInfo(os.makedev(259, 0), kind="nvme", mount_point="/fast")
+
+    assert concurrency_for(hdd) <= 2
+    assert concurrency_for(nvme) > concurrency_for(hdd)
+    assert concurrency_for(hdd, {"hdd": 1}) == 1
+    assert concurrency_for(hdd, {"hdd": 1, "/data": 3}) == 3
+    assert concurrency_for(hdd, {hdd.dev: 5, "/data": 3}) == 5
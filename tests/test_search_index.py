@@ -0,0 +1,95 @@
+"""Test suite for the trigram filename index."""
+
+import os
+import shutil
+from unittest.mock import patch
+
+import pytest
+
+from core.chat_interface import CleanupAssistant
+from core.search_index import FilenameIndex, index_file_for, open_index, substring_distance
+
+
+@pytest.fixture
+def tree(test_directory):
+    (test_directory / "docs" / "old").mkdir(parents=True)
+    (test_directory / "docs" / "Quarterly_Report.pdf").write_text("x")
+    (test_directory / "docs" / "old" / "report-2019.txt").write_text("x")
+    (test_directory / "build.log").write_text("x")
+    (test_directory / "node_modules" / "pkg").mkdir(parents=True)
+    (test_directory / "node_modules" / "pkg" / "report.js").write_text("x")
+    # Settle mtimes in the past so unchanged directories are recognised as such
+    for dirpath, _, _ in os.walk(test_directory):
+        os.utime(dirpath, ns=(10**18, 10**18))
+    return test_directory
+
+
+def test_substring_glob_and_fuzzy_queries(tree):
+    index = FilenameIndex.build(tree)
+    assert sorted(index.search("REPORT")) == [os.path.join("docs", "Quarterly_Report.pdf"),
+                                              os.path.join("docs", "old", "report-2019.txt")]
+    assert list(index.search("*.log")) == ["build.log"]
+    assert list(index.search("docs/*/*.txt")) == [os.path.join("docs", "old", "report-2019.txt")]
+    assert list(index.search("nothing-like-this")) == []
+
+    ranked = index.fuzzy("reprot")
+    assert {path for _, path in ranked} == {os.path.join("docs", "Quarterly_Report.pdf"),
+                                            os.path.join("docs", "old", "report-2019.txt")}
+    assert all(distance == 1 for distance, _ in ranked)
+    assert substring_distance("reprot", "quarterly_report.pdf", 2) == 1
+
+
+def test_persisted_index_refreshes_incrementally(tree):
+    index = open_index(tree)
+    assert index_file_for(tree).exists()
+
+    (tree / "docs" / "new_report.md").write_text("x")
+    (tree / "docs" / "old" / "report-2019.txt").unlink()
+    real_scandir = os.scandir
+    listed = []
+
+    def counting_scandir(path):
+        listed.append(str(path))
+        return real_scandir(path)
+
+    loaded = FilenameIndex.load(tree)
+    with patch("core.search_index.os.scandir", counting_scandir):
+        added, removed = loaded.refresh()
+
+    assert (added, removed) == (1, 1)
+    # Only the two directories whose entries changed were listed again
+    assert sorted(listed) == [str(tree / "docs"), str(tree / "docs" / "old")]
+    assert sorted(loaded.search("report")) == [os.path.join("docs", "Quarterly_Report.pdf"),
+                                               os.path.join("docs", "new_report.md")]
+
+    shutil.rmtree(tree / "docs")
+    loaded.refresh()
+    assert list(loaded.search("report")) == []
+
+
+def test_repl_search_commands(tree):
+    assistant = CleanupAssistant()
+    assistant.current_path = tree
+    output = assistant.handle_command("search Quarterly")
+    assert "Found matches" in output and "Quarterly_Report.pdf" in output
+    assert "build.log" in assistant.handle_command("search *.LOG")
+    assert "report-2019.txt (1 edits)" in assistant.handle_command("fuzzy reprot")
+
+    # Searching below an indexed root reuses its index, limited to that subtree
+    assistant.current_path = tree / "docs" / "old"
+    output = assistant.handle_command("search report")
+    assert "report-2019.txt" in output and "Quarterly" not in output
+    assert list(assistant.search_indexes) == [str(tree)]
+
+
+def test_search_all_includes_skipped_directories(tree):
+    assistant = CleanupAssistant()
+    assistant.current_path = tree
+    assert "No files found" in assistant.handle_command("search report.js")
+
+    output = assistant.handle_command("search --all report.js")
+    assert os.path.join("node_modules", "pkg", "report.js") in output
+    assert "report.js" in assistant.handle_command("fuzzy --all reprot.js")
+    # Persisted apart from the default index, which still leaves node_modules out
+    assert index_file_for(tree, skip_dirs=frozenset()) != index_file_for(tree)
+    assert "No files found" in assistant.handle_command("search report.js")
@@ -0,0 +1,99 @@
+"""Test suite for columnar scan snapshots and snapshot diffs."""
+
+import io
+import json
+import os
+
+import pytest
+
+from core import batch
+from core.snapshot import (KIND_DIR, KIND_FILE, Snapshot, diff_snapshots, snapshots_for,
+                           take_snapshot)
+
+
+@pytest.fixture
+def tree(test_directory):
+    (test_directory / "logs" / "old").mkdir(parents=True)
+    (test_directory / "logs" / "app.log").write_bytes(b"x" * 100)
+    (test_directory / "logs" / "old" / "app.1.log").write_bytes(b"x" * 50)
+    (test_directory / "docs").mkdir()
+    (test_directory / "docs" / "notes.txt").write_bytes(b"x" * 10)
+    (test_directory / "docs" / "café.txt").write_bytes(b"")
+    (test_directory / ".git").mkdir()
+    (test_directory / ".git" / "HEAD").write_bytes(b"ref")
+    return test_directory
+
+
+def test_snapshot_is_sorted_and_mapped(tree, tmp_path):
+    path = take_snapshot(tree, tmp_path / "one.snap")
+    with Snapshot.open(path) as snap:
+        entries = list(snap)
+        assert snap.root == str(tree)
+        assert [e.path for e in entries] == sorted(
+            [os.path.join(*parts) for parts in [("logs",), ("logs", "old"), ("logs", "app.log"),
+                                                ("logs", "old", "app.1.log"), ("docs",),
+                                                ("docs", "notes.txt"), ("docs", "café.txt")]],
+            key=lambda p: p.encode())
+        assert isinstance(snap.sizes, memoryview) and snap.sizes.obj is not None
+        app_log = snap.find(os.path.join("logs", "app.log"))
+        assert (app_log.size, app_log.kind) == (100, KIND_FILE)
+        assert app_log.inode == os.stat(tree / "logs" / "app.log").st_ino
+        assert snap.find("logs").kind == KIND_DIR
+        assert snap.find("missing") is None
+        assert snap.total_bytes == 160
+
+    (tmp_path / "bad.snap").write_bytes(b"not a snapshot\n")
+    with pytest.raises(ValueError):
+        Snapshot.open(tmp_path / "bad.snap")
+
+
+def test_diff_reports_changes_and_directory_growth(tree, tmp_path):
+    before = take_snapshot(tree, tmp_path / "before.snap")
+    (tree / "logs" / "app.log").write_bytes(b"x" * 5000)
+    (tree / "logs" / "old" / "app.1.log").unlink()
+    (tree / "logs" / "old" / "app.2.log").write_bytes(b"x" * 2000)
+    (tree / "docs" / "notes.txt").write_bytes(b"x")
+    (tree / "media").mkdir()
+    (tree / "media" / "video.mp4").write_bytes(b"x" * 10000)
+    after = take_snapshot(tree, tmp_path / "after.snap")
+
+    with Snapshot.open(before) as old, Snapshot.open(after) as new:
+        diff = diff_snapshots(old, new)
+    assert {(c.status, c.path) for c in diff.changes} == {
+        ('grown', os.path.join("logs", "app.log")),
+        ('removed', os.path.join("logs", "old", "app.1.log")),
+        ('added', os.path.join("logs", "old", "app.2.log")),
+        ('shrunk', os.path.join("docs", "notes.txt")),
+        ('added', "media"),
+        ('added', os.path.join("media", "video.mp4")),
+    }
+    assert diff.growth == 4900 + 1950 - 9 + 10000
+    assert diff.dir_growth[os.path.join("logs", "old")] == 1950
+    assert diff.dir_growth["logs"] == 4900 + 1950
+    assert diff.top_directories(3) == [("", diff.growth), ("media", 10000), ("logs", 6850)]
+
+
+def test_diff_command_uses_the_two_newest_snapshots(tree, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def run(*argv):
+        stream = io.StringIO()
+        code = batch.main(list(argv), stream=stream)
+        return code, [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    code, records = run("diff", str(tree))
+    assert code == batch.EXIT_FAILED
+
+    assert run("snapshot", str(tree))[0] == batch.EXIT_OK
+    (tree / "logs" / "huge.bin").write_bytes(b"x" * 4096)
+    code, records = run("snapshot", str(tree))
+    assert code == batch.EXIT_OK and records[0]['entries'] == 8
+    assert len(snapshots_for(tree)) == 2
+
+    code, records = run("diff", str(tree), "--min-size", "1000")
+    assert code == batch.EXIT_OK
+    assert [(r['status'], r['path']) for r in records if r['type'] == 'change'] == [
+        ('added', str(tree / "logs" / "huge.bin"))]
+    assert [r['path'] for r in records if r['type'] == 'dir_growth'] == [str(tree), str(tree / "logs")]
+    summary = next(r for r in records if r['type'] == 'diff_summary')
+    assert (summary['added'], summary['growth_bytes']) == (1, 4096)
@@ -0,0 +1,46 @@
+"""Startup-time budget: entry points stay light and import without side effects."""
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Generous enough for a loaded CI box; a regression to eager imports roughly doubles startup
+STARTUP_BUDGET_S = 1.0
+
+# Modules that must only load once a code path actually needs them
+DEFERRED_MODULES = {
+    'openai', 'dotenv', 'send2trash', 'tqdm', 'mimetypes', 'subprocess', 'tempfile', 'uuid',
+    'core.chat_interface', 'core.planner', 'core.duplicates', 'utils.journal',
+}
+
+
+def _python(code: str, cwd: Path) -> str:
+    env = {**os.environ, 'PYTHONPATH': str(REPO_ROOT)}
+    return subprocess.run([sys.executable, '-c', code], cwd=cwd, env=env,
+                          capture_output=True, text=True, check=True).stdout
+
+
+def test_importing_main_defers_heavy_modules(tmp_path):
+    loaded = set(_python("import sys, main; print('\\n'.join(sys.modules))", tmp_path).split())
+    assert not DEFERRED_MODULES & loaded
+
+
+def test_imports_have_no_filesystem_side_effects(tmp_path):
+    _python("import main, utils.enhanced_logging, utils.ai_safety, utils.ai_navigator", tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_batch_command_starts_within_budget(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, str(REPO_ROOT / "main.py"), "scan", str(root)],
+                       cwd=tmp_path, stdout=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - start)
+    assert min(timings) < STARTUP_BUDGET_S
@@ -1,8 +1,40 @@
 """Basic test suite for directory cleanup strategies."""
 
-import pytest
+import errno
+import gzip
+import os
+import tarfile
 from pathlib import Path
+
+import pytest
+
+import strategies.move_strategy as move_strategy
+from core.duplicates import DuplicateGroup
+from strategies.archive_strategy import ArchiveError, ArchiveStrategy
+from strategies.dedupe_strategy import HardlinkDedupeStrategy
 from strategies.move_strategy import MoveStrategy
+from utils.journal import OperationJournal
+
+
+def _force_cross_device(monkeypatch):
+    def rename(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "rename", rename)
+
+
+def _cold_tree(root: Path) -> Path:
+    source = root / "cold"
+    (source / "sub").mkdir(parents=True)
+    for i in range(20):
+        (source / "sub" / f"file{i}.txt").write_bytes(bytes([i]) * 10_000)
+    (source / "top.txt").write_text("top")
+    return source
+
+
+def _duplicate_group(paths, size):
+    return DuplicateGroup(size, "digest", [str(p) for p in paths])
+
 
 def test_move_empty_directory(test_directory):
     """Test basic directory move functionality."""
@@ -17,4 +49,145 @@ def test_move_empty_directory(test_directory):
     
     # Verify
     assert not source_dir.exists()
-    assert (target_dir / "source").exists() 
\ No newline at end of file
+    assert (target_dir / "source").exists()
+
+
+def test_move_across_devices_copies_and_verifies(tmp_path, monkeypatch):
+    source = _cold_tree(tmp_path)
+    os.chmod(source / "top.txt", 0o600)
+    os.symlink("sub/file1.txt", source / "link")
+    os.utime(source / "sub" / "file2.txt", (1_000_000, 1_000_000))
+    _force_cross_device(monkeypatch)
+    progress = []
+
+    MoveStrategy(tmp_path / "archive", checksum=True,
+                 on_progress=lambda done, total: progress.append((done, total))).execute(source)
+
+    moved = tmp_path / "archive" / "cold"
+    assert not source.exists()
+    assert (moved / "sub" / "file3.txt").read_bytes() == bytes([3]) * 10_000
+    assert os.readlink(moved / "link") == "sub/file1.txt"
+    assert (moved / "top.txt").stat().st_mode & 0o777 == 0o600
+    assert (moved / "sub" / "file2.txt").stat().st_mtime == 1_000_000
+    assert progress[-1] == (200_003, 200_003)
+    assert not MoveStrategy.manifest_path(moved).exists()
+
+
+def test_interrupted_move_resumes_from_manifest(tmp_path, monkeypatch):
+    source = _cold_tree(tmp_path)
+    _force_cross_device(monkeypatch)
+    copy_file = move_strategy.copy_file
+    copied = []
+
+    def flaky_copy(src, dst):
+        if len(copied) == 5:
+            raise OSError("disk unplugged")
+        copied.append(src)
+        return copy_file(src, dst)
+
+    monkeypatch.setattr(move_strategy, "copy_file", flaky_copy)
+    with pytest.raises(OSError, match="unplugged"):
+        MoveStrategy(tmp_path / "archive", workers=1).execute(source)
+    assert (source / "top.txt").exists()
+
+    monkeypatch.setattr(move_strategy, "copy_file", lambda src, dst: copied.append(src) or copy_file(src, dst))
+    MoveStrategy(tmp_path / "archive", workers=1).execute(source)
+    # The five files copied before the interruption were not copied again
+    assert len(copied) == 21 and len(set(copied)) == 21
+    assert not source.exists()
+    assert len(list((tmp_path / "archive" / "cold" / "sub").iterdir())) == 20
+
+
+def test_archive_round_trip(tmp_path):
+    """The directory is replaced by a multi-member gzip tarball that undo extracts again."""
+
+    source = _cold_tree(tmp_path)
+    journal = OperationJournal(tmp_path / "journal.jsonl")
+    archive = ArchiveStrategy(tmp_path / "archives", chunk_size=16 * 1024, workers=4,
+                              journal=journal).execute(source)
+
+    assert archive == tmp_path / "archives" / "cold.tar.gz"
+    assert not source.exists()
+    with open(archive, 'rb') as f:
+        assert f.read().count(b"\x1f\x8b\x08") > 1
+    with tarfile.open(archive) as tar:
+        assert tar.extractfile("cold/sub/file3.txt").read() == bytes([3]) * 10_000
+    assert len(gzip.decompress(archive.read_bytes())) > 200_000
+
+    assert journal.undo().failed == []
+    assert (source / "top.txt").read_text() == "top"
+    assert len(list((source / "sub").iterdir())) == 20
+    assert not archive.exists()
+
+
+def test_archive_keeps_source_when_verification_fails(tmp_path, monkeypatch):
+    source = _cold_tree(tmp_path)
+    strategy = ArchiveStrategy(tmp_path / "archives")
+    written = strategy._write
+
+    def corrupt(source_dir, archive):
+        manifest = written(source_dir, archive)
+        data = bytearray(archive.read_bytes())
+        data[len(data) // 2] ^= 0xFF
+        archive.write_bytes(bytes(data))
+        return manifest
+
+    monkeypatch.setattr(strategy, "_write", corrupt)
+    with pytest.raises(ArchiveError):
+        strategy.execute(source)
+    assert (source / "top.txt").exists()
+    assert list((tmp_path / "archives").iterdir()) == []
+
+
+def test_archive_keeps_source_changed_while_archiving(tmp_path, monkeypatch):
+    source = _cold_tree(tmp_path)
+    strategy = ArchiveStrategy(tmp_path / "archives")
+    written = strategy._write
+
+    def write_then_modify(source_dir, archive):
+        manifest = written(source_dir, archive)
+        (source_dir / "top.txt").write_text("changed after it was read")
+        os.utime(source_dir / "top.txt", (0, 0))
+        return manifest
+
+    monkeypatch.setattr(strategy, "_write", write_then_modify)
+    with pytest.raises(ArchiveError, match="top.txt"):
+        strategy.execute(source)
+    assert (source / "top.txt").read_text() == "changed after it was read"
+
+
+def test_hardlink_dedupe_links_and_undoes(tmp_path):
+    copies = [tmp_path / f"copy{i}.bin" for i in range(3)]
+    for path in copies:
+        path.write_bytes(b"x" * 5000)
+    journal = OperationJournal(tmp_path / "journal.jsonl")
+    report = HardlinkDedupeStrategy(journal=journal).run([_duplicate_group(copies, 5000)])
+
+    assert report.linked == 2 and report.reclaimed_bytes == 10_000
+    assert len({os.stat(p).st_ino for p in copies}) == 1
+    assert all(p.read_bytes() == b"x" * 5000 for p in copies)
+    assert list(tmp_path.glob(".*.link")) == []
+
+    assert journal.undo().failed == []
+    assert len({os.stat(p).st_ino for p in copies}) == 3
+    assert all(p.read_bytes() == b"x" * 5000 for p in copies)
+
+
+def test_hardlink_dedupe_dry_run_and_mismatch(tmp_path):
+    same, copy, other = tmp_path / "a.bin", tmp_path / "a-copy.bin", tmp_path / "b.bin"
+    same.write_bytes(b"a" * 100)
+    copy.write_bytes(b"a" * 100)
+    other.write_bytes(b"b" * 100)
+    group = _duplicate_group([same, other], 100)
+
+    # The dry run compares content too: only verified duplicates are reported
+    dry = HardlinkDedupeStrategy(dry_run=True).run([group])
+    assert dry.linked == 0 and dry.reclaimed_bytes == 0 and dry.skipped == 1
+    dry = HardlinkDedupeStrategy(dry_run=True).run([_duplicate_group([same, copy], 100)])
+    assert dry.linked == 1 and dry.reclaimed_bytes == 100
+    assert len({os.stat(p).st_ino for p in (same, copy, other)}) == 3
+
+    # Content is compared again before linking, so a stale group is not collapsed
+    result = HardlinkDedupeStrategy().execute(group)
+    assert result.linked == [] and result.skipped[0][0] == str(other)
+    assert other.read_bytes() == b"b" * 100
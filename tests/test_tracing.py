@@ -0,0 +1,68 @@
+"""Test suite for hierarchical tracing spans."""
+
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from utils.tracing import Tracer
+
+
+def test_nested_spans_record_depth_and_attributes():
+    """Child spans are nested inside their parent and keep attributes."""
+    tracer = Tracer()
+    with tracer.span("scan", path="/tmp") as outer:
+        with tracer.span("scan.walk") as inner:
+            inner.add("items", 3)
+            inner.add("items")
+        outer.set("bytes", 42)
+
+    spans = {s.name: s for s in tracer.spans}
+    assert spans["scan.walk"].depth == 1
+    assert spans["scan"].depth == 0
+    assert spans["scan.walk"].attrs["items"] == 4
+    assert spans["scan"].attrs == {"path": "/tmp", "bytes": 42}
+    assert spans["scan"].start_ns <= spans["scan.walk"].start_ns
+    assert spans["scan.walk"].end_ns <= spans["scan"].end_ns
+
+
+def test_unsampled_root_skips_children():
+    """Sampling is decided per trace, not per span."""
+    tracer = Tracer(sample_rate=0.0)
+    with tracer.span("root"):
+        with tracer.span("child") as child:
+            child.set("ignored", True)
+    assert len(tracer.spans) == 0
+
+
+def test_errors_are_recorded_on_span():
+    """Exceptions propagate and are noted on the span."""
+    tracer = Tracer()
+    with pytest.raises(ValueError):
+        with tracer.span("delete"):
+            raise ValueError("boom")
+    assert "ValueError: boom" in tracer.spans[0].attrs["error"]
+
+
+def test_chrome_trace_export(tmp_path):
+    """Export produces complete events per span, per thread."""
+    tracer = Tracer()
+
+    def work():
+        with tracer.span("safety.check", item_count=1):
+            pass
+
+    with tracer.span("cleanup"):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+
+    path = tracer.export_chrome_trace(str(tmp_path / "trace.json"))
+    data = json.loads(Path(path).read_text())
+    events = data["traceEvents"]
+
+    assert {e["name"] for e in events} == {"cleanup", "safety.check"}
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+    assert len({e["tid"] for e in events}) == 2
+    assert next(e for e in events if e["name"] == "safety.check")["args"] == {"item_count": 1}
@@ -0,0 +1,155 @@
+"""Test suite for the live index and watch daemon."""
+
+import errno
+import os
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from core.chat_interface import CleanupAssistant
+from core.live_index import LiveIndex
+from core.watcher import WatchClient, WatchDaemon, WatchServer
+from utils import inotify
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """A small tree with empty and non-empty items."""
+    root = tmp_path / "root"
+    (root / "docs").mkdir(parents=True)
+    (root / "docs" / "big.bin").write_bytes(b"x" * 5000)
+    (root / "docs" / "empty.txt").touch()
+    (root / "empty_dir").mkdir()
+    (root / "node_modules" / "pkg").mkdir(parents=True)
+    (root / "small.txt").write_text("hi")
+    return root
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+def test_live_index_propagates_totals(tmp_path):
+    """Size and count deltas reach every ancestor; removals undo them."""
+    root = str(tmp_path)
+    index = LiveIndex([root])
+    a = os.path.join(root, "a")
+    b = os.path.join(a, "b")
+    index.apply_listing(root, [("a", True, 0)])
+    index.apply_listing(a, [("b", True, 0), ("f", False, 10)])
+    index.apply_listing(b, [("g", False, 0)])
+
+    assert index.summary(root)["bytes"] == 10
+    assert index.summary(root)["files"] == 2
+    assert index.summary(root)["dirs"] == 2
+    assert index.empty_files() == [os.path.join(b, "g")]
+    assert index.empty_dirs() == []
+
+    index.set_file(os.path.join(b, "g"), 90)
+    assert index.summary(a)["bytes"] == 100
+    assert index.empty_files() == []
+
+    index.remove(b)
+    assert index.summary(root)["bytes"] == 10
+    assert index.summary(root)["dirs"] == 1
+    assert index.biggest(root)[0]["path"] == a
+
+
+def test_daemon_initial_index(tree):
+    """The initial parallel scan fills the index and skips SKIP_DIRS."""
+    daemon = WatchDaemon([tree])
+    index = daemon.build()
+    try:
+        assert index.empty_files() == [str(tree / "docs" / "empty.txt")]
+        assert index.empty_dirs() == [str(tree / "empty_dir")]
+        assert index.biggest(str(tree))[0]["path"] == str(tree / "docs")
+        assert not index.covers(tree / "node_modules")
+    finally:
+        daemon.stop()
+
+
+@pytest.mark.skipif(not inotify.is_supported(), reason="inotify is Linux-only")
+def test_inotify_updates_index(tree):
+    """Creations, growth and deletions show up without rescanning."""
+    daemon = WatchDaemon([tree]).start()
+    index = daemon.index
+    try:
+        new_dir = tree / "new" / "deeper"
+        new_dir.mkdir(parents=True)
+        assert _wait_for(lambda: str(new_dir) in index.empty_dirs())
+
+        (new_dir / "data.bin").write_bytes(b"y" * 1234)
+        assert _wait_for(lambda: index.summary(str(tree / "new")).get("bytes") == 1234)
+        assert str(new_dir) not in index.empty_dirs()
+
+        (tree / "docs" / "empty.txt").write_text("now has content")
+        assert _wait_for(lambda: index.empty_files() == [])
+
+        (tree / "docs" / "big.bin").unlink()
+        assert _wait_for(lambda: index.summary(str(tree / "docs")).get("bytes") == 15)
+    finally:
+        daemon.stop()
+
+
+def test_watch_limit_falls_back_to_polling(tree):
+    """ENOSPC from inotify switches the remaining directories to mtime polling."""
+    calls = {"n": 0}
+
+    def add_watch(self, path, mask=inotify.WATCH_MASK):
+        calls["n"] += 1
+        if calls["n"] > 1:
+            raise OSError(errno.ENOSPC, "No space left on device", path)
+        return calls["n"]
+
+    with patch.object(inotify.Inotify, "add_watch", add_watch) if inotify.is_supported() else \
+            patch.object(inotify, "is_supported", return_value=False):
+        daemon = WatchDaemon([tree], poll_interval=0.05)
+        daemon.build()
+    try:
+        assert len(daemon.polled) >= 2
+        # Created within the same mtime tick: the directory's mtime does not change
+        before = os.stat(tree / "empty_dir")
+        (tree / "empty_dir" / "late.txt").touch()
+        os.utime(tree / "empty_dir", ns=(before.st_atime_ns, before.st_mtime_ns))
+        daemon.poll()
+        assert str(tree / "empty_dir" / "late.txt") in daemon.index.empty_files()
+        assert str(tree / "empty_dir") not in daemon.index.empty_dirs()
+        # Only mtimes old enough to have settled are trusted
+        assert daemon._settled(10**18) == 10**18 and daemon._settled(time.time_ns()) == 0
+    finally:
+        daemon.stop()
+
+
+def test_socket_client_and_repl_use_live_state(tree, tmp_path):
+    """Queries over the socket answer from the index, with no filesystem walk."""
+    daemon = WatchDaemon([tree])
+    daemon.build()
+    socket_path = str(tmp_path / "watch.sock")
+    server = WatchServer(daemon.index, socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = WatchClient(socket_path)
+    try:
+        assert client.covers(tree)
+        assert client.empty_dirs(str(tree)) == [str(tree / "empty_dir")]
+        assert client.summary(str(tree))["files"] == 3
+
+        assistant = CleanupAssistant()
+        assistant.current_path = tree
+        assistant.live_index = client
+        with patch.object(Path, "rglob", side_effect=AssertionError("walked the tree")):
+            assert "empty.txt" in assistant.handle_command("show me empty files")
+            assert "docs/" in assistant.handle_command("what's big here")
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+        daemon.stop()
@@ -4,16 +4,16 @@ import os
 import logging
 from pathlib import Path
 from typing import Tuple, Optional, List
-from dotenv import load_dotenv
-import openai
-
-# Load environment variables
-load_dotenv()
 
 class AINavigator:
     """Interactive AI assistant for directory navigation and cleanup."""
     
     def __init__(self):
+        # Deferred so that importing this module stays cheap for non-AI code paths
+        import openai
+        from dotenv import load_dotenv
+        
+        load_dotenv()
         self.current_dir = Path.cwd()
         self.openai = openai
         self.openai.api_key = os.getenv('OPENAI_API_KEY')
@@ -3,26 +3,27 @@
 import logging
 from pathlib import Path
 from typing import Tuple, Optional
-import openai
-from dotenv import load_dotenv
 import os
 
-# Load environment variables
-load_dotenv()
-
 class AISafetyCheck:
     """AI-powered safety validation for directory operations."""
     
     def __init__(self):
+        # Deferred so that importing this module stays cheap for non-AI code paths
+        import openai
+        from dotenv import load_dotenv
+        
+        load_dotenv()
         self.api_key = os.getenv('OPENAI_API_KEY')
         if not self.api_key:
             raise ValueError("OpenAI API key not found in environment")
-        openai.api_key = self.api_key
+        self.openai = openai
+        self.openai.api_key = self.api_key
     
     async def get_directory_recommendation(self) -> Tuple[str, bool]:
         """Get AI recommendation for directory cleanup."""
         try:
-            response = await openai.ChatCompletion.acreate(
+            response = await self.openai.ChatCompletion.acreate(
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": "You are a safety validator for directory cleanup operations."},
@@ -37,7 +38,7 @@ class AISafetyCheck:
     async def validate_empty_directory(self, dir_path: Path) -> bool:
         """Validate if directory is safe to process."""
         try:
-            response = await openai.ChatCompletion.acreate(
+            response = await self.openai.ChatCompletion.acreate(
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": "You are a safety validator for directory cleanup operations."},
@@ -52,7 +53,7 @@ class AISafetyCheck:
     async def get_final_confirmation(self, dir_path: Path) -> bool:
         """Get final confirmation before deletion."""
         try:
-            response = await openai.ChatCompletion.acreate(
+            response = await self.openai.ChatCompletion.acreate(
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": "You are a safety validator for critical delete operations."},
@@ -0,0 +1,178 @@
+"""Runs shell commands for the REPL's '!' escape.
+
+Output is read in chunks as the command produces it and handed to a
+callback, so '!find /' shows results immediately instead of after it
+exits; only the first output_limit bytes are also kept for the return
+value. By default commands run in one long-lived /bin/sh, which saves a
+shell start per command and keeps variables and functions between them.
+Commands run in their own process group so they can be cancelled
+(Ctrl-C in the REPL, or cancel() from another thread) without killing
+the assistant.
+"""
+
+import codecs
+import logging
+import os
+import shlex
+import signal
+import subprocess
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+OUTPUT_LIMIT = 1024 * 1024
+READ_CHUNK = 64 * 1024
+
+
+@dataclass
+class CommandResult:
+    """Exit status (None if cancelled) and the captured start of the output."""
+
+    returncode: Optional[int]
+    output: str
+    truncated_bytes: int = 0
+    cancelled: bool = False
+
+
+class _Capture:
+    """Decodes streamed bytes, forwards them and keeps at most limit bytes."""
+
+    def __init__(self, limit: int, on_output: Optional[Callable[[str], None]]):
+        self.limit = limit
+        self.on_output = on_output
+        self.kept = bytearray()
+        self.truncated_bytes = 0
+        self._decoder = codecs.getincrementaldecoder('utf-8')('replace')
+
+    def feed(self, data: bytes) -> None:
+        room = self.limit - len(self.kept)
+        self.kept += data[:max(0, room)]
+        self.truncated_bytes += max(0, len(data) - max(0, room))
+        if self.on_output is not None:
+            text = self._decoder.decode(data)
+            if text:
+                self.on_output(text)
+
+    def result(self, returncode: Optional[int], cancelled: bool = False) -> CommandResult:
+        return CommandResult(returncode, self.kept.decode('utf-8', 'replace'),
+                             self.truncated_bytes, cancelled)
+
+
+class CommandRunner:
+    """Streaming, cancellable command execution, optionally in a persistent shell."""
+
+    def __init__(self, persistent: bool = True, output_limit: int = OUTPUT_LIMIT, shell: str = '/bin/sh'):
+        # Process groups and a POSIX shell are needed for the persistent session
+        self.persistent = persistent and os.name == 'posix'
+        self.output_limit = output_limit
+        self.shell = shell
+        self.logger = logging.getLogger(__name__)
+        self._session: Optional[subprocess.Popen] = None
+        self._running: Optional[subprocess.Popen] = None
+        self._cancelled = threading.Event()
+
+    def run(self, command: str, cwd, on_output: Optional[Callable[[str], None]] = None) -> CommandResult:
+        """Run command in cwd, streaming output to on_output as it arrives."""
+        capture = _Capture(self.output_limit, on_output)
+        self._cancelled.clear()
+        try:
+            if self.persistent:
+                returncode = self._run_in_session(command, str(cwd), capture)
+            else:
+                returncode = self._run_once(command, str(cwd), capture)
+        except KeyboardInterrupt:
+            self.cancel()
+            return capture.result(None, cancelled=True)
+        finally:
+            self._running = None
+        if self._cancelled.is_set():
+            return capture.result(None, cancelled=True)
+        return capture.result(returncode)
+
+    def cancel(self) -> None:
+        """Kill the running command (and the session it runs in, whose state is lost)."""
+        self._cancelled.set()
+        process = self._running
+        if process is None or process.poll() is not None:
+            return
+        try:
+            if os.name == 'posix':
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+            process.wait()
+        except OSError as e:
+            self.logger.debug(f"Could not kill command: {e}")
+        if process is self._session:
+            self._session = None
+
+    def close(self) -> None:
+        """End the persistent session, if one is running."""
+        session, self._session = self._session, None
+        if session is not None and session.poll() is None:
+            session.stdin.close()
+            session.wait()
+
+    def _run_once(self, command: str, cwd: str, capture: _Capture) -> int:
+        process = subprocess.Popen(command, shell=True, cwd=cwd, stdin=subprocess.DEVNULL,
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   start_new_session=os.name == 'posix')
+        self._running = process
+        with process.stdout:
+            while True:
+                data = os.read(process.stdout.fileno(), READ_CHUNK)
+                if not data:
+                    break
+                capture.feed(data)
+        return process.wait()
+
+    def _start_session(self) -> subprocess.Popen:
+        if self._session is None or self._session.poll() is not None:
+            self._session = subprocess.Popen([self.shell], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                             stderr=subprocess.STDOUT, start_new_session=True)
+        return self._session
+
+    def _run_in_session(self, command: str, cwd: str, capture: _Capture) -> int:
+        """Feed command to the session shell and read until its end marker.
+
+        eval keeps a syntax error in command from swallowing the marker line,
+        and stdin is /dev/null so the command cannot read the session's input.
+        The marker is printed after a newline, which is removed again.
+        """
+        session = self._start_session()
+        marker = f"__ai_clean_cpu_done_{os.urandom(8).hex()}__".encode()
+        script = (f"cd {shlex.quote(cwd)} && eval {shlex.quote(command)} </dev/null; "
+                  f"printf '\\n%s %d\\n' {marker.decode()} \"$?\"\n")
+        self._running = session
+        try:
+            session.stdin.write(script.encode('utf-8', 'surrogateescape'))
+            session.stdin.flush()
+            end = b"\n" + marker + b" "
+            pending = bytearray()
+            fd = session.stdout.fileno()
+            while True:
+                data = os.read(fd, READ_CHUNK)
+                if not data:
+                    # The command ended the shell (exit, exec) or it was killed
+                    capture.feed(bytes(pending))
+                    self._session = None
+                    return session.wait()
+                pending += data
+                found = pending.find(end)
+                if found != -1:
+                    while not pending.endswith(b"\n"):
+                        data = os.read(fd, READ_CHUNK)
+                        if not data:
+                            break
+                        pending += data
+                    capture.feed(bytes(pending[:found]))
+                    return int(pending[found + len(end):].strip() or 0)
+                # Hold back only a tail that could be the start of a split marker
+                tail = pending.rfind(b"\n", max(0, len(pending) - len(end) + 1))
+                safe = tail if tail != -1 and end.startswith(pending[tail:]) else len(pending)
+                if safe:
+                    capture.feed(bytes(pending[:safe]))
+                    del pending[:safe]
+        except (BrokenPipeError, ValueError):
+            self._session = None
+            return session.wait()
@@ -9,20 +9,31 @@ from functools import wraps
 import time
 import traceback
 
+from utils.tracing import tracer
+
 class EnhancedLogger:
     """Enhanced logging with structured output and performance tracking."""
     
+    CATEGORIES = ("ai_interactions", "operations", "errors", "performance")
+    
     def __init__(self, log_dir: str = "logs"):
         self.base_dir = Path(log_dir)
-        self.setup_log_directories()
         self.session_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+        # Directories are created on first write, not at import of the global instance
+        self._created = set()
         
     def setup_log_directories(self) -> None:
         """Create structured log directories."""
-        (self.base_dir / "ai_interactions").mkdir(parents=True, exist_ok=True)
-        (self.base_dir / "operations").mkdir(parents=True, exist_ok=True)
-        (self.base_dir / "errors").mkdir(parents=True, exist_ok=True)
-        (self.base_dir / "performance").mkdir(parents=True, exist_ok=True)
+        for category in self.CATEGORIES:
+            self._log_file(category, "")
+    
+    def _log_file(self, category: str, name: str) -> Path:
+        """Path of a log file in category, creating the directory on first use."""
+        directory = self.base_dir / category
+        if category not in self._created:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._created.add(category)
+        return directory / name
     
     def log_ai_interaction(self, interaction_type: str, prompt: str, response: str, 
                           metadata: Optional[Dict] = None) -> None:
@@ -36,7 +47,7 @@ class EnhancedLogger:
             'session_id': self.session_id
         }
         
-        file_path = self.base_dir / "ai_interactions" / f"ai_log_{self.session_id}.jsonl"
+        file_path = self._log_file("ai_interactions", f"ai_log_{self.session_id}.jsonl")
         with file_path.open('a') as f:
             f.write(json.dumps(log_entry) + '\n')
     
@@ -51,7 +62,7 @@ class EnhancedLogger:
             'session_id': self.session_id
         }
         
-        file_path = self.base_dir / "operations" / f"op_log_{self.session_id}.jsonl"
+        file_path = self._log_file("operations", f"op_log_{self.session_id}.jsonl")
         with file_path.open('a') as f:
             f.write(json.dumps(log_entry) + '\n')
     
@@ -66,55 +77,58 @@ class EnhancedLogger:
             'session_id': self.session_id
         }
         
-        file_path = self.base_dir / "errors" / f"error_log_{self.session_id}.jsonl"
+        file_path = self._log_file("errors", f"error_log_{self.session_id}.jsonl")
         with file_path.open('a') as f:
             f.write(json.dumps(log_entry) + '\n')
     
     def performance_decorator(self, operation_name: str):
-        """Decorator to track operation performance."""
+        """Decorator to track operation performance.
+
+        Each call is also recorded as a tracing span, so decorated operations
+        nest under whatever span is open when they are called.
+        """
         def decorator(func):
             @wraps(func)
             def wrapper(*args, **kwargs):
-                start_time = time.time()
-                try:
-                    result = func(*args, **kwargs)
-                    duration = time.time() - start_time
-                    
-                    # Log performance metrics
-                    metrics = {
-                        'operation': operation_name,
-                        'duration': duration,
-                        'success': True,
-                        'timestamp': datetime.now().isoformat(),
-                        'session_id': self.session_id
-                    }
-                    
-                    file_path = self.base_dir / "performance" / f"perf_log_{self.session_id}.jsonl"
-                    with file_path.open('a') as f:
-                        f.write(json.dumps(metrics) + '\n')
-                    
+                with tracer.span(operation_name) as span:
+                    start_ns = time.perf_counter_ns()
+                    try:
+                        result = func(*args, **kwargs)
+                    except Exception as e:
+                        self._log_performance(operation_name, time.perf_counter_ns() - start_ns,
+                                              success=False, error=str(e))
+                        raise
+                    duration_ns = time.perf_counter_ns() - start_ns
+                    span.set('success', True)
+                    self._log_performance(operation_name, duration_ns, success=True)
                     return result
                     
-                except Exception as e:
-                    duration = time.time() - start_time
-                    # Log failure metrics
-                    metrics = {
-                        'operation': operation_name,
-                        'duration': duration,
-                        'success': False,
-                        'error': str(e),
-                        'timestamp': datetime.now().isoformat(),
-                        'session_id': self.session_id
-                    }
-                    
-                    file_path = self.base_dir / "performance" / f"perf_log_{self.session_id}.jsonl"
-                    with file_path.open('a') as f:
-                        f.write(json.dumps(metrics) + '\n')
-                    
-                    raise
-                    
             return wrapper
         return decorator
+    
+    def _log_performance(self, operation_name: str, duration_ns: int, success: bool,
+                         error: Optional[str] = None) -> None:
+        """Append a performance metric entry."""
+        metrics = {
+            'operation': operation_name,
+            'duration': duration_ns / 1e9,
+            'duration_ns': duration_ns,
+            'success': success,
+            'timestamp': datetime.now().isoformat(),
+            'session_id': self.session_id
+        }
+        if error is not None:
+            metrics['error'] = error
+        
+        file_path = self._log_file("performance", f"perf_log_{self.session_id}.jsonl")
+        with file_path.open('a') as f:
+            f.write(json.dumps(metrics) + '\n')
+    
+    def export_trace(self, file_path: Optional[str] = None) -> Path:
+        """Export recorded tracing spans as Chrome trace-event JSON."""
+        if file_path is None:
+            file_path = self._log_file("performance", f"trace_{self.session_id}.json")
+        return tracer.export_chrome_trace(str(file_path))
 
 # Create global logger instance
 enhanced_logger = EnhancedLogger()
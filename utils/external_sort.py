@@ -0,0 +1,182 @@
+"""Sorted collections of paths that spill to disk beyond a memory budget.
+
+A scan that finds tens of millions of candidates cannot keep them all in
+a Python list. SortedSpillStore buffers added strings until their size
+reaches the memory budget, then sorts the buffer and writes it to a
+temporary file as a sorted run. Iterating k-way merges the runs (and
+whatever is still buffered) with heapq.merge, reading each run in
+fixed-size blocks, so memory stays bounded by the budget plus one block
+per run. When more than MAX_RUNS runs exist they are merged into one, so
+open files stay bounded too.
+
+Runs store items NUL-terminated (a NUL cannot occur in a path) and are
+removed on close() or when the store is garbage collected. While nothing
+has spilled and the decoded items fit in the budget too, they are kept
+after the first iteration, so consumers that walk the results several
+times decode them only once; callers that already hold the decoded
+object can hand it to add() so it is not decoded at all.
+"""
+
+import heapq
+import os
+import sys
+import weakref
+from operator import itemgetter
+from typing import Callable, Generic, Iterator, List, Optional, TypeVar
+
+from core.constants import SPILL_MEMORY_BUDGET
+
+T = TypeVar('T')
+
+# Runs merged at once; beyond this they are first merged into a single run
+MAX_RUNS = 64
+READ_BLOCK = 256 * 1024
+# List slot per buffered item, on top of the string itself
+_SLOT_BYTES = 8
+# Rough size of a decoded item (e.g. a Path) relative to its string
+DECODED_WEIGHT = 4
+
+
+def _encode(item: str) -> bytes:
+    return item.encode('utf-8', 'surrogateescape') + b'\0'
+
+
+def _read_run(path: str) -> Iterator[str]:
+    with open(path, 'rb') as f:
+        tail = b''
+        while True:
+            block = f.read(READ_BLOCK)
+            if not block:
+                break
+            parts = (tail + block).split(b'\0')
+            tail = parts.pop()
+            for part in parts:
+                yield part.decode('utf-8', 'surrogateescape')
+
+
+def _remove(paths: List[str]) -> None:
+    for path in paths:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    paths.clear()
+
+
+class SortedSpillStore(Generic[T]):
+    """Collects strings and yields them sorted, holding at most memory_budget bytes in RAM.
+
+    Iteration yields decode(item) (str by default; Path for path lists)
+    and can be repeated. len() and truth testing work like a list's.
+    """
+
+    def __init__(self, memory_budget: int = SPILL_MEMORY_BUDGET, reverse: bool = False,
+                 decode: Callable[[str], T] = str, tmp_dir: Optional[str] = None):
+        self.memory_budget = max(1, memory_budget)
+        self.reverse = reverse
+        self.decode = decode
+        self.tmp_dir = tmp_dir
+        self._buffer: List[str] = []
+        self._buffered_bytes = 0
+        self._count = 0
+        self._runs: List[str] = []
+        # Decoded objects given to add(), aligned with _buffer; dropped once they no longer fit
+        self._originals: Optional[List[T]] = []
+        # Sorted, decoded buffer; only kept while nothing has spilled
+        self._decoded: Optional[List[T]] = None
+        self._finalizer = weakref.finalize(self, _remove, self._runs)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    @property
+    def spilled_runs(self) -> int:
+        return len(self._runs)
+
+    def add(self, item: str, decoded: Optional[T] = None) -> None:
+        """Add item; decoded, if given, must equal decode(item)."""
+        self._decoded = None
+        self._buffer.append(item)
+        self._count += 1
+        self._buffered_bytes += sys.getsizeof(item) + _SLOT_BYTES
+        if self._originals is not None:
+            if decoded is None or self._buffered_bytes * DECODED_WEIGHT > self.memory_budget:
+                self._originals = None
+            else:
+                self._originals.append(decoded)
+        if self._buffered_bytes >= self.memory_budget:
+            self._spill()
+
+    def extend(self, items) -> None:
+        for item in items:
+            self.add(item)
+
+    def _write_run(self, items) -> str:
+        import tempfile
+
+        fd, path = tempfile.mkstemp(prefix="ai-clean-cpu-run-", suffix=".bin", dir=self.tmp_dir)
+        self._runs.append(path)
+        with os.fdopen(fd, 'wb', buffering=READ_BLOCK) as f:
+            for item in items:
+                f.write(_encode(item))
+        return path
+
+    def _spill(self) -> None:
+        if not self._buffer:
+            return
+        self._buffer.sort(reverse=self.reverse)
+        self._write_run(self._buffer)
+        self._buffer = []
+        self._originals = None
+        self._buffered_bytes = 0
+        if len(self._runs) > MAX_RUNS:
+            runs = list(self._runs)
+            merged = heapq.merge(*(_read_run(run) for run in runs), reverse=self.reverse)
+            self._write_run(merged)
+            for run in runs:
+                self._runs.remove(run)
+            _remove(runs)
+
+    def __iter__(self) -> Iterator[T]:
+        if self._decoded is not None:
+            return iter(self._decoded)
+        if self._runs:
+            return self._merged()
+        if self._originals is not None:
+            pairs = sorted(zip(self._buffer, self._originals), key=itemgetter(0), reverse=self.reverse)
+            self._buffer = [item for item, _ in pairs]
+            self._originals = [decoded for _, decoded in pairs]
+            self._decoded = list(self._originals)
+            return iter(self._decoded)
+        self._buffer.sort(reverse=self.reverse)
+        # Decoded objects outweigh the strings several times over; cache only while that fits
+        if self._buffered_bytes * DECODED_WEIGHT <= self.memory_budget:
+            self._decoded = list(map(self.decode, self._buffer))
+            return iter(self._decoded)
+        return map(self.decode, list(self._buffer))
+
+    def _merged(self) -> Iterator[T]:
+        self._buffer.sort(reverse=self.reverse)
+        # A copy, so adding while iterating cannot reorder what is being merged
+        sources = [_read_run(run) for run in self._runs] + [iter(list(self._buffer))]
+        decode = self.decode
+        for item in heapq.merge(*sources, reverse=self.reverse):
+            yield decode(item)
+
+    def close(self) -> None:
+        """Delete the spilled runs and forget every item."""
+        _remove(self._runs)
+        self._buffer = []
+        self._originals = []
+        self._decoded = None
+        self._buffered_bytes = 0
+        self._count = 0
+
+    def __enter__(self) -> 'SortedSpillStore[T]':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
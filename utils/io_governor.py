@@ -0,0 +1,308 @@
+"""Pacing for scans, deletes and moves on hosts that also serve traffic.
+
+Every filesystem operation of a bulk job passes through one shared
+IOGovernor, which enforces an ops/sec and a bytes/sec budget with token
+buckets. With adaptation on, the budgets follow how busy the machine is:
+I/O pressure from /proc/pressure/io (or the load average where PSI is
+unavailable), corroborated by the latency of the governed operations.
+When the host is busy the allowed rate is halved every adjustment
+interval, down to min_fraction of the budget; when it is idle it grows
+back, and with no configured budget the job returns to full speed.
+
+Latency is measured per unit of work (per directory entry for scans) and
+compared with a baseline that drifts towards the recent norm, so a long
+run of cold-cache reads is not mistaken for contention. Slow operations
+alone never throttle an idle host: they only count while PSI or the load
+average shows some pressure too.
+Optionally, worker threads also drop to the idle I/O scheduling class.
+
+The budgets can be set with CLEANUP_MAX_IOPS, CLEANUP_MAX_BANDWIDTH
+(bytes/sec), CLEANUP_IO_ADAPTIVE=0 and CLEANUP_IO_IDLE=1, or through
+configure_governor().
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# Adjust budgets at most this often (seconds)
+ADJUST_INTERVAL = 1.0
+# Share of time some task stalled on I/O (PSI avg10, percent) above which the host is busy,
+# and below which it is idle; for the load average, the equivalent load per CPU
+PRESSURE_BUSY, PRESSURE_IDLE = 20.0, 5.0
+LOAD_BUSY, LOAD_IDLE = 1.0, 0.7
+# Governed ops slower than this many times their usual latency (and than LATENCY_FLOOR) mean contention
+LATENCY_FACTOR = 4.0
+LATENCY_FLOOR = 0.005
+# Share of each sample by which the baseline drifts up towards slower latencies
+BASELINE_DRIFT = 0.002
+
+_IOPRIO_SET = {'x86_64': 251, 'amd64': 251, 'aarch64': 30, 'arm64': 30, 'i386': 289, 'i686': 289,
+               'armv7l': 314, 'ppc64le': 273, 's390x': 282, 'riscv64': 30}
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+
+
+class TokenBucket:
+    """Thread-safe token bucket; rate None means unlimited.
+
+    A request larger than the available tokens is granted and paid for by
+    sleeping until the debt is refilled, so single large requests (a
+    whole file's bytes) are paced correctly without splitting them.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._updated = clock()
+        self.rate: Optional[float] = None
+        self.tokens = 0.0
+        self.set_rate(rate)
+
+    @property
+    def capacity(self) -> float:
+        return self.burst or max(self.rate or 0.0, 1.0)
+
+    def _refill(self, now: float) -> None:
+        if self.rate is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate: Optional[float]) -> None:
+        with self._lock:
+            self._refill(self.clock())
+            was_unlimited = self.rate is None
+            self.rate = rate if rate and rate > 0 else None
+            # A newly limited bucket starts full
+            self.tokens = self.capacity if was_unlimited else min(self.tokens, self.capacity)
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Take amount tokens, sleeping off any shortfall; returns the seconds slept."""
+        if self.rate is None:
+            return 0.0
+        with self._lock:
+            self._refill(self.clock())
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            self.sleep(wait)
+        return wait
+
+
+class LoadMonitor:
+    """How busy the host is, as a fraction of the 'busy' threshold (1.0 = busy)."""
+
+    def __init__(self, pressure_path: str = '/proc/pressure/io'):
+        self.pressure_path = pressure_path
+        self.has_pressure = os.path.exists(pressure_path)
+
+    def _pressure(self) -> Optional[float]:
+        try:
+            with open(self.pressure_path) as f:
+                for line in f:
+                    if line.startswith('some'):
+                        fields = dict(part.split('=') for part in line.split()[1:])
+                        return float(fields['avg10'])
+        except (OSError, ValueError, KeyError):
+            self.has_pressure = False
+        return None
+
+    def busy_level(self) -> Optional[float]:
+        """0 when idle, 1 at the busy threshold; None if nothing can be measured."""
+        if self.has_pressure:
+            pressure = self._pressure()
+            if pressure is not None:
+                return pressure / PRESSURE_BUSY
+        try:
+            load = os.getloadavg()[0] / (os.cpu_count() or 1)
+        except (OSError, AttributeError):
+            return None
+        return load / LOAD_BUSY
+
+    @staticmethod
+    def idle_level() -> float:
+        """busy_level() at or below which the host counts as idle."""
+        return min(PRESSURE_IDLE / PRESSURE_BUSY, LOAD_IDLE / LOAD_BUSY)
+
+
+def lower_io_priority() -> bool:
+    """Put the calling thread in the idle I/O scheduling class (Linux); False if unsupported."""
+    import ctypes
+    import ctypes.util
+    import platform
+
+    if platform.system() != 'Linux':
+        return False
+    number = _IOPRIO_SET.get(platform.machine().lower())
+    libc_name = ctypes.util.find_library('c')
+    if number is None or libc_name is None:
+        return False
+    libc = ctypes.CDLL(libc_name, use_errno=True)
+    # who=0 with IOPRIO_WHO_PROCESS means the calling thread
+    return libc.syscall(number, 1, 0, IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT) == 0
+
+
+class IOGovernor:
+    """Shared ops/sec and bytes/sec budgets that back off while the host is busy."""
+
+    def __init__(self, ops_per_sec: Optional[float] = None, bytes_per_sec: Optional[float] = None,
+                 adaptive: bool = True, idle_priority: bool = False, min_fraction: float = 0.05,
+                 monitor: Optional[LoadMonitor] = None, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.ops_per_sec = ops_per_sec
+        self.bytes_per_sec = bytes_per_sec
+        self.adaptive = adaptive
+        self.idle_priority = idle_priority
+        self.min_fraction = min_fraction
+        self.monitor = monitor or LoadMonitor()
+        self.clock = clock
+        self.logger = logging.getLogger(__name__)
+        self.ops = TokenBucket(ops_per_sec, clock=clock, sleep=sleep)
+        self.bytes = TokenBucket(bytes_per_sec, clock=clock, sleep=sleep)
+        self.fraction = 1.0
+        self.total_ops = 0
+        self.total_bytes = 0
+        self.throttled_seconds = 0.0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._adjust_lock = threading.Lock()
+        self._window_start = clock()
+        self._window_ops = self._window_bytes = 0
+        self._peak_ops = self._peak_bytes = 0.0
+        # Exponentially weighted latency per unit of work, and the uncontended latency: it follows
+        # drops at once and rises slowly, so it tracks the recent norm rather than the all-time best
+        self._latency: Optional[float] = None
+        self._baseline: Optional[float] = None
+
+    @property
+    def unlimited(self) -> bool:
+        return self.ops.rate is None and self.bytes.rate is None and not self.adaptive
+
+    def throttle(self, ops: int = 1, nbytes: int = 0) -> float:
+        """Wait until ops operations moving nbytes bytes fit the budget; returns seconds waited."""
+        if self.idle_priority and not getattr(self._local, 'lowered', False):
+            self._local.lowered = True
+            if not lower_io_priority():
+                self.logger.debug("Idle I/O priority is not available here")
+        if self.unlimited:
+            return 0.0
+        with self._lock:
+            self.total_ops += ops
+            self.total_bytes += nbytes
+            self._window_ops += ops
+            self._window_bytes += nbytes
+        waited = self.ops.acquire(ops)
+        if nbytes:
+            waited += self.bytes.acquire(nbytes)
+        if waited:
+            with self._lock:
+                self.throttled_seconds += waited
+        if self.adaptive and self.clock() - self._window_start >= ADJUST_INTERVAL:
+            self._adjust()
+        return waited
+
+    def record_latency(self, seconds: float, units: int = 1) -> None:
+        """Feed the duration of one governed operation covering units of work (e.g. directory entries)."""
+        sample = seconds / max(1, units)
+        with self._lock:
+            self._latency = sample if self._latency is None else 0.9 * self._latency + 0.1 * sample
+            if self._baseline is None or self._latency < self._baseline:
+                self._baseline = self._latency
+            else:
+                self._baseline += (self._latency - self._baseline) * BASELINE_DRIFT
+
+    def timed(self, fn: Callable, *args, nbytes: int = 0):
+        """throttle(), then call fn(*args) and record how long it took."""
+        self.throttle(1, nbytes)
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.record_latency(time.perf_counter() - started)
+
+    def _contended(self) -> bool:
+        latency, baseline = self._latency, self._baseline
+        return (latency is not None and baseline is not None and latency > LATENCY_FLOOR
+                and latency > LATENCY_FACTOR * baseline)
+
+    def _adjust(self) -> None:
+        if not self._adjust_lock.acquire(blocking=False):
+            return
+        try:
+            now = self.clock()
+            with self._lock:
+                elapsed = now - self._window_start
+                if elapsed < ADJUST_INTERVAL:
+                    return
+                ops_rate, bytes_rate = self._window_ops / elapsed, self._window_bytes / elapsed
+                self._window_start, self._window_ops, self._window_bytes = now, 0, 0
+            # Unthrottled throughput is the budget when none was configured
+            if self.fraction >= 1.0:
+                self._peak_ops = max(self._peak_ops, ops_rate)
+                self._peak_bytes = max(self._peak_bytes, bytes_rate)
+            busy = self.monitor.busy_level()
+            previous = self.fraction
+            # Slow ops only mean contention when the host shows some pressure as well
+            pressured = busy is not None and busy > self.monitor.idle_level()
+            if (busy is not None and busy >= 1.0) or (pressured and self._contended()):
+                self.fraction = max(self.min_fraction, self.fraction / 2)
+            elif busy is None or busy <= self.monitor.idle_level():
+                self.fraction = min(1.0, self.fraction + 0.1)
+            if self.fraction != previous:
+                self._apply_fraction()
+                self.logger.debug(f"I/O budget at {self.fraction:.0%} (busy level {busy}, "
+                                  f"latency {self._latency})")
+        finally:
+            self._adjust_lock.release()
+
+    def _apply_fraction(self) -> None:
+        for bucket, configured, peak in ((self.ops, self.ops_per_sec, self._peak_ops),
+                                         (self.bytes, self.bytes_per_sec, self._peak_bytes)):
+            base = configured or peak
+            if self.fraction >= 1.0 or not base:
+                bucket.set_rate(configured)
+            else:
+                bucket.set_rate(base * self.fraction)
+
+    def stats(self) -> Dict:
+        return {'ops': self.total_ops, 'bytes': self.total_bytes,
+                'throttled_s': round(self.throttled_seconds, 3), 'budget_fraction': self.fraction,
+                'ops_rate_limit': self.ops.rate, 'bytes_rate_limit': self.bytes.rate}
+
+
+def _env_float(name: str) -> Optional[float]:
+    value = os.environ.get(name)
+    try:
+        return float(value) if value else None
+    except ValueError:
+        logging.getLogger(__name__).warning(f"Ignoring {name}={value!r}: not a number")
+        return None
+
+
+_default: Optional[IOGovernor] = None
+_default_lock = threading.Lock()
+
+
+def configure_governor(**kwargs) -> IOGovernor:
+    """Replace the process-wide governor (see IOGovernor for the options)."""
+    global _default
+    with _default_lock:
+        _default = IOGovernor(**kwargs)
+        return _default
+
+
+def get_governor() -> IOGovernor:
+    """Return the process-wide governor, configured from the environment on first use."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = IOGovernor(ops_per_sec=_env_float('CLEANUP_MAX_IOPS'),
+                                  bytes_per_sec=_env_float('CLEANUP_MAX_BANDWIDTH'),
+                                  adaptive=os.environ.get('CLEANUP_IO_ADAPTIVE', '1') != '0',
+                                  idle_priority=os.environ.get('CLEANUP_IO_IDLE') == '1')
+        return _default
@@ -0,0 +1,716 @@
+"""Append-only write-ahead journal for file operations, with undo and crash recovery."""
+
+import atexit
+import itertools
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.constants import DEFAULT_LOG_DIR
+
+DEFAULT_JOURNAL_PATH = DEFAULT_LOG_DIR / "journal" / "operations.jsonl"
+
+# json.dumps with non-default options builds a new encoder per call
+_encode = json.JSONEncoder(separators=(',', ':')).encode
+# Intents and outcomes are written once per op, so their lines are formatted by hand;
+# even a reused encoder costs several times more per record than quoting the strings
+_quote = json.encoder.encode_basestring_ascii
+
+# Op ids only need to be unique within a batch; a counter is far cheaper than uuid4
+_OP_PREFIX = os.urandom(2).hex()
+_op_counter = itertools.count()
+
+# Operations the journal knows how to reverse
+REVERSIBLE_OPS = {'move', 'delete_file', 'rmdir', 'trash', 'mkdir', 'archive', 'hardlink'}
+
+# Compact once the journal grows past this many bytes, keeping this many closed batches
+COMPACT_BYTES = 8 * 1024 * 1024
+KEEP_BATCHES = 200
+
+
+def _encode_meta(meta: Dict) -> str:
+    parts = []
+    for key, value in meta.items():
+        if type(key) is not str or type(value) is not int:
+            return _encode(meta)
+        parts.append(f'{_quote(key)}:{value}')
+    return '{' + ','.join(parts) + '}'
+
+
+def _intent_line(batch: str, op: 'JournalOp') -> str:
+    """The intent record for op, as _encode would write it; batch is already quoted."""
+    dst = 'null' if op.dst is None else _quote(op.dst)
+    return (f'{{"type":"intent","batch":{batch},"op_id":{_quote(op.op_id)},"op":{_quote(op.op)},'
+            f'"src":{_quote(op.src)},"dst":{dst},"meta":{_encode_meta(op.meta)}}}\n')
+
+
+def _outcome_line(batch: str, op: 'JournalOp', status: str, error: Optional[str]) -> str:
+    error = f',"error":{_quote(error)}' if error else ''
+    return f'{{"type":"outcome","batch":{batch},"op_id":{_quote(op.op_id)},"status":{_quote(status)}{error}}}\n'
+
+
+class JournalOp:
+    """An intended operation inside a batch."""
+
+    __slots__ = ('op_id', 'op', 'src', 'dst', 'meta')
+
+    def __init__(self, op: str, src: str, dst: Optional[str] = None, meta: Optional[Dict] = None,
+                 op_id: Optional[str] = None):
+        self.op_id = op_id or f"{_OP_PREFIX}{next(_op_counter):x}"
+        self.op = op
+        self.src = str(src)
+        self.dst = str(dst) if dst is not None else None
+        self.meta = meta or {}
+
+    def paths(self) -> List[str]:
+        return [p for p in (self.src, self.dst) if p]
+
+
+class JournalBatch:
+    """Handle for recording intents and outcomes within one open batch."""
+
+    def __init__(self, journal: 'OperationJournal', batch_id: str):
+        self.journal = journal
+        self.batch_id = batch_id
+
+    def intend(self, op: str, src, dst=None, meta: Optional[Dict] = None) -> JournalOp:
+        """Durably record one intent before performing it."""
+        return self.intend_many([JournalOp(op, src, dst, meta)])[0]
+
+    def intend_many(self, ops: List[JournalOp]) -> List[JournalOp]:
+        """Durably record several intents with one fsync."""
+        self.journal.add_intents(self.batch_id, ops)
+        return ops
+
+    def done(self, op: JournalOp) -> None:
+        self.journal.record_outcome(self.batch_id, op, 'done')
+
+    def failed(self, op: JournalOp, error) -> None:
+        self.journal.record_outcome(self.batch_id, op, 'failed', str(error))
+
+    def skipped(self, op: JournalOp, reason: str) -> None:
+        self.journal.record_outcome(self.batch_id, op, 'skipped', reason)
+
+    def record_many(self, outcomes: Iterable[Tuple[JournalOp, str, Optional[str]]]) -> None:
+        """Record buffered (op, status, error) outcomes together."""
+        self.journal.record_outcomes(self.batch_id, outcomes)
+
+
+class UndoResult:
+    """Outcome of undoing one batch."""
+
+    def __init__(self, batch_id: str):
+        self.batch_id = batch_id
+        self.restored: List[str] = []
+        self.failed: List[Tuple[str, str]] = []
+        self.skipped: List[Tuple[str, str]] = []
+
+
+class OperationJournal:
+    """JSON-lines journal recording intent and outcome of every operation.
+
+    Intents are made durable before the operation runs. Outcomes are
+    group-committed: concurrent callers waiting on durability share one
+    fsync, and a background flusher syncs buffered records every
+    `commit_interval` seconds or `commit_records` records, so journaling
+    does not throttle bulk operations.
+
+    Once the file grows past `compact_bytes`, it is compacted (see
+    compact()) so reading it back for undo and recovery stays cheap.
+    """
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH, commit_interval: float = 0.05,
+                 commit_records: int = 256, compact_bytes: int = COMPACT_BYTES,
+                 keep_batches: int = KEEP_BATCHES):
+        self.path = Path(path)
+        self.commit_interval = commit_interval
+        self.commit_records = commit_records
+        self.compact_bytes = compact_bytes
+        self.keep_batches = keep_batches
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._file = None
+        self._lock_fd: Optional[int] = None
+        self._size = 0
+        # Size past which the next compaction runs; raised when a compacted journal is still large
+        self._compact_at = compact_bytes
+        self._open_batches = 0
+        self._written = 0
+        self._synced = 0
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._flusher: Optional[threading.Thread] = None
+
+    # -- writing ----------------------------------------------------------
+
+    def _open(self):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._hold_lock()
+            self._file = self.path.open('a', encoding='utf-8')
+            self._size = self._file.tell()
+            self._flusher = threading.Thread(target=self._run_flusher, daemon=True, name="journal-flusher")
+            self._flusher.start()
+        return self._file
+
+    def _hold_lock(self) -> None:
+        """Hold a shared lock on the journal's lock file while this process uses the journal.
+
+        compact() needs it exclusively, so it never rewrites the file under
+        another process that is still appending to the old one.
+        """
+        if self._lock_fd is not None:
+            return
+        try:
+            import fcntl
+        except ImportError:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        self._lock_fd = fd
+
+    def _release_lock(self) -> None:
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _append(self, records: Iterable[Dict]) -> int:
+        """Buffer records and return the sequence number of the last one."""
+        # Encode outside the lock so concurrent writers only serialize on the write
+        return self._append_lines([_encode(record) + '\n' for record in records])
+
+    def _append_lines(self, lines: List[str]) -> int:
+        """Buffer already encoded records, one per line."""
+        data = ''.join(lines)
+        with self._lock:
+            f = self._open()
+            f.write(data)
+            self._size += len(data)
+            self._written += len(lines)
+            seq = self._written
+        if seq - self._synced >= self.commit_records:
+            self._wakeup.set()
+        return seq
+
+    def sync(self, seq: Optional[int] = None) -> None:
+        """Block until record `seq` (default: everything written) is on disk."""
+        target = self._written if seq is None else seq
+        if self._synced >= target:
+            return
+        with self._sync_lock:
+            # Another caller's fsync may already have covered us
+            if self._synced >= target:
+                return
+            with self._lock:
+                if self._file is None:
+                    return
+                self._file.flush()
+                upto = self._written
+                fd = self._file.fileno()
+            os.fsync(fd)
+            self._synced = upto
+
+    def _run_flusher(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.commit_interval)
+            self._wakeup.clear()
+            try:
+                self.sync()
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Journal flush failed: {e}")
+
+    def close(self) -> None:
+        """Flush everything and close the journal file."""
+        self.sync()
+        self._closed = True
+        self._wakeup.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._flusher = None
+                self._closed = False
+            self._release_lock()
+
+    # -- batches ----------------------------------------------------------
+
+    def begin_batch(self, description: str, ops: Iterable[JournalOp] = ()) -> str:
+        """Durably record the intent for every op of a batch with a single fsync."""
+        batch_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{os.urandom(3).hex()}"
+        lines = [_encode({'type': 'batch_begin', 'batch': batch_id, 'description': description,
+                          'ts': datetime.now().isoformat()}) + '\n']
+        quoted = _quote(batch_id)
+        lines.extend(_intent_line(quoted, op) for op in ops)
+        with self._lock:
+            self._open_batches += 1
+        self.sync(self._append_lines(lines))
+        return batch_id
+
+    def add_intents(self, batch_id: str, ops: Iterable[JournalOp]) -> None:
+        """Durably record more intents in an open batch with a single fsync."""
+        quoted = _quote(batch_id)
+        lines = [_intent_line(quoted, op) for op in ops]
+        if lines:
+            self.sync(self._append_lines(lines))
+
+    def record_outcome(self, batch_id: str, op: JournalOp, status: str, error: Optional[str] = None) -> None:
+        """Record an op's result; durability is left to group commit."""
+        self.record_outcomes(batch_id, [(op, status, error)])
+
+    def record_outcomes(self, batch_id: str, outcomes: Iterable[Tuple[JournalOp, str, Optional[str]]]) -> None:
+        """Record several (op, status, error) results in one append."""
+        quoted = _quote(batch_id)
+        lines = [_outcome_line(quoted, op, status, error) for op, status, error in outcomes]
+        if lines:
+            self._append_lines(lines)
+
+    def end_batch(self, batch_id: str, status: str = 'committed') -> None:
+        """Close a batch durably, compacting the journal if it has grown too large."""
+        self.sync(self._append([{'type': 'batch_end', 'batch': batch_id, 'status': status,
+                                 'ts': datetime.now().isoformat()}]))
+        with self._lock:
+            self._open_batches -= 1
+            idle = self._open_batches == 0
+        if idle and self._size > self._compact_at:
+            self.compact()
+
+    @contextmanager
+    def batch(self, description: str, ops: Iterable[JournalOp] = ()):
+        """Open a batch (recording the intents of ops with it); yields a JournalBatch and commits it on exit."""
+        batch = JournalBatch(self, self.begin_batch(description, ops))
+        try:
+            yield batch
+        except BaseException:
+            self.end_batch(batch.batch_id, 'aborted')
+            raise
+        self.end_batch(batch.batch_id)
+
+    @contextmanager
+    def operation(self, op: str, src, dst=None, meta: Optional[Dict] = None,
+                  description: Optional[str] = None):
+        """Journal a single standalone operation as its own batch."""
+        with self.batch(description or f"{op} {src}") as batch:
+            journal_op = batch.intend(op, src, dst, meta)
+            try:
+                yield journal_op
+            except BaseException as e:
+                batch.failed(journal_op, e)
+                raise
+            batch.done(journal_op)
+
+    # -- reading ----------------------------------------------------------
+
+    def read_records(self) -> List[Dict]:
+        """Read every record; a torn final line from a crash is ignored."""
+        self.sync()
+        return self._read()
+
+    def _read(self) -> List[Dict]:
+        if not self.path.exists():
+            return []
+        records = []
+        with self.path.open(encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    self.logger.warning(f"Ignoring corrupt journal line in {self.path}")
+        return records
+
+    def batches(self) -> Dict[str, Dict]:
+        """Group records into batches, in journal order."""
+        return self._group(self.read_records())
+
+    @staticmethod
+    def _group(records: Iterable[Dict]) -> Dict[str, Dict]:
+        batches: Dict[str, Dict] = {}
+        for record in records:
+            batch = batches.setdefault(record['batch'], {
+                'id': record['batch'], 'description': '', 'status': None,
+                'ops': {}, 'outcomes': {}, 'undone': set(),
+            })
+            kind = record['type']
+            if kind == 'batch_begin':
+                batch['description'] = record.get('description', '')
+                batch['started'] = record.get('ts')
+            elif kind == 'intent':
+                batch['ops'][record['op_id']] = JournalOp(record['op'], record['src'], record.get('dst'),
+                                                         record.get('meta'), record['op_id'])
+            elif kind == 'outcome':
+                batch['outcomes'][record['op_id']] = record['status']
+            elif kind == 'undo':
+                if record.get('status') == 'restored':
+                    batch['undone'].add(record['op_id'])
+            elif kind == 'batch_end':
+                batch['status'] = record.get('status')
+        return batches
+
+    # -- compaction -------------------------------------------------------
+
+    def compact(self) -> bool:
+        """Rewrite the journal without history that undo and recovery no longer need.
+
+        Open batches are copied in full. Closed batches keep only the ops
+        that can still be undone (done, and not undone yet) and are dropped
+        when none are left; only the newest `keep_batches` of them survive.
+        Returns False without touching the file while another process has
+        the journal open.
+        """
+        self.sync()
+        with self._sync_lock, self._lock:
+            if not self._lock_exclusively():
+                self.logger.info("Journal is in use by another process; not compacting")
+                return False
+            try:
+                records = self._read()
+                kept = self._compacted(records)
+                # Everything may still be undoable; then there is nothing to rewrite
+                if len(kept) < len(records):
+                    tmp = self.path.with_name(f"{self.path.name}.compact")
+                    with tmp.open('w', encoding='utf-8') as f:
+                        f.write(''.join(_encode(record) + '\n' for record in kept))
+                        f.flush()
+                        os.fsync(f.fileno())
+                    if self._file is not None:
+                        self._file.close()
+                    os.replace(tmp, self.path)
+                    if self._file is not None:
+                        self._file = self.path.open('a', encoding='utf-8')
+                self._size = self.path.stat().st_size if self.path.exists() else 0
+                self._compact_at = max(self.compact_bytes, 2 * self._size)
+                self._synced = self._written
+            finally:
+                self._share_lock()
+        self.logger.info(f"Compacted journal {self.path}: {len(records)} -> {len(kept)} records")
+        return True
+
+    def _lock_exclusively(self) -> bool:
+        self._hold_lock()
+        if self._lock_fd is None:
+            return True
+        import fcntl
+
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    def _share_lock(self) -> None:
+        if self._lock_fd is not None:
+            import fcntl
+
+            fcntl.flock(self._lock_fd, fcntl.LOCK_SH)
+
+    def _compacted(self, records: List[Dict]) -> List[Dict]:
+        batches = self._group(records)
+        keep = set()
+        closed = []
+        for batch_id, batch in batches.items():
+            if batch['status'] is None:
+                keep.add(batch_id)
+            elif any(status == 'done' and op_id not in batch['undone']
+                     for op_id, status in batch['outcomes'].items()):
+                closed.append(batch_id)
+        keep.update(closed[-self.keep_batches:] if self.keep_batches > 0 else ())
+
+        kept = []
+        for record in records:
+            batch_id = record['batch']
+            if batch_id not in keep:
+                continue
+            batch = batches[batch_id]
+            kind = record['type']
+            if batch['status'] is not None and kind not in ('batch_begin', 'batch_end'):
+                # Of a closed batch, only undoable ops are kept, each as its intent and outcome
+                op_id = record.get('op_id')
+                if (kind not in ('intent', 'outcome') or (kind == 'outcome' and record['status'] != 'done')
+                        or batch['outcomes'].get(op_id) != 'done' or op_id in batch['undone']):
+                    continue
+            kept.append(record)
+        return kept
+
+    # -- recovery ---------------------------------------------------------
+
+    @staticmethod
+    def _probe(op: JournalOp) -> str:
+        """Decide from the filesystem whether an op without an outcome happened."""
+        src_exists = os.path.lexists(op.src)
+        if op.op == 'move':
+            return 'done' if op.dst and os.path.lexists(op.dst) and not src_exists else 'not_applied'
+        if op.op == 'hardlink':
+            return 'done' if _same_file(op.src, op.dst) else 'not_applied'
+        if op.op == 'archive':
+            kept = op.meta.get('kept_source')
+            return 'done' if op.dst and os.path.exists(op.dst) and (kept or not src_exists) else 'not_applied'
+        if op.op == 'mkdir':
+            return 'done' if src_exists else 'not_applied'
+        return 'not_applied' if src_exists else 'done'
+
+    def recover(self) -> List[str]:
+        """Resolve batches left open by a crash; returns their ids.
+
+        Runs at startup, so this is also where a journal that grew past
+        compact_bytes in earlier runs gets compacted.
+        """
+        if self.path.exists() and self.path.stat().st_size > self._compact_at:
+            self.compact()
+        recovered = []
+        for batch_id, batch in self.batches().items():
+            if batch['status'] is not None:
+                continue
+            records = []
+            for op_id, op in batch['ops'].items():
+                if op_id not in batch['outcomes']:
+                    records.append({'type': 'outcome', 'batch': batch_id, 'op_id': op_id,
+                                    'status': self._probe(op), 'recovered': True})
+            records.append({'type': 'batch_end', 'batch': batch_id, 'status': 'recovered'})
+            self.sync(self._append(records))
+            recovered.append(batch_id)
+            self.logger.warning(f"Recovered interrupted batch {batch_id} ({batch['description']}): "
+                                f"{len(records) - 1} operations resolved from filesystem state")
+        return recovered
+
+    # -- undo -------------------------------------------------------------
+
+    @staticmethod
+    def _dependency_levels(ops: List[JournalOp]) -> List[List[JournalOp]]:
+        """Group ops (already in undo order) into levels that can run in parallel.
+
+        Two ops conflict when one's path equals or contains the other's; a
+        conflicting op must wait for every earlier op in undo order.
+        """
+        exact: Dict[str, int] = {}
+        subtree: Dict[str, int] = {}
+        levels: List[List[JournalOp]] = []
+        for op in ops:
+            level = 0
+            for path in op.paths():
+                level = max(level, subtree.get(path, -1) + 1)
+                parent = os.path.dirname(path)
+                while parent and parent != os.path.dirname(parent):
+                    level = max(level, exact.get(parent, -1) + 1)
+                    parent = os.path.dirname(parent)
+            for path in op.paths():
+                exact[path] = max(exact.get(path, -1), level)
+                node = path
+                while node:
+                    subtree[node] = max(subtree.get(node, -1), level)
+                    parent = os.path.dirname(node)
+                    if parent == node:
+                        break
+                    node = parent
+            while len(levels) <= level:
+                levels.append([])
+            levels[level].append(op)
+        return levels
+
+    def _undo_op(self, op: JournalOp) -> str:
+        """Reverse a single operation; returns a note on success, raises on failure."""
+        if op.op == 'move':
+            if not op.dst or not os.path.lexists(op.dst):
+                raise FileNotFoundError(f"moved item no longer at {op.dst}")
+            if os.path.lexists(op.src):
+                raise FileExistsError(f"{op.src} already exists")
+            Path(op.src).parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(op.dst, op.src)
+            return f"{op.dst} -> {op.src}"
+        if op.op == 'delete_file':
+            Path(op.src).parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(op.src, os.O_WRONLY | os.O_CREAT | os.O_EXCL, op.meta.get('mode', 0o644) & 0o7777)
+            os.close(fd)
+            return f"recreated {op.src}"
+        if op.op == 'rmdir':
+            Path(op.src).mkdir(mode=op.meta.get('mode', 0o755) & 0o7777, parents=True)
+            return f"recreated {op.src}/"
+        if op.op == 'mkdir':
+            os.rmdir(op.src)
+            return f"removed {op.src}/"
+        if op.op == 'trash':
+            trashed = find_in_trash(op.src)
+            if trashed is None:
+                raise FileNotFoundError(f"{op.src} not found in Trash; restore it manually")
+            Path(op.src).parent.mkdir(parents=True, exist_ok=True)
+            os.rename(trashed[0], op.src)
+            trashed[1].unlink(missing_ok=True)
+            return f"restored {op.src} from Trash"
+        if op.op == 'archive':
+            if not op.dst or not os.path.exists(op.dst):
+                raise FileNotFoundError(f"archive no longer at {op.dst}")
+            if op.meta.get('kept_source'):
+                os.unlink(op.dst)
+                return f"removed {op.dst}"
+            if os.path.lexists(op.src):
+                raise FileExistsError(f"{op.src} already exists")
+            _extract_archive(op.dst, os.path.dirname(op.src))
+            os.unlink(op.dst)
+            return f"extracted {op.dst} -> {op.src}"
+        if op.op == 'hardlink':
+            if not _same_file(op.src, op.dst):
+                raise FileExistsError(f"{op.src} is no longer a link to {op.dst}")
+            # Give the path its own copy again, swapped in the same way it was linked
+            tmp = f"{op.src}.{os.urandom(4).hex()}.unlink"
+            shutil.copy2(op.dst, tmp)
+            os.chmod(tmp, op.meta.get('mode', 0o644) & 0o7777)
+            os.replace(tmp, op.src)
+            return f"unlinked {op.src} from {op.dst}"
+        raise ValueError(f"'{op.op}' cannot be undone")
+
+    def undo(self, batch_id: Optional[str] = None, workers: int = 8) -> UndoResult:
+        """Reverse a batch (default: the most recent one not yet undone).
+
+        Ops are replayed newest-first; independent ops run in parallel.
+        """
+        batches = self.batches()
+        if batch_id is None:
+            candidates = [b for b in batches.values()
+                          if b['ops'] and any(s == 'done' for s in b['outcomes'].values())
+                          and not all(op_id in b['undone'] for op_id, s in b['outcomes'].items() if s == 'done')]
+            if not candidates:
+                raise LookupError("Nothing to undo")
+            batch = candidates[-1]
+        else:
+            if batch_id not in batches:
+                raise LookupError(f"Unknown batch: {batch_id}")
+            batch = batches[batch_id]
+
+        result = UndoResult(batch['id'])
+        ops = [op for op_id, op in batch['ops'].items()
+               if batch['outcomes'].get(op_id) == 'done' and op_id not in batch['undone']]
+        ops.reverse()
+
+        def run(op: JournalOp):
+            try:
+                note = self._undo_op(op)
+                status, error = 'restored', None
+                result.restored.append(note)
+            except ValueError as e:
+                status, error = 'skipped', str(e)
+                result.skipped.append((op.src, str(e)))
+            except OSError as e:
+                status, error = 'failed', str(e)
+                result.failed.append((op.src, str(e)))
+            record = {'type': 'undo', 'batch': batch['id'], 'op_id': op.op_id, 'status': status}
+            if error:
+                record['error'] = error
+            self._append([record])
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for level in self._dependency_levels(ops):
+                list(pool.map(run, level))
+        self.sync()
+        self.logger.info(f"Undo of batch {batch['id']}: {len(result.restored)} restored, "
+                         f"{len(result.failed)} failed, {len(result.skipped)} skipped")
+        return result
+
+
+def find_in_trash(original_path: str) -> Optional[Tuple[Path, Path]]:
+    """Locate an item in the freedesktop.org Trash by its original path.
+
+    Items on another filesystem than the home directory are trashed to
+    $topdir/.Trash/$uid or $topdir/.Trash-$uid on their own mount, where
+    the recorded path may be relative to $topdir; those are searched too.
+    Returns (trashed file, .trashinfo file) for the most recent match.
+    """
+    from urllib.parse import unquote
+
+    best = None
+    for trash, topdir in _trash_dirs(original_path):
+        info_dir = trash / 'info'
+        if not info_dir.is_dir():
+            continue
+        for info in info_dir.glob('*.trashinfo'):
+            try:
+                lines = info.read_text().splitlines()
+            except OSError:
+                continue
+            fields = dict(line.split('=', 1) for line in lines if '=' in line)
+            recorded = unquote(fields.get('Path', ''))
+            if topdir is not None and recorded and not os.path.isabs(recorded):
+                recorded = os.path.join(topdir, recorded)
+            if recorded == str(original_path):
+                deleted = fields.get('DeletionDate', '')
+                if best is None or deleted > best[0]:
+                    best = (deleted, trash / 'files' / info.stem, info)
+    if best is None or not os.path.lexists(best[1]):
+        return None
+    return best[1], best[2]
+
+
+def _trash_dirs(original_path: str) -> List[Tuple[Path, Optional[str]]]:
+    """(trash directory, its $topdir or None for the home trash) where original_path may be."""
+    dirs: List[Tuple[Path, Optional[str]]] = [
+        (Path(os.environ.get('XDG_DATA_HOME', Path.home() / '.local' / 'share')) / 'Trash', None)
+    ]
+    topdir = _mount_point(os.path.dirname(os.path.abspath(original_path)))
+    if topdir is not None and hasattr(os, 'getuid'):
+        uid = os.getuid()
+        dirs.append((Path(topdir) / '.Trash' / str(uid), topdir))
+        dirs.append((Path(topdir) / f'.Trash-{uid}', topdir))
+    return dirs
+
+
+def _mount_point(path: str) -> Optional[str]:
+    """Mount point of the filesystem holding path (or its nearest existing ancestor)."""
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+    while not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+    return path
+
+
+def _same_file(a: str, b: Optional[str]) -> bool:
+    try:
+        return b is not None and os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def _extract_archive(archive: str, parent: str) -> None:
+    """Unpack a tarball written by ArchiveStrategy into parent."""
+    import tarfile
+
+    with tarfile.open(archive, 'r:*') as tar:
+        if hasattr(tarfile, 'data_filter'):
+            tar.extractall(parent, filter='tar')
+        else:
+            tar.extractall(parent)
+
+
+_default_journal: Optional[OperationJournal] = None
+_default_lock = threading.Lock()
+
+
+def get_journal() -> OperationJournal:
+    """Return the process-wide journal, creating it on first use."""
+    global _default_journal
+    with _default_lock:
+        if _default_journal is None:
+            _default_journal = OperationJournal(os.environ.get('CLEANUP_JOURNAL', DEFAULT_JOURNAL_PATH))
+            atexit.register(_default_journal.close)
+        return _default_journal
+
+
+def set_journal(journal: Optional[OperationJournal]) -> None:
+    """Replace the process-wide journal (used by tests and alternate configs)."""
+    global _default_journal
+    with _default_lock:
+        _default_journal = journal
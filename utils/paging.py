@@ -0,0 +1,79 @@
+"""Page-at-a-time rendering of lazily produced results."""
+
+import heapq
+import itertools
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+def lazy_sorted(items: Iterable[T], key: Callable[[T], object]) -> Iterator[T]:
+    """Yield items in key order, paying O(n) up front and O(log n) per item taken.
+
+    Showing the first page of a huge listing then costs one heapify instead
+    of a full sort; later pages are only sorted if someone asks for them.
+    """
+    counter = itertools.count()
+    heap = [(key(item), next(counter), item) for item in items]
+    heapq.heapify(heap)
+    while heap:
+        yield heapq.heappop(heap)[2]
+
+
+class Pager:
+    """Pulls lines from an iterator one page at a time.
+
+    Nothing beyond the current page is produced, so the first screen of a
+    search over millions of files appears as soon as a page of matches is
+    found. At most limit lines are ever shown.
+    """
+
+    def __init__(self, header: str, lines: Iterable[str], page_size: int = 50,
+                 limit: Optional[int] = None):
+        self.header = header
+        self.lines = iter(lines)
+        self.page_size = max(1, page_size)
+        self.limit = limit
+        self.shown = 0
+        self.exhausted = False
+        self.truncated = False
+        self._lookahead = None
+
+    def _take(self, count: int) -> list:
+        page = []
+        if self._lookahead is not None:
+            page.append(self._lookahead)
+            self._lookahead = None
+        page.extend(itertools.islice(self.lines, count - len(page)))
+        # Peek one line ahead so the footer only offers 'more' when there is more
+        try:
+            self._lookahead = next(self.lines)
+        except StopIteration:
+            self.exhausted = True
+        return page
+
+    def next_page(self) -> Optional[str]:
+        """Render the next page, or None if nothing is left (the first call always renders)."""
+        if self.exhausted and self.shown:
+            return None
+        count = self.page_size
+        if self.limit is not None:
+            count = min(count, self.limit - self.shown)
+        page = self._take(count) if count > 0 else []
+        self.shown += len(page)
+        if self.limit is not None and self.shown >= self.limit and not self.exhausted:
+            self.truncated = True
+            self.exhausted = True
+            self._lookahead = None
+
+        output = [self.header] if self.shown == len(page) else []
+        output.extend(page)
+        if self.truncated:
+            output.append(f"... stopped after {self.limit} results; narrow the search to see others")
+        elif not self.exhausted:
+            output.append(f"... {self.shown} shown; type 'more' for the next {self.page_size}")
+        return "\n".join(output)
+
+    @property
+    def has_more(self) -> bool:
+        return not self.exhausted
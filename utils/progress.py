@@ -1,19 +1,274 @@
 """Progress tracking utilities."""
 
 import logging
-from datetime import datetime
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+
+class ProgressSnapshot:
+    """Point-in-time view of a tracker's counters and derived rates."""
+
+    __slots__ = ('description', 'unit', 'items', 'bytes', 'total', 'total_bytes',
+                 'elapsed', 'items_per_sec', 'bytes_per_sec', 'eta', 'final')
+
+    def __init__(self, description: str, unit: str, items: int, nbytes: int, total: int,
+                 total_bytes: int, elapsed: float, final: bool = False):
+        self.description = description
+        self.unit = unit
+        self.items = items
+        self.bytes = nbytes
+        self.total = total
+        self.total_bytes = total_bytes
+        self.elapsed = elapsed
+        self.items_per_sec = items / elapsed if elapsed > 0 else 0.0
+        self.bytes_per_sec = nbytes / elapsed if elapsed > 0 else 0.0
+        self.final = final
+
+        self.eta: Optional[float] = None
+        if total_bytes > nbytes and self.bytes_per_sec > 0:
+            self.eta = (total_bytes - nbytes) / self.bytes_per_sec
+        elif total > items and self.items_per_sec > 0:
+            self.eta = (total - items) / self.items_per_sec
+
+    @property
+    def percentage(self) -> Optional[float]:
+        if self.total > 0:
+            return min(100.0, self.items / self.total * 100)
+        return None
+
+    def as_dict(self) -> Dict:
+        return {
+            'description': self.description,
+            'items': self.items,
+            'bytes': self.bytes,
+            'total': self.total,
+            'total_bytes': self.total_bytes,
+            'elapsed': round(self.elapsed, 3),
+            'items_per_sec': round(self.items_per_sec, 1),
+            'bytes_per_sec': round(self.bytes_per_sec, 1),
+            'eta': round(self.eta, 1) if self.eta is not None else None,
+            'final': self.final,
+        }
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def format_progress(snap: ProgressSnapshot) -> str:
+    """Render a snapshot as a single human-readable line."""
+    parts = [f"{snap.description}: {snap.items:,}"]
+    if snap.total:
+        parts[0] += f"/{snap.total:,} ({snap.percentage:.1f}%)"
+    parts.append(f"{snap.items_per_sec:,.0f} {snap.unit}/s")
+    if snap.bytes:
+        parts.append(f"{_format_bytes(snap.bytes_per_sec)}/s")
+    if snap.eta is not None and not snap.final:
+        parts.append(f"ETA {timedelta(seconds=int(snap.eta))}")
+    elif snap.final:
+        parts.append(f"done in {timedelta(seconds=int(snap.elapsed))}")
+    return " | ".join(parts)
+
+
+class ProgressSink(ABC):
+    """Destination for rendered progress; subclasses implement emit."""
+
+    @abstractmethod
+    def emit(self, snapshot: ProgressSnapshot) -> None:
+        """Render one snapshot."""
+
+    def close(self, snapshot: ProgressSnapshot) -> None:
+        self.emit(snapshot)
+
+
+class TerminalSink(ProgressSink):
+    """Rewrites a single status line on a terminal (stderr by default)."""
+
+    def __init__(self, stream=None):
+        self._stream = stream
+
+    @property
+    def stream(self):
+        # Resolve lazily so redirected stderr is honoured
+        return self._stream or sys.stderr
+
+    def emit(self, snapshot: ProgressSnapshot) -> None:
+        stream = self.stream
+        line = format_progress(snapshot)
+        if getattr(stream, 'isatty', lambda: False)():
+            stream.write(f"\r\033[K{line}")
+        else:
+            stream.write(f"{line}\n")
+        stream.flush()
+
+    def close(self, snapshot: ProgressSnapshot) -> None:
+        self.emit(snapshot)
+        if getattr(self.stream, 'isatty', lambda: False)():
+            self.stream.write("\n")
+            self.stream.flush()
+
+
+class LogSink(ProgressSink):
+    """Writes structured progress records to a logger, at most every min_interval seconds."""
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO,
+                 min_interval: float = 5.0):
+        self.logger = logger or logging.getLogger(__name__)
+        self.level = level
+        self.min_interval = min_interval
+        self._last = 0.0
+
+    def emit(self, snapshot: ProgressSnapshot) -> None:
+        now = time.monotonic()
+        if now - self._last < self.min_interval:
+            return
+        self._last = now
+        self.logger.log(self.level, format_progress(snapshot), extra={'progress': snapshot.as_dict()})
+
+    def close(self, snapshot: ProgressSnapshot) -> None:
+        self._last = 0.0
+        self.emit(snapshot)
+
+
+class MetricsSink(ProgressSink):
+    """Keeps the latest progress values for metrics exporters and forwards them to a callback."""
+
+    def __init__(self, callback: Optional[Callable[[Dict], None]] = None):
+        self.callback = callback
+        self.latest: Dict = {}
+
+    def emit(self, snapshot: ProgressSnapshot) -> None:
+        self.latest = snapshot.as_dict()
+        if self.callback:
+            self.callback(self.latest)
+
 
 class ProgressTracker:
-    """Track progress of directory operations."""
-    
-    def __init__(self):
+    """Track progress of directory operations.
+
+    Worker threads call advance() on the hot path. Each thread increments its
+    own counter cell, so there is no lock contention; a background ticker sums
+    the cells and renders to the sinks every `interval` seconds.
+    """
+
+    def __init__(self, total: int = 0, total_bytes: int = 0, description: str = "Progress",
+                 unit: str = "items", sinks: Optional[List[ProgressSink]] = None,
+                 interval: float = 0.5):
         self.start_time = datetime.now()
         self.logger = logging.getLogger(__name__)
-        self.total_processed = 0
-        
+        self.description = description
+        self.unit = unit
+        self.total = total
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.sinks = sinks if sinks is not None else [LogSink(self.logger)]
+
+        self._start = time.monotonic()
+        self._local = threading.local()
+        self._cells: List[List[int]] = []
+        self._cells_lock = threading.Lock()
+        self._base = [0, 0]  # absolute values set via update()
+        self._stop = threading.Event()
+        self._ticker: Optional[threading.Thread] = None
+        self._closed = False
+
+    # -- counters ---------------------------------------------------------
+
+    def _cell(self) -> List[int]:
+        cell = getattr(self._local, 'cell', None)
+        if cell is None:
+            cell = self._local.cell = [0, 0]
+            with self._cells_lock:
+                self._cells.append(cell)
+            self._ensure_ticker()
+        return cell
+
+    def advance(self, items: int = 1, nbytes: int = 0) -> None:
+        """Record completed work from any thread; cheap enough for per-file calls."""
+        cell = self._cell()
+        cell[0] += items
+        if nbytes:
+            cell[1] += nbytes
+
+    def set_total(self, total: Optional[int] = None, total_bytes: Optional[int] = None) -> None:
+        """Set or refine the expected amount of work (e.g. from an estimate)."""
+        if total is not None:
+            self.total = total
+        if total_bytes is not None:
+            self.total_bytes = total_bytes
+
+    @property
+    def total_processed(self) -> int:
+        with self._cells_lock:
+            return self._base[0] + sum(cell[0] for cell in self._cells)
+
+    @property
+    def total_bytes_processed(self) -> int:
+        with self._cells_lock:
+            return self._base[1] + sum(cell[1] for cell in self._cells)
+
     def update(self, current: int, total: int):
-        """Update progress."""
-        self.total_processed = current
-        if total > 0:
-            percentage = (current / total) * 100
-            self.logger.info(f"Progress: {current}/{total} ({percentage:.1f}%)") 
\ No newline at end of file
+        """Update progress with absolute values (single-threaded callers)."""
+        with self._cells_lock:
+            for cell in self._cells:
+                cell[0] = 0
+            self._base[0] = current
+        self.total = total
+        self._ensure_ticker()
+
+    # -- rendering --------------------------------------------------------
+
+    def snapshot(self, final: bool = False) -> ProgressSnapshot:
+        return ProgressSnapshot(
+            self.description, self.unit, self.total_processed, self.total_bytes_processed,
+            self.total, self.total_bytes, time.monotonic() - self._start, final
+        )
+
+    def _emit(self, final: bool = False) -> None:
+        snapshot = self.snapshot(final)
+        for sink in self.sinks:
+            try:
+                if final:
+                    sink.close(snapshot)
+                else:
+                    sink.emit(snapshot)
+            except Exception as e:
+                self.logger.error(f"Progress sink {sink.__class__.__name__} failed: {e}")
+
+    def _ensure_ticker(self) -> None:
+        if self._ticker is None and not self._closed and self.sinks:
+            with self._cells_lock:
+                if self._ticker is None:
+                    self._ticker = threading.Thread(target=self._run_ticker, daemon=True,
+                                                    name=f"progress-{self.description}")
+                    self._ticker.start()
+
+    def _run_ticker(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._emit()
+
+    def close(self) -> ProgressSnapshot:
+        """Stop rendering and emit the final state to every sink."""
+        if not self._closed:
+            self._closed = True
+            self._stop.set()
+            if self._ticker is not None and self._ticker is not threading.current_thread():
+                self._ticker.join()
+            self._emit(final=True)
+        return self.snapshot(final=True)
+
+    def __enter__(self) -> 'ProgressTracker':
+        self._ensure_ticker()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.close()
+        return False
@@ -0,0 +1,170 @@
+"""Hierarchical tracing spans with Chrome trace-event export."""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+class Span:
+    """A single timed region of work, optionally nested inside another span."""
+
+    __slots__ = ('tracer', 'name', 'attrs', 'start_ns', 'end_ns', 'tid', 'depth')
+
+    def __init__(self, tracer: 'Tracer', name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.start_ns = 0
+        self.end_ns = 0
+        self.tid = 0
+        self.depth = 0
+
+    def set(self, key: str, value: Any) -> None:
+        """Attach or overwrite an attribute (path, item count, bytes, ...)."""
+        self.attrs[key] = value
+
+    def add(self, key: str, amount: int = 1) -> None:
+        """Increment a numeric attribute."""
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+    @property
+    def duration_ns(self) -> int:
+        return self.end_ns - self.start_ns
+
+    def __enter__(self) -> 'Span':
+        stack = self.tracer._stack()
+        self.depth = len(stack)
+        self.tid = threading.get_ident()
+        stack.append(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.attrs['error'] = f"{exc_type.__name__}: {exc}"
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        self.tracer._record(self)
+        return False
+
+
+class _NoopSpan:
+    """Span returned for unsampled traces; every operation is a no-op."""
+
+    __slots__ = ('tracer',)
+
+    def __init__(self, tracer: 'Tracer'):
+        self.tracer = tracer
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def add(self, key: str, amount: int = 1) -> None:
+        pass
+
+    def __enter__(self) -> '_NoopSpan':
+        # Children of an unsampled root stay unsampled
+        self.tracer._stack().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        return False
+
+
+class Tracer:
+    """Collects nested spans per thread and exports them as Chrome trace events.
+
+    Sampling is decided once per root span: if a root span is not sampled,
+    every span nested inside it is skipped as well, so a trace is never
+    partially recorded.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, max_spans: int = 100_000):
+        self.sample_rate = sample_rate
+        self.spans: deque = deque(maxlen=max_spans)
+        self.logger = logging.getLogger(__name__)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._noop = _NoopSpan(self)
+        self._epoch_ns = time.perf_counter_ns()
+        self._pid = os.getpid()
+
+    def _stack(self) -> List:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def span(self, name: str, **attrs: Any):
+        """Open a span; use as ``with tracer.span("scan", path=p) as span:``."""
+        stack = self._stack()
+        if stack:
+            if isinstance(stack[-1], _NoopSpan):
+                return self._noop
+        elif self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            return self._noop
+        return Span(self, name, attrs)
+
+    def current_span(self):
+        """Return the innermost open span of the calling thread, if any."""
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def clear(self) -> None:
+        """Drop all recorded spans."""
+        with self._lock:
+            self.spans.clear()
+
+    def to_chrome_events(self) -> List[Dict[str, Any]]:
+        """Convert recorded spans to Chrome trace-event complete ('X') events."""
+        with self._lock:
+            spans = list(self.spans)
+
+        events = []
+        for span in spans:
+            events.append({
+                'name': span.name,
+                'cat': span.name.split('.', 1)[0],
+                'ph': 'X',
+                'ts': (span.start_ns - self._epoch_ns) / 1000,
+                'dur': span.duration_ns / 1000,
+                'pid': self._pid,
+                'tid': span.tid,
+                'args': {k: _jsonable(v) for k, v in span.attrs.items()},
+            })
+        events.sort(key=lambda e: e['ts'])
+        return events
+
+    def export_chrome_trace(self, file_path: str) -> Path:
+        """Write recorded spans as a Chrome trace JSON file (chrome://tracing, Perfetto)."""
+        path = Path(file_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open('w') as f:
+            json.dump({'traceEvents': self.to_chrome_events(), 'displayTimeUnit': 'ms'}, f)
+        self.logger.info(f"Exported {len(self.spans)} spans to {path}")
+        return path
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+# Global tracer; TRACE_SAMPLE_RATE=0 disables recording entirely
+tracer = Tracer(sample_rate=float(os.getenv('TRACE_SAMPLE_RATE', '1.0')))